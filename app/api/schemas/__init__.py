@@ -24,6 +24,7 @@ from app.api.schemas.plano import (
     PlanoRefeicaoResponse,
 )
 from app.api.schemas.refeicao import RefeicaoCreate, RefeicaoResponse, RefeicaoUpdate
+from app.api.schemas.catalogo import CatalogoExercicioResponse, CatalogoRefeicaoResponse
 
 __all__ = [
     # User
@@ -55,4 +56,7 @@ __all__ = [
     "RefeicaoCreate",
     "RefeicaoResponse",
     "RefeicaoUpdate",
+    # Catalogo
+    "CatalogoExercicioResponse",
+    "CatalogoRefeicaoResponse",
 ]
@@ -0,0 +1,20 @@
+# app/api/schemas/catalogo.py
+"""Schemas de busca no catálogo de exercícios e refeições."""
+
+from pydantic import BaseModel
+from typing import Optional
+
+
+class CatalogoExercicioResponse(BaseModel):
+    id: Optional[int] = None  # None para itens da base embutida
+    nome: str
+    grupo_muscular: Optional[str] = None
+    video_url: Optional[str] = None
+
+
+class CatalogoRefeicaoResponse(BaseModel):
+    id: Optional[int] = None
+    nome: str
+    tipo: Optional[str] = None
+    nivel: Optional[str] = None
+    custo_estimado: Optional[str] = None
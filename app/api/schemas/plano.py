@@ -114,3 +114,6 @@ class PlanoIAResponse(BaseModel):
     plano: dict 
     status: str
     mensagem: str
+    origem: str = "ia"  # "ia", "pool", "catalogo" ou "historico"
+    substituicoes: int = 0  # itens evitados trocados localmente após a geração
+    stale: bool = False  # True quando a geração falhou e este é um plano salvo anteriormente
@@ -22,7 +22,8 @@ class ObjetivoTreino(str, Enum):
     DEFINICAO = "definicao"
 
 
-class SugestaoCreate(BaseModel):
+class PerfilUsuario(BaseModel):
+    """Dados físicos e de treino enviados a cada geração."""
 
     nome: str = Field(
         ..., min_length=2, max_length=100, description="Nome completo do usuário"
@@ -36,9 +37,6 @@ class SugestaoCreate(BaseModel):
     idade: int = Field(
         ..., ge=11, le=110, description="Idade em anos (entre 11 e 110 anos)"
     )
-    disponibilidade: int = Field(
-        ..., ge=1, le=7, description="Quantas vezes por semana pode treinar (1-7)"
-    )
     local: LocalTreino = Field(
         ..., 
         description="Local de treino. Opções: 'academia', 'casa', 'arLivre'"
@@ -48,6 +46,17 @@ class SugestaoCreate(BaseModel):
         description="Objetivo do treino. Opções: 'perder', 'ganhar', 'hipertrofia', 'definicao'",
     )
 
+
+class SugestaoCreate(PerfilUsuario):
+
+    disponibilidade: int = Field(
+        ..., ge=1, le=7, description="Quantas vezes por semana pode treinar (1-7)"
+    )
+    modo_rapido: bool = Field(
+        False,
+        description="Gera o plano localmente a partir do catálogo, sem chamar a IA",
+    )
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -60,3 +69,19 @@ class SugestaoCreate(BaseModel):
                 "objetivo": "hipertrofia",
             }
         }
+
+
+class RegeneracaoCreate(PerfilUsuario):
+    """Perfil usado no prompt da regeneração parcial; a frequência vem do plano salvo."""
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "nome": "João Silva",
+                "altura": 175,
+                "peso": 80,
+                "idade": 30,
+                "local": "academia",
+                "objetivo": "hipertrofia",
+            }
+        }
@@ -1,24 +1,20 @@
 from typing import Any
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from app.core import security
 from app.core.config import settings
+from app.core.rate_limit import rate_limit
 from app.database.models.user import User
 from app.api import deps
 from app.api.schemas.user import UserCreate, UserResponse, Token
 
 router = APIRouter()
 
-# Configurar limiter
-limiter = Limiter(key_func=get_remote_address)
 
-
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(rate_limit(custo=2))])
 def login_access_token(
     session: deps.SessionDep, form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
@@ -38,10 +34,12 @@ def login_access_token(
     }
 
 
-@router.post("/register", response_model=UserResponse)
-@limiter.limit("3/hour")  # Máximo 3 cadastros por hora por IP
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    dependencies=[Depends(rate_limit(escopo="cadastro"))],
+)
 def register_user(
-    request: Request,
     *,
     session: deps.SessionDep,
     user_in: UserCreate,
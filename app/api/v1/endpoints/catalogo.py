@@ -0,0 +1,97 @@
+# app/api/v1/endpoints/catalogo.py
+"""Busca e autocomplete no catálogo de exercícios e refeições."""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.api import deps
+from app.api.schemas.catalogo import CatalogoExercicioResponse, CatalogoRefeicaoResponse
+from app.api.schemas.sugestao import LocalTreino
+from app.core.rate_limit import rate_limit
+from app.services.catalogo import buscar_no_banco, obter_indice
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Abaixo deste tamanho o termo só é buscado por prefixo (busca aproximada não ajuda)
+MIN_CARACTERES_BUSCA = 3
+
+
+@router.get(
+    "/exercicios",
+    response_model=list[CatalogoExercicioResponse],
+    summary="Buscar exercícios do catálogo",
+    description="Autocomplete por prefixo (sem acentos) com busca aproximada quando o prefixo não encontra nada",
+    dependencies=[Depends(rate_limit(escopo="catalogo"))],
+)
+def buscar_exercicios(
+    session: deps.SessionDep,
+    q: str = Query(..., min_length=1, max_length=100, description="Texto digitado pelo usuário"),
+    limite: int = Query(10, ge=1, le=50),
+    grupo: Optional[str] = Query(None, description="Filtra por grupo muscular (ex.: peito)"),
+    local: Optional[LocalTreino] = Query(None, description="Filtra por local de treino"),
+    modo: str = Query("auto", pattern="^(auto|prefixo|busca)$"),
+):
+    """
+    Os prefixos são respondidos do índice em memória. Em `auto`, só se o
+    prefixo não encontrar nada a busca vai ao banco (trigramas e texto
+    completo), com os mesmos filtros; `busca` vai direto ao banco.
+    """
+    local_valor = local.value if local else None
+
+    def compativel(item: dict) -> bool:
+        if grupo and item.get("grupo_muscular") != grupo:
+            return False
+        return local_valor is None or local_valor in item.get("locais", ())
+
+    resultados = []
+    if modo != "busca":
+        indice = obter_indice(session)
+        resultados = indice.prefixos_exercicios.buscar(q, limite, compativel)
+
+    if modo != "prefixo" and not resultados and len(q) >= MIN_CARACTERES_BUSCA:
+        try:
+            resultados = buscar_no_banco(session, "exercicios", q, limite, grupo=grupo, local=local_valor)
+        except Exception as e:
+            logger.error("Erro na busca aproximada de exercícios: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Erro ao buscar no catálogo",
+            )
+
+    return resultados
+
+
+@router.get(
+    "/refeicoes",
+    response_model=list[CatalogoRefeicaoResponse],
+    summary="Buscar refeições do catálogo",
+    description="Autocomplete por prefixo (sem acentos) com busca aproximada quando o prefixo não encontra nada",
+    dependencies=[Depends(rate_limit(escopo="catalogo"))],
+)
+def buscar_refeicoes(
+    session: deps.SessionDep,
+    q: str = Query(..., min_length=1, max_length=100, description="Texto digitado pelo usuário"),
+    limite: int = Query(10, ge=1, le=50),
+    tipo: Optional[str] = Query(None, pattern="^(pre_treino|pos_treino)$"),
+    modo: str = Query("auto", pattern="^(auto|prefixo|busca)$"),
+):
+    def compativel(item: dict) -> bool:
+        return tipo is None or item.get("tipo") == tipo
+
+    resultados = []
+    if modo != "busca":
+        indice = obter_indice(session)
+        resultados = indice.prefixos_refeicoes.buscar(q, limite, compativel)
+
+    if modo != "prefixo" and not resultados and len(q) >= MIN_CARACTERES_BUSCA:
+        try:
+            resultados = buscar_no_banco(session, "refeicoes", q, limite, tipo=tipo)
+        except Exception as e:
+            logger.error("Erro na busca aproximada de refeições: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Erro ao buscar no catálogo",
+            )
+
+    return resultados
@@ -1,7 +1,7 @@
 # app/api/v1/endpoints/feedback.py
 """Endpoints para sistema de feedback de exercícios e refeições."""
 
-from fastapi import APIRouter, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException
 from sqlalchemy import func, desc
 from app.api import deps
 from app.api.schemas.feedback import (
@@ -11,6 +11,9 @@ from app.api.schemas.feedback import (
     FeedbackStats
 )
 from app.database.models.feedback import Feedback
+from app.core.config import settings
+from app.core.rate_limit import rate_limit
+from app.services.especulacao import pre_gerador
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,7 +25,8 @@ router = APIRouter()
     response_model=FeedbackResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Avaliar exercício",
-    description="Salva feedback positivo ou negativo de um exercício"
+    description="Salva feedback positivo ou negativo de um exercício",
+    dependencies=[Depends(rate_limit(custo=1))]
 )
 async def criar_feedback_exercicio(
     feedback: FeedbackCreate,
@@ -47,8 +51,10 @@ async def criar_feedback_exercicio(
         session.commit()
         session.refresh(db_feedback)
         
-        logger.info(f"Feedback de exercício salvo: usuário={current_user.id}, "
-                   f"item={feedback.item_nome}, gostou={feedback.gostou}")
+        logger.info("Feedback de exercício salvo: usuário=%s, item=%s, gostou=%s",
+                    current_user.id, feedback.item_nome, feedback.gostou)
+        if settings.ESPECULACAO_ATIVA:
+            pre_gerador.registrar_feedback(current_user.id)
         
         return db_feedback
         
@@ -66,7 +72,8 @@ async def criar_feedback_exercicio(
     response_model=FeedbackResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Avaliar refeição",
-    description="Salva feedback positivo ou negativo de uma refeição/ingrediente"
+    description="Salva feedback positivo ou negativo de uma refeição/ingrediente",
+    dependencies=[Depends(rate_limit(custo=1))]
 )
 async def criar_feedback_refeicao(
     feedback: FeedbackCreate,
@@ -91,8 +98,10 @@ async def criar_feedback_refeicao(
         session.commit()
         session.refresh(db_feedback)
         
-        logger.info(f"Feedback de refeição salvo: usuário={current_user.id}, "
-                   f"item={feedback.item_nome}, gostou={feedback.gostou}")
+        logger.info("Feedback de refeição salvo: usuário=%s, item=%s, gostou=%s",
+                    current_user.id, feedback.item_nome, feedback.gostou)
+        if settings.ESPECULACAO_ATIVA:
+            pre_gerador.registrar_feedback(current_user.id)
         
         return db_feedback
         
@@ -109,7 +118,8 @@ async def criar_feedback_refeicao(
     "/me",
     response_model=PreferenciasUsuario,
     summary="Listar minhas preferências",
-    description="Retorna agregado de exercícios e refeições que o usuário gostou/não gostou"
+    description="Retorna agregado de exercícios e refeições que o usuário gostou/não gostou",
+    dependencies=[Depends(rate_limit(custo=2))]
 )
 async def listar_preferencias(
     current_user: deps.CurrentUser,
@@ -153,7 +163,8 @@ async def listar_preferencias(
     "/{feedback_id}",
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Deletar feedback",
-    description="Remove um feedback específico (apenas do próprio usuário)"
+    description="Remove um feedback específico (apenas do próprio usuário)",
+    dependencies=[Depends(rate_limit(custo=1))]
 )
 async def deletar_feedback(
     feedback_id: int,
@@ -197,7 +208,8 @@ async def deletar_feedback(
     "/stats",
     response_model=FeedbackStats,
     summary="Estatísticas de feedback",
-    description="Retorna métricas agregadas (taxa de satisfação, itens mais rejeitados)"
+    description="Retorna métricas agregadas (taxa de satisfação, itens mais rejeitados)",
+    dependencies=[Depends(rate_limit(custo=3))]
 )
 async def obter_estatisticas(
     current_user: deps.CurrentUser,
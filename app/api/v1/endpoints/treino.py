@@ -1,113 +1,304 @@
 # app/api/v1/endpoints/treino.py
 
-from fastapi import APIRouter, HTTPException, status, Depends
-from app.api.schemas.sugestao import SugestaoCreate
+from fastapi import APIRouter, HTTPException, Response, status, Depends
+from app.core.rate_limit import rate_limit
+from app.api.schemas.sugestao import RegeneracaoCreate, SugestaoCreate
 from app.services.ia_agent import generate_training_plan, obter_preferencias_usuario
+from app.services.especulacao import pre_gerador
+from app.services.pool_planos import consumir_do_pool
+from app.services.regeneracao import regenerar_dia, regenerar_nutricao
+from app.services.gerador_local import gerar_plano_local
+from app.services.preferencias import aplicar_preferencias
+from app.core.config import settings
+import copy
 import logging
+import time
+from app.core.metricas import PLANO_PERSISTENCIA, PLANO_STALE
+from app.core.prazo import prazo
+from app.core.rastreamento import tracer
 from app.api.schemas.plano import PlanoIAResponse
 from app.api import deps
 from app.database.models.plano import Plano, PlanoDia, PlanoExercicio
 from app.database.models.nutricao import PlanoRefeicao
 from app.services import coleta_dados
+from app.core.exceptions import ServicoIndisponivelError
+from sqlalchemy.orm import selectinload
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+@tracer.start_as_current_span("plano.gerar_local")
+def _gerar_plano_catalogo(dados: SugestaoCreate, preferencias: dict, session) -> dict:
+    return gerar_plano_local(
+        nome=dados.nome,
+        disponibilidade=dados.disponibilidade,
+        local=dados.local.value,
+        objetivo=dados.objetivo.value,
+        preferencias=preferencias,
+        db=session,
+    )
+
+
+def _adicionar_exercicios(dia: PlanoDia, exercicios: list, session) -> None:
+    for j, ex_data in enumerate(exercicios):
+        exercicio = PlanoExercicio(
+            dia_id=dia.id,
+            nome=ex_data.get("nome", "Exercício"),
+            series=ex_data.get("series", ""),
+            repeticoes=ex_data.get("repeticoes", ""),
+            descanso_segundos=ex_data.get("descanso_segundos", 60),
+            detalhes_execucao=ex_data.get("detalhes_execucao", ""),
+            video_url=ex_data.get("video_url", ""),
+            ordem=j + 1,
+        )
+        session.add(exercicio)
+
+
+def _adicionar_refeicoes(plano: Plano, nutricao: dict, session) -> None:
+    for tipo in ["pre_treino", "pos_treino"]:
+        opcoes = nutricao.get(tipo, {})
+        for nivel, refeicao_data in opcoes.items():
+            refeicao = PlanoRefeicao(
+                plano_id=plano.id,
+                nome=refeicao_data.get("nome", f"Opção {nivel}"),
+                custo_estimado=refeicao_data.get("custo_estimado", ""),
+                tipo=tipo,
+                nivel=nivel,
+                ingredientes=refeicao_data.get("ingredientes", []),
+                link_receita=refeicao_data.get("link_receita", ""),
+                explicacao=refeicao_data.get("explicacao", ""),
+            )
+            session.add(refeicao)
+
+
+@tracer.start_as_current_span("plano.persistir")
+def _salvar_plano(
+    plano_ia: dict, origem: str, objetivo: str, local: str, frequencia: int, usuario_id: int, session
+) -> Plano:
+    """
+    Grava plano, dias, exercícios e refeições numa única transação.
+
+    `frequencia` é a disponibilidade pedida, não a quantidade de dias que
+    veio no plano: é por ela que `_ultimo_plano_compativel` procura.
+    """
+    inicio_persistencia = time.perf_counter()
+    # Criar Plano
+    descricao = "por IA" if origem in ("ia", "pool") else "a partir do catálogo"
+    novo_plano = Plano(
+        nome=plano_ia.get("nome_da_rotina", "Rotina Personalizada"),
+        descricao=f"Rotina gerada {descricao} para {objetivo}",
+        usuario_id=usuario_id,
+        objetivo=objetivo,
+        local=local,
+        frequencia=frequencia,
+        snapshot=plano_ia,
+    )
+    session.add(novo_plano)
+    session.flush()  # Para obter o ID
+
+    # Criar Dias e Exercícios
+    dias_treino = plano_ia.get("dias_de_treino", [])
+    for i, dia_data in enumerate(dias_treino):
+        dia = PlanoDia(
+            plano_id=novo_plano.id,
+            identificacao=dia_data.get("identificacao", f"Dia {i+1}"),
+            foco_muscular=dia_data.get("foco_muscular", ""),
+            ordem=i + 1,
+        )
+        session.add(dia)
+        session.flush()
+        _adicionar_exercicios(dia, dia_data.get("exercicios", []), session)
+
+    # Criar Refeições do Plano
+    _adicionar_refeicoes(novo_plano, plano_ia.get("sugestoes_nutricionais", {}), session)
+
+    session.commit()
+    PLANO_PERSISTENCIA.observe(time.perf_counter() - inicio_persistencia)
+    return novo_plano
+
+
+def _plano_para_dict(plano: Plano) -> dict:
+    """Reconstrói o plano no formato de `JSON_EXAMPLE` a partir das tabelas."""
+    nutricao: dict = {}
+    for refeicao in plano.refeicoes:
+        nutricao.setdefault(refeicao.tipo, {})[refeicao.nivel] = {
+            "nome": refeicao.nome,
+            "custo_estimado": refeicao.custo_estimado,
+            "ingredientes": refeicao.ingredientes or [],
+            "link_receita": refeicao.link_receita,
+            "explicacao": refeicao.explicacao,
+        }
+    return {
+        "nome_da_rotina": plano.nome,
+        "dias_de_treino": [
+            {
+                "identificacao": dia.identificacao,
+                "foco_muscular": dia.foco_muscular,
+                "exercicios": [
+                    {
+                        "nome": ex.nome,
+                        "series": ex.series,
+                        "repeticoes": ex.repeticoes,
+                        "descanso_segundos": ex.descanso_segundos,
+                        "detalhes_execucao": ex.detalhes_execucao,
+                        "video_url": ex.video_url,
+                    }
+                    for ex in sorted(dia.exercicios, key=lambda e: e.ordem or 0)
+                ],
+            }
+            for dia in sorted(plano.dias, key=lambda d: d.ordem or 0)
+        ],
+        "sugestoes_nutricionais": nutricao,
+    }
+
+
+@tracer.start_as_current_span("plano.ultimo_compativel")
+def _ultimo_plano_compativel(
+    usuario_id: int, objetivo: str, local: str, frequencia: int, session
+) -> Optional[dict]:
+    """
+    Plano mais recente do usuário com o mesmo objetivo, local e frequência.
+    Uma consulta pelo índice (usuario_id, objetivo, local, frequencia,
+    created_at); só planos sem snapshot são remontados das tabelas. O
+    retorno é uma cópia que pode ser alterada sem tocar no snapshot.
+    """
+    linha = (
+        session.query(Plano.id, Plano.snapshot)
+        .filter(
+            Plano.usuario_id == usuario_id,
+            Plano.objetivo == objetivo,
+            Plano.local == local,
+            Plano.frequencia == frequencia,
+        )
+        .order_by(Plano.created_at.desc())
+        .first()
+    )
+    if linha is None:
+        return None
+    plano = copy.deepcopy(linha.snapshot) if linha.snapshot else _plano_para_dict(
+        _obter_plano_do_usuario(linha.id, usuario_id, session)
+    )
+    plano["rotina_id"] = linha.id
+    return plano
+
+
 @router.post(
     "",
     response_model=PlanoIAResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Gerar plano de treino personalizado",
     description="Recebe dados do usuário e gera plano de treino com IA",
+    dependencies=[Depends(rate_limit(custo=settings.RATE_LIMIT_CUSTO_GERACAO))],
 )
-async def obter_sugestao(
+def obter_sugestao(
     dados: SugestaoCreate,
     current_user: deps.CurrentUser,
     session: deps.SessionDep,
+    response: Response,
 ):
     try:
         logger.info(
-            f"Gerando plano para {dados.nome}: "
-            f"{dados.idade}a, {dados.peso}kg, {dados.altura}cm, "
-            f"{dados.disponibilidade}x/sem, {dados.local.value}, {dados.objetivo.value}"
+            "Gerando plano para %s: %sa, %skg, %scm, %sx/sem, %s, %s",
+            dados.nome, dados.idade, dados.peso, dados.altura,
+            dados.disponibilidade, dados.local.value, dados.objetivo.value,
         )
         
         preferencias = obter_preferencias_usuario(current_user.id, session)
         
         if preferencias["exercicios_evitar"] or preferencias["refeicoes_evitar"]:
-            logger.info(f"Aplicando preferências do usuário {current_user.id}: "
-                       f"{len(preferencias['exercicios_evitar'])} exercícios a evitar, "
-                       f"{len(preferencias['refeicoes_evitar'])} refeições a evitar")
-
-        plano_ia = generate_training_plan(
-            nome=dados.nome,
-            altura=dados.altura,
-            peso=dados.peso,
-            idade=dados.idade,
-            disponibilidade=dados.disponibilidade,
-            local=dados.local.value,
-            objetivo=dados.objetivo.value,
-            preferencias=preferencias, 
-        )
+            logger.info("Aplicando preferências do usuário %s: %d exercícios a evitar, %d refeições a evitar",
+                        current_user.id, len(preferencias["exercicios_evitar"]),
+                        len(preferencias["refeicoes_evitar"]))
 
-        logger.info(f"Plano gerado com sucesso para {dados.nome}")
+        origem = "ia"
+        plano_ia = None
+        if settings.ESPECULACAO_ATIVA:
+            perfil = dados.model_dump(mode="json", exclude={"modo_rapido"})
+            pre_gerador.lembrar_perfil(current_user.id, perfil)
+            if not dados.modo_rapido:
+                plano_ia = pre_gerador.consumir(current_user.id, perfil, preferencias)
+                if plano_ia is not None:
+                    logger.info("Plano pré-gerado entregue para %s", dados.nome)
 
-        try:
-            # Criar Plano
-            novo_plano = Plano(
-                nome=plano_ia.get("nome_da_rotina", "Rotina Personalizada"),
-                descricao=f"Rotina gerada por IA para {dados.objetivo.value}",
+        if plano_ia is None and dados.modo_rapido:
+            plano_ia = _gerar_plano_catalogo(dados, preferencias, session)
+            origem = "catalogo"
+        elif plano_ia is None and settings.PLANO_POOL_ATIVO:
+            plano_ia = consumir_do_pool(
+                session,
+                nome=dados.nome,
+                altura=dados.altura,
+                peso=dados.peso,
+                idade=dados.idade,
+                disponibilidade=dados.disponibilidade,
+                local=dados.local.value,
+                objetivo=dados.objetivo.value,
+                preferencias=preferencias,
                 usuario_id=current_user.id,
             )
-            session.add(novo_plano)
-            session.flush()  # Para obter o ID
-
-            # Criar Dias e Exercícios
-            dias_treino = plano_ia.get("dias_de_treino", [])
-            for i, dia_data in enumerate(dias_treino):
-                dia = PlanoDia(
-                    plano_id=novo_plano.id,
-                    identificacao=dia_data.get("identificacao", f"Dia {i+1}"),
-                    foco_muscular=dia_data.get("foco_muscular", ""),
-                    ordem=i + 1,
-                )
-                session.add(dia)
-                session.flush()
-
-                exercicios = dia_data.get("exercicios", [])
-                for j, ex_data in enumerate(exercicios):
-                    exercicio = PlanoExercicio(
-                        dia_id=dia.id,
-                        nome=ex_data.get("nome", "Exercício"),
-                        series=ex_data.get("series", ""),
-                        repeticoes=ex_data.get("repeticoes", ""),
-                        descanso_segundos=ex_data.get("descanso_segundos", 60),
-                        detalhes_execucao=ex_data.get("detalhes_execucao", ""),
-                        video_url=ex_data.get("video_url", ""),
-                        ordem=j + 1,
+            if plano_ia is not None:
+                origem = "pool"
+
+        if plano_ia is None:
+            try:
+                with prazo(settings.LLM_PRAZO_SEGUNDOS):
+                    plano_ia = generate_training_plan(
+                        nome=dados.nome,
+                        altura=dados.altura,
+                        peso=dados.peso,
+                        idade=dados.idade,
+                        disponibilidade=dados.disponibilidade,
+                        local=dados.local.value,
+                        objetivo=dados.objetivo.value,
+                        preferencias=preferencias,
+                        db=session,
                     )
-                    session.add(exercicio)
-
-            # Criar Refeições do Plano
-            nutricao = plano_ia.get("sugestoes_nutricionais", {})
-            for tipo in ["pre_treino", "pos_treino"]:
-                opcoes = nutricao.get(tipo, {})
-                for nivel, refeicao_data in opcoes.items():
-                    refeicao = PlanoRefeicao(
-                        plano_id=novo_plano.id,
-                        nome=refeicao_data.get("nome", f"Opção {nivel}"),
-                        custo_estimado=refeicao_data.get("custo_estimado", ""),
-                        tipo=tipo,
-                        nivel=nivel,
-                        ingredientes=refeicao_data.get("ingredientes", []),
-                        link_receita=refeicao_data.get("link_receita", ""),
-                        explicacao=refeicao_data.get("explicacao", ""),
+            except (ValueError, ServicoIndisponivelError) as e:
+                anterior = None
+                if settings.PLANO_STALE_EM_ERRO:
+                    anterior = _ultimo_plano_compativel(
+                        current_user.id, dados.objetivo.value, dados.local.value,
+                        dados.disponibilidade, session,
                     )
-                    session.add(refeicao)
+                    PLANO_STALE.labels("servido" if anterior else "sem_plano").inc()
+                if anterior is not None:
+                    logger.warning("IA falhou (%s); devolvendo a rotina %s salva", e, anterior["rotina_id"])
+                    # Feedbacks dados depois que a rotina foi salva também valem aqui
+                    substituicoes = aplicar_preferencias(
+                        anterior, preferencias, local=dados.local.value, db=session
+                    )
+                    # Nada foi criado: a rotina devolvida já existia
+                    response.status_code = status.HTTP_200_OK
+                    return {
+                        "plano": anterior,
+                        "status": "sucesso",
+                        "mensagem": f"IA indisponível; rotina '{anterior.get('nome_da_rotina')}' salva anteriormente",
+                        "origem": "historico",
+                        "substituicoes": substituicoes,
+                        "stale": True,
+                    }
+                if not settings.PLANO_FALLBACK_LOCAL:
+                    raise
+                logger.warning(f"IA falhou ({e}); usando gerador local do catálogo")
+                plano_ia = _gerar_plano_catalogo(dados, preferencias, session)
+                origem = "catalogo"
+
+        logger.info("Plano gerado com sucesso para %s (origem: %s)", dados.nome, origem)
 
-            session.commit()
-            logger.info(f"Plano salvo no banco com ID: {novo_plano.id}")
+        substituicoes = aplicar_preferencias(
+            plano_ia, preferencias, local=dados.local.value, db=session
+        )
+        if substituicoes:
+            logger.info(f"{substituicoes} itens evitados substituídos localmente no plano de {dados.nome}")
+
+        try:
+            novo_plano = _salvar_plano(
+                plano_ia, origem, dados.objetivo.value, dados.local.value,
+                dados.disponibilidade, current_user.id, session,
+            )
+            logger.info("Plano salvo no banco com ID: %s", novo_plano.id)
             
             # Adicionar ID da rotina na resposta
             plano_ia["rotina_id"] = novo_plano.id
@@ -130,12 +321,14 @@ async def obter_sugestao(
             "plano": plano_ia,
             "status": "sucesso",
             "mensagem": f"Plano '{plano_ia.get('nome_da_rotina')}' criado para {dados.nome}",
+            "origem": origem,
+            "substituicoes": substituicoes,
         }
 
     except ValueError as e:
         logger.warning(f"Validação falhou: {e}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except HTTPException:
+    except (HTTPException, ServicoIndisponivelError):
         raise
     except Exception as e:
         logger.error(f"Erro ao processar requisição: {e}", exc_info=True)
@@ -143,3 +336,159 @@ async def obter_sugestao(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro ao processar requisição. Tente novamente.",
         )
+
+
+def _obter_plano_do_usuario(rotina_id: int, usuario_id: int, session) -> Plano:
+    plano = (
+        session.query(Plano)
+        .options(
+            selectinload(Plano.dias).selectinload(PlanoDia.exercicios),
+            selectinload(Plano.refeicoes),
+        )
+        .filter(Plano.id == rotina_id, Plano.usuario_id == usuario_id)
+        .first()
+    )
+    if plano is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rotina não encontrada")
+    return plano
+
+
+def _salvar_regeneracao(session, plano_parcial: dict) -> None:
+    """Grava a troca (já feita na sessão) e coleta os itens novos para o catálogo."""
+    inicio_persistencia = time.perf_counter()
+    try:
+        session.commit()
+    except Exception as db_err:
+        logger.error(f"Erro ao salvar regeneração no banco: {db_err}", exc_info=True)
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro ao salvar rotina no banco de dados.",
+        )
+    PLANO_PERSISTENCIA.observe(time.perf_counter() - inicio_persistencia)
+
+    try:
+        coleta_dados.salvar_exercicios_e_refeicoes(plano_parcial, session)
+    except Exception as e:
+        logger.error(f"Erro na coleta de dados (não crítico): {e}")
+
+
+@router.post(
+    "/{rotina_id}/dias/{ordem}/regenerar",
+    response_model=PlanoIAResponse,
+    summary="Regenerar um dia do plano",
+    description="Gera com IA um novo treino para um dia da rotina salva, mantendo os demais dias",
+    dependencies=[Depends(rate_limit(custo=settings.RATE_LIMIT_CUSTO_REGENERACAO))],
+)
+def regenerar_dia_do_plano(
+    rotina_id: int,
+    ordem: int,
+    dados: RegeneracaoCreate,
+    current_user: deps.CurrentUser,
+    session: deps.SessionDep,
+):
+    plano = _obter_plano_do_usuario(rotina_id, current_user.id, session)
+    dias = sorted(plano.dias, key=lambda d: d.ordem or 0)
+    if not 1 <= ordem <= len(dias):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dia não encontrado na rotina")
+
+    preferencias = obter_preferencias_usuario(current_user.id, session)
+    contexto = [
+        {
+            "identificacao": d.identificacao,
+            "foco_muscular": d.foco_muscular,
+            "exercicios": [{"nome": ex.nome} for ex in sorted(d.exercicios, key=lambda e: e.ordem or 0)],
+        }
+        for d in dias
+    ]
+
+    try:
+        with prazo(settings.LLM_PRAZO_SEGUNDOS):
+            novo_dia = regenerar_dia(
+                nome=dados.nome,
+                altura=dados.altura,
+                peso=dados.peso,
+                idade=dados.idade,
+                local=dados.local.value,
+                objetivo=dados.objetivo.value,
+                preferencias=preferencias,
+                dias=contexto,
+                ordem=ordem,
+            )
+    except ValueError as e:
+        logger.warning(f"Regeneração do dia {ordem} da rotina {rotina_id} falhou: {e}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    plano_parcial = {"dias_de_treino": [novo_dia]}
+    substituicoes = aplicar_preferencias(plano_parcial, preferencias, local=dados.local.value, db=session)
+
+    # Troca só os exercícios deste dia; o restante do plano fica intacto
+    dia = dias[ordem - 1]
+    dia.exercicios.clear()
+    session.flush()
+    _adicionar_exercicios(dia, novo_dia.get("exercicios", []), session)
+    if plano.snapshot and ordem <= len(plano.snapshot.get("dias_de_treino", [])):
+        snapshot_dias = list(plano.snapshot["dias_de_treino"])
+        snapshot_dias[ordem - 1] = novo_dia
+        plano.snapshot = {**plano.snapshot, "dias_de_treino": snapshot_dias}
+    _salvar_regeneracao(session, plano_parcial)
+    logger.info("Dia %s da rotina %s regenerado", ordem, rotina_id)
+
+    return {
+        "plano": {"rotina_id": plano.id, "ordem": ordem, "dia": novo_dia},
+        "status": "sucesso",
+        "mensagem": f"{dia.identificacao} da rotina '{plano.nome}' regenerado",
+        "substituicoes": substituicoes,
+    }
+
+
+@router.post(
+    "/{rotina_id}/nutricao/regenerar",
+    response_model=PlanoIAResponse,
+    summary="Regenerar as sugestões nutricionais do plano",
+    description="Gera com IA novas refeições pré e pós-treino para a rotina salva, mantendo os treinos",
+    dependencies=[Depends(rate_limit(custo=settings.RATE_LIMIT_CUSTO_REGENERACAO))],
+)
+def regenerar_nutricao_do_plano(
+    rotina_id: int,
+    dados: RegeneracaoCreate,
+    current_user: deps.CurrentUser,
+    session: deps.SessionDep,
+):
+    plano = _obter_plano_do_usuario(rotina_id, current_user.id, session)
+    preferencias = obter_preferencias_usuario(current_user.id, session)
+
+    try:
+        with prazo(settings.LLM_PRAZO_SEGUNDOS):
+            nutricao = regenerar_nutricao(
+                nome=dados.nome,
+                altura=dados.altura,
+                peso=dados.peso,
+                idade=dados.idade,
+                local=dados.local.value,
+                objetivo=dados.objetivo.value,
+                preferencias=preferencias,
+                frequencia=len(plano.dias),
+                refeicoes_atuais=[r.nome for r in plano.refeicoes],
+            )
+    except ValueError as e:
+        logger.warning(f"Regeneração da nutrição da rotina {rotina_id} falhou: {e}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    plano_parcial = {"sugestoes_nutricionais": nutricao}
+    substituicoes = aplicar_preferencias(plano_parcial, preferencias, local=dados.local.value, db=session)
+
+    plano.refeicoes.clear()
+    session.flush()
+    _adicionar_refeicoes(plano, nutricao, session)
+    if plano.snapshot:
+        plano.snapshot = {**plano.snapshot, "sugestoes_nutricionais": nutricao}
+    _salvar_regeneracao(session, plano_parcial)
+    logger.info("Nutrição da rotina %s regenerada", rotina_id)
+
+    return {
+        "plano": {"rotina_id": plano.id, "sugestoes_nutricionais": nutricao},
+        "status": "sucesso",
+        "mensagem": f"Sugestões nutricionais da rotina '{plano.nome}' regeneradas",
+        "substituicoes": substituicoes,
+    }
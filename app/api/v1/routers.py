@@ -1,10 +1,11 @@
 # app/api/v1/routers.py
 
 from fastapi import APIRouter
-from app.api.v1.endpoints import treino, auth, feedback
+from app.api.v1.endpoints import treino, auth, feedback, catalogo
 
 router = APIRouter()
 
 router.include_router(treino.router, prefix="/sugestao", tags=["sugestao"])
 router.include_router(auth.router, prefix="/auth", tags=["auth"])
 router.include_router(feedback.router, prefix="/feedback", tags=["feedback"])
+router.include_router(catalogo.router, prefix="/catalogo", tags=["catalogo"])
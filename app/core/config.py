@@ -18,6 +18,134 @@ class Settings(BaseSettings):
 
     # Gemini AI API
     GEMINI_API_KEY: str
+    GEMINI_BASE_URL: Optional[str] = None  # aponta o cliente para outro servidor (ex.: stub de carga)
+
+    # Provedor de LLM: "gemini", "stub" (local, determinístico) ou "cassete" (grava/reproduz)
+    LLM_PROVEDOR: str = "gemini"
+    LLM_MODELO: str = "gemini-2.0-flash"
+
+    # Tiers de modelo: planos pequenos sem restrições vão ao modelo rápido e escalam se falharem
+    LLM_TIERING_ATIVO: bool = True
+    LLM_MODELO_RAPIDO: str = "gemini-2.0-flash-lite"
+    LLM_TIER_RAPIDO_MAX_DIAS: int = 3
+    LLM_TOKENS_SAIDA_BASE: int = 2048  # nutrição + estrutura
+    LLM_TOKENS_SAIDA_POR_DIA: int = 1024
+    LLM_TOKENS_SAIDA_MAX: int = 8192
+
+    # Geração em paralelo: uma chamada por grupo de dias + uma para a nutrição
+    LLM_GERACAO_PARALELA: bool = False
+    LLM_PARALELO_DIAS_POR_CHAMADA: int = 1
+
+    # Saída compacta: a IA responde com códigos do catálogo, expandidos no servidor
+    LLM_SAIDA_COMPACTA: bool = False
+    LLM_COMPACTA_EXERCICIOS_POR_GRUPO: int = 8
+    LLM_COMPACTA_REFEICOES_POR_SLOT: int = 4
+
+    # Cache de contexto: o prefixo fixo do prompt fica no provedor e cada chamada envia só os dados do usuário
+    LLM_CACHE_CONTEXTO_ATIVO: bool = False
+    LLM_CACHE_CONTEXTO_TTL_SEGUNDOS: int = 3600
+    LLM_CACHE_CONTEXTO_MARGEM_SEGUNDOS: float = 120.0  # renova o TTL quando faltar menos que isso
+    LLM_CACHE_CONTEXTO_ESPERA_FALHA_SEGUNDOS: float = 600.0  # sem cache por esse tempo após falhar ao criar
+
+    # Orçamento do prompt (tokens estimados): restrições além disso viram categorias ou ficam de fora
+    LLM_PROMPT_MAX_TOKENS: int = 1800  # prompt de geração completo (prefixo fixo + dados do usuário)
+    LLM_PROMPT_RESTRICOES_MAX_TOKENS: int = 400  # restrições de preferência em qualquer prompt
+    PREFERENCIAS_MEIA_VIDA_DIAS: float = 30.0  # peso de um feedback cai pela metade a cada meia-vida
+
+    LLM_STUB_LATENCIA_SEGUNDOS: float = 0.0
+    LLM_STUB_SEGUNDOS_POR_TOKEN: float = 0.0  # simula o tempo de escrita da saída
+    LLM_CASSETE_ARQUIVO: str = "cassetes/llm.json"
+    LLM_CASSETE_MODO: str = "reproduzir"  # "reproduzir", "gravar" ou "misto"
+    LLM_CASSETE_PROVEDOR: str = "gemini"  # provedor real usado ao gravar
+
+    # HTTP do cliente Gemini: prazo por requisição, timeouts por fase e pool keep-alive
+    LLM_PRAZO_SEGUNDOS: float = 45.0  # fila + tentativas de uma geração em POST /sugestao
+    LLM_PRAZO_MINIMO_CHAMADA_SEGUNDOS: float = 1.0  # com menos tempo restante a chamada nem começa
+    LLM_TIMEOUT_CONEXAO_SEGUNDOS: float = 5.0
+    LLM_TIMEOUT_LEITURA_SEGUNDOS: float = 40.0  # teto por chamada, limitado ao que resta do prazo
+    LLM_TIMEOUT_ESCRITA_SEGUNDOS: float = 10.0
+    LLM_HTTP_CONEXOES_KEEPALIVE: Optional[int] = None  # padrão: LLM_CONCORRENCIA_MAX
+    LLM_HTTP_KEEPALIVE_SEGUNDOS: float = 30.0
+    LLM_HTTP2: bool = True  # usado se o pacote h2 estiver instalado
+
+    # Circuit breaker da IA
+    LLM_CB_TAXA_FALHA: float = 0.5
+    LLM_CB_JANELA_SEGUNDOS: int = 60
+    LLM_CB_MINIMO_CHAMADAS: int = 5
+    LLM_CB_TEMPO_ABERTO_SEGUNDOS: int = 30
+    LLM_CB_SONDAS_SEMI_ABERTO: int = 2
+
+    # Limite adaptativo (AIMD) de chamadas simultâneas à IA
+    LLM_CONCORRENCIA_INICIAL: int = 4
+    LLM_CONCORRENCIA_MIN: int = 1
+    LLM_CONCORRENCIA_MAX: int = 32
+    LLM_FILA_MAX: int = 50
+    LLM_FILA_TIMEOUT_SEGUNDOS: float = 10.0
+    LLM_LATENCIA_ALVO_SEGUNDOS: float = 15.0
+
+    # Hedge: segunda chamada idêntica quando a primeira passa do percentil recente
+    LLM_HEDGE_ATIVO: bool = False
+    LLM_HEDGE_PERCENTIL: float = 95.0
+    LLM_HEDGE_ORCAMENTO: float = 0.05  # fração máxima de chamadas extras
+    LLM_HEDGE_ATRASO_MIN_SEGUNDOS: float = 2.0
+    LLM_HEDGE_AMOSTRAS_MIN: int = 20
+
+    # Descarte de carga: limites a partir dos quais gerações (e depois consultas) recebem 503
+    CARGA_PROTECAO_ATIVA: bool = True
+    CARGA_LAG_MAX_MS: int = 200
+    CARGA_ESPERA_POOL_MAX_MS: int = 500
+    CARGA_FILA_LLM_MAX: int = 25
+
+    # Instrumentação SQL: consulta lenta e limite de repetições (N+1) por requisição
+    SQL_LENTA_MS: int = 200
+    SQL_REPETICOES_MAX: int = 10
+
+    # Rastreamento (OpenTelemetry): nenhum | console | arquivo | otlp
+    TRACING_EXPORTADOR: str = "nenhum"
+    TRACING_ARQUIVO: str = "traces.jsonl"
+
+    # Gerador local (catálogo) usado quando a IA falha
+    PLANO_FALLBACK_LOCAL: bool = True
+    # Antes do gerador local, devolve o último plano salvo compatível (stale: true)
+    PLANO_STALE_EM_ERRO: bool = True
+
+    # Pool de planos pré-gerados por bucket (objetivo, local, dias, faixa de IMC e de idade)
+    PLANO_POOL_ATIVO: bool = False
+    PLANO_POOL_POR_BUCKET: int = 5
+    PLANO_POOL_MINIMO: int = 2  # abaixo disso o bucket é reposto em segundo plano
+    PLANO_POOL_CANDIDATOS: int = 20  # planos livres examinados por requisição
+    PLANO_POOL_PRESSAO_MAX: float = 0.5  # a reposição não gera acima desta pressão de carga
+    PLANO_POOL_REPOSICOES_POR_HORA: int = 60
+
+    # Pré-geração especulativa do próximo plano depois de feedbacks
+    ESPECULACAO_ATIVA: bool = False
+    ESPECULACAO_FEEDBACKS_MIN: int = 3  # feedbacks desde o último plano para disparar
+    ESPECULACAO_TTL_SEGUNDOS: int = 1800
+    ESPECULACAO_MAX_POR_HORA: int = 60
+    ESPECULACAO_PRESSAO_MAX: float = 0.5  # não inicia acima desta pressão de carga
+
+    # Rate limiting (token bucket por usuário ou IP)
+    RATE_LIMIT_BACKEND: str = "memoria"  # memoria | redis
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+    RATE_LIMIT_MAX_CHAVES: int = 10000
+    RATE_LIMIT_CAPACIDADE: int = 60
+    RATE_LIMIT_REPOSICAO_POR_MINUTO: int = 30
+    RATE_LIMIT_CUSTO_GERACAO: int = 20
+    RATE_LIMIT_CUSTO_REGENERACAO: int = 5  # regenerar um dia ou a nutrição
+    RATE_LIMIT_CADASTROS_POR_HORA: int = 3
+    # Busca/autocomplete do catálogo (uma chamada por tecla), em balde próprio
+    RATE_LIMIT_CATALOGO_CAPACIDADE: int = 60
+    RATE_LIMIT_CATALOGO_POR_MINUTO: int = 120
+
+    # Índice em memória do catálogo
+    CATALOGO_INDICE_TTL_SEGUNDOS: int = 300
+
+    # Logs (fila + thread de escrita); LOG_NIVEL vazio usa DEBUG/INFO conforme DEBUG
+    LOG_NIVEL: Optional[str] = None
+    LOG_FORMATO: str = "json"  # json | texto
+    LOG_MAX_CARACTERES: int = 2000
+    LOG_FILA_MAX: int = 10000
+    LOG_AMOSTRAGEM: dict[str, float] = {"app.api.v1.endpoints.feedback": 0.1}
 
     # Environment
     DEBUG: bool = False
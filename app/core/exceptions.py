@@ -0,0 +1,22 @@
+# app/core/exceptions.py
+"""Exceções de domínio compartilhadas entre serviços e endpoints."""
+
+
+class ServicoIndisponivelError(Exception):
+    """
+    Indica que um serviço externo está temporariamente indisponível.
+
+    O handler global em `main.py` converte esta exceção em 503 com o
+    header Retry-After, usando `retry_after` (em segundos).
+    """
+
+    def __init__(self, mensagem: str, retry_after: int = 30):
+        super().__init__(mensagem)
+        self.retry_after = max(1, int(retry_after))
+
+
+class PrazoEsgotadoError(ServicoIndisponivelError):
+    """O prazo da requisição acabou antes de a IA responder."""
+
+    def __init__(self, mensagem: str = "Prazo para gerar o plano esgotado.", retry_after: int = 5):
+        super().__init__(mensagem, retry_after)
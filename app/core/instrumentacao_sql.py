@@ -0,0 +1,184 @@
+# app/core/instrumentacao_sql.py
+"""
+Contagem de consultas SQL por requisição e detector de N+1.
+
+Os eventos `before_cursor_execute`/`after_cursor_execute` do engine
+acumulam, no contexto da requisição corrente (ContextVar), o número de
+consultas, o tempo total no banco e quantas vezes cada comando normalizado
+rodou. Ao fim da requisição:
+
+- com DEBUG, as respostas levam `X-DB-Queries` e `X-DB-Time-Ms`;
+- comandos repetidos mais de `SQL_REPETICOES_MAX` vezes geram um aviso de
+  possível N+1.
+
+Consultas acima de `SQL_LENTA_MS` são registradas em log com o comando
+normalizado, dentro ou fora de requisições.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_LITERAL_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_LITERAL_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETRO = re.compile(r"%\(\w+\)s|%s|\$\d+|:\w+|\?")
+_LISTA_IN = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ESPACOS = re.compile(r"\s+")
+
+
+def normalizar_sql(sql: str) -> str:
+    """Troca literais e parâmetros por `?` e colapsa listas e espaços."""
+    sql = _LITERAL_TEXTO.sub("?", sql)
+    sql = _PARAMETRO.sub("?", sql)
+    sql = _LITERAL_NUMERO.sub("?", sql)
+    sql = _LISTA_IN.sub("(?...)", sql)
+    return _ESPACOS.sub(" ", sql).strip()
+
+
+class EstatisticasSQL:
+    """Consultas executadas dentro de um contexto (normalmente uma requisição)."""
+
+    def __init__(self):
+        self.total = 0
+        self.tempo = 0.0
+        self.por_comando: Counter[str] = Counter()
+
+    def registrar(self, comando: str, duracao: float) -> None:
+        self.total += 1
+        self.tempo += duracao
+        self.por_comando[comando] += 1
+
+    def repetidos(self, limite: int) -> list[tuple[str, int]]:
+        return [(c, n) for c, n in self.por_comando.most_common() if n > limite]
+
+
+_estatisticas: ContextVar[Optional[EstatisticasSQL]] = ContextVar("estatisticas_sql", default=None)
+
+# Chamados com (caminho, estatísticas) ao fim de cada requisição; usados por `limitar_consultas`
+_observadores: list[Callable[[str, EstatisticasSQL], None]] = []
+_observadores_lock = threading.Lock()
+
+
+def instrumentar_consultas(engine) -> None:
+    """Registra os ouvintes de eventos do engine que alimentam as estatísticas."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_sql_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _depois(conn, cursor, statement, parameters, context, executemany):
+        duracao = time.perf_counter() - conn.info["_sql_inicio"].pop()
+        estatisticas = _estatisticas.get()
+        lenta = duracao * 1000 >= settings.SQL_LENTA_MS
+        if estatisticas is None and not lenta:
+            return
+
+        comando = normalizar_sql(statement)
+        if estatisticas is not None:
+            estatisticas.registrar(comando, duracao)
+        if lenta:
+            logger.warning(f"Consulta lenta ({duracao * 1000:.0f} ms): {comando[:500]}")
+
+    @event.listens_for(engine, "handle_error")
+    def _erro(contexto):
+        pilha = contexto.connection.info.get("_sql_inicio") if contexto.connection else None
+        if pilha:
+            pilha.pop()
+
+
+def _avisar_repetidos(origem: str, estatisticas: EstatisticasSQL) -> None:
+    for comando, vezes in estatisticas.repetidos(settings.SQL_REPETICOES_MAX):
+        logger.warning(
+            f"Possível N+1 em {origem}: comando executado {vezes}x "
+            f"({estatisticas.total} consultas no total): {comando[:300]}"
+        )
+
+
+class InstrumentacaoSQLMiddleware:
+    """Abre um contexto de estatísticas SQL por requisição HTTP."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estatisticas = EstatisticasSQL()
+        token = _estatisticas.set(estatisticas)
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start" and settings.DEBUG:
+                mensagem.setdefault("headers", [])
+                mensagem["headers"] = list(mensagem["headers"]) + [
+                    (b"x-db-queries", str(estatisticas.total).encode()),
+                    (b"x-db-time-ms", f"{estatisticas.tempo * 1000:.1f}".encode()),
+                ]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _estatisticas.reset(token)
+            origem = f"{scope['method']} {scope['path']}"
+            _avisar_repetidos(origem, estatisticas)
+            with _observadores_lock:
+                observadores = list(_observadores)
+            for observador in observadores:
+                observador(origem, estatisticas)
+
+
+@contextmanager
+def medir_consultas() -> Iterator[EstatisticasSQL]:
+    """Acumula as consultas executadas no bloco (fora de requisições HTTP, ex.: scripts)."""
+    estatisticas = EstatisticasSQL()
+    token = _estatisticas.set(estatisticas)
+    try:
+        yield estatisticas
+    finally:
+        _estatisticas.reset(token)
+        _avisar_repetidos("bloco medido", estatisticas)
+
+
+@contextmanager
+def limitar_consultas(maximo: int, repeticoes_max: Optional[int] = None) -> Iterator[list]:
+    """
+    Falha (AssertionError) se alguma requisição atendida no bloco, ou o
+    próprio bloco, executar mais de `maximo` consultas, ou repetir um mesmo
+    comando mais de `repeticoes_max` vezes.
+    """
+    medidas: list[tuple[str, EstatisticasSQL]] = []
+
+    def observar(origem: str, estatisticas: EstatisticasSQL) -> None:
+        medidas.append((origem, estatisticas))
+
+    with _observadores_lock:
+        _observadores.append(observar)
+    try:
+        with medir_consultas() as direto:
+            yield medidas
+        medidas.append(("bloco", direto))
+    finally:
+        with _observadores_lock:
+            _observadores.remove(observar)
+
+    for origem, estatisticas in medidas:
+        assert estatisticas.total <= maximo, (
+            f"{origem}: {estatisticas.total} consultas (orçamento {maximo}); "
+            f"mais frequentes: {estatisticas.por_comando.most_common(3)}"
+        )
+        if repeticoes_max is not None:
+            repetidos = estatisticas.repetidos(repeticoes_max)
+            assert not repetidos, f"{origem}: comandos repetidos além de {repeticoes_max}x: {repetidos}"
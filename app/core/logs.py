@@ -0,0 +1,138 @@
+# app/core/logs.py
+"""
+Configuração central de logs.
+
+Quem loga só enfileira o LogRecord (QueueHandler); formatação e escrita
+acontecem numa thread própria (QueueListener), fora do event loop e das
+threads das requisições. Antes de enfileirar:
+
+- registros INFO/DEBUG de loggers listados em `LOG_AMOSTRAGEM` são
+  amostrados (ex.: `{"app.api.v1.endpoints.feedback": 0.1}` mantém 10%);
+  WARNING ou acima nunca são descartados;
+- com a fila cheia (`LOG_FILA_MAX`) o registro é descartado e contado,
+  em vez de bloquear a requisição.
+
+A mensagem (`msg % args`) só é montada na thread de escrita e é truncada
+em `LOG_MAX_CARACTERES`, assim como tracebacks. A saída é JSON por linha
+(`LOG_FORMATO=json`) ou texto.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core.config import settings
+
+_listener: Optional[QueueListener] = None
+
+
+def _truncar(texto: str, limite: int) -> str:
+    if len(texto) <= limite:
+        return texto
+    return f"{texto[:limite]}... [+{len(texto) - limite} caracteres]"
+
+
+class FiltroAmostragem(logging.Filter):
+    """Mantém só uma fração dos registros INFO/DEBUG dos loggers configurados."""
+
+    def __init__(self, taxas: dict[str, float]):
+        super().__init__()
+        self.taxas = taxas
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.taxas:
+            return True
+        taxa = self.taxas.get(record.name)
+        return taxa is None or random.random() < taxa
+
+
+class FilaHandler(QueueHandler):
+    """QueueHandler que não formata no chamador e descarta (contando) com a fila cheia."""
+
+    def __init__(self, fila: queue.Queue):
+        super().__init__(fila)
+        self.descartados = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # A fila é em processo: o registro segue intacto e é formatado pelo listener
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+class FormatadorJSON(logging.Formatter):
+    def __init__(self, max_caracteres: int):
+        super().__init__()
+        self.max_caracteres = max_caracteres
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": _truncar(record.getMessage(), self.max_caracteres),
+        }
+        trace_id = getattr(record, "trace_id", "-")
+        if trace_id != "-":
+            dados["trace_id"] = trace_id
+            dados["span_id"] = getattr(record, "span_id", "-")
+        if record.exc_info:
+            dados["exc"] = _truncar(self.formatException(record.exc_info), self.max_caracteres)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class FormatadorTexto(logging.Formatter):
+    def __init__(self, max_caracteres: int):
+        super().__init__(
+            "%(asctime)s - %(name)s - %(levelname)s - [trace=%(trace_id)s] %(message)s",
+            defaults={"trace_id": "-"},
+        )
+        self.max_caracteres = max_caracteres
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = _truncar(record.message, self.max_caracteres)
+        return super().formatMessage(record)
+
+    def formatException(self, exc_info) -> str:
+        return _truncar(super().formatException(exc_info), self.max_caracteres)
+
+
+def configurar_logs() -> None:
+    """Instala fila, amostragem e formatação no logger raiz a partir de `Settings`."""
+    global _listener
+    if _listener is not None:
+        return
+
+    nivel = settings.LOG_NIVEL or ("DEBUG" if settings.DEBUG else "INFO")
+    formatador = (
+        FormatadorJSON(settings.LOG_MAX_CARACTERES)
+        if settings.LOG_FORMATO == "json"
+        else FormatadorTexto(settings.LOG_MAX_CARACTERES)
+    )
+
+    saida = logging.StreamHandler(sys.stderr)
+    saida.setFormatter(formatador)
+
+    fila: queue.Queue = queue.Queue(maxsize=settings.LOG_FILA_MAX)
+    handler = FilaHandler(fila)
+    handler.addFilter(FiltroAmostragem(settings.LOG_AMOSTRAGEM))
+
+    raiz = logging.getLogger()
+    for antigo in list(raiz.handlers):
+        raiz.removeHandler(antigo)
+    raiz.addHandler(handler)
+    raiz.setLevel(nivel)
+
+    _listener = QueueListener(fila, saida, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
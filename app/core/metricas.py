@@ -0,0 +1,249 @@
+# app/core/metricas.py
+"""
+Métricas no formato Prometheus, expostas em `/metrics`.
+
+Os coletores são módulo-globais e atualizados nos pontos quentes:
+latência por rota (middleware ASGI), chamadas à IA, persistência do plano,
+consultas SQL (eventos do engine), pool de conexões e caches.
+
+Com vários workers do uvicorn defina `PROMETHEUS_MULTIPROC_DIR` (diretório
+vazio e gravável, limpo a cada deploy): cada processo grava seus valores
+em arquivos mmap e `/metrics` agrega todos eles.
+"""
+
+import os
+import time
+from typing import Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+
+# Faixas em segundos: rotas comuns ficam em ms, geração com IA chega a dezenas de s
+_BALDES_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60)
+_BALDES_LLM = (0.5, 1, 2, 4, 6, 8, 10, 15, 20, 30, 45, 60)
+_BALDES_DB = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+HTTP_LATENCIA = Histogram(
+    "aican_http_request_duration_seconds",
+    "Latência das requisições HTTP por rota",
+    ["metodo", "rota", "status"],
+    buckets=_BALDES_HTTP,
+)
+
+LLM_LATENCIA = Histogram(
+    "aican_llm_call_duration_seconds",
+    "Latência de cada tentativa de chamada à IA",
+    ["modelo", "resultado"],
+    buckets=_BALDES_LLM,
+)
+LLM_TENTATIVAS = Counter(
+    "aican_llm_attempts_total",
+    "Tentativas de chamada à IA (inclui retries)",
+    ["modelo", "resultado"],
+)
+LLM_TOKENS = Counter(
+    "aican_llm_tokens_total",
+    "Tokens consumidos segundo usage_metadata da resposta",
+    ["modelo", "tipo"],
+)
+LLM_CONEXOES = Counter(
+    "aican_llm_http_connections_total",
+    "Respostas da IA por conexão usada (nova ou reutilizada do pool keep-alive) e versão HTTP",
+    ["conexao", "http"],
+)
+LLM_TIMEOUTS = Counter(
+    "aican_llm_timeouts_total",
+    "Timeouts de chamadas à IA por fase: conexao, leitura, escrita, pool ou prazo (requisição sem tempo restante)",
+    ["fase"],
+)
+LLM_CACHE_CONTEXTO = Counter(
+    "aican_llm_context_cache_total",
+    "Cache de contexto do prefixo do prompt: criado, reutilizado, renovado, expirado, falha, indisponivel",
+    ["evento"],
+)
+LLM_HEDGES = Counter(
+    "aican_llm_hedges_total",
+    "Hedges de chamadas à IA: disparado, vitoria_hedge, vitoria_original, sem_orcamento, sem_vaga",
+    ["evento"],
+)
+LLM_TIER_ESCOLHAS = Counter(
+    "aican_llm_tier_selected_total",
+    "Tier de modelo escolhido para cada geração de plano",
+    ["tier"],
+)
+LLM_ESCALONAMENTOS = Counter(
+    "aican_llm_escalations_total",
+    "Gerações que falharam no tier de origem e foram repetidas no tier de destino",
+    ["origem", "destino"],
+)
+PLANO_GERACAO_TIER = Histogram(
+    "aican_plan_generation_tier_duration_seconds",
+    "Tempo de geração (chamada + validação) por tier de modelo",
+    ["tier", "resultado"],
+    buckets=_BALDES_LLM,
+)
+
+PLANO_POOL_CONSUMO = Counter(
+    "aican_plan_pool_requests_total",
+    "Pedidos de plano ao pool pré-gerado: acerto, vazio, incompativel",
+    ["resultado"],
+)
+PLANO_POOL_GERADOS = Counter(
+    "aican_plan_pool_generated_total",
+    "Planos gerados para o pool: novo, duplicado, erro; reposição adiada: sob_carga, sem_orcamento",
+    ["resultado"],
+)
+
+PLANO_ESPECULATIVO = Counter(
+    "aican_plan_speculative_total",
+    "Pré-gerações especulativas por desfecho: gerado, usado, expirado, divergente, substituido, sob_carga, sem_orcamento, erro",
+    ["evento"],
+)
+
+PLANO_STALE = Counter(
+    "aican_plan_stale_total",
+    "Falhas de geração atendidas com o último plano salvo (servido) ou sem plano compatível (sem_plano)",
+    ["resultado"],
+)
+
+PLANO_PERSISTENCIA = Histogram(
+    "aican_plan_persist_duration_seconds",
+    "Tempo para gravar plano, dias, exercícios e refeições no banco",
+    buckets=_BALDES_DB,
+)
+
+DB_CONSULTAS = Histogram(
+    "aican_db_query_duration_seconds",
+    "Duração das consultas SQL por tipo de comando",
+    ["operacao"],
+    buckets=_BALDES_DB,
+)
+DB_POOL_EM_USO = Gauge(
+    "aican_db_pool_checked_out",
+    "Conexões do pool em uso",
+    multiprocess_mode="livesum",
+)
+DB_POOL_ESPERA = Histogram(
+    "aican_db_pool_wait_seconds",
+    "Espera para obter uma conexão do pool",
+    buckets=_BALDES_DB,
+)
+
+REQUISICOES_DESCARTADAS = Counter(
+    "aican_load_shed_total",
+    "Requisições recusadas pelo descarte de carga",
+    ["prioridade"],
+)
+
+CACHE_CONSULTAS = Counter(
+    "aican_cache_requests_total",
+    "Consultas a caches internos por resultado (acerto/falha)",
+    ["cache", "resultado"],
+)
+
+
+def registrar_cache(cache: str, acerto: bool) -> None:
+    CACHE_CONSULTAS.labels(cache, "acerto" if acerto else "falha").inc()
+
+
+def registrar_uso_llm(modelo: str, prompt: int, saida: int, cache: int = 0) -> None:
+    """Soma os tokens de uma chamada ao LLM (zeros são ignorados)."""
+    for tipo, valor in (("prompt", prompt), ("saida", saida), ("cache", cache)):
+        if valor:
+            LLM_TOKENS.labels(modelo, tipo).inc(valor)
+
+
+def _operacao(sql: str) -> str:
+    comando = sql.lstrip().split(None, 1)
+    return comando[0].upper() if comando else "?"
+
+
+def instrumentar_engine(engine) -> None:
+    """Registra ouvintes de eventos do SQLAlchemy para consultas e pool."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metricas_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _depois(conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info["_metricas_inicio"].pop()
+        DB_CONSULTAS.labels(_operacao(statement)).observe(time.perf_counter() - inicio)
+
+    @event.listens_for(engine, "handle_error")
+    def _erro(contexto):
+        pilha = contexto.connection.info.get("_metricas_inicio") if contexto.connection else None
+        if pilha:
+            pilha.pop()
+
+    @event.listens_for(engine.pool, "checkout")
+    def _checkout(dbapi_conn, registro, proxy):
+        DB_POOL_EM_USO.inc()
+
+    @event.listens_for(engine.pool, "checkin")
+    def _checkin(dbapi_conn, registro):
+        DB_POOL_EM_USO.dec()
+
+
+_rotas: dict[Any, str] = {}
+
+
+def rota_do_escopo(scope) -> str:
+    """Template da rota atendida (ex.: `/api/v1/feedback/{feedback_id}`), após o roteamento."""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "nao_encontrada"
+    rota = _rotas.get(endpoint)
+    if rota is None:
+        rota = next(
+            (r.path for r in scope["app"].routes if getattr(r, "endpoint", None) is endpoint),
+            endpoint.__name__,
+        )
+        _rotas[endpoint] = rota
+    return rota
+
+
+class MetricasHTTPMiddleware:
+    """Middleware ASGI que mede a latência por rota (template do caminho, não a URL)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        status_code = 500
+
+        async def enviar(mensagem):
+            nonlocal status_code
+            if mensagem["type"] == "http.response.start":
+                status_code = mensagem["status"]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            HTTP_LATENCIA.labels(scope["method"], rota_do_escopo(scope), str(status_code)).observe(
+                time.perf_counter() - inicio
+            )
+
+
+def gerar_metricas() -> tuple[bytes, str]:
+    """Conteúdo de `/metrics`, agregando os workers em modo multiprocesso."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,35 @@
+# app/core/prazo.py
+"""
+Prazo (deadline) por requisição para o trabalho com a IA.
+
+O endpoint abre `prazo(segundos)` em volta da geração. Cada chamada ao
+LLM usa como timeout de leitura o que resta do prazo: a fila do
+limitador, as tentativas do retry e as chamadas em paralelo (que copiam o
+contexto) dividem o mesmo orçamento de tempo. Fora de um prazo (jobs em
+segundo plano) valem só os tetos fixos de timeout.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+_prazo: ContextVar[Optional[float]] = ContextVar("prazo_ia", default=None)
+
+
+@contextmanager
+def prazo(segundos: float) -> Iterator[None]:
+    """Define o prazo do bloco; um prazo externo mais curto prevalece."""
+    limite = time.monotonic() + segundos
+    atual = _prazo.get()
+    token = _prazo.set(limite if atual is None else min(atual, limite))
+    try:
+        yield
+    finally:
+        _prazo.reset(token)
+
+
+def tempo_restante() -> Optional[float]:
+    """Segundos até o fim do prazo atual (pode ser negativo), ou None sem prazo."""
+    limite = _prazo.get()
+    return None if limite is None else limite - time.monotonic()
@@ -0,0 +1,206 @@
+# app/core/protecao_carga.py
+"""
+Descarte de carga (load shedding) por prioridade de rota.
+
+Sob pico, aceitar tudo faz todas as requisições estourarem o tempo ao mesmo
+tempo. O monitor acompanha três sinais de saturação:
+
+- atraso do event loop (amostrado por uma tarefa asyncio);
+- espera para obter conexão do pool do banco;
+- profundidade da fila de chamadas à IA.
+
+Cada sinal é dividido pelo seu limite configurado; a maior razão é a
+pressão. Entre 1 e 2 uma fração crescente das novas gerações de plano é
+recusada com 503 e Retry-After (todas a partir de 2); entre 2 e 3 o mesmo
+vale para as consultas (estatísticas, catálogo, leitura de feedbacks).
+Health check, autenticação e gravação de feedback nunca são descartados.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.core.metricas import REQUISICOES_DESCARTADAS
+
+logger = logging.getLogger(__name__)
+
+# Prioridades: quanto menor, mais cedo é descartada
+GERACAO = 0
+CONSULTA = 1
+ESSENCIAL = 2
+
+NOMES_PRIORIDADE = {GERACAO: "geracao", CONSULTA: "consulta", ESSENCIAL: "essencial"}
+
+# Faixa de pressão (início, total) de cada prioridade: dentro da faixa a
+# fração descartada cresce linearmente de 0 a 100%, o que evita alternar
+# entre aceitar tudo e recusar tudo
+PRESSAO_DESCARTE = {GERACAO: (1.0, 2.0), CONSULTA: (2.0, 3.0)}
+
+# Retry-After sugerido para cada prioridade descartada
+RETRY_AFTER = {GERACAO: 10, CONSULTA: 2}
+
+
+def classificar_prioridade(metodo: str, caminho: str) -> int:
+    """Prioridade da requisição a partir do método e do caminho."""
+    if caminho.startswith("/api/v1/sugestao"):
+        return GERACAO
+    if caminho.startswith("/api/v1/feedback/stats") or caminho.startswith("/api/v1/catalogo"):
+        return CONSULTA
+    if caminho.startswith("/api/v1/feedback") and metodo == "GET":
+        return CONSULTA
+    return ESSENCIAL
+
+
+class JanelaMaxima:
+    """Máximo dos valores registrados nos últimos `janela` segundos (baldes de `resolucao` s)."""
+
+    def __init__(self, janela: float = 1.0, resolucao: float = 0.25):
+        self.baldes_max = max(1, round(janela / resolucao))
+        self.resolucao = resolucao
+        self._baldes: deque[list[float]] = deque()
+        self._lock = threading.Lock()
+
+    def registrar(self, valor: float) -> None:
+        balde = int(time.monotonic() / self.resolucao)
+        with self._lock:
+            if self._baldes and self._baldes[-1][0] == balde:
+                if valor > self._baldes[-1][1]:
+                    self._baldes[-1][1] = valor
+            else:
+                self._baldes.append([balde, valor])
+                self._descartar_antigos(balde)
+
+    def valor(self) -> float:
+        with self._lock:
+            self._descartar_antigos(int(time.monotonic() / self.resolucao))
+            return max((b[1] for b in self._baldes), default=0.0)
+
+    def _descartar_antigos(self, balde: int) -> None:
+        while self._baldes and self._baldes[0][0] <= balde - self.baldes_max:
+            self._baldes.popleft()
+
+
+class MonitorCarga:
+    def __init__(
+        self,
+        lag_max: float,
+        espera_pool_max: float,
+        fila_llm_max: int,
+        intervalo_amostra: float = 0.1,
+        janela: float = 0.5,
+    ):
+        self.lag_max = lag_max
+        self.espera_pool_max = espera_pool_max
+        self.fila_llm_max = fila_llm_max
+        self.intervalo_amostra = intervalo_amostra
+
+        self._lag = JanelaMaxima(janela)
+        self._espera_pool = JanelaMaxima(janela)
+        self._fila_llm: Callable[[], int] = lambda: 0
+        self._amostrador: Optional[asyncio.Task] = None
+        self.descartadas = {NOMES_PRIORIDADE[p]: 0 for p in PRESSAO_DESCARTE}
+        self._ultimo_aviso = 0.0
+
+    def configurar_fila_llm(self, fonte: Callable[[], int]) -> None:
+        """Define a função que informa quantas chamadas à IA aguardam na fila."""
+        self._fila_llm = fonte
+
+    def registrar_espera_pool(self, segundos: float) -> None:
+        self._espera_pool.registrar(segundos)
+
+    def iniciar_amostragem(self) -> None:
+        """Inicia (uma vez por event loop) a tarefa que mede o atraso do loop."""
+        if self._amostrador is None or self._amostrador.done():
+            self._amostrador = asyncio.get_running_loop().create_task(self._amostrar_lag())
+
+    async def _amostrar_lag(self) -> None:
+        while True:
+            inicio = time.perf_counter()
+            await asyncio.sleep(self.intervalo_amostra)
+            self._lag.registrar(max(0.0, time.perf_counter() - inicio - self.intervalo_amostra))
+
+    def pressao(self) -> float:
+        return max(
+            self._lag.valor() / self.lag_max,
+            self._espera_pool.valor() / self.espera_pool_max,
+            self._fila_llm() / self.fila_llm_max,
+        )
+
+    def deve_descartar(self, prioridade: int) -> bool:
+        faixa = PRESSAO_DESCARTE.get(prioridade)
+        if faixa is None:
+            return False
+        inicio, total = faixa
+        pressao = self.pressao()
+        if pressao < inicio:
+            return False
+        if pressao < total and random.random() >= (pressao - inicio) / (total - inicio):
+            return False
+
+        self.descartadas[NOMES_PRIORIDADE[prioridade]] += 1
+        REQUISICOES_DESCARTADAS.labels(NOMES_PRIORIDADE[prioridade]).inc()
+        agora = time.monotonic()
+        if agora - self._ultimo_aviso >= 1.0:
+            self._ultimo_aviso = agora
+            logger.warning(
+                f"Carga alta (pressão {pressao:.2f}): descartando requisições de "
+                f"{NOMES_PRIORIDADE[prioridade]}; total {self.descartadas}"
+            )
+        return True
+
+    def snapshot(self) -> dict:
+        return {
+            "pressao": round(self.pressao(), 3),
+            "lag_loop_ms": round(self._lag.valor() * 1000, 1),
+            "espera_pool_ms": round(self._espera_pool.valor() * 1000, 1),
+            "fila_llm": self._fila_llm(),
+            "descartadas": dict(self.descartadas),
+        }
+
+
+monitor_carga = MonitorCarga(
+    lag_max=settings.CARGA_LAG_MAX_MS / 1000,
+    espera_pool_max=settings.CARGA_ESPERA_POOL_MAX_MS / 1000,
+    fila_llm_max=settings.CARGA_FILA_LLM_MAX,
+)
+
+
+class ProtecaoCargaMiddleware:
+    """Middleware ASGI que recusa com 503 as requisições de baixa prioridade sob pressão."""
+
+    def __init__(self, app, monitor: MonitorCarga = monitor_carga, ativo: bool = True):
+        self.app = app
+        self.monitor = monitor
+        self.ativo = ativo
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.ativo:
+            await self.app(scope, receive, send)
+            return
+
+        self.monitor.iniciar_amostragem()
+        prioridade = classificar_prioridade(scope["method"], scope["path"])
+
+        if self.monitor.deve_descartar(prioridade):
+            corpo = json.dumps(
+                {"detail": "Servidor sobrecarregado. Tente novamente em instantes."}
+            ).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(corpo)).encode()),
+                    (b"retry-after", str(RETRY_AFTER[prioridade]).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": corpo})
+            return
+
+        await self.app(scope, receive, send)
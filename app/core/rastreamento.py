@@ -0,0 +1,118 @@
+# app/core/rastreamento.py
+"""
+Rastreamento (tracing) compatível com OpenTelemetry.
+
+Cada requisição HTTP abre um span raiz (respeitando `traceparent` de
+entrada) e as etapas da geração de plano abrem spans filhos. O trace id vai
+em todas as linhas de log (`trace=...`) e no cabeçalho `X-Trace-Id` da
+resposta.
+
+Exportadores (`TRACING_EXPORTADOR`):
+- `nenhum`: spans são criados (para os ids nos logs), mas não exportados;
+- `console`: um JSON por span na saída padrão;
+- `arquivo`: um JSON por linha em `TRACING_ARQUIVO`, sem precisar de coletor;
+- `otlp`: envia para um coletor (requer `opentelemetry-exporter-otlp`).
+"""
+
+import logging
+import sys
+
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+from app.core.config import settings
+from app.core.metricas import rota_do_escopo
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("aican")
+
+
+def _formatar_span(span) -> str:
+    return span.to_json(indent=None) + "\n"
+
+
+def configurar_rastreamento() -> None:
+    """Instala o TracerProvider e o exportador configurado (chamar uma vez, na subida)."""
+    provedor = TracerProvider(resource=Resource.create({"service.name": "aican-api"}))
+    destino = settings.TRACING_EXPORTADOR
+
+    if destino == "console":
+        provedor.add_span_processor(
+            BatchSpanProcessor(ConsoleSpanExporter(out=sys.stdout, formatter=_formatar_span))
+        )
+    elif destino == "arquivo":
+        arquivo = open(settings.TRACING_ARQUIVO, "a", encoding="utf-8")
+        provedor.add_span_processor(
+            BatchSpanProcessor(ConsoleSpanExporter(out=arquivo, formatter=_formatar_span))
+        )
+    elif destino == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError as e:
+            raise RuntimeError("TRACING_EXPORTADOR=otlp requer o pacote 'opentelemetry-exporter-otlp'") from e
+        provedor.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    elif destino != "nenhum":
+        raise ValueError(f"TRACING_EXPORTADOR inválido: {destino}")
+
+    trace.set_tracer_provider(provedor)
+    _instalar_ids_nos_logs()
+    logger.info(f"Rastreamento configurado (exportador: {destino})")
+
+
+def _instalar_ids_nos_logs() -> None:
+    """Acrescenta `trace_id` e `span_id` a todo LogRecord (vazios fora de um span)."""
+    fabrica_original = logging.getLogRecordFactory()
+
+    def fabrica(*args, **kwargs):
+        registro = fabrica_original(*args, **kwargs)
+        contexto = trace.get_current_span().get_span_context()
+        if contexto.is_valid:
+            registro.trace_id = format(contexto.trace_id, "032x")
+            registro.span_id = format(contexto.span_id, "016x")
+        else:
+            registro.trace_id = "-"
+            registro.span_id = "-"
+        return registro
+
+    logging.setLogRecordFactory(fabrica)
+
+
+class RastreamentoMiddleware:
+    """Abre o span raiz de cada requisição HTTP e devolve o trace id em `X-Trace-Id`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cabecalhos = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        contexto_pai = propagate.extract(cabecalhos)
+
+        with tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}",
+            context=contexto_pai,
+            kind=trace.SpanKind.SERVER,
+            attributes={"http.request.method": scope["method"], "url.path": scope["path"]},
+        ) as span:
+            trace_id = format(span.get_span_context().trace_id, "032x").encode()
+
+            async def enviar(mensagem):
+                if mensagem["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", mensagem["status"])
+                    if mensagem["status"] >= 500:
+                        span.set_status(trace.StatusCode.ERROR)
+                    mensagem["headers"] = list(mensagem.get("headers", [])) + [(b"x-trace-id", trace_id)]
+                await send(mensagem)
+
+            try:
+                await self.app(scope, receive, enviar)
+            finally:
+                rota = rota_do_escopo(scope)
+                span.update_name(f"{scope['method']} {rota}")
+                span.set_attribute("http.route", rota)
@@ -0,0 +1,192 @@
+# app/core/rate_limit.py
+"""
+Rate limiting por token bucket com custo por rota.
+
+Um único limitador para toda a API: a chave é o usuário do token JWT
+(quando presente e válido) ou o IP. Cada rota consome um número de tokens
+proporcional ao seu custo (gerar um plano custa bem mais que salvar um
+feedback). O estado fica num backend plugável: Redis para compartilhar o
+limite entre workers ou memória local, limitada e com descarte LRU.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol
+
+from fastapi import HTTPException, Request, status
+from jose import JWTError, jwt
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Regra:
+    """Balde de `capacidade` tokens reabastecido a `taxa` tokens por segundo."""
+
+    capacidade: float
+    taxa: float
+
+
+class BackendRateLimit(Protocol):
+    def consumir(self, chave: str, custo: float, regra: Regra) -> tuple[bool, float]:
+        """Retorna (permitido, segundos até haver tokens suficientes)."""
+        ...
+
+
+class MemoriaBackend:
+    """Backend em processo. Mantém no máximo `max_chaves` baldes (LRU)."""
+
+    def __init__(self, max_chaves: int = 10000):
+        self.max_chaves = max_chaves
+        self._baldes: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(self, chave: str, custo: float, regra: Regra) -> tuple[bool, float]:
+        agora = time.monotonic()
+        with self._lock:
+            tokens, atualizado_em = self._baldes.pop(chave, (regra.capacidade, agora))
+            tokens = min(regra.capacidade, tokens + (agora - atualizado_em) * regra.taxa)
+
+            permitido = tokens >= custo
+            if permitido:
+                tokens -= custo
+            espera = 0.0 if permitido else (custo - tokens) / regra.taxa
+
+            self._baldes[chave] = (tokens, agora)
+            while len(self._baldes) > self.max_chaves:
+                self._baldes.popitem(last=False)
+
+        return permitido, espera
+
+
+_LUA_TOKEN_BUCKET = """
+local capacidade = tonumber(ARGV[1])
+local taxa = tonumber(ARGV[2])
+local custo = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local agora = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local dados = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(dados[1]) or capacidade
+local ts = tonumber(dados[2]) or agora
+tokens = math.min(capacidade, tokens + math.max(0, agora - ts) * taxa)
+
+local permitido = 0
+local espera = 0
+if tokens >= custo then
+    tokens = tokens - custo
+    permitido = 1
+else
+    espera = (custo - tokens) / taxa
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', agora)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacidade / taxa) + 1)
+return {permitido, tostring(espera)}
+"""
+
+
+class RedisBackend:
+    """Backend compartilhado entre workers; a atualização do balde é atômica (script Lua)."""
+
+    def __init__(self, url: str, prefixo: str = "aican:rl:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requer o pacote 'redis'") from e
+
+        self._cliente = redis.Redis.from_url(url, socket_timeout=0.05)
+        self._script = self._cliente.register_script(_LUA_TOKEN_BUCKET)
+        self.prefixo = prefixo
+
+    def consumir(self, chave: str, custo: float, regra: Regra) -> tuple[bool, float]:
+        permitido, espera = self._script(
+            keys=[self.prefixo + chave],
+            args=[regra.capacidade, regra.taxa, custo],
+        )
+        return bool(int(permitido)), float(espera)
+
+
+class RateLimiter:
+    def __init__(self, backend: BackendRateLimit, regras: dict[str, Regra]):
+        self.backend = backend
+        self.regras = regras
+
+    def verificar(self, request: Request, escopo: str, custo: float) -> None:
+        """Consome `custo` tokens do balde (escopo, identidade) ou lança 429 com Retry-After."""
+        regra = self.regras[escopo]
+        identidade = identificar_cliente(request)
+
+        try:
+            permitido, espera = self.backend.consumir(f"{escopo}:{identidade}", custo, regra)
+        except Exception as e:
+            # Falha do backend não pode derrubar a API: deixa passar
+            logger.error(f"Erro no backend de rate limit: {e}")
+            return
+
+        if not permitido:
+            logger.warning(f"Rate limit excedido: escopo={escopo}, cliente={identidade}, custo={custo}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Muitas requisições. Tente novamente em instantes.",
+                headers={"Retry-After": str(max(1, math.ceil(espera)))},
+            )
+
+
+def identificar_cliente(request: Request) -> str:
+    """Usuário do token Bearer se for válido; senão o IP de origem."""
+    autorizacao = request.headers.get("authorization", "")
+    if autorizacao.lower().startswith("bearer "):
+        try:
+            payload = jwt.decode(
+                autorizacao[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+            if payload.get("sub"):
+                return f"usuario:{payload['sub']}"
+        except JWTError:
+            pass
+    return f"ip:{request.client.host if request.client else 'desconhecido'}"
+
+
+def _criar_backend() -> BackendRateLimit:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        if not settings.RATE_LIMIT_REDIS_URL:
+            raise ValueError("RATE_LIMIT_REDIS_URL não configurada.")
+        return RedisBackend(settings.RATE_LIMIT_REDIS_URL)
+    return MemoriaBackend(max_chaves=settings.RATE_LIMIT_MAX_CHAVES)
+
+
+limiter = RateLimiter(
+    backend=_criar_backend(),
+    regras={
+        "geral": Regra(
+            capacidade=settings.RATE_LIMIT_CAPACIDADE,
+            taxa=settings.RATE_LIMIT_REPOSICAO_POR_MINUTO / 60,
+        ),
+        # Máximo de cadastros por hora por IP (3 por padrão)
+        "cadastro": Regra(
+            capacidade=settings.RATE_LIMIT_CADASTROS_POR_HORA,
+            taxa=settings.RATE_LIMIT_CADASTROS_POR_HORA / 3600,
+        ),
+        # Autocomplete do catálogo: não disputa o balde das gerações de plano
+        "catalogo": Regra(
+            capacidade=settings.RATE_LIMIT_CATALOGO_CAPACIDADE,
+            taxa=settings.RATE_LIMIT_CATALOGO_POR_MINUTO / 60,
+        ),
+    },
+)
+
+
+def rate_limit(custo: float = 1, escopo: str = "geral"):
+    """Dependência FastAPI: `dependencies=[Depends(rate_limit(custo=20))]`."""
+
+    def dependencia(request: Request) -> None:
+        limiter.verificar(request, escopo, custo)
+
+    return dependencia
@@ -1,22 +1,46 @@
 # app/database/base.py
 
+import time
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from app.core.config import settings
+from app.core.instrumentacao_sql import instrumentar_consultas
+from app.core.metricas import DB_POOL_ESPERA, instrumentar_engine
+from app.core.protecao_carga import monitor_carga
 from sqlalchemy import MetaData
 
 Base = declarative_base(metadata=MetaData(schema="aican"))
 
+
+class PoolMedido(QueuePool):
+    """QueuePool que informa ao monitor de carga quanto tempo cada checkout esperou."""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            espera = time.perf_counter() - inicio
+            monitor_carga.registrar_espera_pool(espera)
+            DB_POOL_ESPERA.observe(espera)
+
+
 engine = create_engine(
-    settings.DATABASE_URL, connect_args={"options": "-c search_path=aican"}
+    settings.DATABASE_URL,
+    connect_args={"options": "-c search_path=aican"},
+    poolclass=PoolMedido,
 )
+instrumentar_engine(engine)
+instrumentar_consultas(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 from app.database.models.user import User
 from app.database.models.plano import Plano, PlanoDia, PlanoExercicio
 from app.database.models.catalogo_exercicio import CatalogoExercicio
 from app.database.models.nutricao import PlanoRefeicao, CatalogoRefeicao
+from app.database.models.plano_pool import PlanoPool
 
 def get_db():
     """Dependência para obter uma sessão do banco de dados"""
@@ -2,3 +2,4 @@ from app.database.models.user import User
 from app.database.models.plano import Plano, PlanoDia, PlanoExercicio
 from app.database.models.catalogo_exercicio import CatalogoExercicio
 from app.database.models.nutricao import PlanoRefeicao, CatalogoRefeicao
+from app.database.models.plano_pool import PlanoPool
@@ -1,5 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from app.database.base import Base
 
@@ -13,6 +14,20 @@ class Plano(Base):
     usuario_id = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Perfil do pedido e cópia do plano entregue, para servir o último
+    # plano compatível quando a geração falha (None em planos antigos)
+    objetivo = Column(String(20), nullable=True)
+    local = Column(String(20), nullable=True)
+    frequencia = Column(Integer, nullable=True)
+    snapshot = Column(JSONB, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_planos_usuario_perfil_recente",
+            "usuario_id", "objetivo", "local", "frequencia", created_at.desc(),
+        ),
+    )
+
     # Relações
     dias = relationship(
         "PlanoDia", back_populates="plano", cascade="all, delete-orphan"
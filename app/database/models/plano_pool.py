@@ -0,0 +1,40 @@
+# app/database/models/plano_pool.py
+# Planos pré-gerados pela IA, agrupados por faixa de perfil
+
+from datetime import datetime
+from sqlalchemy import ARRAY, Column, DateTime, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from app.database.base import Base
+
+
+class PlanoPool(Base):
+    """
+    Plano completo (formato `JSON_EXAMPLE`) gerado em lote para um bucket
+    de perfil. `usado_em` preenchido indica que já foi entregue a um usuário.
+    """
+    __tablename__ = "planos_pool"
+
+    id = Column(Integer, primary_key=True, index=True)
+    objetivo = Column(String(20), nullable=False)
+    local = Column(String(20), nullable=False)
+    disponibilidade = Column(Integer, nullable=False)
+    faixa_imc = Column(String(20), nullable=False)
+    faixa_idade = Column(String(20), nullable=False)
+
+    conteudo = Column(JSONB, nullable=False)
+    # Nomes normalizados, para filtrar pelas preferências sem abrir o JSON
+    exercicios = Column(ARRAY(String), nullable=False)
+    refeicoes = Column(ARRAY(String), nullable=False)
+    assinatura = Column(String(64), nullable=False, unique=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    usado_em = Column(DateTime, nullable=True)
+    usuario_id = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_planos_pool_bucket_livre",
+            "objetivo", "local", "disponibilidade", "faixa_imc", "faixa_idade",
+            postgresql_where=usado_em.is_(None),
+        ),
+    )
@@ -0,0 +1,139 @@
+# app/services/cache_contexto.py
+"""
+Cache de contexto no provedor para o prefixo fixo do prompt.
+
+O prompt de geração começa com um bloco igual para todos os usuários
+(instruções, regras de JSON, `JSON_EXAMPLE`, orientações de refeições) e
+termina com os dados do usuário. Com `LLM_CACHE_CONTEXTO_ATIVO`, o prefixo
+é enviado uma vez ao provedor como contexto em cache e cada chamada manda
+só o sufixo, referenciando o cache pelo nome.
+
+`GerenciadorCacheContexto` guarda um cache por (modelo, prefixo):
+
+- reutiliza enquanto faltar mais que `LLM_CACHE_CONTEXTO_MARGEM_SEGUNDOS`
+  para expirar;
+- dentro da margem, renova o TTL; se a renovação falhar, cria outro;
+- depois de expirado (ou quando o provedor diz que o cache sumiu, via
+  `CacheExpiradoError`), cria outro;
+- se a criação falhar (modelo sem suporte, prefixo abaixo do mínimo de
+  tokens do provedor), a chamada segue com o prompt inteiro e o cache não
+  é tentado de novo por `LLM_CACHE_CONTEXTO_ESPERA_FALHA_SEGUNDOS`.
+
+O estado fica em memória, por processo: cada worker cria o seu cache.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from app.core.metricas import LLM_CACHE_CONTEXTO
+
+logger = logging.getLogger(__name__)
+
+
+class CacheExpiradoError(LookupError):
+    """O provedor não encontrou o cache referenciado (expirou ou foi removido)."""
+
+
+@dataclass
+class _Entrada:
+    nome: str
+    expira_em: float  # time.monotonic()
+
+
+class GerenciadorCacheContexto:
+    def __init__(
+        self,
+        criar: Callable[[str, str, int], str],
+        renovar: Callable[[str, int], None],
+        ttl: int,
+        margem: float,
+        espera_falha: float,
+    ):
+        """
+        Args:
+            criar: (modelo, prefixo, ttl em segundos) -> nome do cache no provedor
+            renovar: (nome, ttl em segundos) -> None; CacheExpiradoError se o cache sumiu
+        """
+        self._criar = criar
+        self._renovar = renovar
+        self.ttl = ttl
+        self.margem = margem
+        self.espera_falha = espera_falha
+
+        self._entradas: dict[tuple[str, str], _Entrada] = {}
+        self._falhas: dict[tuple[str, str], float] = {}
+        self._travas: dict[tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _chave(modelo: str, prefixo: str) -> tuple[str, str]:
+        return modelo, hashlib.sha256(prefixo.encode()).hexdigest()
+
+    def _trava(self, chave: tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            return self._travas.setdefault(chave, threading.Lock())
+
+    def obter(self, modelo: str, prefixo: str) -> Optional[str]:
+        """Nome do cache do prefixo (criado ou renovado se preciso), ou None para não usar cache."""
+        chave = self._chave(modelo, prefixo)
+        # Uma criação/renovação por prefixo de cada vez; as demais chamadas esperam e reaproveitam
+        with self._trava(chave):
+            agora = time.monotonic()
+            if self._falhas.get(chave, 0.0) > agora:
+                LLM_CACHE_CONTEXTO.labels("indisponivel").inc()
+                return None
+
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada.expira_em - agora > self.margem:
+                LLM_CACHE_CONTEXTO.labels("reutilizado").inc()
+                return entrada.nome
+
+            if entrada is not None and entrada.expira_em > agora:
+                try:
+                    self._renovar(entrada.nome, self.ttl)
+                    entrada.expira_em = agora + self.ttl
+                    LLM_CACHE_CONTEXTO.labels("renovado").inc()
+                    return entrada.nome
+                except Exception as e:
+                    logger.warning("Renovação do cache de contexto %s falhou: %s", entrada.nome, e)
+            if entrada is not None:
+                del self._entradas[chave]
+                LLM_CACHE_CONTEXTO.labels("expirado").inc()
+
+            try:
+                nome = self._criar(modelo, prefixo, self.ttl)
+            except Exception as e:
+                logger.warning(
+                    "Cache de contexto indisponível para %s; usando o prompt inteiro por %.0fs: %s",
+                    modelo, self.espera_falha, e,
+                )
+                self._falhas[chave] = agora + self.espera_falha
+                LLM_CACHE_CONTEXTO.labels("falha").inc()
+                return None
+
+            self._entradas[chave] = _Entrada(nome, agora + self.ttl)
+            self._falhas.pop(chave, None)
+            LLM_CACHE_CONTEXTO.labels("criado").inc()
+            logger.info("Cache de contexto %s criado para %s (TTL %ss)", nome, modelo, self.ttl)
+            return nome
+
+    def invalidar(self, modelo: str, prefixo: str, nome: str) -> None:
+        """Esquece o cache que o provedor não encontrou; a próxima chamada cria outro."""
+        chave = self._chave(modelo, prefixo)
+        with self._trava(chave):
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada.nome == nome:
+                del self._entradas[chave]
+                LLM_CACHE_CONTEXTO.labels("expirado").inc()
+
+    def snapshot(self) -> dict:
+        agora = time.monotonic()
+        with self._lock:
+            return {
+                "caches": len(self._entradas),
+                "indisponiveis": sum(1 for limite in self._falhas.values() if limite > agora),
+            }
@@ -0,0 +1,706 @@
+# app/services/catalogo.py
+"""
+Catálogo de exercícios e refeições: normalização de nomes, classificação
+por grupo muscular e índice invertido em memória.
+
+O índice mapeia (grupo_muscular, local) -> exercícios e (tipo, nivel) ->
+refeições, combinando o catálogo do banco com uma base mínima embutida,
+e mantém índices de prefixo para o autocomplete de `/catalogo`.
+Ele é recarregado sem reinício quando expira (CATALOGO_INDICE_TTL_SEGUNDOS)
+ou via `recarregar_indice`.
+
+Para preencher `grupo_muscular` nos registros existentes:
+
+    python -m app.services.catalogo
+"""
+
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metricas import registrar_cache
+
+logger = logging.getLogger(__name__)
+
+# Palavras-chave (já normalizadas) que indicam o grupo muscular de um exercício.
+# A mais longa encontrada vence ("flexao diamante" > "flexao"); em empate, o
+# grupo que vem primeiro.
+GRUPOS_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "abdomen": ("abdominal", "abdomen", "prancha", "crunch", "obliquo", "core"),
+    "gluteos": ("gluteo", "elevacao pelvica", "hip thrust", "coice de gluteo", "abducao", "abdutora"),
+    "pernas": (
+        "agachamento", "leg press", "extensora", "flexora", "afundo", "passada",
+        "stiff", "panturrilha", "avanco", "adutora", "hack", "bulgaro",
+    ),
+    "peito": ("supino", "crucifixo", "flexao", "peck deck", "voador", "peitoral", "crossover"),
+    "costas": (
+        "remada", "puxada", "pulldown", "barra fixa", "levantamento terra", "pull", "serrote", "dorsal",
+        "superman",
+    ),
+    "ombros": (
+        "desenvolvimento", "elevacao lateral", "elevacao frontal", "ombro", "arnold", "encolhimento",
+        "flexao pike",
+    ),
+    "triceps": (
+        "triceps", "mergulho", "frances", "testa", "paralela", "coice de triceps", "flexao diamante",
+        "flexao fechada",
+    ),
+    "biceps": ("rosca", "biceps", "barra fixa supinada"),
+    "cardio": (
+        "corrida", "caminhada", "bicicleta", "bike", "polichinelo", "burpee",
+        "pular corda", "esteira", "eliptico", "trote", "sprint", "mountain climber",
+    ),
+}
+
+# Equipamentos que só existem em academia ou que exigem algum material em casa.
+EQUIPAMENTOS_ACADEMIA = (
+    "maquina", "polia", "cabo", "leg press", "smith", "extensora", "flexora",
+    "cadeira abdutora", "cadeira adutora", "pulldown", "puxada", "peck deck", "voador", "crossover", "hack", "esteira",
+    "eliptico", "barra",
+)
+EQUIPAMENTOS_CASA = ("halter", "kettlebell", "elastico", "banco")
+# Exceções de equipamento compatíveis com qualquer local
+EQUIPAMENTOS_LIVRES = ("barra fixa", "peso corporal", "paralela")
+
+LOCAIS = ("academia", "casa", "arLivre")
+NIVEIS_REFEICAO = {
+    "pre_treino": ("opcao_economica", "opcao_equilibrada", "opcao_premium"),
+    "pos_treino": ("opcao_economica", "opcao_equilibrada", "opcao_premium"),
+}
+
+STOPWORDS = frozenset({"a", "o", "e", "de", "da", "do", "das", "dos", "com", "na", "no", "em", "para"})
+
+# Palavras do foco muscular de um dia (normalizadas) -> grupo
+FOCO_GRUPOS = {
+    "peito": "peito", "peitoral": "peito", "costas": "costas", "dorsal": "costas",
+    "ombro": "ombros", "ombros": "ombros", "biceps": "biceps", "triceps": "triceps",
+    "perna": "pernas", "pernas": "pernas", "inferiores": "pernas", "quadriceps": "pernas",
+    "posterior": "pernas", "gluteo": "gluteos", "gluteos": "gluteos",
+    "abdomen": "abdomen", "abdominal": "abdomen", "core": "abdomen", "cardio": "cardio",
+}
+
+
+# Alternativas da mais longa para a mais curta, para o match pegar a mais específica.
+# A palavra-chave precisa terminar a palavra (aceitando plural): "core" não casa
+# com "coreografia", mas "gluteo" casa com "gluteos".
+_PADROES_GRUPO = {
+    grupo: re.compile(
+        r"\b(?:" + "|".join(re.escape(p) for p in sorted(palavras, key=len, reverse=True)) + r")(?:e?s)?\b"
+    )
+    for grupo, palavras in GRUPOS_KEYWORDS.items()
+}
+
+
+def normalizar_nome(texto: Optional[str]) -> str:
+    """Minúsculas, sem acentos e com espaços colapsados."""
+    if not texto:
+        return ""
+    sem_acento = unicodedata.normalize("NFKD", texto)
+    sem_acento = "".join(c for c in sem_acento if not unicodedata.combining(c))
+    sem_acento = re.sub(r"[^a-z0-9 ]+", " ", sem_acento.lower())
+    return " ".join(sem_acento.split())
+
+
+def _tokens(texto_normalizado: str) -> list[str]:
+    return [t for t in texto_normalizado.split() if t not in STOPWORDS]
+
+
+def nome_corresponde(nome: str, termos: Iterable[str], limiar: float = 0.85) -> bool:
+    """
+    Verifica se `nome` corresponde a algum dos termos (já normalizados).
+
+    Um termo corresponde quando cada uma de suas palavras aparece no nome,
+    exatamente ou com similaridade >= `limiar` (tolera plural e erros de
+    digitação): "supino reto" casa com "Supino retos com barra".
+    """
+    tokens_nome = _tokens(normalizar_nome(nome))
+    if not tokens_nome:
+        return False
+
+    for termo in termos:
+        tokens_termo = _tokens(termo)
+        if tokens_termo and all(
+            any(t == n or SequenceMatcher(None, t, n).ratio() >= limiar for n in tokens_nome)
+            for t in tokens_termo
+        ):
+            return True
+    return False
+
+
+def grupos_do_foco(foco_muscular: Optional[str]) -> list[str]:
+    """Grupos musculares citados no foco de um dia ("Peito e Tríceps" -> ["peito", "triceps"])."""
+    grupos = []
+    for palavra in normalizar_nome(foco_muscular).split():
+        grupo = FOCO_GRUPOS.get(palavra)
+        if grupo and grupo not in grupos:
+            grupos.append(grupo)
+    return grupos
+
+
+def _grupo_por_palavras(texto_normalizado: str) -> Optional[str]:
+    melhor, tamanho = None, 0
+    for grupo, padrao in _PADROES_GRUPO.items():
+        for encontrado in padrao.finditer(texto_normalizado):
+            if len(encontrado.group()) > tamanho:
+                melhor, tamanho = grupo, len(encontrado.group())
+    return melhor
+
+
+def classificar_grupo(
+    nome: str,
+    descricao: Optional[str] = None,
+    foco_muscular: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Classifica o grupo muscular de um exercício.
+
+    Usa a palavra-chave mais específica do nome e, se não houver
+    correspondência, da descrição; por último, o primeiro grupo citado no foco muscular do dia
+    em que o exercício apareceu.
+    """
+    grupo = _grupo_por_palavras(normalizar_nome(nome))
+    if grupo is None and descricao:
+        grupo = _grupo_por_palavras(normalizar_nome(descricao))
+    if grupo is None and foco_muscular:
+        grupos = grupos_do_foco(foco_muscular)
+        grupo = grupos[0] if grupos else None
+    return grupo
+
+
+def locais_compativeis(nome: str) -> tuple[str, ...]:
+    """Locais em que o exercício pode ser executado, inferidos pelo equipamento citado no nome."""
+    texto = normalizar_nome(nome)
+    if any(e in texto for e in EQUIPAMENTOS_LIVRES):
+        return LOCAIS
+    if any(e in texto for e in EQUIPAMENTOS_ACADEMIA):
+        return ("academia",)
+    if any(e in texto for e in EQUIPAMENTOS_CASA):
+        return ("academia", "casa")
+    return LOCAIS
+
+
+# Base mínima embutida, usada quando o catálogo ainda não cobre um grupo/local
+EXERCICIOS_BASE: list[dict[str, str]] = [
+    {"nome": "Supino reto com barra", "grupo": "peito", "detalhes_execucao": "Escápulas retraídas, descer a barra até o peito com controle"},
+    {"nome": "Supino inclinado com halteres", "grupo": "peito", "detalhes_execucao": "Banco a 30 graus, cotovelos levemente fechados"},
+    {"nome": "Crucifixo na máquina", "grupo": "peito", "detalhes_execucao": "Braços semiflexionados, contrair o peitoral ao fechar"},
+    {"nome": "Flexão de braço", "grupo": "peito", "detalhes_execucao": "Corpo alinhado, peito próximo ao chão a cada repetição"},
+    {"nome": "Flexão de braço inclinada", "grupo": "peito", "detalhes_execucao": "Mãos apoiadas em superfície elevada, corpo reto"},
+    {"nome": "Flexão aberta", "grupo": "peito", "detalhes_execucao": "Mãos além da largura dos ombros, descer controlando"},
+    {"nome": "Puxada frontal na polia", "grupo": "costas", "detalhes_execucao": "Puxar a barra até o queixo levando os cotovelos para baixo"},
+    {"nome": "Remada curvada com barra", "grupo": "costas", "detalhes_execucao": "Tronco inclinado, coluna neutra, puxar em direção ao abdômen"},
+    {"nome": "Remada unilateral com halter", "grupo": "costas", "detalhes_execucao": "Apoio no banco, puxar o halter até a linha do quadril"},
+    {"nome": "Barra fixa", "grupo": "costas", "detalhes_execucao": "Pegada pronada, subir até o queixo passar a barra"},
+    {"nome": "Remada com elástico", "grupo": "costas", "detalhes_execucao": "Elástico preso à frente, puxar mantendo os ombros baixos"},
+    {"nome": "Remada invertida na barra fixa", "grupo": "costas", "detalhes_execucao": "Corpo inclinado sob a barra, puxar o peito até ela"},
+    {"nome": "Superman no solo", "grupo": "costas", "detalhes_execucao": "Deitado de bruços, elevar braços e pernas simultaneamente"},
+    {"nome": "Desenvolvimento com halteres", "grupo": "ombros", "detalhes_execucao": "Empurrar os halteres acima da cabeça sem arquear a lombar"},
+    {"nome": "Elevação lateral com halteres", "grupo": "ombros", "detalhes_execucao": "Elevar até a altura dos ombros com cotovelos levemente flexionados"},
+    {"nome": "Desenvolvimento na máquina", "grupo": "ombros", "detalhes_execucao": "Costas apoiadas, empurrar sem travar os cotovelos"},
+    {"nome": "Flexão pike", "grupo": "ombros", "detalhes_execucao": "Quadril elevado, descer a cabeça em direção ao chão"},
+    {"nome": "Elevação lateral com elástico", "grupo": "ombros", "detalhes_execucao": "Pisar no elástico e elevar os braços até a linha dos ombros"},
+    {"nome": "Rosca direta com barra", "grupo": "biceps", "detalhes_execucao": "Cotovelos fixos ao lado do corpo, subir sem balanço"},
+    {"nome": "Rosca alternada com halteres", "grupo": "biceps", "detalhes_execucao": "Supinar o punho durante a subida"},
+    {"nome": "Rosca com elástico", "grupo": "biceps", "detalhes_execucao": "Pisar no elástico e flexionar os cotovelos com controle"},
+    {"nome": "Barra fixa supinada", "grupo": "biceps", "detalhes_execucao": "Palmas voltadas para você, subir concentrando nos bíceps"},
+    {"nome": "Rosca isométrica com toalha", "grupo": "biceps", "detalhes_execucao": "Puxar a toalha presa sob os pés mantendo a contração"},
+    {"nome": "Tríceps na polia", "grupo": "triceps", "detalhes_execucao": "Cotovelos junto ao corpo, estender totalmente os braços"},
+    {"nome": "Tríceps francês com halter", "grupo": "triceps", "detalhes_execucao": "Halter atrás da cabeça, mover apenas os antebraços"},
+    {"nome": "Mergulho no banco", "grupo": "triceps", "detalhes_execucao": "Mãos no banco atrás do corpo, descer até 90 graus"},
+    {"nome": "Flexão diamante", "grupo": "triceps", "detalhes_execucao": "Mãos juntas formando um losango sob o peito"},
+    {"nome": "Mergulho entre cadeiras", "grupo": "triceps", "detalhes_execucao": "Mãos em duas cadeiras firmes, descer flexionando os cotovelos"},
+    {"nome": "Agachamento livre com barra", "grupo": "pernas", "detalhes_execucao": "Barra nos trapézios, descer com joelhos alinhados aos pés"},
+    {"nome": "Leg press 45", "grupo": "pernas", "detalhes_execucao": "Descer até 90 graus sem tirar a lombar do apoio"},
+    {"nome": "Cadeira extensora", "grupo": "pernas", "detalhes_execucao": "Estender os joelhos e segurar um segundo no topo"},
+    {"nome": "Agachamento com peso corporal", "grupo": "pernas", "detalhes_execucao": "Pés na largura dos ombros, quadril para trás"},
+    {"nome": "Afundo alternado", "grupo": "pernas", "detalhes_execucao": "Passo à frente, joelho de trás em direção ao chão"},
+    {"nome": "Agachamento búlgaro", "grupo": "pernas", "detalhes_execucao": "Pé de trás apoiado, tronco levemente inclinado"},
+    {"nome": "Panturrilha em pé", "grupo": "pernas", "detalhes_execucao": "Subir na ponta dos pés e descer alongando"},
+    {"nome": "Elevação pélvica", "grupo": "gluteos", "detalhes_execucao": "Ombros apoiados, elevar o quadril contraindo os glúteos"},
+    {"nome": "Coice de glúteo", "grupo": "gluteos", "detalhes_execucao": "Em quatro apoios, estender a perna para trás"},
+    {"nome": "Abdução de quadril com elástico", "grupo": "gluteos", "detalhes_execucao": "Elástico acima dos joelhos, afastar as pernas com controle"},
+    {"nome": "Prancha", "grupo": "abdomen", "detalhes_execucao": "Apoio nos antebraços, corpo alinhado, abdômen contraído"},
+    {"nome": "Abdominal crunch", "grupo": "abdomen", "detalhes_execucao": "Elevar as escápulas do chão sem puxar o pescoço"},
+    {"nome": "Abdominal bicicleta", "grupo": "abdomen", "detalhes_execucao": "Alternar cotovelo em direção ao joelho oposto"},
+    {"nome": "Polichinelo", "grupo": "cardio", "detalhes_execucao": "Ritmo constante, aterrissar com os joelhos levemente flexionados"},
+    {"nome": "Burpee", "grupo": "cardio", "detalhes_execucao": "Agachar, prancha, flexão e salto em sequência"},
+    {"nome": "Pular corda", "grupo": "cardio", "detalhes_execucao": "Saltos baixos na ponta dos pés"},
+    {"nome": "Mountain climber", "grupo": "cardio", "detalhes_execucao": "Em prancha, alternar os joelhos em direção ao peito"},
+    {"nome": "Corrida leve", "grupo": "cardio", "detalhes_execucao": "Ritmo confortável que permita conversar"},
+]
+
+# tipo -> nivel -> opções
+REFEICOES_BASE: dict[str, dict[str, list[dict[str, Any]]]] = {
+    "pre_treino": {
+        "opcao_economica": [
+            {"nome": "Banana com aveia", "custo_estimado": "R$ 3,00", "ingredientes": ["1 banana", "2 colheres de aveia"], "explicacao": "Carboidratos rápidos para energia"},
+            {"nome": "Pão francês com ovo mexido", "custo_estimado": "R$ 3,50", "ingredientes": ["1 pão francês", "1 ovo"], "explicacao": "Energia com um pouco de proteína"},
+            {"nome": "Cuscuz com manteiga", "custo_estimado": "R$ 2,50", "ingredientes": ["1 xícara de cuscuz", "1 colher de manteiga"], "explicacao": "Carboidrato acessível e de fácil digestão"},
+        ],
+        "opcao_equilibrada": [
+            {"nome": "Pão integral com pasta de amendoim", "custo_estimado": "R$ 5,00", "ingredientes": ["2 fatias de pão integral", "1 colher de pasta de amendoim"], "explicacao": "Carboidratos e gorduras boas"},
+            {"nome": "Iogurte natural com granola e mel", "custo_estimado": "R$ 6,00", "ingredientes": ["1 iogurte natural", "2 colheres de granola", "1 fio de mel"], "explicacao": "Proteína leve e carboidratos"},
+            {"nome": "Tapioca com banana e canela", "custo_estimado": "R$ 4,50", "ingredientes": ["3 colheres de goma de tapioca", "1 banana", "canela"], "explicacao": "Energia rápida e saborosa"},
+        ],
+        "opcao_premium": [
+            {"nome": "Tapioca com queijo e peito de peru", "custo_estimado": "R$ 8,00", "ingredientes": ["3 colheres de goma de tapioca", "30g queijo branco", "50g peito de peru"], "explicacao": "Proteínas e carboidratos de qualidade"},
+            {"nome": "Panqueca de aveia com whey", "custo_estimado": "R$ 9,00", "ingredientes": ["1 ovo", "3 colheres de aveia", "1 scoop de whey"], "explicacao": "Refeição completa e prática"},
+            {"nome": "Smoothie de frutas vermelhas com whey", "custo_estimado": "R$ 10,00", "ingredientes": ["1 xícara de frutas vermelhas", "1 scoop de whey", "200ml de leite"], "explicacao": "Antioxidantes e proteína"},
+        ],
+    },
+    "pos_treino": {
+        "opcao_economica": [
+            {"nome": "Arroz com ovo", "custo_estimado": "R$ 4,00", "ingredientes": ["1 xícara de arroz", "2 ovos"], "explicacao": "Proteína e carboidratos para recuperação"},
+            {"nome": "Macarrão com carne moída", "custo_estimado": "R$ 6,00", "ingredientes": ["100g de macarrão", "100g de carne moída"], "explicacao": "Reposição de glicogênio e proteína"},
+            {"nome": "Cuscuz com sardinha", "custo_estimado": "R$ 5,00", "ingredientes": ["1 xícara de cuscuz", "1 lata de sardinha"], "explicacao": "Proteína e ômega-3 baratos"},
+        ],
+        "opcao_equilibrada": [
+            {"nome": "Frango grelhado com batata doce", "custo_estimado": "R$ 7,00", "ingredientes": ["150g frango", "200g batata doce"], "explicacao": "Refeição completa para recuperação muscular"},
+            {"nome": "Omelete com legumes e pão integral", "custo_estimado": "R$ 6,50", "ingredientes": ["3 ovos", "legumes picados", "1 fatia de pão integral"], "explicacao": "Proteína de alto valor e fibras"},
+            {"nome": "Wrap de atum com salada", "custo_estimado": "R$ 8,00", "ingredientes": ["1 tortilha integral", "1 lata de atum", "folhas verdes"], "explicacao": "Prático e rico em proteína"},
+        ],
+        "opcao_premium": [
+            {"nome": "Salmão com quinoa e legumes", "custo_estimado": "R$ 15,00", "ingredientes": ["150g salmão", "1 xícara quinoa", "legumes variados"], "explicacao": "Ômega-3 e proteínas de alto valor biológico"},
+            {"nome": "Patinho grelhado com mandioca", "custo_estimado": "R$ 12,00", "ingredientes": ["150g patinho", "200g mandioca cozida"], "explicacao": "Proteína magra e carboidrato denso"},
+            {"nome": "Bowl de tofu com arroz integral", "custo_estimado": "R$ 11,00", "ingredientes": ["150g tofu", "1 xícara de arroz integral", "brócolis"], "explicacao": "Opção vegetal rica em proteína"},
+        ],
+    },
+}
+
+
+class IndicePrefixos:
+    """
+    Autocomplete por prefixo, sem acentos, sobre nomes do catálogo.
+
+    Funciona como uma trie compacta: guarda as chaves normalizadas em
+    ordem (o nome completo e o trecho a partir de cada palavra) e responde
+    com busca binária, O(log n + k), usando bem menos memória que nós por
+    caractere com 100k nomes.
+    """
+
+    MAX_VARREDURA = 2000
+
+    def __init__(self, itens: Iterable[dict[str, Any]] = ()):
+        self._itens: list[dict[str, Any]] = []
+        self._nomes: list[tuple[str, int]] = []
+        self._palavras: list[tuple[str, int]] = []
+        for item in itens:
+            self._indexar(item, ordenar=False)
+        self._nomes.sort()
+        self._palavras.sort()
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def adicionar(self, item: dict[str, Any]) -> None:
+        """
+        Inclui um item no lugar, O(n) por chave (insort). Serve para poucos
+        itens entre recargas; para muitos, construa um índice novo.
+        """
+        self._indexar(item, ordenar=True)
+
+    def buscar(
+        self,
+        prefixo: str,
+        limite: int = 10,
+        filtro: Optional[Callable[[dict[str, Any]], bool]] = None,
+    ) -> list[dict[str, Any]]:
+        """Itens cujo nome (ou alguma palavra dele) começa com `prefixo`; nomes completos primeiro."""
+        chave = normalizar_nome(prefixo)
+        if not chave:
+            return []
+
+        resultados: list[dict[str, Any]] = []
+        vistos: set[int] = set()
+        varridos = 0
+        for chaves in (self._nomes, self._palavras):
+            i = bisect_left(chaves, (chave,))
+            while i < len(chaves) and chaves[i][0].startswith(chave) and varridos < self.MAX_VARREDURA:
+                posicao = chaves[i][1]
+                i += 1
+                varridos += 1
+                if posicao in vistos:
+                    continue
+                vistos.add(posicao)
+                item = self._itens[posicao]
+                if filtro is not None and not filtro(item):
+                    continue
+                resultados.append(item)
+                if len(resultados) >= limite:
+                    return resultados
+        return resultados
+
+    def _indexar(self, item: dict[str, Any], ordenar: bool) -> None:
+        posicao = len(self._itens)
+        self._itens.append(item)
+
+        nome = normalizar_nome(item["nome"])
+        palavras = nome.split()
+        chaves_palavras = [
+            (" ".join(palavras[k:]), posicao)
+            for k in range(1, len(palavras))
+            if palavras[k] not in STOPWORDS
+        ]
+        if ordenar:
+            insort(self._nomes, (nome, posicao))
+            for chave in chaves_palavras:
+                insort(self._palavras, chave)
+        else:
+            self._nomes.append((nome, posicao))
+            self._palavras.extend(chaves_palavras)
+
+
+def _entrada_exercicio(ex: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": ex["id"],
+        "nome": ex["nome"],
+        "grupo_muscular": ex["grupo"],
+        "video_url": ex.get("video_url"),
+        "locais": ex["locais"],
+    }
+
+
+def _entrada_refeicao(tipo: str, nivel: str, refeicao: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": refeicao["id"],
+        "nome": refeicao["nome"],
+        "tipo": tipo,
+        "nivel": nivel,
+        "custo_estimado": refeicao.get("custo_estimado"),
+    }
+
+
+class IndiceCatalogo:
+    """
+    Índice invertido do catálogo.
+
+    Cada recarga constrói estruturas novas e as troca de uma vez, então
+    leitores concorrentes nunca veem um índice parcial. Entre recargas,
+    `adicionar_*` inclui os itens recém-gravados: os mapas por grupo e por
+    slot são copiados e trocados, e os índices de prefixo são atualizados
+    no lugar (sob o lock; uma busca concorrente pode ou não ver o item).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recarga = threading.Lock()  # uma recarga por vez (ver `obter_indice`)
+        self._exercicios_por_chave: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        self._refeicoes_por_slot: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        self._exercicios_por_nome: dict[str, dict[str, Any]] = {}
+        self._nomes_refeicao: frozenset[str] = frozenset()
+        self.prefixos_exercicios = IndicePrefixos()
+        self.prefixos_refeicoes = IndicePrefixos()
+        self.carregado_em: float = 0.0
+        self.com_banco = False
+
+    def exercicios(self, grupo: str, local: Optional[str] = None) -> list[dict[str, Any]]:
+        """Exercícios do grupo executáveis no local (todos os locais se None)."""
+        if local is None:
+            vistos: dict[str, dict[str, Any]] = {}
+            for loc in LOCAIS:
+                for ex in self._exercicios_por_chave.get((grupo, loc), []):
+                    vistos.setdefault(ex["nome"], ex)
+            return list(vistos.values())
+        return list(self._exercicios_por_chave.get((grupo, local), []))
+
+    def refeicoes(self, tipo: str, nivel: str) -> list[dict[str, Any]]:
+        return list(self._refeicoes_por_slot.get((tipo, nivel), []))
+
+    def exercicio(self, nome: str) -> Optional[dict[str, Any]]:
+        return self._exercicios_por_nome.get(normalizar_nome(nome))
+
+    def expirado(self) -> bool:
+        return time.monotonic() - self.carregado_em > settings.CATALOGO_INDICE_TTL_SEGUNDOS
+
+    def recarregar(self, db: Optional[Session] = None) -> None:
+        """Reconstrói o índice a partir do banco (se `db` for informado) e da base embutida."""
+        inicio = time.perf_counter()
+        exercicios: list[dict[str, Any]] = []
+        refeicoes: list[tuple[str, str, dict[str, Any]]] = []
+
+        if db is not None:
+            from app.database.models.catalogo_exercicio import CatalogoExercicio
+            from app.database.models.nutricao import CatalogoRefeicao
+
+            for item in db.query(CatalogoExercicio).order_by(CatalogoExercicio.id).all():
+                exercicios.append({
+                    "id": item.id,
+                    "nome": item.nome,
+                    "grupo": item.grupo_muscular or classificar_grupo(item.nome, item.descricao),
+                    "detalhes_execucao": item.descricao or "",
+                    "video_url": item.video_url,
+                })
+            for item in db.query(CatalogoRefeicao).order_by(CatalogoRefeicao.id).all():
+                refeicoes.append((item.tipo, item.nivel, {
+                    "id": item.id,
+                    "nome": item.nome,
+                    "custo_estimado": item.custo_estimado or "",
+                    "ingredientes": list(item.ingredientes or []),
+                    "link_receita": item.link_receita,
+                    "explicacao": item.explicacao or "",
+                }))
+
+        exercicios.extend(dict(ex, id=None) for ex in EXERCICIOS_BASE)
+        for tipo, niveis in REFEICOES_BASE.items():
+            for nivel, opcoes in niveis.items():
+                refeicoes.extend((tipo, nivel, dict(r, id=None)) for r in opcoes)
+
+        por_chave: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        por_nome: dict[str, dict[str, Any]] = {}
+        for ex in exercicios:
+            chave_nome = normalizar_nome(ex["nome"])
+            if chave_nome in por_nome:
+                continue
+            ex["locais"] = locais_compativeis(ex["nome"])
+            por_nome[chave_nome] = ex
+            if not ex["grupo"]:
+                continue
+            for local in ex["locais"]:
+                por_chave.setdefault((ex["grupo"], local), []).append(ex)
+
+        por_slot: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        nomes_refeicao: set[str] = set()
+        entradas_refeicao = []
+        for tipo, nivel, refeicao in refeicoes:
+            chave_nome = normalizar_nome(refeicao["nome"])
+            if chave_nome in nomes_refeicao:
+                continue
+            nomes_refeicao.add(chave_nome)
+            por_slot.setdefault((tipo, nivel), []).append(refeicao)
+            entradas_refeicao.append(_entrada_refeicao(tipo, nivel, refeicao))
+
+        prefixos_exercicios = IndicePrefixos(_entrada_exercicio(ex) for ex in por_nome.values())
+        prefixos_refeicoes = IndicePrefixos(entradas_refeicao)
+
+        with self._lock:
+            self._exercicios_por_chave = por_chave
+            self._exercicios_por_nome = por_nome
+            self._refeicoes_por_slot = por_slot
+            self._nomes_refeicao = frozenset(nomes_refeicao)
+            self.prefixos_exercicios = prefixos_exercicios
+            self.prefixos_refeicoes = prefixos_refeicoes
+            self.carregado_em = time.monotonic()
+            self.com_banco = db is not None
+
+        logger.info(
+            f"Índice do catálogo recarregado: {len(por_nome)} exercícios, "
+            f"{len(nomes_refeicao)} refeições em {(time.perf_counter() - inicio) * 1000:.1f}ms"
+        )
+
+    def adicionar_exercicio(self, item: Any) -> None:
+        """Inclui um CatalogoExercicio recém-criado sem recarregar tudo (ignorado se o nome já existe)."""
+        ex = {
+            "id": item.id,
+            "nome": item.nome,
+            "grupo": item.grupo_muscular,
+            "detalhes_execucao": item.descricao or "",
+            "video_url": item.video_url,
+            "locais": locais_compativeis(item.nome),
+        }
+        with self._lock:
+            if normalizar_nome(item.nome) in self._exercicios_por_nome:
+                return
+            por_chave = dict(self._exercicios_por_chave)
+            if ex["grupo"]:
+                for local in ex["locais"]:
+                    por_chave[(ex["grupo"], local)] = por_chave.get((ex["grupo"], local), []) + [ex]
+            self._exercicios_por_chave = por_chave
+            self._exercicios_por_nome = {**self._exercicios_por_nome, normalizar_nome(item.nome): ex}
+            self.prefixos_exercicios.adicionar(_entrada_exercicio(ex))
+
+    def adicionar_refeicao(self, item: Any) -> None:
+        """Inclui um CatalogoRefeicao recém-criado sem recarregar tudo (ignorado se o nome já existe)."""
+        refeicao = {
+            "id": item.id,
+            "nome": item.nome,
+            "custo_estimado": item.custo_estimado or "",
+            "ingredientes": list(item.ingredientes or []),
+            "link_receita": item.link_receita,
+            "explicacao": item.explicacao or "",
+        }
+        with self._lock:
+            chave_nome = normalizar_nome(item.nome)
+            if chave_nome in self._nomes_refeicao:
+                return
+            self._nomes_refeicao = self._nomes_refeicao | {chave_nome}
+            slot = (item.tipo, item.nivel)
+            self._refeicoes_por_slot = {
+                **self._refeicoes_por_slot,
+                slot: self._refeicoes_por_slot.get(slot, []) + [refeicao],
+            }
+            self.prefixos_refeicoes.adicionar(_entrada_refeicao(item.tipo, item.nivel, refeicao))
+
+
+indice_catalogo = IndiceCatalogo()
+
+
+def _precisa_recarregar(db: Optional[Session]) -> bool:
+    precisa_banco = db is not None and not indice_catalogo.com_banco
+    return indice_catalogo.carregado_em == 0.0 or precisa_banco or (db is not None and indice_catalogo.expirado())
+
+
+def obter_indice(db: Optional[Session] = None) -> IndiceCatalogo:
+    """
+    Retorna o índice, recarregando-o se expirou ou se ainda não incluiu o banco.
+
+    Só uma requisição recarrega por vez; as outras seguem com o índice
+    atual enquanto isso. Só a primeira carga do processo, sem índice
+    nenhum para servir, faz as demais esperarem.
+    """
+    recarregar = _precisa_recarregar(db)
+    registrar_cache("indice_catalogo", acerto=not recarregar)
+    if not recarregar:
+        return indice_catalogo
+
+    primeira_carga = indice_catalogo.carregado_em == 0.0
+    if not indice_catalogo._recarga.acquire(blocking=primeira_carga):
+        return indice_catalogo
+    try:
+        # Outra requisição pode ter recarregado enquanto esta esperava
+        if _precisa_recarregar(db):
+            try:
+                indice_catalogo.recarregar(db)
+            except Exception as e:
+                logger.error("Erro ao recarregar índice do catálogo: %s", e)
+                if indice_catalogo.carregado_em == 0.0:
+                    indice_catalogo.recarregar(None)
+    finally:
+        indice_catalogo._recarga.release()
+    return indice_catalogo
+
+
+def recarregar_indice(db: Session) -> None:
+    indice_catalogo.recarregar(db)
+
+
+_SQL_BUSCA = {
+    "exercicios": """
+        SELECT id, nome, grupo_muscular, video_url,
+               greatest(
+                   public.similarity(aican.f_unaccent(lower(nome)), :termo),
+                   ts_rank(to_tsvector('portuguese', aican.f_unaccent(coalesce(nome, '') || ' ' || coalesce(descricao, ''))),
+                           plainto_tsquery('portuguese', :termo))
+               ) AS relevancia
+        FROM aican.catalogo_exercicios
+        WHERE (aican.f_unaccent(lower(nome)) OPERATOR(public.%) :termo
+               OR to_tsvector('portuguese', aican.f_unaccent(coalesce(nome, '') || ' ' || coalesce(descricao, '')))
+                  @@ plainto_tsquery('portuguese', :termo))
+          AND (CAST(:grupo AS varchar) IS NULL OR grupo_muscular = :grupo)
+        ORDER BY relevancia DESC, nome
+        LIMIT :limite
+    """,
+    "refeicoes": """
+        SELECT id, nome, tipo, nivel, custo_estimado,
+               greatest(
+                   public.similarity(aican.f_unaccent(lower(nome)), :termo),
+                   ts_rank(to_tsvector('portuguese', aican.f_unaccent(coalesce(nome, '') || ' ' || coalesce(explicacao, ''))),
+                           plainto_tsquery('portuguese', :termo))
+               ) AS relevancia
+        FROM aican.catalogo_refeicoes
+        WHERE (aican.f_unaccent(lower(nome)) OPERATOR(public.%) :termo
+               OR to_tsvector('portuguese', aican.f_unaccent(coalesce(nome, '') || ' ' || coalesce(explicacao, '')))
+                  @@ plainto_tsquery('portuguese', :termo))
+          AND (CAST(:tipo AS varchar) IS NULL OR tipo = :tipo)
+        ORDER BY relevancia DESC, nome
+        LIMIT :limite
+    """,
+}
+
+
+# Com filtro de local, quantas vezes o limite é lido do banco antes de filtrar
+_FOLGA_FILTRO_LOCAL = 4
+
+
+def buscar_no_banco(
+    db: Session,
+    tabela: str,
+    termo: str,
+    limite: int = 10,
+    grupo: Optional[str] = None,
+    tipo: Optional[str] = None,
+    local: Optional[str] = None,
+) -> list[dict[str, Any]]:
+    """
+    Busca aproximada no catálogo usando os índices GIN de trigramas e de
+    tsvector em português (migração 5d8e9f0a1b2c).
+
+    O local de um exercício é inferido do nome (`locais_compativeis`), não
+    fica numa coluna: com `local`, lê mais linhas e filtra aqui.
+    """
+    linhas = db.execute(
+        text(_SQL_BUSCA[tabela]),
+        {
+            "termo": normalizar_nome(termo),
+            "limite": limite * _FOLGA_FILTRO_LOCAL if local else limite,
+            "grupo": grupo,
+            "tipo": tipo,
+        },
+    ).mappings().all()
+    resultados = [{k: v for k, v in linha.items() if k != "relevancia"} for linha in linhas]
+    if local:
+        resultados = [r for r in resultados if local in locais_compativeis(r["nome"])]
+    return resultados[:limite]
+
+
+def classificar_catalogo(db: Session, reclassificar: bool = False, lote: int = 500) -> int:
+    """
+    Preenche `grupo_muscular` do CatalogoExercicio em lote.
+
+    Para exercícios que o nome e a descrição não classificam, usa o foco
+    muscular mais comum dos PlanoDia em que o exercício apareceu.
+
+    Returns:
+        Quantidade de exercícios classificados
+    """
+    from app.database.models.catalogo_exercicio import CatalogoExercicio
+    from app.database.models.plano import PlanoDia, PlanoExercicio
+
+    query = db.query(CatalogoExercicio)
+    if not reclassificar:
+        query = query.filter(CatalogoExercicio.grupo_muscular.is_(None))
+    pendentes = query.order_by(CatalogoExercicio.id).all()
+
+    classificados = 0
+    for inicio in range(0, len(pendentes), lote):
+        bloco = pendentes[inicio:inicio + lote]
+
+        focos: dict[str, Counter] = {}
+        linhas = (
+            db.query(PlanoExercicio.nome, PlanoDia.foco_muscular)
+            .join(PlanoDia, PlanoExercicio.dia_id == PlanoDia.id)
+            .filter(PlanoExercicio.nome.in_([item.nome for item in bloco]))
+            .all()
+        )
+        for nome, foco in linhas:
+            if foco:
+                focos.setdefault(nome, Counter())[foco] += 1
+
+        for item in bloco:
+            foco = focos[item.nome].most_common(1)[0][0] if item.nome in focos else None
+            grupo = classificar_grupo(item.nome, item.descricao, foco)
+            if grupo and grupo != item.grupo_muscular:
+                item.grupo_muscular = grupo
+                classificados += 1
+
+        db.commit()
+
+    logger.info(f"Classificação do catálogo: {classificados} de {len(pendentes)} exercícios atualizados")
+    return classificados
+
+
+if __name__ == "__main__":
+    from app.database.base import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as sessao:
+        classificar_catalogo(sessao)
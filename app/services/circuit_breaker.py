@@ -0,0 +1,185 @@
+# app/services/circuit_breaker.py
+"""Circuit breaker para chamadas a serviços externos (ex.: API de IA)."""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from app.core.exceptions import ServicoIndisponivelError
+
+logger = logging.getLogger(__name__)
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+SEMI_ABERTO = "semi_aberto"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker com janela deslizante por tempo.
+
+    - FECHADO: chamadas passam; abre quando a taxa de falha na janela
+      atinge `taxa_falha` (com pelo menos `minimo_chamadas` registradas).
+    - ABERTO: chamadas falham imediatamente com ServicoIndisponivelError
+      até `tempo_aberto` segundos se passarem.
+    - SEMI_ABERTO: até `sondas` chamadas de teste passam; se todas tiverem
+      sucesso o circuito fecha, qualquer falha o reabre.
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        taxa_falha: float = 0.5,
+        janela_segundos: float = 60.0,
+        minimo_chamadas: int = 5,
+        tempo_aberto: float = 30.0,
+        sondas: int = 2,
+    ):
+        self.nome = nome
+        self.taxa_falha = taxa_falha
+        self.janela_segundos = janela_segundos
+        self.minimo_chamadas = minimo_chamadas
+        self.tempo_aberto = tempo_aberto
+        self.sondas = max(1, sondas)
+
+        self._lock = threading.Lock()
+        self._estado = FECHADO
+        self._janela: deque = deque()  # (timestamp, sucesso)
+        self._aberto_em = 0.0
+        self._sondas_em_voo = 0
+        self._sondas_ok = 0
+        self._ouvintes: list[Callable[[str, str], None]] = []
+        self.transicoes: dict[str, int] = {FECHADO: 0, ABERTO: 0, SEMI_ABERTO: 0}
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            self._verificar_timeout()
+            return self._estado
+
+    def adicionar_ouvinte(self, callback: Callable[[str, str], None]) -> None:
+        """Registra callback(estado_anterior, novo_estado) chamado a cada transição."""
+        self._ouvintes.append(callback)
+
+    def antes_da_chamada(self) -> None:
+        """Reserva a passagem de uma chamada ou falha rápido se o circuito estiver aberto."""
+        with self._lock:
+            self._verificar_timeout()
+
+            if self._estado == ABERTO:
+                raise ServicoIndisponivelError(
+                    "Serviço de IA temporariamente indisponível. Tente novamente em instantes.",
+                    retry_after=self._segundos_restantes(),
+                )
+
+            if self._estado == SEMI_ABERTO:
+                if self._sondas_em_voo >= self.sondas:
+                    raise ServicoIndisponivelError(
+                        "Serviço de IA em recuperação. Tente novamente em instantes.",
+                        retry_after=math.ceil(self.tempo_aberto / 2),
+                    )
+                self._sondas_em_voo += 1
+
+    def cancelar_chamada(self) -> None:
+        """Desfaz `antes_da_chamada` quando a chamada nem chegou a ser feita."""
+        with self._lock:
+            if self._estado == SEMI_ABERTO:
+                self._sondas_em_voo = max(0, self._sondas_em_voo - 1)
+
+    def registrar_sucesso(self) -> None:
+        with self._lock:
+            if self._estado == SEMI_ABERTO:
+                self._sondas_em_voo = max(0, self._sondas_em_voo - 1)
+                self._sondas_ok += 1
+                if self._sondas_ok >= self.sondas:
+                    self._transicionar(FECHADO)
+                return
+            self._registrar(True)
+
+    def registrar_falha(self) -> None:
+        with self._lock:
+            if self._estado == SEMI_ABERTO:
+                self._transicionar(ABERTO)
+                return
+            if self._estado == ABERTO:
+                return
+            self._registrar(False)
+
+            total = len(self._janela)
+            falhas = sum(1 for _, ok in self._janela if not ok)
+            if total >= self.minimo_chamadas and falhas / total >= self.taxa_falha:
+                self._transicionar(ABERTO)
+
+    def chamar(self, func: Callable, *args, **kwargs):
+        """Executa `func` protegida pelo circuito."""
+        self.antes_da_chamada()
+        try:
+            resultado = func(*args, **kwargs)
+        except Exception:
+            self.registrar_falha()
+            raise
+        self.registrar_sucesso()
+        return resultado
+
+    def snapshot(self) -> dict:
+        """Estado atual para exportação (health check e métricas)."""
+        with self._lock:
+            self._verificar_timeout()
+            self._podar_janela(time.monotonic())
+            total = len(self._janela)
+            falhas = sum(1 for _, ok in self._janela if not ok)
+            return {
+                "nome": self.nome,
+                "estado": self._estado,
+                "chamadas_janela": total,
+                "falhas_janela": falhas,
+                "taxa_falha": round(falhas / total, 3) if total else 0.0,
+                "retry_after": self._segundos_restantes() if self._estado == ABERTO else 0,
+                "transicoes": dict(self.transicoes),
+            }
+
+    # --- internos (chamados com o lock adquirido) ---
+
+    def _registrar(self, sucesso: bool) -> None:
+        agora = time.monotonic()
+        self._janela.append((agora, sucesso))
+        self._podar_janela(agora)
+
+    def _podar_janela(self, agora: float) -> None:
+        limite = agora - self.janela_segundos
+        while self._janela and self._janela[0][0] < limite:
+            self._janela.popleft()
+
+    def _verificar_timeout(self) -> None:
+        if self._estado == ABERTO and time.monotonic() - self._aberto_em >= self.tempo_aberto:
+            self._transicionar(SEMI_ABERTO)
+
+    def _segundos_restantes(self) -> int:
+        restante = self.tempo_aberto - (time.monotonic() - self._aberto_em)
+        return max(1, math.ceil(restante))
+
+    def _transicionar(self, novo_estado: str) -> None:
+        anterior = self._estado
+        if anterior == novo_estado:
+            return
+
+        self._estado = novo_estado
+        self.transicoes[novo_estado] += 1
+        self._sondas_em_voo = 0
+        self._sondas_ok = 0
+        if novo_estado == ABERTO:
+            self._aberto_em = time.monotonic()
+        elif novo_estado == FECHADO:
+            self._janela.clear()
+
+        log = logger.warning if novo_estado == ABERTO else logger.info
+        log(f"Circuit breaker '{self.nome}': {anterior} -> {novo_estado}")
+
+        for callback in self._ouvintes:
+            try:
+                callback(anterior, novo_estado)
+            except Exception as e:
+                logger.error(f"Erro em ouvinte do circuit breaker '{self.nome}': {e}")
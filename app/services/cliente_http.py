@@ -0,0 +1,136 @@
+# app/services/cliente_http.py
+"""
+Clientes httpx usados pelo google-genai.
+
+Sem `HttpOptions`, o google-genai repassa `timeout=None` ao httpx em cada
+requisição, ou seja, sem timeout nenhum: uma conexão travada segura a
+thread por minutos. Aqui os clientes síncrono e assíncrono são criados
+explicitamente com:
+
+- timeouts por fase: a conexão, a escrita e a espera por uma conexão do
+  pool têm tetos curtos fixos; a leitura recebe o timeout da chamada
+  (o que resta do prazo da requisição, limitado a
+  `LLM_TIMEOUT_LEITURA_SEGUNDOS`);
+- pool de conexões keep-alive limitado ao tamanho do limitador AIMD
+  (`LLM_CONCORRENCIA_MAX`, o dobro no total para comportar os hedges);
+- HTTP/2 quando o pacote `h2` está instalado.
+
+Conexões novas x reutilizadas e timeouts por fase viram métricas.
+"""
+
+import importlib.util
+import logging
+from typing import Any
+
+import httpx
+
+from app.core.config import settings
+from app.core.metricas import LLM_CONEXOES, LLM_TIMEOUTS
+
+logger = logging.getLogger(__name__)
+
+_FASES_TIMEOUT = (
+    (httpx.ConnectTimeout, "conexao"),
+    (httpx.ReadTimeout, "leitura"),
+    (httpx.WriteTimeout, "escrita"),
+    (httpx.PoolTimeout, "pool"),
+)
+
+
+def http2_disponivel() -> bool:
+    return settings.LLM_HTTP2 and importlib.util.find_spec("h2") is not None
+
+
+def _timeout(total: Any) -> Any:
+    """
+    Timeout por fase a partir do timeout total da chamada (segundos).
+
+    Um `httpx.Timeout` pronto ou `USE_CLIENT_DEFAULT` (chamada sem
+    `timeout=`, que usa os timeouts do cliente) passam sem alteração.
+    """
+    if total is httpx.USE_CLIENT_DEFAULT or isinstance(total, httpx.Timeout):
+        return total
+    leitura = settings.LLM_TIMEOUT_LEITURA_SEGUNDOS if total is None else total
+    return httpx.Timeout(
+        connect=min(settings.LLM_TIMEOUT_CONEXAO_SEGUNDOS, leitura),
+        read=leitura,
+        write=min(settings.LLM_TIMEOUT_ESCRITA_SEGUNDOS, leitura),
+        pool=min(settings.LLM_TIMEOUT_CONEXAO_SEGUNDOS, leitura),
+    )
+
+
+def _registrar_timeout(erro: httpx.TimeoutException) -> None:
+    fase = next((nome for tipo, nome in _FASES_TIMEOUT if isinstance(erro, tipo)), "outro")
+    LLM_TIMEOUTS.labels(fase).inc()
+
+
+def _registrar_conexao(resposta: httpx.Response) -> None:
+    nova = resposta.request.extensions.get("aican_conexao", {}).get("nova", False)
+    LLM_CONEXOES.labels("nova" if nova else "reutilizada", resposta.http_version).inc()
+
+
+class ClienteHttpLLM(httpx.Client):
+    """httpx.Client que traduz o timeout numérico do google-genai em timeouts por fase."""
+
+    def build_request(self, *args: Any, timeout: Any = httpx.USE_CLIENT_DEFAULT, **kwargs: Any) -> httpx.Request:
+        request = super().build_request(*args, timeout=_timeout(timeout), **kwargs)
+        estado: dict[str, bool] = {}
+        request.extensions["aican_conexao"] = estado
+
+        def rastrear(evento: str, _info: dict) -> None:
+            if evento == "connection.connect_tcp.complete":
+                estado["nova"] = True
+
+        request.extensions["trace"] = rastrear
+        return request
+
+    def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        try:
+            resposta = super().send(request, **kwargs)
+        except httpx.TimeoutException as e:
+            _registrar_timeout(e)
+            raise
+        _registrar_conexao(resposta)
+        return resposta
+
+
+class ClienteHttpLLMAsync(httpx.AsyncClient):
+    """Versão assíncrona de `ClienteHttpLLM`."""
+
+    def build_request(self, *args: Any, timeout: Any = httpx.USE_CLIENT_DEFAULT, **kwargs: Any) -> httpx.Request:
+        request = super().build_request(*args, timeout=_timeout(timeout), **kwargs)
+        estado: dict[str, bool] = {}
+        request.extensions["aican_conexao"] = estado
+
+        async def rastrear(evento: str, _info: dict) -> None:
+            if evento == "connection.connect_tcp.complete":
+                estado["nova"] = True
+
+        request.extensions["trace"] = rastrear
+        return request
+
+    async def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        try:
+            resposta = await super().send(request, **kwargs)
+        except httpx.TimeoutException as e:
+            _registrar_timeout(e)
+            raise
+        _registrar_conexao(resposta)
+        return resposta
+
+
+def _limites() -> httpx.Limits:
+    keepalive = settings.LLM_HTTP_CONEXOES_KEEPALIVE or settings.LLM_CONCORRENCIA_MAX
+    return httpx.Limits(
+        max_connections=2 * keepalive,
+        max_keepalive_connections=keepalive,
+        keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_SEGUNDOS,
+    )
+
+
+def criar_clientes_http() -> tuple[ClienteHttpLLM, ClienteHttpLLMAsync]:
+    http2 = http2_disponivel()
+    if settings.LLM_HTTP2 and not http2:
+        logger.info("Pacote h2 ausente: cliente da IA usando HTTP/1.1")
+    argumentos = {"timeout": _timeout(None), "limits": _limites(), "http2": http2}
+    return ClienteHttpLLM(**argumentos), ClienteHttpLLMAsync(**argumentos)
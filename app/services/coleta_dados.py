@@ -3,11 +3,14 @@
 from sqlalchemy.orm import Session
 from app.database.models.catalogo_exercicio import CatalogoExercicio
 from app.database.models.nutricao import CatalogoRefeicao
+from app.core.rastreamento import tracer
+from app.services.catalogo import classificar_grupo, indice_catalogo
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@tracer.start_as_current_span("catalogo.coletar")
 def salvar_exercicios_e_refeicoes(plano: dict, db: Session):
     """
     Salva exercícios e refeições únicos nas tabelas de catálogo.
@@ -16,30 +19,54 @@ def salvar_exercicios_e_refeicoes(plano: dict, db: Session):
     
     novos_exercicios = 0
     novas_refeicoes = 0
+    adicionados = []
 
     try:
-        # Coletar Exercícios
         dias = plano.get("dias_de_treino", [])
+        nutricao = plano.get("sugestoes_nutricionais", {})
+
+        # Uma consulta por tabela para saber o que já existe no catálogo
+        nomes_exercicios = {ex.get("nome") for dia in dias for ex in dia.get("exercicios", []) if ex.get("nome")}
+        nomes_refeicoes = {
+            r.get("nome")
+            for tipo in ["pre_treino", "pos_treino"]
+            for r in nutricao.get(tipo, {}).values()
+            if r.get("nome")
+        }
+        existentes_ex = set()
+        if nomes_exercicios:
+            existentes_ex.update(
+                n for (n,) in db.query(CatalogoExercicio.nome).filter(CatalogoExercicio.nome.in_(nomes_exercicios))
+            )
+        existentes_ref = set()
+        if nomes_refeicoes:
+            existentes_ref.update(
+                n for (n,) in db.query(CatalogoRefeicao.nome).filter(CatalogoRefeicao.nome.in_(nomes_refeicoes))
+            )
+
+        # Coletar Exercícios
         for dia in dias:
             exercicios = dia.get("exercicios", [])
             for ex in exercicios:
                 nome = ex.get("nome")
                 if not nome:
                     continue
-                
-                # Verifica se já existe no catálogo
-                existe = db.query(CatalogoExercicio).filter(CatalogoExercicio.nome == nome).first()
-                if not existe:
+
+                if nome not in existentes_ex:
+                    existentes_ex.add(nome)
                     novo_ex = CatalogoExercicio(
                         nome=nome,
+                        grupo_muscular=classificar_grupo(
+                            nome, ex.get("detalhes_execucao"), dia.get("foco_muscular")
+                        ),
                         descricao=ex.get("detalhes_execucao"),
                         video_url=ex.get("video_url")
                     )
                     db.add(novo_ex)
+                    adicionados.append(novo_ex)
                     novos_exercicios += 1
 
         # Coletar Refeições
-        nutricao = plano.get("sugestoes_nutricionais", {})
         for tipo in ["pre_treino", "pos_treino"]:
             opcoes = nutricao.get(tipo, {})
             for nivel, refeicao_data in opcoes.items():
@@ -47,10 +74,8 @@ def salvar_exercicios_e_refeicoes(plano: dict, db: Session):
                 if not nome:
                     continue
 
-                # Verifica se já existe no catálogo
-                existe = db.query(CatalogoRefeicao).filter(CatalogoRefeicao.nome == nome).first()
-                
-                if not existe:
+                if nome not in existentes_ref:
+                    existentes_ref.add(nome)
                     nova_ref = CatalogoRefeicao(
                         nome=nome,
                         custo_estimado=refeicao_data.get("custo_estimado"),
@@ -61,9 +86,21 @@ def salvar_exercicios_e_refeicoes(plano: dict, db: Session):
                         explicacao=refeicao_data.get("explicacao")
                     )
                     db.add(nova_ref)
+                    adicionados.append(nova_ref)
                     novas_refeicoes += 1
 
+        # O flush preenche os ids; desanexados, os objetos não expiram no
+        # commit e o índice lê os atributos sem uma consulta por item
+        db.flush()
+        for item in adicionados:
+            db.expunge(item)
         db.commit()
+
+        for item in adicionados:
+            if isinstance(item, CatalogoExercicio):
+                indice_catalogo.adicionar_exercicio(item)
+            else:
+                indice_catalogo.adicionar_refeicao(item)
         logger.info(f"Dados coletados! Novos Exercícios: {novos_exercicios}, Novas Refeições: {novas_refeicoes}")
 
     except Exception as e:
@@ -0,0 +1,268 @@
+# app/services/construtor_prompt.py
+"""
+Parte variável dos prompts: dados do usuário e restrições de preferência
+dentro de um orçamento de tokens.
+
+As preferências chegam ranqueadas (`ranquear_preferencias`): um item por
+nome normalizado, com o voto mais recente valendo e prioridade dada pela
+soma dos feedbacks com peso que cai pela metade a cada
+`PREFERENCIAS_MEIA_VIDA_DIAS` (recência e frequência).
+
+`montar_restricoes` lista os itens na ordem de prioridade enquanto
+couberem no orçamento; os de menor prioridade viram categorias
+("exercícios de impacto (3)") e, se ainda faltar espaço, as categorias
+menos relevantes e os itens sem categoria ficam de fora. Itens fora do
+prompt continuam valendo na substituição local de `preferencias`.
+"""
+
+import math
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from string import Template
+from typing import Iterable, Optional
+
+from app.core.config import settings
+from app.services.catalogo import classificar_grupo, normalizar_nome
+
+# Caracteres por token: a mesma aproximação do provedor stub
+CARACTERES_POR_TOKEN = 4
+
+# Palavras-chave (normalizadas) -> categoria usada ao resumir itens rejeitados.
+# A ordem importa: a primeira categoria com correspondência vence.
+CATEGORIAS_EXERCICIO: dict[str, tuple[str, ...]] = {
+    "exercícios de impacto": (
+        "burpee", "polichinelo", "salto", "saltando", "pular corda", "corrida", "sprint",
+        "trote", "pliometria", "box jump", "mountain climber",
+    ),
+}
+ROTULOS_GRUPO = {
+    "abdomen": "exercícios de abdômen",
+    "gluteos": "exercícios de glúteos",
+    "pernas": "exercícios de pernas",
+    "peito": "exercícios de peito",
+    "costas": "exercícios de costas",
+    "ombros": "exercícios de ombros",
+    "triceps": "exercícios de tríceps",
+    "biceps": "exercícios de bíceps",
+    "cardio": "exercícios aeróbicos",
+}
+CATEGORIAS_REFEICAO: dict[str, tuple[str, ...]] = {
+    "suplementos": ("whey", "albumina", "shake", "suplemento"),
+    "preparações com ovo": ("ovo", "ovos", "omelete", "clara", "claras"),
+    "peixes": ("peixe", "atum", "salmao", "sardinha", "tilapia", "merluza"),
+    "frango": ("frango", "peito de peru", "peru"),
+    "carne vermelha": ("carne", "patinho", "bife", "alcatra", "picanha"),
+    "laticínios": ("queijo", "iogurte", "leite", "cottage", "requeijao", "ricota"),
+    "tapioca e cuscuz": ("tapioca", "cuscuz"),
+    "pães e massas": ("pao", "macarrao", "massa", "torrada", "wrap"),
+    "batatas e raízes": ("batata", "mandioca", "inhame", "aipim"),
+}
+
+SUFIXO_PLANO = Template(
+    """
+        DADOS DO USUÁRIO:
+        Nome: $NOME | Altura: $ALTURA cm | Peso: $PESO kg | Idade: $IDADE anos
+        IMC: $IMC | Frequência: $FREQUENCIA x/semana | Local: $LOCAL | Objetivo: $OBJETIVO
+
+        Gere exatamente $FREQUENCIA dias de treino.
+        $PREFERENCIAS
+
+        COMECE COM { E TERMINE COM } - NADA MAIS!
+    """
+)
+
+_RESTRICAO_EXERCICIOS = Template(
+    """
+
+RESTRIÇÃO CRÍTICA - EXERCÍCIOS PROIBIDOS:
+O usuário JÁ TESTOU e NÃO GOSTOU dos seguintes exercícios. JAMAIS os inclua:
+$ITENS
+$CATEGORIAS
+Substitua por exercícios alternativos que trabalhem os mesmos grupos musculares.
+"""
+)
+
+_RESTRICAO_REFEICOES = Template(
+    """
+
+RESTRIÇÃO CRÍTICA - REFEIÇÕES PROIBIDAS:
+O usuário NÃO GOSTA das seguintes refeições/ingredientes. EVITE COMPLETAMENTE:
+$ITENS
+$CATEGORIAS
+Sugira alternativas diferentes com outras proteínas e carboidratos.
+"""
+)
+
+_CATEGORIAS_EXERCICIOS = "Rejeitou também outros exercícios destas categorias; prefira alternativas fora delas: "
+_CATEGORIAS_REFEICOES = "Rejeitou também outras refeições destas categorias; prefira alternativas fora delas: "
+
+
+def estimar_tokens(texto: str) -> int:
+    return math.ceil(len(texto) / CARACTERES_POR_TOKEN)
+
+
+def _categoria(nome: str, categorias: dict[str, tuple[str, ...]]) -> Optional[str]:
+    palavras = f" {normalizar_nome(nome)} "
+    return next(
+        (rotulo for rotulo, chaves in categorias.items() if any(f" {c} " in palavras for c in chaves)),
+        None,
+    )
+
+
+def categoria_exercicio(nome: str) -> Optional[str]:
+    """Categoria para resumir um exercício: impacto, senão o grupo muscular."""
+    categoria = _categoria(nome, CATEGORIAS_EXERCICIO)
+    if categoria is None:
+        categoria = ROTULOS_GRUPO.get(classificar_grupo(nome))
+    return categoria
+
+
+def categoria_refeicao(nome: str) -> Optional[str]:
+    return _categoria(nome, CATEGORIAS_REFEICAO)
+
+
+def ranquear_preferencias(feedbacks: Iterable, agora: Optional[datetime] = None) -> dict:
+    """
+    Agrupa os feedbacks por tipo e nome normalizado e devolve as listas de
+    preferências ordenadas da maior para a menor prioridade.
+
+    O voto mais recente de cada item decide a lista (quem rejeitou e depois
+    gostou não aparece em `*_evitar`); a prioridade soma os feedbacks com
+    esse voto, cada um com peso 0.5^(idade / meia-vida). O nome exibido é o
+    da avaliação mais recente.
+    """
+    agora = agora or datetime.utcnow()
+    meia_vida = settings.PREFERENCIAS_MEIA_VIDA_DIAS * 86400
+    listas = {
+        ("exercicio", True): "exercicios_preferidos",
+        ("exercicio", False): "exercicios_evitar",
+        ("refeicao", True): "refeicoes_preferidas",
+        ("refeicao", False): "refeicoes_evitar",
+    }
+
+    por_item: dict[tuple[str, str], list] = defaultdict(list)
+    for feedback in feedbacks:
+        chave = normalizar_nome(feedback.item_nome)
+        if feedback.tipo in ("exercicio", "refeicao") and chave:
+            por_item[(feedback.tipo, chave)].append(feedback)
+
+    ranqueados: dict[str, list[tuple[float, float, str]]] = {nome: [] for nome in listas.values()}
+    for (tipo, _), avaliacoes in por_item.items():
+        ultima = max(avaliacoes, key=lambda f: f.created_at)
+        peso = sum(
+            0.5 ** (max(0.0, (agora - f.created_at).total_seconds()) / meia_vida)
+            for f in avaliacoes
+            if f.gostou == ultima.gostou
+        )
+        nome = " ".join(ultima.item_nome.split())
+        ranqueados[listas[(tipo, ultima.gostou)]].append((peso, ultima.created_at.timestamp(), nome))
+
+    return {
+        lista: [nome for _, _, nome in sorted(itens, key=lambda i: (-i[0], -i[1], i[2]))]
+        for lista, itens in ranqueados.items()
+    }
+
+
+@dataclass
+class Restricoes:
+    texto: str
+    listadas: int = 0  # itens citados pelo nome
+    resumidas: int = 0  # itens cobertos só pela categoria
+    descartadas: int = 0  # itens fora do prompt
+
+
+def _secao(modelo: Template, prefixo_categorias: str, itens: list[str], categorias: list[tuple[str, int]]) -> str:
+    if not itens and not categorias:
+        return ""
+    linha_categorias = ""
+    if categorias:
+        linha_categorias = prefixo_categorias + ", ".join(f"{c} ({n})" for c, n in categorias) + "\n"
+    lista = ", ".join(itens) if itens else "(resumidos por categoria abaixo)"
+    return modelo.substitute(ITENS=lista, CATEGORIAS=linha_categorias)
+
+
+def _resumir(contagem: OrderedDict, categoria: Optional[str]) -> int:
+    """
+    Conta na `categoria` um item que saiu da lista nominal. Ele é mais
+    relevante que os já resumidos, então a categoria vai para a frente.
+    Devolve 1 se o item não tem categoria.
+    """
+    if categoria is None:
+        return 1
+    contagem[categoria] = contagem.get(categoria, 0) + 1
+    contagem.move_to_end(categoria, last=False)
+    return 0
+
+
+def montar_restricoes(
+    preferencias: Optional[dict],
+    orcamento_tokens: Optional[int] = None,
+    exercicios: bool = True,
+    refeicoes: bool = True,
+) -> Restricoes:
+    """
+    Texto das restrições de exercícios e/ou refeições em até
+    `orcamento_tokens` (padrão: `LLM_PROMPT_RESTRICOES_MAX_TOKENS`).
+
+    Os itens de menor prioridade (fim das listas ranqueadas) saem primeiro
+    da lista nominal, alternando entre exercícios e refeições, e passam a
+    contar na categoria; depois somem as categorias com menos itens.
+    """
+    if orcamento_tokens is None:
+        orcamento_tokens = settings.LLM_PROMPT_RESTRICOES_MAX_TOKENS
+    preferencias = preferencias or {}
+    ex = list(preferencias.get("exercicios_evitar", [])) if exercicios else []
+    ref = list(preferencias.get("refeicoes_evitar", [])) if refeicoes else []
+
+    # Categoria de cada item calculada uma vez; os itens passam da lista
+    # nominal para a contagem da categoria um a um
+    cats_ex = [categoria_exercicio(nome) for nome in ex]
+    cats_ref = [categoria_refeicao(nome) for nome in ref]
+    lit_ex, lit_ref = len(ex), len(ref)
+    cont_ex: OrderedDict[str, int] = OrderedDict()
+    cont_ref: OrderedDict[str, int] = OrderedDict()
+    sem_ex = sem_ref = 0
+
+    def render(cat_ex: list[tuple[str, int]], cat_ref: list[tuple[str, int]]) -> str:
+        return _secao(_RESTRICAO_EXERCICIOS, _CATEGORIAS_EXERCICIOS, ex[:lit_ex], cat_ex) + _secao(
+            _RESTRICAO_REFEICOES, _CATEGORIAS_REFEICOES, ref[:lit_ref], cat_ref
+        )
+
+    texto = render([], [])
+    while estimar_tokens(texto) > orcamento_tokens and (lit_ex or lit_ref):
+        # Tira o item menos prioritário da lista mais longa (empate: exercícios)
+        if lit_ex >= lit_ref:
+            lit_ex -= 1
+            sem_ex += _resumir(cont_ex, cats_ex[lit_ex])
+        else:
+            lit_ref -= 1
+            sem_ref += _resumir(cont_ref, cats_ref[lit_ref])
+        texto = render(list(cont_ex.items()), list(cont_ref.items()))
+
+    cat_ex, cat_ref = list(cont_ex.items()), list(cont_ref.items())
+    while estimar_tokens(texto) > orcamento_tokens and (cat_ex or cat_ref):
+        # Categoria com menos itens sai primeiro; empate: a que entrou por último (menos prioritária)
+        ex_menor = min(range(len(cat_ex)), key=lambda i: (cat_ex[i][1], -i), default=None)
+        ref_menor = min(range(len(cat_ref)), key=lambda i: (cat_ref[i][1], -i), default=None)
+        if ref_menor is None or (ex_menor is not None and cat_ex[ex_menor][1] <= cat_ref[ref_menor][1]):
+            sem_ex += cat_ex.pop(ex_menor)[1]
+        else:
+            sem_ref += cat_ref.pop(ref_menor)[1]
+        texto = render(cat_ex, cat_ref)
+
+    listadas = lit_ex + lit_ref
+    descartadas = sem_ex + sem_ref
+    return Restricoes(texto, listadas, len(ex) + len(ref) - listadas - descartadas, descartadas)
+
+
+def montar_sufixo_plano(campos: dict, preferencias: Optional[dict], orcamento_tokens: int) -> tuple[str, Restricoes]:
+    """
+    Sufixo do prompt de geração (`SUFIXO_PLANO`) com as restrições no que
+    sobra de `orcamento_tokens`, limitado a `LLM_PROMPT_RESTRICOES_MAX_TOKENS`.
+    """
+    base = estimar_tokens(SUFIXO_PLANO.substitute(campos, PREFERENCIAS=""))
+    restricoes = montar_restricoes(
+        preferencias, min(settings.LLM_PROMPT_RESTRICOES_MAX_TOKENS, max(0, orcamento_tokens - base))
+    )
+    return SUFIXO_PLANO.substitute(campos, PREFERENCIAS=restricoes.texto), restricoes
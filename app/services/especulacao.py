@@ -0,0 +1,205 @@
+# app/services/especulacao.py
+"""
+Pré-geração especulativa do próximo plano a partir do feedback.
+
+Depois de avaliar alguns exercícios ou refeições do plano atual, o usuário
+costuma pedir um plano novo. Quando os feedbacks desde o último plano
+chegam a `ESPECULACAO_FEEDBACKS_MIN`, o próximo plano é gerado em segundo
+plano com as preferências já atualizadas e o último perfil enviado a
+`POST /sugestao`. O próximo pedido com o mesmo perfil e as mesmas
+preferências recebe esse plano sem esperar a IA.
+
+É trabalho de baixa prioridade: uma thread só, nada começa com chamadas à
+IA na fila do limitador ou com a pressão de carga acima de
+`ESPECULACAO_PRESSAO_MAX`, e há no máximo `ESPECULACAO_MAX_POR_HORA`
+gerações por hora. Planos não usados expiram após
+`ESPECULACAO_TTL_SEGUNDOS`. Todos os desfechos são contados em
+`aican_plan_speculative_total` para calibrar o gatilho.
+
+O estado fica em memória, por processo: com vários workers o pedido
+seguinte só aproveita o plano se cair no mesmo worker.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import ServicoIndisponivelError
+from app.core.metricas import PLANO_ESPECULATIVO
+from app.core.protecao_carga import monitor_carga
+from app.database.models.feedback import Feedback
+from app.database.models.plano import Plano
+from app.services.catalogo import obter_indice
+from app.services.ia_agent import generate_training_plan, llm_limitador, obter_preferencias_usuario
+
+logger = logging.getLogger(__name__)
+
+
+def _chave_preferencias(preferencias: Optional[dict]) -> tuple:
+    return tuple(sorted((k, tuple(sorted(v))) for k, v in (preferencias or {}).items()))
+
+
+@dataclass
+class _PlanoEspeculativo:
+    perfil: dict
+    preferencias: tuple
+    plano: dict
+    criado_em: float
+
+
+class PreGeradorPlanos:
+    def __init__(
+        self,
+        feedbacks_min: int,
+        ttl: float,
+        max_por_hora: int,
+        pressao_max: float,
+        max_usuarios: int = 10000,
+    ):
+        self.feedbacks_min = feedbacks_min
+        self.ttl = ttl
+        self.max_por_hora = max_por_hora
+        self.pressao_max = pressao_max
+        self.max_usuarios = max_usuarios
+
+        self._perfis: OrderedDict[int, dict] = OrderedDict()
+        self._prontos: dict[int, _PlanoEspeculativo] = {}
+        self._pendentes: set[int] = set()
+        self._inicios: deque[float] = deque()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="especulacao")
+
+    def lembrar_perfil(self, usuario_id: int, perfil: dict) -> None:
+        """Guarda o perfil do último `POST /sugestao` do usuário (LRU)."""
+        with self._lock:
+            self._perfis.pop(usuario_id, None)
+            self._perfis[usuario_id] = perfil
+            while len(self._perfis) > self.max_usuarios:
+                self._perfis.popitem(last=False)
+
+    def registrar_feedback(self, usuario_id: int) -> None:
+        """Chamado após gravar um feedback; a avaliação roda em segundo plano."""
+        self._expirar()
+        with self._lock:
+            if usuario_id not in self._perfis or usuario_id in self._pendentes:
+                return
+            self._pendentes.add(usuario_id)
+        self._executor.submit(self._avaliar, usuario_id)
+
+    def consumir(self, usuario_id: int, perfil: dict, preferencias: Optional[dict]) -> Optional[dict]:
+        """Devolve o plano pré-gerado se ainda valer para este perfil e estas preferências."""
+        self._expirar()
+        with self._lock:
+            pronto = self._prontos.pop(usuario_id, None)
+        if pronto is None:
+            return None
+        if pronto.perfil != perfil or pronto.preferencias != _chave_preferencias(preferencias):
+            PLANO_ESPECULATIVO.labels("divergente").inc()
+            return None
+        PLANO_ESPECULATIVO.labels("usado").inc()
+        return pronto.plano
+
+    def _expirar(self) -> None:
+        limite = time.monotonic() - self.ttl
+        with self._lock:
+            vencidos = [u for u, p in self._prontos.items() if p.criado_em < limite]
+            for usuario_id in vencidos:
+                del self._prontos[usuario_id]
+        if vencidos:
+            PLANO_ESPECULATIVO.labels("expirado").inc(len(vencidos))
+
+    def _reservar_orcamento(self) -> bool:
+        agora = time.monotonic()
+        with self._lock:
+            while self._inicios and self._inicios[0] < agora - 3600:
+                self._inicios.popleft()
+            if len(self._inicios) >= self.max_por_hora:
+                return False
+            self._inicios.append(agora)
+            return True
+
+    def _avaliar(self, usuario_id: int) -> None:
+        from app.database.base import SessionLocal
+
+        try:
+            # A sessão só cobre as leituras: a geração leva segundos e não
+            # deve segurar uma conexão do pool enquanto espera a IA
+            with SessionLocal() as db:
+                if self._feedbacks_desde_ultimo_plano(db, usuario_id) < self.feedbacks_min:
+                    return
+                preferencias = obter_preferencias_usuario(usuario_id, db)
+
+                with self._lock:
+                    perfil = self._perfis.get(usuario_id)
+                    pronto = self._prontos.get(usuario_id)
+                if perfil is None:
+                    return
+                chave = _chave_preferencias(preferencias)
+                if pronto and pronto.perfil == perfil and pronto.preferencias == chave:
+                    return
+
+                if llm_limitador.na_fila > 0 or monitor_carga.pressao() >= self.pressao_max:
+                    PLANO_ESPECULATIVO.labels("sob_carga").inc()
+                    return
+                if not self._reservar_orcamento():
+                    PLANO_ESPECULATIVO.labels("sem_orcamento").inc()
+                    return
+
+                if settings.LLM_SAIDA_COMPACTA:
+                    # A saída compacta lê o catálogo do índice em memória; sem sessão usa o atual
+                    obter_indice(db)
+
+            plano = generate_training_plan(**perfil, preferencias=preferencias)
+
+            with self._lock:
+                substituido = self._prontos.get(usuario_id)
+                self._prontos[usuario_id] = _PlanoEspeculativo(perfil, chave, plano, time.monotonic())
+            if substituido:
+                PLANO_ESPECULATIVO.labels("substituido").inc()
+            PLANO_ESPECULATIVO.labels("gerado").inc()
+            logger.info("Próximo plano do usuário %s pré-gerado", usuario_id)
+
+        except (ValueError, ServicoIndisponivelError) as e:
+            PLANO_ESPECULATIVO.labels("erro").inc()
+            logger.warning("Pré-geração do usuário %s falhou: %s", usuario_id, e)
+        except Exception as e:
+            PLANO_ESPECULATIVO.labels("erro").inc()
+            logger.error("Erro na pré-geração do usuário %s: %s", usuario_id, e, exc_info=True)
+        finally:
+            with self._lock:
+                self._pendentes.discard(usuario_id)
+
+    @staticmethod
+    def _feedbacks_desde_ultimo_plano(db: Session, usuario_id: int) -> int:
+        ultimo_plano = db.query(func.max(Plano.created_at)).filter(Plano.usuario_id == usuario_id).scalar()
+        if ultimo_plano is None:
+            return 0
+        return (
+            db.query(func.count(Feedback.id))
+            .filter(Feedback.usuario_id == usuario_id, Feedback.created_at > ultimo_plano)
+            .scalar()
+        )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "prontos": len(self._prontos),
+                "pendentes": len(self._pendentes),
+                "geracoes_ultima_hora": len(self._inicios),
+            }
+
+
+pre_gerador = PreGeradorPlanos(
+    feedbacks_min=settings.ESPECULACAO_FEEDBACKS_MIN,
+    ttl=settings.ESPECULACAO_TTL_SEGUNDOS,
+    max_por_hora=settings.ESPECULACAO_MAX_POR_HORA,
+    pressao_max=settings.ESPECULACAO_PRESSAO_MAX,
+)
@@ -0,0 +1,169 @@
+# app/services/geracao_paralela.py
+"""
+Geração do plano em paralelo, por seções.
+
+Em vez de um prompt que pede todos os dias e as seis refeições de uma vez
+(o usuário espera a saída inteira ser escrita), o plano é dividido em
+chamadas menores e simultâneas: uma por grupo de dias
+(`LLM_PARALELO_DIAS_POR_CHAMADA`) e uma para nome da rotina + sugestões
+nutricionais. Cada chamada recebe só o pedaço do esquema que precisa.
+
+A divisão muscular é decidida antes das chamadas (`DIVISOES` do gerador
+local): cada grupo recebe o foco dos seus dias e a lista dos focos dos
+outros, e na junção o foco atribuído prevalece, então não há dias
+repetidos. O resultado passa pela mesma validação do modo sequencial.
+"""
+
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from string import Template
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.metricas import PLANO_GERACAO_TIER
+from app.core.rastreamento import tracer
+from app.services.gerador_local import DIVISOES
+from app.services.ia_agent import (
+    LOCAL_DESCRICOES,
+    OBJETIVO_DESCRICOES,
+    restricao_exercicios,
+    restricao_refeicoes,
+    validar_plano,
+)
+from app.services.secoes_plano import (
+    CABECALHO,
+    ESQUEMA_DIAS,
+    ESQUEMA_NUTRICAO,
+    gerar_secao,
+    identificacao_dia,
+    validador_dias,
+    validar_nutricao,
+)
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.LLM_CONCORRENCIA_MAX, thread_name_prefix="geracao-paralela"
+)
+
+PROMPT_DIAS = Template(
+    CABECALHO
+    + """
+        SEÇÃO: dias $INDICES
+        Este pedido é parte de um plano de $FREQUENCIA dias; os demais dias são gerados à parte.
+        Gere SOMENTE os dias abaixo, na ordem, com 5-6 exercícios cada:
+$DIAS_PEDIDOS
+        Outros dias do plano (não repita o foco deles): $OUTROS_DIAS
+
+        Cada exercício: nome, series (texto), repeticoes (texto), descanso_segundos (número), detalhes_execucao, video_url
+        Use aspas duplas, números sem aspas e nenhuma vírgula antes de } ou ].
+
+        ESTRUTURA ESPERADA (um objeto por dia pedido em "dias_de_treino"):
+        $ESQUEMA
+        $RESTRICOES
+
+        COMECE COM { E TERMINE COM } - NADA MAIS!
+    """
+)
+
+PROMPT_NUTRICAO = Template(
+    CABECALHO
+    + """
+        SEÇÃO: nutricao
+        Gere SOMENTE o nome da rotina e as sugestões nutricionais (pre_treino e pos_treino,
+        com opcao_economica, opcao_equilibrada e opcao_premium cada). Os dias de treino são gerados à parte.
+        Use aspas duplas e nenhuma vírgula antes de } ou ].
+
+        ESTRUTURA ESPERADA:
+        $ESQUEMA
+
+        IMPORTANTE SOBRE AS REFEIÇÕES:
+        - SEJA CRIATIVO! Não repita sempre "Banana com aveia" ou "Frango com batata doce".
+        - Varie as fontes de proteína (ovos, iogurte, atum, carne moída, whey, queijo cottage, tofu, lentilha).
+        - Varie as fontes de carboidrato (pão, tapioca, cuscuz, macarrão, arroz, batata inglesa, mandioca, frutas variadas).
+        $RESTRICOES
+
+        COMECE COM { E TERMINE COM } - NADA MAIS!
+    """
+)
+
+
+@tracer.start_as_current_span("ia.gerar_plano_paralelo")
+def gerar_plano_paralelo(
+    nome: str,
+    altura: float,
+    peso: float,
+    idade: int,
+    disponibilidade: int,
+    local: str,
+    objetivo: str,
+    preferencias: Optional[dict],
+    tier: str,
+) -> Dict[str, Any]:
+    """Gera dias e nutrição em chamadas simultâneas e junta num plano validado."""
+    focos = [foco for foco, _ in DIVISOES[max(1, min(7, disponibilidade))]]
+    por_chamada = max(1, settings.LLM_PARALELO_DIAS_POR_CHAMADA)
+    grupos = [
+        list(enumerate(focos))[i:i + por_chamada] for i in range(0, len(focos), por_chamada)
+    ]
+
+    campos = {
+        "NOME": nome,
+        "ALTURA": altura,
+        "PESO": peso,
+        "IDADE": idade,
+        "IMC": f"{peso / (altura / 100) ** 2:.2f}",
+        "FREQUENCIA": len(focos),
+        "LOCAL": LOCAL_DESCRICOES.get(local, local),
+        "OBJETIVO": OBJETIVO_DESCRICOES.get(objetivo, objetivo),
+    }
+
+    tarefas = []
+    for grupo in grupos:
+        indices = {indice for indice, _ in grupo}
+        prompt = PROMPT_DIAS.substitute(
+            campos,
+            INDICES=",".join(str(indice + 1) for indice, _ in grupo),
+            DIAS_PEDIDOS="\n".join(f"        - {identificacao_dia(i)}: {foco}" for i, foco in grupo),
+            OUTROS_DIAS=", ".join(f for i, f in enumerate(focos) if i not in indices) or "nenhum",
+            ESQUEMA=ESQUEMA_DIAS,
+            RESTRICOES=restricao_exercicios(preferencias),
+        )
+        max_tokens = settings.LLM_TOKENS_SAIDA_POR_DIA * len(grupo) + 256
+        tarefas.append(("dias", prompt, max_tokens, validador_dias(grupo)))
+
+    prompt_nutricao = PROMPT_NUTRICAO.substitute(
+        campos, ESQUEMA=ESQUEMA_NUTRICAO, RESTRICOES=restricao_refeicoes(preferencias)
+    )
+    tarefas.append(("nutricao", prompt_nutricao, settings.LLM_TOKENS_SAIDA_BASE, validar_nutricao))
+
+    inicio = time.monotonic()
+    resultado = "erro"
+    try:
+        # copy_context: spans das seções ficam sob o span desta geração
+        futuros = [
+            _executor.submit(contextvars.copy_context().run, gerar_secao, secao, prompt, tier, max_tokens, validar)
+            for secao, prompt, max_tokens, validar in tarefas
+        ]
+        concluidos, pendentes = wait(futuros, return_when=FIRST_EXCEPTION)
+        falha = next((f.exception() for f in concluidos if f.exception() is not None), None)
+        if falha is not None:
+            # O plano já falhou: seções ainda na fila não chegam a chamar a IA
+            for futuro in pendentes:
+                futuro.cancel()
+            raise falha
+        respostas = [futuro.result() for futuro in futuros]
+
+        nutricao = respostas.pop()
+        plano = {
+            "nome_da_rotina": nutricao.get("nome_da_rotina") or "Plano de Treino",
+            "dias_de_treino": [dia for dias in respostas for dia in dias],
+            "sugestoes_nutricionais": nutricao["sugestoes_nutricionais"],
+        }
+        plano = validar_plano(plano, nome)
+        resultado = "sucesso"
+        return plano
+    finally:
+        PLANO_GERACAO_TIER.labels(tier, resultado).observe(time.monotonic() - inicio)
@@ -0,0 +1,191 @@
+# app/services/gerador_local.py
+"""
+Gerador determinístico de planos a partir do catálogo.
+
+Monta um plano com a mesma estrutura de `JSON_EXAMPLE` sem chamar a IA:
+divide os dias por grupo muscular, aplica séries/repetições/descanso do
+objetivo e escolhe refeições por nível. Serve de fallback quando a IA
+falha e de modo rápido opcional.
+"""
+
+import logging
+import random
+from typing import Any, Dict, Optional
+from urllib.parse import quote_plus
+
+from sqlalchemy.orm import Session
+
+from app.services.catalogo import NIVEIS_REFEICAO, IndiceCatalogo, nome_corresponde, normalizar_nome, obter_indice
+
+logger = logging.getLogger(__name__)
+
+EXERCICIOS_POR_DIA = 5
+
+# (foco_muscular, grupos) por dia, indexado pela disponibilidade semanal
+DIVISOES: dict[int, list[tuple[str, tuple[str, ...]]]] = {
+    1: [("Corpo inteiro", ("pernas", "peito", "costas", "ombros", "abdomen"))],
+    2: [
+        ("Membros superiores", ("peito", "costas", "ombros", "biceps", "triceps")),
+        ("Membros inferiores e Core", ("pernas", "gluteos", "abdomen")),
+    ],
+    3: [
+        ("Peito, Ombros e Tríceps", ("peito", "ombros", "triceps")),
+        ("Costas e Bíceps", ("costas", "biceps")),
+        ("Pernas e Glúteos", ("pernas", "gluteos", "abdomen")),
+    ],
+    4: [
+        ("Peito e Tríceps", ("peito", "triceps")),
+        ("Costas e Bíceps", ("costas", "biceps")),
+        ("Pernas e Glúteos", ("pernas", "gluteos")),
+        ("Ombros e Abdômen", ("ombros", "abdomen")),
+    ],
+    5: [
+        ("Peito e Tríceps", ("peito", "triceps")),
+        ("Costas e Bíceps", ("costas", "biceps")),
+        ("Pernas e Glúteos", ("pernas", "gluteos")),
+        ("Ombros e Abdômen", ("ombros", "abdomen")),
+        ("Corpo inteiro e Cardio", ("pernas", "peito", "costas", "cardio")),
+    ],
+}
+DIVISOES[6] = DIVISOES[3] + [
+    ("Peito e Ombros", ("peito", "ombros", "triceps")),
+    ("Costas e Posterior", ("costas", "biceps", "gluteos")),
+    ("Pernas e Core", ("pernas", "abdomen")),
+]
+DIVISOES[7] = DIVISOES[6] + [("Cardio e Core", ("cardio", "abdomen"))]
+
+TEMPLATES_OBJETIVO: dict[str, dict[str, Any]] = {
+    "hipertrofia": {"series": "4x", "repeticoes": "8-12", "descanso_segundos": 90},
+    "ganhar": {"series": "4x", "repeticoes": "6-10", "descanso_segundos": 120},
+    "definicao": {"series": "3x", "repeticoes": "12-15", "descanso_segundos": 60},
+    "perder": {"series": "3x", "repeticoes": "15-20", "descanso_segundos": 45},
+}
+TEMPLATE_CARDIO = {"series": "1x", "repeticoes": "15-20 minutos", "descanso_segundos": 60}
+
+NOMES_ROTINA = {
+    "hipertrofia": "Programa de Hipertrofia",
+    "ganhar": "Programa de Ganho de Massa",
+    "definicao": "Programa de Definição Muscular",
+    "perder": "Programa de Emagrecimento",
+}
+
+def url_video(nome: str) -> str:
+    return f"https://www.youtube.com/results?search_query=como+fazer+{quote_plus(nome)}"
+
+
+def url_receita(nome: str) -> str:
+    return f"https://www.google.com/search?q=como+fazer+{quote_plus(nome)}"
+
+
+def _refeicoes_permitidas(indice: IndiceCatalogo, tipo: str, nivel: str, evitar: list[str]) -> list[dict[str, Any]]:
+    """
+    Refeições do slot fora de `evitar`. Se o usuário rejeitou todas, tenta
+    os outros níveis do mesmo horário e depois os outros horários (mesmo
+    nível primeiro); só repete uma rejeitada se o catálogo inteiro for.
+    """
+    outros = [(t, n) for t, niveis in NIVEIS_REFEICAO.items() for n in niveis if (t, n) != (tipo, nivel)]
+    outros.sort(key=lambda slot: (slot[0] != tipo, slot[1] != nivel))
+    for slot in [(tipo, nivel)] + outros:
+        permitidas = [r for r in indice.refeicoes(*slot) if not nome_corresponde(r["nome"], evitar)]
+        if permitidas:
+            return permitidas
+    logger.warning("Todas as refeições do catálogo foram rejeitadas; repetindo uma de %s/%s", tipo, nivel)
+    return indice.refeicoes(tipo, nivel)
+
+
+def gerar_plano_local(
+    nome: str,
+    disponibilidade: int,
+    local: str,
+    objetivo: str,
+    preferencias: Optional[dict] = None,
+    db: Optional[Session] = None,
+) -> Dict[str, Any]:
+    """
+    Gera um plano completo a partir do catálogo, sem chamar a IA.
+
+    A escolha é determinística para o mesmo perfil e catálogo. Exercícios e
+    refeições em `exercicios_evitar`/`refeicoes_evitar` são ignorados; um
+    slot de refeição sem opção permitida usa outro nível ou horário.
+    """
+    preferencias = preferencias or {}
+    evitar_ex = [normalizar_nome(n) for n in preferencias.get("exercicios_evitar", [])]
+    evitar_ref = [normalizar_nome(n) for n in preferencias.get("refeicoes_evitar", [])]
+
+    rng = random.Random(f"{nome}|{objetivo}|{local}|{disponibilidade}")
+    template = TEMPLATES_OBJETIVO.get(objetivo, TEMPLATES_OBJETIVO["hipertrofia"])
+
+    indice = obter_indice(db)
+    grupos_plano = {g for _, grupos in DIVISOES[max(1, min(disponibilidade, 7))] for g in grupos}
+    grupos_plano.add("cardio")
+
+    por_grupo: dict[str, list[dict[str, Any]]] = {}
+    for grupo in sorted(grupos_plano):
+        candidatos = [
+            ex for ex in indice.exercicios(grupo, local)
+            if not nome_corresponde(ex["nome"], evitar_ex)
+        ]
+        rng.shuffle(candidatos)
+        por_grupo[grupo] = candidatos
+
+    usados: set[str] = set()
+
+    def escolher(grupos: tuple[str, ...], inicio: int, no_dia: set[str]) -> Optional[dict[str, Any]]:
+        # Prefere exercícios inéditos no plano; se o grupo esgotar, repete de outro dia
+        for bloqueados in (usados, no_dia):
+            for k in range(len(grupos)):
+                grupo = grupos[(inicio + k) % len(grupos)]
+                for ex in por_grupo.get(grupo, []):
+                    if ex["nome"] not in bloqueados:
+                        usados.add(ex["nome"])
+                        no_dia.add(ex["nome"])
+                        return ex
+        return None
+
+    dias = []
+    divisao = DIVISOES[max(1, min(disponibilidade, 7))]
+    for i, (foco, grupos) in enumerate(divisao):
+        if objetivo == "perder" and "cardio" not in grupos:
+            grupos = grupos + ("cardio",)
+
+        exercicios = []
+        no_dia: set[str] = set()
+        for slot in range(EXERCICIOS_POR_DIA):
+            ex = escolher(grupos, slot, no_dia)
+            if ex is None:
+                break
+            valores = TEMPLATE_CARDIO if ex["grupo"] == "cardio" else template
+            exercicios.append({
+                "nome": ex["nome"],
+                "series": valores["series"],
+                "repeticoes": valores["repeticoes"],
+                "descanso_segundos": valores["descanso_segundos"],
+                "detalhes_execucao": ex.get("detalhes_execucao", ""),
+                "video_url": ex.get("video_url") or url_video(ex["nome"]),
+            })
+
+        dias.append({
+            "foco_muscular": foco,
+            "identificacao": f"Dia {chr(ord('A') + i)}",
+            "exercicios": exercicios,
+        })
+
+    nutricao: dict[str, dict[str, Any]] = {}
+    for tipo, niveis in NIVEIS_REFEICAO.items():
+        nutricao[tipo] = {}
+        for nivel in niveis:
+            permitidas = _refeicoes_permitidas(indice, tipo, nivel, evitar_ref)
+            refeicao = {k: v for k, v in rng.choice(permitidas).items() if k != "id"}
+            refeicao["link_receita"] = refeicao.get("link_receita") or url_receita(refeicao["nome"])
+            nutricao[tipo][nivel] = refeicao
+
+    logger.info(
+        f"Plano local gerado: {len(dias)} dias, "
+        f"{sum(len(d['exercicios']) for d in dias)} exercícios"
+    )
+
+    return {
+        "nome_da_rotina": NOMES_ROTINA.get(objetivo, "Rotina Personalizada"),
+        "dias_de_treino": dias,
+        "sugestoes_nutricionais": nutricao,
+    }
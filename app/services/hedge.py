@@ -0,0 +1,166 @@
+# app/services/hedge.py
+"""
+Requisições "hedged" para cortar a cauda de latência da IA.
+
+A chamada original roda numa thread; se não terminar até o percentil
+`percentil` das latências recentes, uma segunda chamada idêntica é
+disparada e vence a primeira que terminar com sucesso. Chamadas síncronas
+do SDK não podem ser interrompidas: a perdedora é cancelada se ainda não
+começou e, senão, segue até o fim com o resultado descartado.
+
+O custo extra é limitado por um orçamento global: cada chamada original
+credita `orcamento` (ex.: 0.05) e cada hedge consome 1 crédito, ou seja,
+no máximo ~5% de chamadas a mais no longo prazo.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional, TypeVar
+
+from app.core.metricas import LLM_HEDGES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class HedgerLLM:
+    def __init__(
+        self,
+        nome: str,
+        percentil: float = 95.0,
+        orcamento: float = 0.05,
+        atraso_min: float = 2.0,
+        amostras_min: int = 20,
+        janela: int = 200,
+        max_threads: int = 64,
+        credito_max: float = 10.0,
+    ):
+        self.nome = nome
+        self.percentil = percentil
+        self.orcamento = orcamento
+        self.atraso_min = atraso_min
+        self.amostras_min = amostras_min
+        self.credito_max = credito_max
+
+        self._lock = threading.Lock()
+        self._latencias: deque[float] = deque(maxlen=janela)
+        self._credito = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix=f"hedge-{nome}")
+        self.chamadas = 0
+        self.disparados = 0
+        self.vitorias = 0
+
+    def atraso(self) -> Optional[float]:
+        """Espera antes do hedge: percentil das latências recentes (None sem amostras suficientes)."""
+        with self._lock:
+            if len(self._latencias) < self.amostras_min:
+                return None
+            ordenadas = sorted(self._latencias)
+        indice = min(len(ordenadas) - 1, int(len(ordenadas) * self.percentil / 100))
+        return max(self.atraso_min, ordenadas[indice])
+
+    def executar(
+        self,
+        funcao: Callable[[], T],
+        pode_disparar: Callable[[], bool] = lambda: True,
+        ao_terminar: Optional[Callable[[Future, float], None]] = None,
+    ) -> T:
+        """
+        Executa `funcao` com hedge. `pode_disparar` é consultado (depois do
+        orçamento) antes do hedge — ex.: reservar uma vaga no limitador.
+
+        `ao_terminar(futuro, duracao)` é chamado uma vez para cada chamada
+        submetida (a original e o hedge), quando ela termina ou é cancelada
+        antes de começar: é onde cada uma devolve a própria vaga, já que a
+        perdedora pode continuar rodando depois que `executar` retorna.
+        """
+        with self._lock:
+            self.chamadas += 1
+            self._credito = min(self.credito_max, self._credito + self.orcamento)
+
+        original = self._submeter(funcao, ao_terminar)
+        atraso = self.atraso()
+        if atraso is None:
+            return original.result()
+
+        concluidas, _ = wait([original], timeout=atraso)
+        if concluidas:
+            return original.result()
+
+        if not self._consumir_credito():
+            LLM_HEDGES.labels("sem_orcamento").inc()
+            return original.result()
+        if not pode_disparar():
+            with self._lock:
+                self._credito = min(self.credito_max, self._credito + 1)
+            LLM_HEDGES.labels("sem_vaga").inc()
+            return original.result()
+
+        with self._lock:
+            self.disparados += 1
+        LLM_HEDGES.labels("disparado").inc()
+        logger.info("Hedge '%s': chamada passou de %.1fs, disparando segunda", self.nome, atraso)
+        hedge = self._submeter(funcao, ao_terminar)
+
+        pendentes = {original, hedge}
+        erro: Optional[BaseException] = None
+        while pendentes:
+            concluidas, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in concluidas:
+                if futuro.exception() is None:
+                    for perdedor in pendentes:
+                        perdedor.cancel()
+                    if futuro is hedge:
+                        with self._lock:
+                            self.vitorias += 1
+                        LLM_HEDGES.labels("vitoria_hedge").inc()
+                    else:
+                        LLM_HEDGES.labels("vitoria_original").inc()
+                    return futuro.result()
+                if futuro is original or erro is None:
+                    erro = futuro.exception()
+        raise erro
+
+    def _submeter(self, funcao: Callable[[], T], ao_terminar: Optional[Callable[[Future, float], None]]) -> Future:
+        inicio = time.monotonic()
+        futuro = self._executor.submit(funcao)
+
+        def registrar(f: Future) -> None:
+            duracao = time.monotonic() - inicio
+            # Latência de cada chamada bem-sucedida, inclusive perdedoras: é a
+            # distribuição do serviço, não a latência já reduzida pelo hedge
+            if not f.cancelled() and f.exception() is None:
+                with self._lock:
+                    self._latencias.append(duracao)
+            if ao_terminar is not None:
+                try:
+                    ao_terminar(f, duracao)
+                except Exception:
+                    logger.exception("Hedge '%s': erro no callback de fim de chamada", self.nome)
+
+        futuro.add_done_callback(registrar)
+        return futuro
+
+    def _consumir_credito(self) -> bool:
+        with self._lock:
+            if self._credito >= 1:
+                self._credito -= 1
+                return True
+            return False
+
+    def snapshot(self) -> dict:
+        atraso = self.atraso()
+        with self._lock:
+            return {
+                "nome": self.nome,
+                "chamadas": self.chamadas,
+                "disparados": self.disparados,
+                "vitorias": self.vitorias,
+                "taxa_hedge": round(self.disparados / self.chamadas, 4) if self.chamadas else 0.0,
+                "atraso_segundos": round(atraso, 3) if atraso is not None else None,
+                "credito": round(self._credito, 2),
+            }
@@ -1,15 +1,51 @@
 # app/services/ia_agent.py
 
-from google.genai import types
-from google.genai.client import Client as GeminiClient
 from app.core.config import settings
+from app.core.exceptions import PrazoEsgotadoError, ServicoIndisponivelError
+from app.core.metricas import (
+    LLM_ESCALONAMENTOS,
+    LLM_LATENCIA,
+    LLM_TENTATIVAS,
+    LLM_TIER_ESCOLHAS,
+    LLM_TIMEOUTS,
+    PLANO_GERACAO_TIER,
+    registrar_uso_llm,
+)
+from app.core.prazo import tempo_restante
+from app.core.rastreamento import tracer
+from opentelemetry import trace
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.construtor_prompt import (
+    Restricoes,
+    estimar_tokens,
+    montar_restricoes,
+    montar_sufixo_plano,
+    ranquear_preferencias,
+)
+from app.services.hedge import HedgerLLM
+from app.services.limite_concorrencia import ERRO, SOBRECARGA, SUCESSO, LimitadorAIMD
+from app.services.provedores_llm import (
+    CasseteSemRespostaError,
+    ConfigGeracao,
+    ProvedorGemini,
+    RespostaLLM,
+    obter_provedor,
+)
 from string import Template
 import re
 from urllib.parse import quote_plus
 import logging
 import json
-from typing import Dict, Any, Optional
-from tenacity import retry, stop_after_attempt, wait_exponential
+import time
+from concurrent.futures import Future
+import httpx
+from typing import Dict, Any, NoReturn, Optional
+from tenacity import (
+    retry,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
@@ -82,64 +118,143 @@ JSON_EXAMPLE = """{
     }
 }"""
 
-_gemini_client = None
-
+llm_circuit_breaker = CircuitBreaker(
+    nome="gemini",
+    taxa_falha=settings.LLM_CB_TAXA_FALHA,
+    janela_segundos=settings.LLM_CB_JANELA_SEGUNDOS,
+    minimo_chamadas=settings.LLM_CB_MINIMO_CHAMADAS,
+    tempo_aberto=settings.LLM_CB_TEMPO_ABERTO_SEGUNDOS,
+    sondas=settings.LLM_CB_SONDAS_SEMI_ABERTO,
+)
 
-def get_gemini_client() -> GeminiClient:
-    """
-    Inicializa o cliente gemini com lazy loading.
-    Garante que a API key está configurada corretamente.
-    """
-    global _gemini_client
+llm_limitador = LimitadorAIMD(
+    nome="gemini",
+    limite_inicial=settings.LLM_CONCORRENCIA_INICIAL,
+    limite_min=settings.LLM_CONCORRENCIA_MIN,
+    limite_max=settings.LLM_CONCORRENCIA_MAX,
+    fila_max=settings.LLM_FILA_MAX,
+    latencia_alvo=settings.LLM_LATENCIA_ALVO_SEGUNDOS,
+)
 
-    if _gemini_client is None:
-        api_key = settings.GEMINI_API_KEY
-        if not api_key:
-            raise ValueError("API_KEY não configurada.")
-        try:
-            _gemini_client = GeminiClient(api_key=api_key)
-            logger.info("Cliente gemini inicializado com sucesso")
-        except Exception as e:
-            logger.error(f"Erro ao inicializar gemini: {e}")
-            raise
+llm_hedger = HedgerLLM(
+    nome="gemini",
+    percentil=settings.LLM_HEDGE_PERCENTIL,
+    orcamento=settings.LLM_HEDGE_ORCAMENTO,
+    atraso_min=settings.LLM_HEDGE_ATRASO_MIN_SEGUNDOS,
+    amostras_min=settings.LLM_HEDGE_AMOSTRAS_MIN,
+    max_threads=settings.LLM_CONCORRENCIA_MAX * 2,
+)
 
-    return _gemini_client
 
 # Tenta inicializar na importação para evitar cold start
 try:
-    if settings.GEMINI_API_KEY:
-        get_gemini_client()
+    provedor = obter_provedor()
+    if isinstance(provedor, ProvedorGemini):
+        provedor.cliente()
 except Exception:
     pass # Falha silenciosa na importação, erro real aparecerá na chamada
 
 
+def _timeout_da_chamada() -> float:
+    """
+    Timeout de uma chamada: o que resta do prazo da requisição, limitado a
+    `LLM_TIMEOUT_LEITURA_SEGUNDOS`. Sem tempo útil, nem começa.
+    """
+    restante = tempo_restante()
+    if restante is None:
+        return settings.LLM_TIMEOUT_LEITURA_SEGUNDOS
+    if restante < settings.LLM_PRAZO_MINIMO_CHAMADA_SEGUNDOS:
+        LLM_TIMEOUTS.labels("prazo").inc()
+        raise PrazoEsgotadoError()
+    return min(restante, settings.LLM_TIMEOUT_LEITURA_SEGUNDOS)
+
+
+def _prazo_esgotado(estado) -> bool:
+    """Parada do retry: depois da espera entre tentativas não sobraria tempo útil."""
+    restante = tempo_restante()
+    if restante is None:
+        return False
+    return restante - estado.upcoming_sleep < settings.LLM_PRAZO_MINIMO_CHAMADA_SEGUNDOS
+
+
 @retry(
-    stop=stop_after_attempt(3),
+    stop=stop_after_attempt(3) | _prazo_esgotado,
     wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_not_exception_type((ServicoIndisponivelError, CasseteSemRespostaError)),
     reraise=True,
 )
-def _call_gemini_api(prompt: str) -> str:
+@tracer.start_as_current_span("ia.chamada_llm")
+def call_llm_api(
+    prompt: str, modelo: Optional[str] = None, max_tokens_saida: int = 8192, prefixo: str = ""
+) -> str:
     """
-    Chama a API gemini com retry automático.
+    Chama o provedor de LLM configurado (`LLM_PROVEDOR`) com retry automático.
+
+    Cada tentativa passa pelo circuit breaker: com o circuito aberto a
+    chamada falha imediatamente com ServicoIndisponivelError, sem retry.
+    Depois ocupa uma vaga no limitador AIMD, que reduz a concorrência
+    quando aparecem 429/timeouts e descarta o excesso com 503.
+
+    Com `LLM_HEDGE_ATIVO`, uma chamada lenta ganha uma cópia (hedge) que
+    ocupa uma vaga própria no limitador; vale a primeira que responder.
+
+    Com `prefixo`, o prompt enviado é `prefixo + prompt` e o prefixo pode
+    vir do cache de contexto do provedor (`LLM_CACHE_CONTEXTO_ATIVO`).
     """
+    modelo = modelo or settings.LLM_MODELO
+    provedor = obter_provedor()
+    span = trace.get_current_span()
+    span.set_attribute("ia.modelo", modelo)
+    span.set_attribute("ia.provedor", provedor.nome)
+    span.set_attribute("ia.max_tokens_saida", max_tokens_saida)
+
+    timeout = _timeout_da_chamada()
+    llm_circuit_breaker.antes_da_chamada()
+    try:
+        inicio_fila = time.monotonic()
+        llm_limitador.adquirir(timeout=min(settings.LLM_FILA_TIMEOUT_SEGUNDOS, timeout))
+        span.set_attribute("ia.espera_fila_segundos", time.monotonic() - inicio_fila)
+    except ServicoIndisponivelError:
+        llm_circuit_breaker.cancelar_chamada()
+        raise
 
+    inicio = time.monotonic()
+    resultado = ERRO
+    hedge = settings.LLM_HEDGE_ATIVO
     try:
-        client = get_gemini_client()
-
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.5,
-                max_output_tokens=8192,
-                response_mime_type="application/json",
-            ),
+        # A espera na fila consumiu parte do prazo
+        restante = tempo_restante()
+        if restante is not None:
+            timeout = max(settings.LLM_PRAZO_MINIMO_CHAMADA_SEGUNDOS, min(timeout, restante))
+        config = ConfigGeracao(
+            temperatura=0.5, max_tokens_saida=max_tokens_saida, timeout_segundos=timeout
         )
 
-        return response.text
+        def gerar() -> RespostaLLM:
+            if prefixo:
+                return provedor.gerar_com_prefixo(prefixo, prompt, modelo, config)
+            return provedor.gerar(prompt, modelo, config)
+
+        if hedge:
+            response = llm_hedger.executar(
+                gerar,
+                pode_disparar=llm_limitador.tentar_adquirir,
+                ao_terminar=lambda futuro, duracao: _fim_chamada_hedger(futuro, duracao, modelo),
+            )
+        else:
+            response = gerar()
+        resultado = SUCESSO
+
+    except CasseteSemRespostaError:
+        # Erro de configuração do teste, não do serviço: não conta no circuit breaker
+        llm_circuit_breaker.cancelar_chamada()
+        raise
 
     except Exception as e:
-        logger.error(f"Erro ao chamar API gemini: {e}")
+        llm_circuit_breaker.registrar_falha()
+        logger.error("Erro ao chamar provedor de LLM (%s): %s", provedor.nome, e)
+        if _indica_sobrecarga(e):
+            resultado = SOBRECARGA
         if "429" in str(e):
             raise ValueError("Serviço de IA sobrecarregado. Tente novamente em alguns instantes.")
         if "500" in str(e) or "503" in str(e):
@@ -147,7 +262,52 @@ def _call_gemini_api(prompt: str) -> str:
         
         raise ValueError(f"Erro na comunicação com IA: {str(e)}")
 
+    finally:
+        # Com hedge, cada chamada devolve a própria vaga ao terminar (_fim_chamada_hedger)
+        if not hedge:
+            _registrar_tentativa(modelo, time.monotonic() - inicio, resultado)
+        span.set_attribute("ia.resultado", resultado)
+
+    llm_circuit_breaker.registrar_sucesso()
+    registrar_uso_llm(modelo, response.tokens_prompt, response.tokens_saida, response.tokens_cache)
+    span.set_attribute("ia.tokens_prompt", response.tokens_prompt)
+    span.set_attribute("ia.tokens_saida", response.tokens_saida)
+    span.set_attribute("ia.tokens_cache", response.tokens_cache)
+    return response.texto
+
 
+def _registrar_tentativa(modelo: str, duracao: float, resultado: str) -> None:
+    llm_limitador.liberar(duracao, resultado)
+    LLM_LATENCIA.labels(modelo, resultado).observe(duracao)
+    LLM_TENTATIVAS.labels(modelo, resultado).inc()
+
+
+def _fim_chamada_hedger(futuro: Future, duracao: float, modelo: str) -> None:
+    """
+    Fim de uma chamada do hedger (a original ou o hedge, que reservou a
+    vaga com `tentar_adquirir`): devolve a vaga dela no limitador.
+    """
+    if futuro.cancelled():
+        # Nem começou: só devolve a vaga, sem sinal para o AIMD nem métricas
+        llm_limitador.liberar(0.0, ERRO)
+        return
+    erro = futuro.exception()
+    if erro is None:
+        resultado = SUCESSO
+    else:
+        resultado = SOBRECARGA if _indica_sobrecarga(erro) else ERRO
+    _registrar_tentativa(modelo, duracao, resultado)
+
+
+def _indica_sobrecarga(erro: Exception) -> bool:
+    """429, RESOURCE_EXHAUSTED e timeouts indicam que devemos reduzir a concorrência."""
+    if isinstance(erro, (httpx.TimeoutException, TimeoutError)):
+        return True
+    mensagem = str(erro)
+    return "429" in mensagem or "RESOURCE_EXHAUSTED" in mensagem or "timed out" in mensagem.lower()
+
+
+@tracer.start_as_current_span("preferencias.carregar")
 def obter_preferencias_usuario(usuario_id: int, db: Session) -> dict:
     """
     Busca preferências do usuário baseadas em feedbacks anteriores.
@@ -157,7 +317,8 @@ def obter_preferencias_usuario(usuario_id: int, db: Session) -> dict:
         db: Sessão do banco de dados
     
     Returns:
-        Dict com listas de exercícios e refeições que o usuário gostou/não gostou
+        Dict com listas de exercícios e refeições que o usuário gostou/não gostou,
+        sem repetições e da maior para a menor prioridade (`ranquear_preferencias`)
     """
     from app.database.models.feedback import Feedback
     
@@ -166,24 +327,7 @@ def obter_preferencias_usuario(usuario_id: int, db: Session) -> dict:
             Feedback.usuario_id == usuario_id
         ).all()
         
-        preferencias = {
-            "exercicios_evitar": [],
-            "exercicios_preferidos": [],
-            "refeicoes_evitar": [],
-            "refeicoes_preferidas": []
-        }
-        
-        for feedback in feedbacks:
-            if feedback.tipo == "exercicio":
-                if feedback.gostou:
-                    preferencias["exercicios_preferidos"].append(feedback.item_nome)
-                else:
-                    preferencias["exercicios_evitar"].append(feedback.item_nome)
-            elif feedback.tipo == "refeicao":
-                if feedback.gostou:
-                    preferencias["refeicoes_preferidas"].append(feedback.item_nome)
-                else:
-                    preferencias["refeicoes_evitar"].append(feedback.item_nome)
+        preferencias = ranquear_preferencias(feedbacks)
         
         logger.info(f"Preferências carregadas para usuário {usuario_id}: "
                    f"{len(preferencias['exercicios_evitar'])} ex. evitar, "
@@ -201,44 +345,45 @@ def obter_preferencias_usuario(usuario_id: int, db: Session) -> dict:
         }
 
 
-def generate_training_plan(
-    nome: str,
-    altura: float,
-    peso: float,
-    idade: int,
-    disponibilidade: int,
-    local: str,
-    objetivo: str,
-    preferencias: Optional[dict] = None,
-) -> Dict[str, Any]:
+LOCAL_DESCRICOES = {"academia": "Academia", "casa": "Em casa", "arLivre": "Ao ar livre"}
 
-    altura_metros = altura / 100
+OBJETIVO_DESCRICOES = {
+    "perder": "Perder peso",
+    "ganhar": "Ganhar peso",
+    "hipertrofia": "Hipertrofia muscular",
+    "definicao": "Definição muscular",
+}
 
-    imc = peso / (altura_metros**2)
 
-    local_map = {"academia": "Academia", "casa": "Em casa", "arLivre": "Ao ar livre"}
+def restricao_exercicios(preferencias: Optional[dict]) -> str:
+    restricoes = montar_restricoes(preferencias, refeicoes=False)
+    _registrar_restricoes("exercícios", restricoes)
+    return restricoes.texto
 
-    objetivo_map = {
-        "perder": "Perder peso",
-        "ganhar": "Ganhar peso",
-        "hipertrofia": "Hipertrofia muscular",
-        "definicao": "Definição muscular",
-    }
 
-    local_descricao = local_map.get(local, local)
-    objetivo_descricao = objetivo_map.get(objetivo, objetivo)
+def restricao_refeicoes(preferencias: Optional[dict]) -> str:
+    restricoes = montar_restricoes(preferencias, exercicios=False)
+    _registrar_restricoes("refeições", restricoes)
+    return restricoes.texto
 
-    prompt_template = Template(
-        """
-        Você é uma API de backend. Retorne APENAS um objeto JSON válido, sem texto antes ou depois.
 
-        DADOS DO USUÁRIO:
-        Nome: $NOME | Altura: $ALTURA cm | Peso: $PESO kg | Idade: $IDADE anos
-        IMC: $IMC | Frequência: $FREQUENCIA x/semana | Local: $LOCAL | Objetivo: $OBJETIVO
+def _registrar_restricoes(secao: str, restricoes: Restricoes) -> None:
+    if restricoes.resumidas or restricoes.descartadas:
+        logger.info(
+            "Restrições de %s acima do orçamento: %d listada(s), %d resumida(s) em categorias, %d descartada(s)",
+            secao, restricoes.listadas, restricoes.resumidas, restricoes.descartadas,
+        )
+
+
+# Parte fixa do prompt, igual para todos os usuários: vem primeiro para poder
+# ficar no cache de contexto do provedor (`LLM_CACHE_CONTEXTO_ATIVO`)
+PREFIXO_PLANO = Template(
+    """
+        Você é uma API de backend. Retorne APENAS um objeto JSON válido, sem texto antes ou depois.
 
         SUAS OBRIGAÇÕES:
         1. Retornar EXCLUSIVAMENTE um JSON válido, sem introduções, comentários ou explicações
-        2. Gerar $FREQUENCIA dias de treino com 5-6 exercícios cada
+        2. Gerar um dia de treino por treino semanal (Frequência em DADOS DO USUÁRIO) com 5-6 exercícios cada
         3. Cada exercício: nome, series (texto), repeticoes (texto), descanso_segundos (número), detalhes_execucao, video_url
         4. Incluir sugestões nutricionais com 3 opções cada (pre_treino e pos_treino)
         5. VERIFICAR TÓDAS AS VÍRGULAS E CHAVES - JSON DEVE SER 100% VÁLIDO
@@ -256,152 +401,299 @@ def generate_training_plan(
         ESTRUTURA ESPERADA:
         $JSON_EXAMPLE
 
-        nesse exemplo — gere variações e substitua valores por opções relevantes ao usuário. 
-        
+        nesse exemplo — gere variações e substitua valores por opções relevantes ao usuário.
+
         IMPORTANTE SOBRE AS REFEIÇÕES:
         - SEJA CRIATIVO! Não repita sempre "Banana com aveia" ou "Frango com batata doce".
         - Varie as fontes de proteína (ovos, iogurte, atum, carne moída, whey, queijo cottage, tofu, lentilha).
         - Varie as fontes de carboidrato (pão, tapioca, cuscuz, macarrão, arroz, batata inglesa, mandioca, frutas variadas).
         - Considere opções práticas e saborosas.
         - Tente surpreender com combinações diferentes, mas acessíveis.
-        $PREFERENCIAS
+"""
+).substitute(JSON_EXAMPLE=JSON_EXAMPLE)
+_TOKENS_PREFIXO_PLANO = estimar_tokens(PREFIXO_PLANO)
+
+
+@tracer.start_as_current_span("ia.montar_prompt")
+def _montar_prompt(
+    nome: str,
+    altura: float,
+    peso: float,
+    idade: int,
+    disponibilidade: int,
+    local: str,
+    objetivo: str,
+    preferencias: Optional[dict] = None,
+) -> tuple[str, str]:
+    """
+    Monta o prompt de geração do plano a partir do perfil e das preferências.
 
-        COMECE COM { E TERMINE COM } - NADA MAIS!
+    Returns:
+        (prefixo, sufixo): `PREFIXO_PLANO` e os dados do usuário; o prompt
+        completo é a concatenação dos dois
     """
+
+    altura_metros = altura / 100
+
+    imc = peso / (altura_metros**2)
+
+    local_descricao = LOCAL_DESCRICOES.get(local, local)
+    objetivo_descricao = OBJETIVO_DESCRICOES.get(objetivo, objetivo)
+
+    campos = {
+        "NOME": nome,
+        "ALTURA": altura,
+        "PESO": peso,
+        "IDADE": idade,
+        "IMC": f"{imc:.2f}",
+        "FREQUENCIA": disponibilidade,
+        "LOCAL": local_descricao,
+        "OBJETIVO": objetivo_descricao,
+    }
+    sufixo, restricoes = montar_sufixo_plano(
+        campos, preferencias, settings.LLM_PROMPT_MAX_TOKENS - _TOKENS_PREFIXO_PLANO
     )
-    
-    preferencias_text = ""
-    if preferencias:
-        if preferencias.get("exercicios_evitar"):
-            exercicios_evitar = ", ".join(preferencias["exercicios_evitar"][:10])  # Limitar a 10
-            preferencias_text += f"""
 
-RESTRIÇÃO CRÍTICA - EXERCÍCIOS PROIBIDOS:
-O usuário JÁ TESTOU e NÃO GOSTOU dos seguintes exercícios. JAMAIS os inclua:
-{exercicios_evitar}
+    tokens = _TOKENS_PREFIXO_PLANO + estimar_tokens(sufixo)
+    span = trace.get_current_span()
+    span.set_attribute("ia.prompt_tokens_estimados", tokens)
+    span.set_attribute("ia.preferencias_descartadas", restricoes.descartadas)
+    logger.info(
+        "Prompt de %s: ~%d tokens; preferências: %d listada(s), %d resumida(s) em categorias, %d descartada(s)",
+        nome, tokens, restricoes.listadas, restricoes.resumidas, restricoes.descartadas,
+    )
 
-Substitua por exercícios alternativos que trabalhem os mesmos grupos musculares.
-"""
-        
-        if preferencias.get("refeicoes_evitar"):
-            refeicoes_evitar = ", ".join(preferencias["refeicoes_evitar"][:10])
-            preferencias_text += f"""
+    return PREFIXO_PLANO, sufixo
 
-RESTRIÇÃO CRÍTICA - REFEIÇÕES PROIBIDAS:
-O usuário NÃO GOSTA das seguintes refeições/ingredientes. EVITE COMPLETAMENTE:
-{refeicoes_evitar}
 
-Sugira alternativas diferentes com outras proteínas e carboidratos.
-"""
-    
-    prompt = prompt_template.substitute(
-        NOME=nome,
-        ALTURA=altura,
-        PESO=peso,
-        IDADE=idade,
-        IMC=f"{imc:.2f}",
-        FREQUENCIA=disponibilidade,
-        LOCAL=local_descricao,
-        OBJETIVO=objetivo_descricao,
-        JSON_EXAMPLE=JSON_EXAMPLE,
-        PREFERENCIAS=preferencias_text,
+def _reparar_json(texto: str) -> Optional[Any]:
+    """Reparos baratos: cercas de markdown, texto fora das chaves e vírgulas sobrando."""
+    inicio, fim = texto.find("{"), texto.rfind("}")
+    if inicio == -1 or fim <= inicio:
+        return None
+    candidato = re.sub(r",\s*([}\]])", r"\1", texto[inicio:fim + 1])
+    try:
+        return json.loads(candidato)
+    except json.JSONDecodeError:
+        return None
+
+
+def _json_invalido(response_text: str, json_err: json.JSONDecodeError) -> NoReturn:
+    # Um único registro com um trecho ao redor do erro, não a resposta inteira
+    logger.error(
+        "IA retornou JSON inválido (linha %d, coluna %d): %s | trecho: %r",
+        json_err.lineno,
+        json_err.colno,
+        json_err.msg,
+        response_text[max(0, json_err.pos - 80):json_err.pos + 80],
+    )
+
+    raise ValueError(
+        f"A IA retornou uma resposta com JSON inválido. "
+        f"Erro na linha {json_err.lineno}, coluna {json_err.colno}: {json_err.msg}"
     )
 
+
+def carregar_json(response_text: str) -> Any:
+    """json.loads com reparo local; ValueError se nem o reparo resolver."""
     try:
-        logger.info(f"Gerando plano de treino para {nome}")
-        response_text = _call_gemini_api(prompt)
+        return json.loads(response_text)
+    except json.JSONDecodeError as json_err:
+        reparado = _reparar_json(response_text)
+        if reparado is None:
+            _json_invalido(response_text, json_err)
+        logger.warning("JSON da IA reparado localmente (%s)", json_err.msg)
+        return reparado
 
-        logger.debug(
-            f"Resposta bruta da IA (primeiros 500 chars): {response_text[:500]}"
-        )
 
-        try:
-            plano_dict = json.loads(response_text)
-        except json.JSONDecodeError as json_err:
-            logger.error("IA retornou JSON inválido")
-            logger.error(
-                f"Posição do erro: linha {json_err.lineno}, coluna {json_err.colno}"
-            )
-            logger.error(f"Mensagem: {json_err.msg}")
+@tracer.start_as_current_span("ia.interpretar_resposta")
+def _interpretar_resposta(response_text: str, nome: str) -> Dict[str, Any]:
+    """Converte a resposta da IA em dict, valida a estrutura e normaliza descansos e links."""
+    return validar_plano(carregar_json(response_text), nome)
 
-            lines = response_text.split("\n")
-            if json_err.lineno <= len(lines):
-                error_line = lines[json_err.lineno - 1]
-                logger.error(f"Linha com erro: {error_line}")
-                logger.error(f"Posição: {' ' * (json_err.colno - 1)}^")
 
-            raise ValueError(
-                f"A IA retornou uma resposta com JSON inválido. "
-                f"Erro na linha {json_err.lineno}, coluna {json_err.colno}: {json_err.msg}"
-            )
+def validar_plano(plano_dict: Any, nome: str) -> Dict[str, Any]:
+    if not isinstance(plano_dict, dict):
+        raise ValueError("Resposta da IA não é um objeto JSON válido")
 
-        if not isinstance(plano_dict, dict):
-            raise ValueError("Resposta da IA não é um objeto JSON válido")
+    if "nome_da_rotina" not in plano_dict:
+        raise ValueError("Campo obrigatório 'nome_da_rotina' ausente na resposta")
 
-        if "nome_da_rotina" not in plano_dict:
-            raise ValueError("Campo obrigatório 'nome_da_rotina' ausente na resposta")
+    if "dias_de_treino" not in plano_dict:
+        raise ValueError("Campo obrigatório 'dias_de_treino' ausente na resposta")
 
-        if "dias_de_treino" not in plano_dict:
-            raise ValueError("Campo obrigatório 'dias_de_treino' ausente na resposta")
+    if not isinstance(plano_dict["dias_de_treino"], list):
+        raise ValueError("Campo 'dias_de_treino' deve ser uma lista")
 
-        if not isinstance(plano_dict["dias_de_treino"], list):
-            raise ValueError("Campo 'dias_de_treino' deve ser uma lista")
+    if len(plano_dict["dias_de_treino"]) == 0:
+        raise ValueError("Campo 'dias_de_treino' não pode estar vazio")
 
-        if len(plano_dict["dias_de_treino"]) == 0:
-            raise ValueError("Campo 'dias_de_treino' não pode estar vazio")
+    if "sugestoes_nutricionais" not in plano_dict:
+        raise ValueError(
+            "Campo obrigatório 'sugestoes_nutricionais' ausente na resposta"
+        )
 
-        if "sugestoes_nutricionais" not in plano_dict:
-            raise ValueError(
-                "Campo obrigatório 'sugestoes_nutricionais' ausente na resposta"
-            )
+    plano = plano_dict
+    normalizar_plano(plano)
 
-        plano = plano_dict
+    logger.info(f"Plano gerado e validado com sucesso para {nome}")
+    logger.info(f"Plano contém {len(plano['dias_de_treino'])} dias de treino")
+    return plano
 
-        def ensure_search_url(url: str, query: str, target: str) -> str:
-            if not url:
-                if target == "youtube":
-                    return f"https://www.youtube.com/results?search_query=como+fazer+{quote_plus(query)}"
-                return f"https://www.google.com/search?q=como+fazer+{quote_plus(query)}"
 
-            if target == "youtube" and re.search(
-                r"youtube\.com/results\?search_query=", url
-            ):
-                return url
-            if target == "google" and re.search(r"google\.com/search\?q=", url):
-                return url
+def normalizar_plano(plano: Dict[str, Any]) -> None:
+    """Corrige descansos e links de vídeo/receita; aceita planos parciais (só dias ou só nutrição)."""
 
+    def ensure_search_url(url: str, query: str, target: str) -> str:
+        if not url:
             if target == "youtube":
                 return f"https://www.youtube.com/results?search_query=como+fazer+{quote_plus(query)}"
             return f"https://www.google.com/search?q=como+fazer+{quote_plus(query)}"
 
-        if isinstance(plano, dict) and "dias_de_treino" in plano:
-            for dia in plano.get("dias_de_treino", []):
-                for ex in dia.get("exercicios", []):
-                    nome_ex = ex.get("nome", "")
-                    descanso = ex.get("descanso_segundos")
-                    if isinstance(descanso, str) and descanso.isdigit():
-                        ex["descanso_segundos"] = int(descanso)
-                    elif not isinstance(descanso, int):
-                        ex["descanso_segundos"] = 60
-
-                    ex["video_url"] = ensure_search_url(
-                        ex.get("video_url"), nome_ex, "youtube"
-                    )
-
-        if isinstance(plano, dict) and "sugestoes_nutricionais" in plano:
-            for timing in ("pre_treino", "pos_treino"):
-                block = plano["sugestoes_nutricionais"].get(timing, {})
-                for key, meal in list(block.items()):
-                    nome_ref = meal.get("nome") or key
-                    meal["link_receita"] = ensure_search_url(
-                        meal.get("link_receita"), nome_ref, "google"
-                    )
-
-        logger.info(f"Plano gerado e validado com sucesso para {nome}")
-        logger.info(f"Plano contém {len(plano['dias_de_treino'])} dias de treino")
+        if target == "youtube" and re.search(
+            r"youtube\.com/results\?search_query=", url
+        ):
+            return url
+        if target == "google" and re.search(r"google\.com/search\?q=", url):
+            return url
+
+        if target == "youtube":
+            return f"https://www.youtube.com/results?search_query=como+fazer+{quote_plus(query)}"
+        return f"https://www.google.com/search?q=como+fazer+{quote_plus(query)}"
+
+    if isinstance(plano, dict) and "dias_de_treino" in plano:
+        for dia in plano.get("dias_de_treino", []):
+            for ex in dia.get("exercicios", []):
+                nome_ex = ex.get("nome", "")
+                descanso = ex.get("descanso_segundos")
+                if isinstance(descanso, str) and descanso.isdigit():
+                    ex["descanso_segundos"] = int(descanso)
+                elif not isinstance(descanso, int):
+                    ex["descanso_segundos"] = 60
+
+                ex["video_url"] = ensure_search_url(
+                    ex.get("video_url"), nome_ex, "youtube"
+                )
+
+    if isinstance(plano, dict) and "sugestoes_nutricionais" in plano:
+        for timing in ("pre_treino", "pos_treino"):
+            block = plano["sugestoes_nutricionais"].get(timing, {})
+            for key, meal in list(block.items()):
+                nome_ref = meal.get("nome") or key
+                meal["link_receita"] = ensure_search_url(
+                    meal.get("link_receita"), nome_ref, "google"
+                )
+
+
+TIER_RAPIDO = "rapido"
+TIER_FORTE = "forte"
+
+
+class RespostaInvalida(ValueError):
+    """A IA respondeu, mas o plano não passou na validação nem no reparo local."""
+
+
+def escolher_tier(disponibilidade: int, preferencias: Optional[dict]) -> str:
+    """Planos pequenos e sem restrições vão para o modelo rápido; o resto, para o forte."""
+    if not settings.LLM_TIERING_ATIVO:
+        return TIER_FORTE
+    tem_restricoes = bool(
+        preferencias
+        and (preferencias.get("exercicios_evitar") or preferencias.get("refeicoes_evitar"))
+    )
+    if disponibilidade <= settings.LLM_TIER_RAPIDO_MAX_DIAS and not tem_restricoes:
+        return TIER_RAPIDO
+    return TIER_FORTE
+
+
+def max_tokens_saida(disponibilidade: int) -> int:
+    """Teto de tokens de saída proporcional aos dias pedidos (nutrição entra na base)."""
+    return min(
+        settings.LLM_TOKENS_SAIDA_MAX,
+        settings.LLM_TOKENS_SAIDA_BASE + settings.LLM_TOKENS_SAIDA_POR_DIA * disponibilidade,
+    )
+
+
+def _gerar_no_tier(
+    tier: str, prefixo: str, prompt: str, nome: str, disponibilidade: int, max_tokens_saida: int
+) -> Dict[str, Any]:
+    modelo = settings.LLM_MODELO_RAPIDO if tier == TIER_RAPIDO else settings.LLM_MODELO
+    inicio = time.monotonic()
+    resultado = "erro"
+    try:
+        response_text = call_llm_api(
+            prompt, modelo=modelo, max_tokens_saida=max_tokens_saida, prefixo=prefixo
+        )
+        logger.debug("Resposta bruta da IA (primeiros 500 chars): %.500s", response_text)
+        try:
+            plano = _interpretar_resposta(response_text, nome)
+        except ValueError as e:
+            raise RespostaInvalida(str(e)) from e
+        if tier == TIER_RAPIDO and len(plano["dias_de_treino"]) != disponibilidade:
+            raise RespostaInvalida(
+                f"Plano com {len(plano['dias_de_treino'])} dias, esperado {disponibilidade}"
+            )
+        resultado = "sucesso"
         return plano
+    finally:
+        PLANO_GERACAO_TIER.labels(tier, resultado).observe(time.monotonic() - inicio)
 
-    except ValueError:
+
+@tracer.start_as_current_span("ia.gerar_plano")
+def generate_training_plan(
+    nome: str,
+    altura: float,
+    peso: float,
+    idade: int,
+    disponibilidade: int,
+    local: str,
+    objetivo: str,
+    preferencias: Optional[dict] = None,
+    db: Optional[Session] = None,
+) -> Dict[str, Any]:
+
+    tier = escolher_tier(disponibilidade, preferencias)
+    span = trace.get_current_span()
+    span.set_attribute("ia.tier", tier)
+    LLM_TIER_ESCOLHAS.labels(tier).inc()
+
+    try:
+        if settings.LLM_SAIDA_COMPACTA:
+            from app.services.saida_compacta import gerar_plano_compacto
+
+            logger.info("Gerando plano de treino para %s com saída compacta (tier %s)", nome, tier)
+            return gerar_plano_compacto(
+                nome, altura, peso, idade, disponibilidade, local, objetivo, preferencias, tier, db
+            )
+
+        if settings.LLM_GERACAO_PARALELA:
+            from app.services.geracao_paralela import gerar_plano_paralelo
+
+            logger.info("Gerando plano de treino para %s em paralelo (tier %s)", nome, tier)
+            return gerar_plano_paralelo(
+                nome, altura, peso, idade, disponibilidade, local, objetivo, preferencias, tier
+            )
+
+        prefixo, prompt = _montar_prompt(
+            nome, altura, peso, idade, disponibilidade, local, objetivo, preferencias
+        )
+        logger.info("Gerando plano de treino para %s (tier %s)", nome, tier)
+        max_tokens = max_tokens_saida(disponibilidade)
+        if tier == TIER_RAPIDO:
+            try:
+                return _gerar_no_tier(TIER_RAPIDO, prefixo, prompt, nome, disponibilidade, max_tokens)
+            except RespostaInvalida as e:
+                # Resposta inválida mesmo após o reparo local: tenta o modelo forte.
+                # Falhas da chamada em si (429, circuito aberto) não escalam.
+                logger.warning("Tier rápido falhou para %s, escalando: %s", nome, e)
+                LLM_ESCALONAMENTOS.labels(TIER_RAPIDO, TIER_FORTE).inc()
+                span.set_attribute("ia.escalonado", True)
+                # A falha pode ter sido truncamento pelo teto: o escalonamento usa o máximo
+                max_tokens = settings.LLM_TOKENS_SAIDA_MAX
+
+        return _gerar_no_tier(TIER_FORTE, prefixo, prompt, nome, disponibilidade, max_tokens)
+
+    except (ValueError, ServicoIndisponivelError):
         raise
 
     except Exception as e:
@@ -0,0 +1,155 @@
+# app/services/limite_concorrencia.py
+"""Limite adaptativo (AIMD) de chamadas simultâneas a serviços externos."""
+
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from app.core.exceptions import ServicoIndisponivelError
+
+logger = logging.getLogger(__name__)
+
+SUCESSO = "sucesso"
+SOBRECARGA = "sobrecarga"  # 429, timeouts: sinal para reduzir o limite
+ERRO = "erro"  # falhas que não indicam sobrecarga
+
+
+class LimitadorAIMD:
+    """
+    Controla quantas chamadas ficam em voo ao mesmo tempo.
+
+    - Aumento aditivo: cada sucesso com latência abaixo de `latencia_alvo`
+      soma 1/limite, ou seja, ~+1 a cada `limite` chamadas saudáveis.
+    - Redução multiplicativa: 429 ou timeout multiplica o limite por
+      `fator_reducao` (no máximo uma vez por `latencia_alvo`, para que uma
+      rajada de erros conte como um único sinal).
+
+    Excedentes esperam numa fila limitada até o prazo; fila cheia ou prazo
+    vencido resultam em ServicoIndisponivelError (503 + Retry-After).
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        limite_inicial: int = 4,
+        limite_min: int = 1,
+        limite_max: int = 32,
+        fila_max: int = 50,
+        latencia_alvo: float = 15.0,
+        fator_reducao: float = 0.5,
+    ):
+        self.nome = nome
+        self.limite_min = limite_min
+        self.limite_max = limite_max
+        self.fila_max = fila_max
+        self.latencia_alvo = latencia_alvo
+        self.fator_reducao = fator_reducao
+
+        self._cond = threading.Condition()
+        self._limite = float(max(limite_min, min(limite_inicial, limite_max)))
+        self._em_voo = 0
+        self._na_fila = 0
+        self._ultima_reducao = 0.0
+        self._latencia_media = latencia_alvo / 2
+        self.rejeitadas = 0
+
+    @property
+    def limite(self) -> int:
+        return max(self.limite_min, int(self._limite))
+
+    @property
+    def na_fila(self) -> int:
+        return self._na_fila
+
+    def adquirir(self, timeout: float) -> None:
+        """Ocupa uma vaga, esperando até `timeout` segundos na fila."""
+        with self._cond:
+            if self._em_voo < self.limite:
+                self._em_voo += 1
+                return
+
+            if self._na_fila >= self.fila_max:
+                self.rejeitadas += 1
+                logger.warning(f"Limitador '{self.nome}': fila cheia ({self._na_fila}), requisição descartada")
+                raise ServicoIndisponivelError(
+                    "Serviço de IA sobrecarregado. Tente novamente em instantes.",
+                    retry_after=self._estimar_espera(),
+                )
+
+            prazo = time.monotonic() + timeout
+            self._na_fila += 1
+            try:
+                while self._em_voo >= self.limite:
+                    restante = prazo - time.monotonic()
+                    if restante <= 0:
+                        self.rejeitadas += 1
+                        logger.warning(f"Limitador '{self.nome}': prazo de espera na fila esgotado")
+                        raise ServicoIndisponivelError(
+                            "Serviço de IA sobrecarregado. Tente novamente em instantes.",
+                            retry_after=self._estimar_espera(),
+                        )
+                    self._cond.wait(restante)
+                self._em_voo += 1
+            finally:
+                self._na_fila -= 1
+
+    def tentar_adquirir(self) -> bool:
+        """Ocupa uma vaga só se houver uma livre agora (sem fila); usado por chamadas opcionais."""
+        with self._cond:
+            if self._em_voo < self.limite and self._na_fila == 0:
+                self._em_voo += 1
+                return True
+            return False
+
+    def liberar(self, latencia: float, resultado: str) -> None:
+        """Devolve a vaga e ajusta o limite conforme o resultado da chamada."""
+        with self._cond:
+            self._em_voo = max(0, self._em_voo - 1)
+            anterior = self.limite
+
+            if resultado == SUCESSO:
+                self._latencia_media = 0.8 * self._latencia_media + 0.2 * latencia
+                if latencia <= self.latencia_alvo:
+                    self._limite = min(self.limite_max, self._limite + 1 / self._limite)
+            elif resultado == SOBRECARGA:
+                agora = time.monotonic()
+                if agora - self._ultima_reducao >= self.latencia_alvo:
+                    self._ultima_reducao = agora
+                    self._limite = max(self.limite_min, self._limite * self.fator_reducao)
+
+            if self.limite != anterior:
+                log = logger.warning if self.limite < anterior else logger.info
+                log(f"Limitador '{self.nome}': limite {anterior} -> {self.limite}")
+
+            self._cond.notify_all()
+
+    @contextmanager
+    def vaga(self, timeout: float) -> Iterator[dict]:
+        """
+        Context manager que adquire e libera a vaga. O chamador marca o
+        resultado em `estado["resultado"]`; exceções contam como ERRO.
+        """
+        self.adquirir(timeout)
+        inicio = time.monotonic()
+        estado = {"resultado": ERRO}
+        try:
+            yield estado
+        finally:
+            self.liberar(time.monotonic() - inicio, estado["resultado"])
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "nome": self.nome,
+                "limite": self.limite,
+                "em_voo": self._em_voo,
+                "na_fila": self._na_fila,
+                "rejeitadas": self.rejeitadas,
+                "latencia_media": round(self._latencia_media, 3),
+            }
+
+    def _estimar_espera(self) -> int:
+        return max(1, math.ceil(self._latencia_media * (self._na_fila + 1) / self.limite))
@@ -0,0 +1,358 @@
+# app/services/pool_planos.py
+"""
+Pool de planos pré-gerados por bucket de perfil.
+
+A maioria das requisições cai em poucas combinações de objetivo, local,
+disponibilidade, faixa de IMC e faixa de idade. Um job em lote
+(`python -m app.services.pool_planos`) gera N planos diversos por bucket
+pelo mesmo caminho da geração normal (provedor, tiers, validação) e os
+grava em `planos_pool`.
+
+Com `PLANO_POOL_ATIVO`, `POST /sugestao` pega um plano livre do bucket do
+usuário que não contenha itens das suas preferências, troca o nome
+provisório pelo do usuário, ajusta as cargas e o persiste: nenhuma
+chamada à IA no caminho da requisição. Quando o bucket fica abaixo de
+`PLANO_POOL_MINIMO`, ele é reposto numa thread em segundo plano, com a
+mesma baixa prioridade da pré-geração especulativa: nenhuma geração começa
+com chamadas à IA na fila ou com a pressão de carga acima de
+`PLANO_POOL_PRESSAO_MAX`, e há no máximo `PLANO_POOL_REPOSICOES_POR_HORA`.
+"""
+
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Callable, ContextManager, NamedTuple, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import ServicoIndisponivelError
+from app.core.metricas import PLANO_POOL_CONSUMO, PLANO_POOL_GERADOS
+from app.core.protecao_carga import monitor_carga
+from app.core.rastreamento import tracer
+from app.database.models.plano_pool import PlanoPool
+from app.services.catalogo import nome_corresponde, normalizar_nome, obter_indice
+from app.services.ia_agent import LOCAL_DESCRICOES, OBJETIVO_DESCRICOES, generate_training_plan, llm_limitador
+
+logger = logging.getLogger(__name__)
+
+# Nome usado no prompt dos planos do pool; trocado pelo do usuário ao servir
+NOME_POOL = "[NOME]"
+ALTURA_POOL = 170.0
+
+# (limite superior exclusivo, faixa) e o valor representativo usado na geração
+FAIXAS_IMC = ((18.5, "abaixo"), (25.0, "normal"), (30.0, "sobrepeso"), (math.inf, "obesidade"))
+IMC_REPRESENTATIVO = {"abaixo": 17.5, "normal": 22.0, "sobrepeso": 27.5, "obesidade": 33.0}
+FAIXAS_IDADE = ((30, "ate_29"), (45, "30_44"), (60, "45_59"), (math.inf, "60_mais"))
+IDADE_REPRESENTATIVA = {"ate_29": 25, "30_44": 37, "45_59": 52, "60_mais": 65}
+
+
+class Bucket(NamedTuple):
+    objetivo: str
+    local: str
+    disponibilidade: int
+    faixa_imc: str
+    faixa_idade: str
+
+
+def _faixa(valor: float, faixas: tuple) -> str:
+    return next(nome for limite, nome in faixas if valor < limite)
+
+
+def bucket_do_perfil(
+    objetivo: str, local: str, disponibilidade: int, altura: float, peso: float, idade: int
+) -> Bucket:
+    imc = peso / (altura / 100) ** 2
+    return Bucket(objetivo, local, disponibilidade, _faixa(imc, FAIXAS_IMC), _faixa(idade, FAIXAS_IDADE))
+
+
+def _filtro_bucket(query, bucket: Bucket):
+    return query.filter(
+        PlanoPool.objetivo == bucket.objetivo,
+        PlanoPool.local == bucket.local,
+        PlanoPool.disponibilidade == bucket.disponibilidade,
+        PlanoPool.faixa_imc == bucket.faixa_imc,
+        PlanoPool.faixa_idade == bucket.faixa_idade,
+        PlanoPool.usado_em.is_(None),
+    )
+
+
+def contar_livres(db: Session, bucket: Bucket) -> int:
+    return _filtro_bucket(db.query(func.count(PlanoPool.id)), bucket).scalar()
+
+
+def _nomes(plano: dict) -> tuple[list[str], list[str]]:
+    exercicios = sorted({
+        normalizar_nome(ex.get("nome"))
+        for dia in plano.get("dias_de_treino", [])
+        for ex in dia.get("exercicios", [])
+    })
+    refeicoes = sorted({
+        normalizar_nome(ref.get("nome"))
+        for opcoes in plano.get("sugestoes_nutricionais", {}).values()
+        for ref in opcoes.values()
+    })
+    return exercicios, refeicoes
+
+
+def gerar_para_bucket(
+    sessao: Callable[[], ContextManager[Session]],
+    bucket: Bucket,
+    quantidade: int,
+    pode_gerar: Callable[[], bool] = lambda: True,
+) -> int:
+    """
+    Gera até `quantidade` planos novos para o bucket. Planos iguais a um já
+    existente (mesmos exercícios e refeições) são descartados; o total de
+    chamadas é limitado a 2x a quantidade pedida. `pode_gerar` é consultado
+    antes de cada geração; se recusar, o bucket fica como está.
+
+    `sessao()` abre uma sessão só para gravar cada plano: nenhuma conexão
+    fica presa enquanto a IA gera.
+
+    Returns:
+        Quantidade de planos gravados
+    """
+    imc = IMC_REPRESENTATIVO[bucket.faixa_imc]
+    peso = round(imc * (ALTURA_POOL / 100) ** 2, 1)
+    idade = IDADE_REPRESENTATIVA[bucket.faixa_idade]
+
+    gravados = 0
+    for _ in range(2 * quantidade):
+        if gravados >= quantidade or not pode_gerar():
+            break
+        try:
+            plano = generate_training_plan(
+                NOME_POOL, ALTURA_POOL, peso, idade, bucket.disponibilidade, bucket.local, bucket.objetivo
+            )
+        except ServicoIndisponivelError as e:
+            logger.warning("IA indisponível; reposição do bucket %s interrompida: %s", bucket, e)
+            PLANO_POOL_GERADOS.labels("erro").inc()
+            break
+        except ValueError as e:
+            logger.warning("Plano inválido para o pool (%s): %s", bucket, e)
+            PLANO_POOL_GERADOS.labels("erro").inc()
+            continue
+
+        exercicios, refeicoes = _nomes(plano)
+        assinatura = hashlib.sha256("|".join(exercicios + ["#"] + refeicoes).encode()).hexdigest()
+        with sessao() as db:
+            if db.query(PlanoPool.id).filter(PlanoPool.assinatura == assinatura).first():
+                PLANO_POOL_GERADOS.labels("duplicado").inc()
+                continue
+
+            db.add(PlanoPool(
+                **bucket._asdict(),
+                conteudo=plano,
+                exercicios=exercicios,
+                refeicoes=refeicoes,
+                assinatura=assinatura,
+            ))
+            db.commit()
+        gravados += 1
+        PLANO_POOL_GERADOS.labels("novo").inc()
+
+    logger.info("Pool %s: %d plano(s) gerado(s)", bucket, gravados)
+    return gravados
+
+
+def _aquecer_indice(db: Session) -> None:
+    # A saída compacta lê o catálogo do índice em memória; a geração roda sem sessão
+    if settings.LLM_SAIDA_COMPACTA:
+        obter_indice(db)
+
+
+def preencher_pool(db: Session, buckets: list[Bucket], por_bucket: int) -> int:
+    """Completa cada bucket até `por_bucket` planos livres."""
+    _aquecer_indice(db)
+    total = 0
+    for bucket in buckets:
+        faltam = por_bucket - contar_livres(db, bucket)
+        if faltam > 0:
+            total += gerar_para_bucket(lambda: nullcontext(db), bucket, faltam)
+    return total
+
+
+def _compativel(item: PlanoPool, evitar_ex: list[str], evitar_ref: list[str]) -> bool:
+    if any(nome_corresponde(nome, evitar_ex) for nome in item.exercicios):
+        return False
+    return not any(nome_corresponde(nome, evitar_ref) for nome in item.refeicoes)
+
+
+def _trocar_nome(valor: Any, nome: str) -> Any:
+    if isinstance(valor, str):
+        return valor.replace(NOME_POOL, nome)
+    if isinstance(valor, list):
+        return [_trocar_nome(v, nome) for v in valor]
+    if isinstance(valor, dict):
+        return {k: _trocar_nome(v, nome) for k, v in valor.items()}
+    return valor
+
+
+def _ajustar_cargas(plano: dict, idade: int, imc: float) -> None:
+    """Idosos e IMC muito alto: no máximo 3 séries e pelo menos 60s de descanso."""
+    if idade < 60 and imc < 35:
+        return
+    for dia in plano.get("dias_de_treino", []):
+        for ex in dia.get("exercicios", []):
+            series = re.match(r"(\d+)", str(ex.get("series", "")))
+            if series and int(series.group(1)) > 3:
+                ex["series"] = "3x"
+            if isinstance(ex.get("descanso_segundos"), int):
+                ex["descanso_segundos"] = max(ex["descanso_segundos"], 60)
+
+
+def personalizar(conteudo: dict, nome: str, idade: int, imc: float) -> dict:
+    plano = _trocar_nome(conteudo, nome)
+    _ajustar_cargas(plano, idade, imc)
+    return plano
+
+
+@tracer.start_as_current_span("plano.consumir_pool")
+def consumir_do_pool(
+    db: Session,
+    nome: str,
+    altura: float,
+    peso: float,
+    idade: int,
+    disponibilidade: int,
+    local: str,
+    objetivo: str,
+    preferencias: Optional[dict],
+    usuario_id: int,
+) -> Optional[dict]:
+    """
+    Reserva um plano livre e compatível do bucket do usuário e o devolve
+    personalizado, ou None se não houver.
+
+    Os candidatos são lidos sem trava e filtrados pelas preferências; só o
+    escolhido é travado (SKIP LOCKED), e se outra requisição já o tiver
+    pego o próximo compatível é tentado. A linha travada é marcada como
+    usada na transação da requisição: o commit de `_salvar_plano` a
+    consome; um rollback a devolve ao pool.
+    """
+    bucket = bucket_do_perfil(objetivo, local, disponibilidade, altura, peso, idade)
+    preferencias = preferencias or {}
+    evitar_ex = [normalizar_nome(n) for n in preferencias.get("exercicios_evitar", [])]
+    evitar_ref = [normalizar_nome(n) for n in preferencias.get("refeicoes_evitar", [])]
+
+    candidatos = (
+        _filtro_bucket(db.query(PlanoPool.id, PlanoPool.exercicios, PlanoPool.refeicoes), bucket)
+        .order_by(PlanoPool.id)
+        .limit(settings.PLANO_POOL_CANDIDATOS)
+        .all()
+    )
+    compativeis = [c.id for c in candidatos if _compativel(c, evitar_ex, evitar_ref)]
+
+    escolhido = None
+    for plano_id in compativeis:
+        # Ainda livre e não travado por outra requisição; senão, o próximo
+        escolhido = (
+            _filtro_bucket(db.query(PlanoPool), bucket)
+            .filter(PlanoPool.id == plano_id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if escolhido is not None:
+            break
+
+    if escolhido is None:
+        PLANO_POOL_CONSUMO.labels("incompativel" if candidatos and not compativeis else "vazio").inc()
+        agendar_reposicao(bucket)
+        return None
+
+    escolhido.usado_em = datetime.utcnow()
+    escolhido.usuario_id = usuario_id
+    # Só depois do commit o plano deixa de contar como livre na reposição
+    event.listen(db, "after_commit", lambda _sessao: agendar_reposicao(bucket), once=True)
+    PLANO_POOL_CONSUMO.labels("acerto").inc()
+    return personalizar(escolhido.conteudo, nome, idade, peso / (altura / 100) ** 2)
+
+
+# Reposição em segundo plano: uma thread, um bucket por vez, sem duplicar pedidos
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pool-planos")
+_em_reposicao: set[Bucket] = set()
+_reposicao_lock = threading.Lock()
+_inicios_reposicao: deque[float] = deque()  # gerações da última hora
+
+
+def agendar_reposicao(bucket: Bucket) -> None:
+    with _reposicao_lock:
+        if bucket in _em_reposicao:
+            return
+        _em_reposicao.add(bucket)
+    _executor.submit(_repor, bucket)
+
+
+def _reposicao_permitida() -> bool:
+    """Antes de cada geração da reposição: só sem fila na IA, sem pressão de carga e dentro do orçamento."""
+    if llm_limitador.na_fila > 0 or monitor_carga.pressao() >= settings.PLANO_POOL_PRESSAO_MAX:
+        PLANO_POOL_GERADOS.labels("sob_carga").inc()
+        return False
+    agora = time.monotonic()
+    with _reposicao_lock:
+        while _inicios_reposicao and _inicios_reposicao[0] < agora - 3600:
+            _inicios_reposicao.popleft()
+        if len(_inicios_reposicao) >= settings.PLANO_POOL_REPOSICOES_POR_HORA:
+            PLANO_POOL_GERADOS.labels("sem_orcamento").inc()
+            return False
+        _inicios_reposicao.append(agora)
+    return True
+
+
+def _repor(bucket: Bucket) -> None:
+    from app.database.base import SessionLocal
+
+    try:
+        with SessionLocal() as db:
+            livres = contar_livres(db, bucket)
+            if livres >= settings.PLANO_POOL_MINIMO:
+                return
+            _aquecer_indice(db)
+        gerar_para_bucket(SessionLocal, bucket, settings.PLANO_POOL_POR_BUCKET - livres, _reposicao_permitida)
+    except Exception as e:
+        logger.error("Erro ao repor o pool %s: %s", bucket, e, exc_info=True)
+    finally:
+        with _reposicao_lock:
+            _em_reposicao.discard(bucket)
+
+
+def _buckets(objetivos, locais, dias, faixas_imc, faixas_idade) -> list[Bucket]:
+    return [
+        Bucket(objetivo, local, d, imc, idade)
+        for objetivo in objetivos
+        for local in locais
+        for d in dias
+        for imc in faixas_imc
+        for idade in faixas_idade
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.database.base import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Gera planos para o pool de planos pré-gerados")
+    parser.add_argument("--objetivos", nargs="+", default=list(OBJETIVO_DESCRICOES))
+    parser.add_argument("--locais", nargs="+", default=list(LOCAL_DESCRICOES))
+    parser.add_argument("--dias", type=int, nargs="+", default=[3, 4, 5])
+    parser.add_argument("--faixas-imc", nargs="+", default=["normal", "sobrepeso"])
+    parser.add_argument("--faixas-idade", nargs="+", default=["ate_29", "30_44"])
+    parser.add_argument("--por-bucket", type=int, default=settings.PLANO_POOL_POR_BUCKET)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    buckets = _buckets(args.objetivos, args.locais, args.dias, args.faixas_imc, args.faixas_idade)
+    with SessionLocal() as sessao:
+        gerados = preencher_pool(sessao, buckets, args.por_bucket)
+    logger.info(f"Pool: {gerados} plano(s) novo(s) em {len(buckets)} bucket(s)")
@@ -0,0 +1,139 @@
+# app/services/preferencias.py
+"""
+Aplicação local das preferências do usuário sobre um plano já gerado.
+
+O prompt pede à IA que nunca inclua itens rejeitados, mas nada garante que
+ela obedeça. Este passo encontra exercícios e refeições que correspondem a
+`exercicios_evitar`/`refeicoes_evitar` e os troca por itens do catálogo do
+mesmo grupo muscular ou do mesmo horário/nível, sem nova chamada à IA.
+"""
+
+import logging
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.services.catalogo import (
+    IndiceCatalogo,
+    classificar_grupo,
+    grupos_do_foco,
+    nome_corresponde,
+    normalizar_nome,
+    obter_indice,
+)
+from app.services.gerador_local import url_receita, url_video
+
+logger = logging.getLogger(__name__)
+
+
+def _refeicao_evitada(refeicao: dict, evitar: list[str]) -> bool:
+    """
+    A refeição é evitada quando o nome ou algum ingrediente corresponde a
+    um termo. Termos são comparados palavra a palavra, então rejeitar
+    "Frango" remove toda refeição com frango, enquanto rejeitar "Frango
+    grelhado com batata doce" só casa com ingredientes que tragam todas
+    essas palavras, ou seja, na prática só com a própria refeição.
+    """
+    if nome_corresponde(refeicao.get("nome", ""), evitar):
+        return True
+    return any(nome_corresponde(ing, evitar) for ing in refeicao.get("ingredientes") or [])
+
+
+def aplicar_preferencias(
+    plano: dict,
+    preferencias: Optional[dict],
+    local: Optional[str] = None,
+    db: Optional[Session] = None,
+) -> int:
+    """
+    Substitui no próprio `plano` os itens que o usuário pediu para evitar.
+
+    Exercícios são trocados por outro do mesmo grupo muscular (inferido pelo
+    nome ou pelo foco do dia) compatível com o local; refeições por outra do
+    mesmo horário e nível (ver `_refeicao_evitada` para a regra dos
+    ingredientes). Itens sem substituto disponível são mantidos.
+
+    Returns:
+        Quantidade de substituições feitas
+    """
+    if not preferencias:
+        return 0
+
+    evitar_ex = [normalizar_nome(n) for n in preferencias.get("exercicios_evitar", [])]
+    evitar_ref = [normalizar_nome(n) for n in preferencias.get("refeicoes_evitar", [])]
+    substituicoes = 0
+
+    if evitar_ex:
+        dias = plano.get("dias_de_treino", [])
+        no_plano = {
+            normalizar_nome(ex.get("nome"))
+            for dia in dias
+            for ex in dia.get("exercicios", [])
+        }
+        indice: Optional[IndiceCatalogo] = None
+
+        for dia in dias:
+            for ex in dia.get("exercicios", []):
+                nome = ex.get("nome", "")
+                if not nome_corresponde(nome, evitar_ex):
+                    continue
+
+                if indice is None:
+                    indice = obter_indice(db)
+
+                grupo = classificar_grupo(nome, ex.get("detalhes_execucao"))
+                grupos = [grupo] if grupo else grupos_do_foco(dia.get("foco_muscular"))
+
+                substituto = next(
+                    (
+                        c for g in grupos for c in indice.exercicios(g, local)
+                        if normalizar_nome(c["nome"]) not in no_plano
+                        and not nome_corresponde(c["nome"], evitar_ex)
+                    ),
+                    None,
+                )
+                if substituto is None:
+                    logger.warning(f"Sem substituto no catálogo para exercício evitado: {nome}")
+                    continue
+
+                logger.info(f"Exercício evitado substituído: {nome} -> {substituto['nome']}")
+                no_plano.add(normalizar_nome(substituto["nome"]))
+                ex["nome"] = substituto["nome"]
+                ex["detalhes_execucao"] = substituto.get("detalhes_execucao", "")
+                ex["video_url"] = substituto.get("video_url") or url_video(substituto["nome"])
+                substituicoes += 1
+
+    if evitar_ref:
+        nutricao = plano.get("sugestoes_nutricionais", {})
+
+        for tipo, opcoes in nutricao.items():
+            if not isinstance(opcoes, dict):
+                continue
+            nomes_usados = {normalizar_nome(r.get("nome")) for r in opcoes.values() if isinstance(r, dict)}
+
+            for nivel, refeicao in opcoes.items():
+                if not isinstance(refeicao, dict) or not _refeicao_evitada(refeicao, evitar_ref):
+                    continue
+
+                substituta = next(
+                    (
+                        r for r in obter_indice(db).refeicoes(tipo, nivel)
+                        if normalizar_nome(r["nome"]) not in nomes_usados
+                        and not _refeicao_evitada(r, evitar_ref)
+                    ),
+                    None,
+                )
+                if substituta is None:
+                    logger.warning(f"Sem substituta no catálogo para refeição evitada: {refeicao.get('nome')}")
+                    continue
+
+                logger.info(f"Refeição evitada substituída: {refeicao.get('nome')} -> {substituta['nome']}")
+                nomes_usados.add(normalizar_nome(substituta["nome"]))
+                opcoes[nivel] = {
+                    **{k: v for k, v in substituta.items() if k != "id"},
+                    "ingredientes": list(substituta.get("ingredientes") or []),
+                    "link_receita": substituta.get("link_receita") or url_receita(substituta["nome"]),
+                }
+                substituicoes += 1
+
+    return substituicoes
@@ -0,0 +1,513 @@
+# app/services/provedores_llm.py
+"""
+Provedores de LLM intercambiáveis.
+
+`ia_agent` só conhece a interface `ProvedorLLM`; qual implementação e qual
+modelo usar vem de `Settings`:
+
+- `gemini`: API do Google Gemini (google-genai);
+- `stub`: resposta determinística e local (plano do gerador do catálogo
+  montado a partir do perfil lido no prompt), sem rede;
+- `cassete`: grava e reproduz respostas por hash do (modelo, config,
+  prompt), para testes de regressão e desempenho sem rede.
+
+Todas oferecem chamadas síncronas e assíncronas, com e sem streaming.
+`gerar_com_prefixo` separa o prefixo fixo do prompt: `gemini` e `stub`
+(`ProvedorComCacheContexto`) o guardam num cache de contexto (ver
+`cache_contexto`); os demais provedores, ou o cache indisponível,
+recebem o prompt inteiro.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from app.core.config import settings
+from app.services.cache_contexto import CacheExpiradoError, GerenciadorCacheContexto
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ConfigGeracao:
+    temperatura: float = 0.5
+    max_tokens_saida: int = 8192
+    json: bool = True
+    timeout_segundos: Optional[float] = None  # não entra na chave do cassete
+
+
+@dataclass
+class RespostaLLM:
+    texto: str
+    modelo: str
+    tokens_prompt: int = 0
+    tokens_saida: int = 0
+    tokens_cache: int = 0
+
+
+class CasseteSemRespostaError(LookupError):
+    """O prompt não está no cassete e o modo é apenas reprodução."""
+
+
+class ProvedorLLM(ABC):
+    nome: str
+    caches: Optional[GerenciadorCacheContexto] = None  # só provedores com cache de contexto
+
+    @abstractmethod
+    def gerar(self, prompt: str, modelo: str, config: ConfigGeracao) -> RespostaLLM:
+        ...
+
+    async def gerar_async(self, prompt: str, modelo: str, config: ConfigGeracao) -> RespostaLLM:
+        return await asyncio.to_thread(self.gerar, prompt, modelo, config)
+
+    def gerar_stream(self, prompt: str, modelo: str, config: ConfigGeracao) -> Iterator[str]:
+        yield self.gerar(prompt, modelo, config).texto
+
+    async def gerar_stream_async(
+        self, prompt: str, modelo: str, config: ConfigGeracao
+    ) -> AsyncIterator[str]:
+        yield (await self.gerar_async(prompt, modelo, config)).texto
+
+    def gerar_com_prefixo(
+        self, prefixo: str, sufixo: str, modelo: str, config: ConfigGeracao
+    ) -> RespostaLLM:
+        """Gera com o prompt `prefixo + sufixo`; provedores com cache de contexto separam o prefixo."""
+        return self.gerar(prefixo + sufixo, modelo, config)
+
+
+class ProvedorComCacheContexto(ProvedorLLM):
+    """
+    Provedor que guarda o prefixo fixo do prompt num cache de contexto
+    (`cache_contexto`). As subclasses criam e renovam o cache no provedor
+    e geram referenciando-o pelo nome.
+    """
+
+    def __init__(self):
+        self.caches = GerenciadorCacheContexto(
+            criar=self._criar_cache,
+            renovar=self._renovar_cache,
+            ttl=settings.LLM_CACHE_CONTEXTO_TTL_SEGUNDOS,
+            margem=settings.LLM_CACHE_CONTEXTO_MARGEM_SEGUNDOS,
+            espera_falha=settings.LLM_CACHE_CONTEXTO_ESPERA_FALHA_SEGUNDOS,
+        )
+
+    def gerar_com_prefixo(
+        self, prefixo: str, sufixo: str, modelo: str, config: ConfigGeracao
+    ) -> RespostaLLM:
+        """
+        Com `LLM_CACHE_CONTEXTO_ATIVO`, o prefixo vai pelo cache de contexto;
+        um cache que o provedor não encontra mais é recriado uma vez e, sem
+        cache, o prompt vai inteiro.
+        """
+        if settings.LLM_CACHE_CONTEXTO_ATIVO and prefixo:
+            for _ in range(2):
+                nome = self.caches.obter(modelo, prefixo)
+                if nome is None:
+                    break
+                try:
+                    return self._gerar_no_cache(nome, sufixo, modelo, config)
+                except CacheExpiradoError:
+                    self.caches.invalidar(modelo, prefixo, nome)
+        return super().gerar_com_prefixo(prefixo, sufixo, modelo, config)
+
+    @abstractmethod
+    def _gerar_no_cache(self, nome: str, sufixo: str, modelo: str, config: ConfigGeracao) -> RespostaLLM:
+        """Gera com o cache `nome` como contexto; CacheExpiradoError se o provedor não o encontra."""
+
+    @abstractmethod
+    def _criar_cache(self, modelo: str, prefixo: str, ttl: int) -> str:
+        ...
+
+    @abstractmethod
+    def _renovar_cache(self, nome: str, ttl: int) -> None:
+        ...
+
+
+class ProvedorGemini(ProvedorComCacheContexto):
+    nome = "gemini"
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None):
+        if not api_key:
+            raise ValueError("API_KEY não configurada.")
+        self.api_key = api_key
+        self.base_url = base_url
+        self._cliente = None
+        self._lock = threading.Lock()
+        super().__init__()
+
+    def cliente(self):
+        """Cliente google-genai criado sob demanda (uma vez por processo)."""
+        if self._cliente is None:
+            with self._lock:
+                if self._cliente is None:
+                    from google.genai import types
+                    from google.genai.client import Client as GeminiClient
+
+                    from app.services.cliente_http import criar_clientes_http, http2_disponivel
+
+                    cliente_http, cliente_http_async = criar_clientes_http()
+                    http_options = types.HttpOptions(
+                        base_url=self.base_url,  # Ex.: stub local de benchmarks/gemini_stub.py
+                        httpx_client=cliente_http,
+                        httpx_async_client=cliente_http_async,
+                    )
+                    self._cliente = GeminiClient(api_key=self.api_key, http_options=http_options)
+                    logger.info(f"Cliente gemini inicializado ({'HTTP/2' if http2_disponivel() else 'HTTP/1.1'})")
+        return self._cliente
+
+    @staticmethod
+    def _config(config: ConfigGeracao, cache: Optional[str] = None):
+        from google.genai import types
+
+        return types.GenerateContentConfig(
+            cached_content=cache,
+            temperature=config.temperatura,
+            max_output_tokens=config.max_tokens_saida,
+            response_mime_type="application/json" if config.json else None,
+            http_options=(
+                types.HttpOptions(timeout=int(config.timeout_segundos * 1000))
+                if config.timeout_segundos
+                else None
+            ),
+        )
+
+    @staticmethod
+    def _resposta(resposta, modelo: str) -> RespostaLLM:
+        uso = getattr(resposta, "usage_metadata", None)
+        return RespostaLLM(
+            texto=resposta.text,
+            modelo=modelo,
+            tokens_prompt=getattr(uso, "prompt_token_count", None) or 0,
+            tokens_saida=getattr(uso, "candidates_token_count", None) or 0,
+            tokens_cache=getattr(uso, "cached_content_token_count", None) or 0,
+        )
+
+    def gerar(self, prompt: str, modelo: str, config: ConfigGeracao) -> RespostaLLM:
+        resposta = self.cliente().models.generate_content(
+            model=modelo, contents=prompt, config=self._config(config)
+        )
+        return self._resposta(resposta, modelo)
+
+    async def gerar_async(self, prompt: str, modelo: str, config: ConfigGeracao) -> RespostaLLM:
+        resposta = await self.cliente().aio.models.generate_content(
+            model=modelo, contents=prompt, config=self._config(config)
+        )
+        return self._resposta(resposta, modelo)
+
+    def _gerar_no_cache(self, nome: str, sufixo: str, modelo: str, config: ConfigGeracao) -> RespostaLLM:
+        from google.genai import errors
+
+        try:
+            resposta = self.cliente().models.generate_content(
+                model=modelo, contents=sufixo, config=self._config(config, cache=nome)
+            )
+        except errors.ClientError as e:
+            if self._cache_ausente(e):
+                raise CacheExpiradoError(str(e)) from e
+            raise
+        return self._resposta(resposta, modelo)
+
+    @staticmethod
+    def _cache_ausente(erro) -> bool:
+        # Cache expirado ou removido: 403/404 "CachedContent not found (or permission denied)"
+        return erro.code in (403, 404) and "cachedcontent" in str(erro).lower()
+
+    def _criar_cache(self, modelo: str, prefixo: str, ttl: int) -> str:
+        from google.genai import types
+
+        cache = self.cliente().caches.create(
+            model=modelo,
+            config=types.CreateCachedContentConfig(
+                contents=[prefixo],
+                display_name="aican-prefixo-plano",
+                ttl=f"{ttl}s",
+                http_options=types.HttpOptions(timeout=int(settings.LLM_TIMEOUT_ESCRITA_SEGUNDOS * 1000)),
+            ),
+        )
+        return cache.name
+
+    def _renovar_cache(self, nome: str, ttl: int) -> None:
+        from google.genai import errors, types
+
+        try:
+            self.cliente().caches.update(
+                name=nome,
+                config=types.UpdateCachedContentConfig(
+                    ttl=f"{ttl}s",
+                    http_options=types.HttpOptions(timeout=int(settings.LLM_TIMEOUT_CONEXAO_SEGUNDOS * 1000)),
+                ),
+            )
+        except errors.ClientError as e:
+            if self._cache_ausente(e):
+                raise CacheExpiradoError(str(e)) from e
+            raise
+
+    def gerar_stream(self, prompt: str, modelo: str, config: ConfigGeracao) -> Iterator[str]:
+        for parte in self.cliente().models.generate_content_stream(
+            model=modelo, contents=prompt, config=self._config(config)
+        ):
+            if parte.text:
+                yield parte.text
+
+    async def gerar_stream_async(
+        self, prompt: str, modelo: str, config: ConfigGeracao
+    ) -> AsyncIterator[str]:
+        partes = await self.cliente().aio.models.generate_content_stream(
+            model=modelo, contents=prompt, config=self._config(config)
+        )
+        async for parte in partes:
+            if parte.text:
+                yield parte.text
+
+
+_LOCAIS_PROMPT = {"Academia": "academia", "Em casa": "casa", "Ao ar livre": "arLivre"}
+_OBJETIVOS_PROMPT = {
+    "Perder peso": "perder",
+    "Ganhar peso": "ganhar",
+    "Hipertrofia muscular": "hipertrofia",
+    "Definição muscular": "definicao",
+}
+
+
+def perfil_do_prompt(prompt: str) -> tuple[int, str, str]:
+    """Extrai (frequência, local, objetivo) do prompt de geração; padrões se não achar."""
+    frequencia = re.search(r"Frequ[êe]ncia:\s*(\d+)", prompt)
+    local = re.search(r"Local:\s*([^|\n]+)", prompt)
+    objetivo = re.search(r"Objetivo:\s*([^|\n]+)", prompt)
+    return (
+        max(1, min(7, int(frequencia.group(1)))) if frequencia else 3,
+        _LOCAIS_PROMPT.get(local.group(1).strip(), "academia") if local else "academia",
+        _OBJETIVOS_PROMPT.get(objetivo.group(1).strip(), "hipertrofia") if objetivo else "hipertrofia",
+    )
+
+
+def plano_stub(prompt: str, semente: str) -> str:
+    """
+    JSON de um plano válido para o perfil do prompt, montado pelo gerador
+    local. Prompts de seção (`SEÇÃO: dias 1,2` ou `SEÇÃO: nutricao`, da
+    geração paralela) recebem só a parte pedida; `SEÇÃO: compacta` recebe
+    o formato por códigos da saída compacta.
+    """
+    from app.services.gerador_local import gerar_plano_local
+
+    frequencia, local, objetivo = perfil_do_prompt(prompt)
+    plano = gerar_plano_local(semente, frequencia, local, objetivo)
+
+    secao = re.search(r"SEÇÃO:\s*(dias\s+[\d,]+|nutricao|compacta)", prompt)
+    if secao and secao.group(1) == "compacta":
+        plano = _plano_compacto(plano, prompt)
+    elif secao and secao.group(1) == "nutricao":
+        plano = {k: plano[k] for k in ("nome_da_rotina", "sugestoes_nutricionais")}
+    elif secao:
+        indices = [int(i) - 1 for i in secao.group(1).split()[1].split(",") if i]
+        plano = {"dias_de_treino": [plano["dias_de_treino"][i] for i in indices]}
+    return json.dumps(plano, ensure_ascii=False)
+
+
+def _plano_compacto(plano: dict, prompt: str) -> dict:
+    """Troca os itens do plano pelos códigos listados no prompt; os demais viram itens novos."""
+    # Exercícios por nome; refeições por nome e horário/nível, como exige a expansão
+    codigos = {
+        (nome, slot if codigo[0] == "r" else ""): codigo
+        for codigo, nome, slot in re.findall(r"^\s*([er]\d+): (.+?) \[(.+?)\]", prompt, re.MULTILINE)
+    }
+
+    def exercicio(ex: dict) -> list:
+        ref = codigos.get((ex["nome"], "")) or {"nome": ex["nome"], "detalhes_execucao": ex["detalhes_execucao"]}
+        return [ref, ex["series"], ex["repeticoes"], ex["descanso_segundos"]]
+
+    def refeicao(r: dict, tipo: str, nivel: str) -> Any:
+        return codigos.get((r["nome"], f"{tipo}/{nivel}")) or {
+            k: r[k] for k in ("nome", "custo_estimado", "ingredientes", "explicacao")
+        }
+
+    return {
+        "nome_da_rotina": plano["nome_da_rotina"],
+        "dias": [
+            {"foco": dia["foco_muscular"], "ex": [exercicio(ex) for ex in dia["exercicios"]]}
+            for dia in plano["dias_de_treino"]
+        ],
+        "nutri": {
+            tipo: {nivel: refeicao(r, tipo, nivel) for nivel, r in niveis.items()}
+            for tipo, niveis in plano["sugestoes_nutricionais"].items()
+        },
+    }
+
+
+def chave_prompt(prompt: str, modelo: str, config: ConfigGeracao) -> str:
+    campos = {k: v for k, v in asdict(config).items() if k != "timeout_segundos"}
+    conteudo = json.dumps([modelo, campos, prompt], ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode()).hexdigest()
+
+
+class ProvedorStub(ProvedorComCacheContexto):
+    """
+    Sem rede: mesma entrada, mesma saída. A latência simulada é
+    `latencia` + `segundos_por_token` x tokens de saída, como num modelo
+    real em que o tempo cresce com o tamanho da resposta.
+    """
+
+    nome = "stub"
+
+    def __init__(self, latencia: float = 0.0, segundos_por_token: float = 0.0):
+        self.latencia = latencia
+        self.segundos_por_token = segundos_por_token
+        super().__init__()
+        # Caches "do servidor": nome -> (modelo, prefixo, expira_em)
+        self._caches_servidor: dict[str, tuple[str, str, float]] = {}
+        self._caches_lock = threading.Lock()
+        self._caches_criados = 0
+
+    def _responder(self, prompt: str, modelo: str, config: ConfigGeracao) -> tuple[RespostaLLM, float]:
+        texto = plano_stub(prompt, semente=chave_prompt(prompt, modelo, config))
+        resposta = RespostaLLM(texto, modelo, tokens_prompt=len(prompt) // 4, tokens_saida=len(texto) // 4)
+        return resposta, self.latencia + self.segundos_por_token * resposta.tokens_saida
+
+    def _cache_valido(self, nome: str) -> tuple[str, str, float]:
+        with self._caches_lock:
+            cache = self._caches_servidor.get(nome)
+            if cache is None or cache[2] <= time.monotonic():
+                self._caches_servidor.pop(nome, None)
+                raise CacheExpiradoError(f"CachedContent not found: {nome}")
+            return cache
+
+    def _criar_cache(self, modelo: str, prefixo: str, ttl: int) -> str:
+        with self._caches_lock:
+            self._caches_criados += 1
+            nome = f"cachedContents/stub-{self._caches_criados}"
+            self._caches_servidor[nome] = (modelo, prefixo, time.monotonic() + ttl)
+        return nome
+
+    def _renovar_cache(self, nome: str, ttl: int) -> None:
+        modelo, prefixo, _ = self._cache_valido(nome)
+        with self._caches_lock:
+            self._caches_servidor[nome] = (modelo, prefixo, time.monotonic() + ttl)
+
+    def descartar_caches(self) -> None:
+        """Simula o provedor removendo os caches antes do TTL local (ex.: reinício do serviço)."""
+        with self._caches_lock:
+            self._caches_servidor.clear()
+
+    def _gerar_no_cache(self, nome: str, sufixo: str, modelo: str, config: ConfigGeracao) -> RespostaLLM:
+        # Como no Gemini: mesma resposta do prompt inteiro; tokens_prompt inclui os do cache
+        _, prefixo, _ = self._cache_valido(nome)
+        resposta, espera = self._responder(prefixo + sufixo, modelo, config)
+        resposta.tokens_cache = len(prefixo) // 4
+        if espera:
+            time.sleep(espera)
+        return resposta
+
+    def gerar(self, prompt: str, modelo: str, config: ConfigGeracao) -> RespostaLLM:
+        resposta, espera = self._responder(prompt, modelo, config)
+        if espera:
+            time.sleep(espera)
+        return resposta
+
+    async def gerar_async(self, prompt: str, modelo: str, config: ConfigGeracao) -> RespostaLLM:
+        resposta, espera = self._responder(prompt, modelo, config)
+        if espera:
+            await asyncio.sleep(espera)
+        return resposta
+
+
+class ProvedorCassete(ProvedorLLM):
+    """
+    Grava/reproduz respostas num arquivo JSON (hash do pedido -> resposta).
+
+    Modos: `reproduzir` (só lê; pedido ausente gera CasseteSemRespostaError),
+    `gravar` (sempre chama o provedor real e grava) e `misto` (reproduz o que
+    existe e grava o que faltar).
+    """
+
+    nome = "cassete"
+
+    def __init__(self, arquivo: str, modo: str = "reproduzir", real: Optional[ProvedorLLM] = None):
+        if modo not in ("reproduzir", "gravar", "misto"):
+            raise ValueError(f"Modo de cassete inválido: {modo}")
+        if modo != "reproduzir" and real is None:
+            raise ValueError(f"Cassete em modo '{modo}' precisa de um provedor real")
+        self.arquivo = arquivo
+        self.modo = modo
+        self.real = real
+        self._lock = threading.Lock()
+        self._respostas: dict[str, dict] = {}
+        if os.path.exists(arquivo):
+            with open(arquivo, encoding="utf-8") as f:
+                self._respostas = json.load(f)
+
+    def _gravar(self, chave: str, resposta: RespostaLLM) -> None:
+        with self._lock:
+            self._respostas[chave] = asdict(resposta)
+            diretorio = os.path.dirname(os.path.abspath(self.arquivo))
+            os.makedirs(diretorio, exist_ok=True)
+            # Escrita atômica: arquivo temporário + rename
+            fd, temporario = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._respostas, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(temporario, self.arquivo)
+
+    def _buscar(self, chave: str) -> Optional[RespostaLLM]:
+        if self.modo == "gravar":
+            return None
+        gravada = self._respostas.get(chave)
+        if gravada is not None:
+            return RespostaLLM(**gravada)
+        if self.modo == "reproduzir":
+            raise CasseteSemRespostaError(f"Pedido {chave[:12]} não está no cassete {self.arquivo}")
+        return None
+
+    def gerar(self, prompt: str, modelo: str, config: ConfigGeracao) -> RespostaLLM:
+        chave = chave_prompt(prompt, modelo, config)
+        resposta = self._buscar(chave)
+        if resposta is None:
+            resposta = self.real.gerar(prompt, modelo, config)
+            self._gravar(chave, resposta)
+        return resposta
+
+    async def gerar_async(self, prompt: str, modelo: str, config: ConfigGeracao) -> RespostaLLM:
+        chave = chave_prompt(prompt, modelo, config)
+        resposta = self._buscar(chave)
+        if resposta is None:
+            resposta = await self.real.gerar_async(prompt, modelo, config)
+            await asyncio.to_thread(self._gravar, chave, resposta)
+        return resposta
+
+
+def criar_provedor(nome: str) -> ProvedorLLM:
+    if nome == "gemini":
+        return ProvedorGemini(settings.GEMINI_API_KEY, settings.GEMINI_BASE_URL)
+    if nome == "stub":
+        return ProvedorStub(
+            latencia=settings.LLM_STUB_LATENCIA_SEGUNDOS,
+            segundos_por_token=settings.LLM_STUB_SEGUNDOS_POR_TOKEN,
+        )
+    if nome == "cassete":
+        real = None
+        if settings.LLM_CASSETE_MODO != "reproduzir":
+            real = criar_provedor(settings.LLM_CASSETE_PROVEDOR)
+        return ProvedorCassete(settings.LLM_CASSETE_ARQUIVO, settings.LLM_CASSETE_MODO, real)
+    raise ValueError(f"LLM_PROVEDOR inválido: {nome}")
+
+
+_provedor: Optional[ProvedorLLM] = None
+_provedor_lock = threading.Lock()
+
+
+def obter_provedor() -> ProvedorLLM:
+    """Provedor configurado em `LLM_PROVEDOR` (instância única por processo)."""
+    global _provedor
+    if _provedor is None:
+        with _provedor_lock:
+            if _provedor is None:
+                _provedor = criar_provedor(settings.LLM_PROVEDOR)
+                logger.info(f"Provedor de LLM: {_provedor.nome} (modelo {settings.LLM_MODELO})")
+    return _provedor
@@ -0,0 +1,171 @@
+# app/services/regeneracao.py
+"""
+Regeneração parcial de um plano salvo: um dia de treino ou o bloco de
+nutrição.
+
+O prompt leva só o perfil, as restrições de feedback e, como contexto, os
+outros dias (foco e nomes dos exercícios) ou as refeições atuais; a saída
+pedida é apenas a parte trocada. Comparado a gerar o plano inteiro de
+novo, a saída cai para ~1/N (dias) ou ~1/3 (nutrição) do tamanho.
+"""
+
+import logging
+from string import Template
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.rastreamento import tracer
+from app.services.ia_agent import (
+    LOCAL_DESCRICOES,
+    OBJETIVO_DESCRICOES,
+    escolher_tier,
+    normalizar_plano,
+    restricao_exercicios,
+    restricao_refeicoes,
+)
+from app.services.secoes_plano import (
+    CABECALHO,
+    ESQUEMA_DIAS,
+    ESQUEMA_NUTRICAO,
+    gerar_secao,
+    validador_dias,
+    validar_nutricao,
+)
+
+logger = logging.getLogger(__name__)
+
+PROMPT_REGENERAR_DIA = Template(
+    CABECALHO
+    + """
+        SEÇÃO: dias $ORDEM
+        O usuário pediu um novo treino para o dia "$IDENTIFICACAO" (foco: $FOCO) de um plano de $FREQUENCIA dias.
+        Gere SOMENTE esse dia, com 5-6 exercícios, mantendo o foco muscular.
+        Exercícios atuais deste dia (troque por outros): $ATUAIS
+        Outros dias do plano, que não mudam (evite repetir seus exercícios):
+$OUTROS_DIAS
+
+        Cada exercício: nome, series (texto), repeticoes (texto), descanso_segundos (número), detalhes_execucao, video_url
+        Use aspas duplas, números sem aspas e nenhuma vírgula antes de } ou ].
+
+        ESTRUTURA ESPERADA (um único dia em "dias_de_treino"):
+        $ESQUEMA
+        $RESTRICOES
+
+        COMECE COM { E TERMINE COM } - NADA MAIS!
+    """
+)
+
+PROMPT_REGENERAR_NUTRICAO = Template(
+    CABECALHO
+    + """
+        SEÇÃO: nutricao
+        O usuário pediu novas sugestões nutricionais para o plano atual.
+        Gere SOMENTE "sugestoes_nutricionais" (pre_treino e pos_treino, com opcao_economica,
+        opcao_equilibrada e opcao_premium cada); "nome_da_rotina" pode ser omitido.
+        Refeições atuais (sugira outras): $ATUAIS
+        Use aspas duplas e nenhuma vírgula antes de } ou ].
+
+        ESTRUTURA ESPERADA:
+        $ESQUEMA
+
+        Varie as fontes de proteína e de carboidrato; prefira opções práticas e acessíveis.
+        $RESTRICOES
+
+        COMECE COM { E TERMINE COM } - NADA MAIS!
+    """
+)
+
+
+def _campos_perfil(
+    nome: str, altura: float, peso: float, idade: int, frequencia: int, local: str, objetivo: str
+) -> dict[str, Any]:
+    return {
+        "NOME": nome,
+        "ALTURA": altura,
+        "PESO": peso,
+        "IDADE": idade,
+        "IMC": f"{peso / (altura / 100) ** 2:.2f}",
+        "FREQUENCIA": frequencia,
+        "LOCAL": LOCAL_DESCRICOES.get(local, local),
+        "OBJETIVO": OBJETIVO_DESCRICOES.get(objetivo, objetivo),
+    }
+
+
+@tracer.start_as_current_span("ia.regenerar_dia")
+def regenerar_dia(
+    nome: str,
+    altura: float,
+    peso: float,
+    idade: int,
+    local: str,
+    objetivo: str,
+    preferencias: Optional[dict],
+    dias: list[dict],
+    ordem: int,
+) -> dict:
+    """
+    Gera um substituto para o dia `ordem` (1-based) de `dias`, lista de
+    dicts com identificacao, foco_muscular e exercicios (nomes bastam).
+    Devolve o dia novo, com a identificação do original e o foco dele (ou
+    o da IA, se o original não tinha).
+    """
+    atual = dias[ordem - 1]
+    outros = "\n".join(
+        f"        - {d['identificacao']} ({d.get('foco_muscular') or '-'}): "
+        + ", ".join(ex["nome"] for ex in d.get("exercicios", []))
+        for i, d in enumerate(dias)
+        if i != ordem - 1
+    )
+    prompt = PROMPT_REGENERAR_DIA.substitute(
+        _campos_perfil(nome, altura, peso, idade, len(dias), local, objetivo),
+        ORDEM=ordem,
+        IDENTIFICACAO=atual["identificacao"],
+        FOCO=atual.get("foco_muscular") or "livre",
+        ATUAIS=", ".join(ex["nome"] for ex in atual.get("exercicios", [])) or "nenhum",
+        OUTROS_DIAS=outros or "        - nenhum",
+        ESQUEMA=ESQUEMA_DIAS,
+        RESTRICOES=restricao_exercicios(preferencias),
+    )
+
+    tier = escolher_tier(1, preferencias)
+    novo = gerar_secao(
+        "regenerar_dia",
+        prompt,
+        tier,
+        settings.LLM_TOKENS_SAIDA_POR_DIA + 256,
+        # Dia salvo sem foco: fica o que a IA escolheu
+        validador_dias([(ordem - 1, atual.get("foco_muscular") or None)]),
+    )[0]
+    novo["identificacao"] = atual["identificacao"]
+    novo["foco_muscular"] = novo.get("foco_muscular") or ""
+    normalizar_plano({"dias_de_treino": [novo]})
+    return novo
+
+
+@tracer.start_as_current_span("ia.regenerar_nutricao")
+def regenerar_nutricao(
+    nome: str,
+    altura: float,
+    peso: float,
+    idade: int,
+    local: str,
+    objetivo: str,
+    preferencias: Optional[dict],
+    frequencia: int,
+    refeicoes_atuais: list[str],
+) -> dict:
+    """Gera novas `sugestoes_nutricionais` (pre_treino/pos_treino) para o plano."""
+    prompt = PROMPT_REGENERAR_NUTRICAO.substitute(
+        _campos_perfil(nome, altura, peso, idade, frequencia, local, objetivo),
+        ATUAIS=", ".join(refeicoes_atuais) or "nenhuma",
+        ESQUEMA=ESQUEMA_NUTRICAO,
+        RESTRICOES=restricao_refeicoes(preferencias),
+    )
+
+    tier = escolher_tier(1, preferencias)
+    resposta = gerar_secao(
+        "regenerar_nutricao", prompt, tier, settings.LLM_TOKENS_SAIDA_BASE, validar_nutricao
+    )
+    nutricao = {"sugestoes_nutricionais": resposta["sugestoes_nutricionais"]}
+    normalizar_plano(nutricao)
+    return nutricao["sugestoes_nutricionais"]
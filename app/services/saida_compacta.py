@@ -0,0 +1,272 @@
+# app/services/saida_compacta.py
+"""
+Geração com saída compacta baseada no catálogo.
+
+A maior parte dos tokens que a IA escreve é texto que já temos:
+`detalhes_execucao`, `video_url`, `ingredientes`, `link_receita` e
+`explicacao` de exercícios e refeições do catálogo. Neste modo o prompt
+leva uma fatia do catálogo (código curto + nome) para os grupos
+musculares do plano e para cada horário/nível de refeição. A IA responde
+só com códigos, séries, repetições e descanso, e usa texto livre apenas
+para itens novos. O servidor expande os códigos a partir do índice em
+memória (`IndiceCatalogo`).
+
+Os códigos (`e1`, `r1`, ...) valem só para a requisição: o mapeamento
+código -> item fica guardado aqui, então itens da base embutida (sem id
+no banco) também podem ser referenciados.
+"""
+
+import json
+import logging
+import time
+from string import Template
+from typing import Any, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metricas import PLANO_GERACAO_TIER
+from app.core.rastreamento import tracer
+from app.services.catalogo import NIVEIS_REFEICAO, IndiceCatalogo, nome_corresponde, normalizar_nome, obter_indice
+from app.services.gerador_local import DIVISOES, url_receita, url_video
+from app.services.ia_agent import (
+    LOCAL_DESCRICOES,
+    OBJETIVO_DESCRICOES,
+    RespostaInvalida,
+    max_tokens_saida,
+    restricao_exercicios,
+    restricao_refeicoes,
+    validar_plano,
+)
+from app.services.secoes_plano import CABECALHO, gerar_secao
+
+logger = logging.getLogger(__name__)
+
+ESQUEMA_COMPACTO = json.dumps(
+    {
+        "nome_da_rotina": "Ex.: Programa de Hipertrofia",
+        "dias": [
+            {
+                "foco": "Ex.: Peito e Tríceps",
+                "ex": [
+                    ["e3", "4x", "8-12", 90],
+                    [{"nome": "Ex.: exercício fora da lista", "detalhes_execucao": "Ex.: execução"}, "3x", "12", 60],
+                ],
+            }
+        ],
+        "nutri": {
+            "pre_treino": {"opcao_economica": "r1", "opcao_equilibrada": "r4", "opcao_premium": "r7"},
+            "pos_treino": {
+                "opcao_economica": "r10",
+                "opcao_equilibrada": {
+                    "nome": "Ex.: refeição fora da lista",
+                    "custo_estimado": "Ex.: R$ 7,00",
+                    "ingredientes": ["Ex.: 150g frango"],
+                    "explicacao": "Ex.: por que ajuda",
+                },
+                "opcao_premium": "r16",
+            },
+        },
+    },
+    ensure_ascii=False,
+)
+
+PROMPT_COMPACTO = Template(
+    CABECALHO
+    + """
+        SEÇÃO: compacta
+        Gere um plano de $FREQUENCIA dias de treino com 5-6 exercícios cada, nesta divisão:
+$DIVISAO
+
+        FORMATO COMPACTO (obrigatório):
+        - Cada exercício é uma lista [código, series, repeticoes, descanso_segundos].
+        - Use os CÓDIGOS da lista abaixo sempre que possível; só para um exercício que não
+          está na lista, troque o código por {"nome": ..., "detalhes_execucao": ...}.
+        - Cada refeição é um código de REFEIÇÕES do mesmo horário/nível; só para uma refeição
+          nova use {"nome", "custo_estimado", "ingredientes", "explicacao"}.
+        - NÃO escreva links, descrições ou ingredientes de itens com código.
+
+        EXERCÍCIOS DISPONÍVEIS (código: nome [grupo]):
+$EXERCICIOS
+
+        REFEIÇÕES DISPONÍVEIS (código: nome [horário/nível]):
+$REFEICOES
+
+        ESTRUTURA ESPERADA:
+        $ESQUEMA
+        $RESTRICOES
+
+        COMECE COM { E TERMINE COM } - NADA MAIS!
+    """
+)
+
+
+def montar_fatia_catalogo(
+    indice: IndiceCatalogo,
+    disponibilidade: int,
+    local: str,
+    preferencias: Optional[dict],
+) -> tuple[dict[str, dict[str, Any]], dict[str, dict[str, Any]]]:
+    """
+    Códigos -> itens do catálogo relevantes para o plano: exercícios dos
+    grupos da divisão compatíveis com o local e refeições de cada slot,
+    sem os itens que o usuário pediu para evitar.
+    """
+    preferencias = preferencias or {}
+    evitar_ex = [normalizar_nome(n) for n in preferencias.get("exercicios_evitar", [])]
+    evitar_ref = [normalizar_nome(n) for n in preferencias.get("refeicoes_evitar", [])]
+
+    grupos = sorted({g for _, gs in DIVISOES[max(1, min(7, disponibilidade))] for g in gs} | {"cardio"})
+    exercicios: dict[str, dict[str, Any]] = {}
+    for grupo in grupos:
+        candidatos = [ex for ex in indice.exercicios(grupo, local) if not nome_corresponde(ex["nome"], evitar_ex)]
+        for ex in candidatos[: settings.LLM_COMPACTA_EXERCICIOS_POR_GRUPO]:
+            exercicios[f"e{len(exercicios) + 1}"] = ex
+
+    refeicoes: dict[str, dict[str, Any]] = {}
+    for tipo, niveis in NIVEIS_REFEICAO.items():
+        for nivel in niveis:
+            candidatas = [r for r in indice.refeicoes(tipo, nivel) if not nome_corresponde(r["nome"], evitar_ref)]
+            for refeicao in candidatas[: settings.LLM_COMPACTA_REFEICOES_POR_SLOT]:
+                refeicoes[f"r{len(refeicoes) + 1}"] = dict(refeicao, tipo=tipo, nivel=nivel)
+
+    return exercicios, refeicoes
+
+
+def _expandir_exercicio(item: Any, exercicios: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    if not isinstance(item, list) or len(item) < 4:
+        raise RespostaInvalida(f"Exercício compacto malformado: {item!r}")
+    ref, series, repeticoes, descanso = item[:4]
+
+    if isinstance(ref, str):
+        ex = exercicios.get(ref)
+        if ex is None:
+            raise RespostaInvalida(f"Código de exercício desconhecido: {ref}")
+        nome, detalhes, video = ex["nome"], ex.get("detalhes_execucao", ""), ex.get("video_url")
+    elif isinstance(ref, dict) and ref.get("nome"):
+        nome, detalhes, video = ref["nome"], ref.get("detalhes_execucao", ""), None
+    else:
+        raise RespostaInvalida(f"Exercício compacto sem código nem nome: {item!r}")
+
+    return {
+        "nome": nome,
+        "series": str(series),
+        "repeticoes": str(repeticoes),
+        "descanso_segundos": descanso,
+        "detalhes_execucao": detalhes,
+        "video_url": video or url_video(nome),
+    }
+
+
+def _expandir_refeicao(item: Any, refeicoes: dict[str, dict[str, Any]], tipo: str, nivel: str) -> dict[str, Any]:
+    if isinstance(item, str):
+        refeicao = refeicoes.get(item)
+        if refeicao is None:
+            raise RespostaInvalida(f"Código de refeição desconhecido: {item}")
+        if (refeicao["tipo"], refeicao["nivel"]) != (tipo, nivel):
+            raise RespostaInvalida(
+                f"Código {item} é de {refeicao['tipo']}/{refeicao['nivel']}, usado em {tipo}/{nivel}"
+            )
+    elif isinstance(item, dict) and item.get("nome"):
+        refeicao = item
+    else:
+        raise RespostaInvalida(f"Refeição compacta malformada: {item!r}")
+
+    return {
+        "nome": refeicao["nome"],
+        "custo_estimado": refeicao.get("custo_estimado", ""),
+        "ingredientes": list(refeicao.get("ingredientes") or []),
+        "link_receita": refeicao.get("link_receita") or url_receita(refeicao["nome"]),
+        "explicacao": refeicao.get("explicacao", ""),
+    }
+
+
+def expandir_plano_compacto(
+    compacto: Any,
+    focos: list[str],
+    exercicios: dict[str, dict[str, Any]],
+    refeicoes: dict[str, dict[str, Any]],
+) -> dict[str, Any]:
+    """Converte a resposta compacta no formato completo de `JSON_EXAMPLE`."""
+    if not isinstance(compacto, dict) or not isinstance(compacto.get("dias"), list):
+        raise RespostaInvalida("Resposta compacta sem 'dias'")
+    if len(compacto["dias"]) != len(focos):
+        raise RespostaInvalida(f"Plano com {len(compacto['dias'])} dias, esperado {len(focos)}")
+
+    dias = []
+    for i, (foco, dia) in enumerate(zip(focos, compacto["dias"])):
+        itens = dia.get("ex") if isinstance(dia, dict) else None
+        if not isinstance(itens, list) or not itens:
+            raise RespostaInvalida(f"Dia {i + 1} sem exercícios")
+        dias.append({
+            "foco_muscular": foco,
+            "identificacao": f"Dia {chr(ord('A') + i)}",
+            "exercicios": [_expandir_exercicio(item, exercicios) for item in itens],
+        })
+
+    nutri = compacto.get("nutri")
+    if not isinstance(nutri, dict):
+        raise RespostaInvalida("Resposta compacta sem 'nutri'")
+    sugestoes: dict[str, dict[str, Any]] = {}
+    for tipo, niveis in NIVEIS_REFEICAO.items():
+        slot = nutri.get(tipo)
+        if not isinstance(slot, dict) or any(nivel not in slot for nivel in niveis):
+            raise RespostaInvalida(f"'nutri.{tipo}' precisa de {', '.join(niveis)}")
+        sugestoes[tipo] = {nivel: _expandir_refeicao(slot[nivel], refeicoes, tipo, nivel) for nivel in niveis}
+
+    return {
+        "nome_da_rotina": compacto.get("nome_da_rotina") or "Plano de Treino",
+        "dias_de_treino": dias,
+        "sugestoes_nutricionais": sugestoes,
+    }
+
+
+@tracer.start_as_current_span("ia.gerar_plano_compacto")
+def gerar_plano_compacto(
+    nome: str,
+    altura: float,
+    peso: float,
+    idade: int,
+    disponibilidade: int,
+    local: str,
+    objetivo: str,
+    preferencias: Optional[dict],
+    tier: str,
+    db: Optional[Session] = None,
+) -> dict[str, Any]:
+    """Gera o plano no formato compacto e o expande com o catálogo em memória."""
+    exercicios, refeicoes = montar_fatia_catalogo(obter_indice(db), disponibilidade, local, preferencias)
+    focos = [foco for foco, _ in DIVISOES[max(1, min(7, disponibilidade))]]
+
+    prompt = PROMPT_COMPACTO.substitute(
+        NOME=nome,
+        ALTURA=altura,
+        PESO=peso,
+        IDADE=idade,
+        IMC=f"{peso / (altura / 100) ** 2:.2f}",
+        FREQUENCIA=len(focos),
+        LOCAL=LOCAL_DESCRICOES.get(local, local),
+        OBJETIVO=OBJETIVO_DESCRICOES.get(objetivo, objetivo),
+        DIVISAO="\n".join(f"        - Dia {chr(ord('A') + i)}: {foco}" for i, foco in enumerate(focos)),
+        EXERCICIOS="\n".join(
+            f"        {codigo}: {ex['nome']} [{ex['grupo']}]" for codigo, ex in exercicios.items()
+        ),
+        REFEICOES="\n".join(
+            f"        {codigo}: {r['nome']} [{r['tipo']}/{r['nivel']}]" for codigo, r in refeicoes.items()
+        ),
+        ESQUEMA=ESQUEMA_COMPACTO,
+        RESTRICOES=restricao_exercicios(preferencias) + restricao_refeicoes(preferencias),
+    )
+
+    def validar(compacto: Any) -> dict[str, Any]:
+        return expandir_plano_compacto(compacto, focos, exercicios, refeicoes)
+
+    inicio = time.monotonic()
+    resultado = "erro"
+    try:
+        plano = gerar_secao("compacta", prompt, tier, max_tokens_saida(disponibilidade), validar)
+        plano = validar_plano(plano, nome)
+        resultado = "sucesso"
+        return plano
+    finally:
+        PLANO_GERACAO_TIER.labels(tier, resultado).observe(time.monotonic() - inicio)
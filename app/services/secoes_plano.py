@@ -0,0 +1,110 @@
+# app/services/secoes_plano.py
+"""
+Geração de um plano por seções: as peças usadas pela geração paralela
+(`geracao_paralela`), pela regeneração parcial (`regeneracao`) e pela
+saída compacta (`saida_compacta`).
+
+Cada seção é uma chamada à IA com um prompt que começa por `CABECALHO`
+(dados do usuário) e pede só o seu pedaço do esquema (`ESQUEMA_DIAS`,
+`ESQUEMA_NUTRICAO`); `gerar_secao` chama, valida e, no tier rápido,
+repete a seção inválida no modelo forte.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Optional
+
+from opentelemetry import trace
+
+from app.core.config import settings
+from app.core.metricas import LLM_ESCALONAMENTOS
+from app.core.rastreamento import tracer
+from app.services.ia_agent import (
+    JSON_EXAMPLE,
+    TIER_FORTE,
+    TIER_RAPIDO,
+    RespostaInvalida,
+    call_llm_api,
+    carregar_json,
+)
+
+logger = logging.getLogger(__name__)
+
+_EXEMPLO = json.loads(JSON_EXAMPLE)
+ESQUEMA_DIAS = json.dumps(
+    {"dias_de_treino": [_EXEMPLO["dias_de_treino"][0]]}, ensure_ascii=False, indent=4
+)
+ESQUEMA_NUTRICAO = json.dumps(
+    {
+        "nome_da_rotina": _EXEMPLO["nome_da_rotina"],
+        "sugestoes_nutricionais": _EXEMPLO["sugestoes_nutricionais"],
+    },
+    ensure_ascii=False,
+    indent=4,
+)
+
+CABECALHO = """
+        Você é uma API de backend. Retorne APENAS um objeto JSON válido, sem texto antes ou depois.
+
+        DADOS DO USUÁRIO:
+        Nome: $NOME | Altura: $ALTURA cm | Peso: $PESO kg | Idade: $IDADE anos
+        IMC: $IMC | Frequência: $FREQUENCIA x/semana | Local: $LOCAL | Objetivo: $OBJETIVO
+"""
+
+
+def identificacao_dia(indice: int) -> str:
+    """Rótulo do dia no plano: 0 -> "Dia A"."""
+    return f"Dia {chr(ord('A') + indice)}"
+
+
+def gerar_secao(
+    nome_secao: str,
+    prompt: str,
+    tier: str,
+    max_tokens_saida: int,
+    validar: Callable[[Any], Any],
+) -> Any:
+    """Uma chamada de seção; resposta inválida no tier rápido é repetida no forte."""
+    with tracer.start_as_current_span("ia.gerar_secao", attributes={"ia.secao": nome_secao, "ia.tier": tier}):
+        modelo = settings.LLM_MODELO_RAPIDO if tier == TIER_RAPIDO else settings.LLM_MODELO
+        texto = call_llm_api(prompt, modelo=modelo, max_tokens_saida=max_tokens_saida)
+        try:
+            return validar(carregar_json(texto))
+        except ValueError as e:
+            if tier != TIER_RAPIDO:
+                raise
+            logger.warning("Seção '%s' inválida no tier rápido, escalando: %s", nome_secao, e)
+            LLM_ESCALONAMENTOS.labels(TIER_RAPIDO, TIER_FORTE).inc()
+            trace.get_current_span().set_attribute("ia.escalonado", True)
+
+        texto = call_llm_api(
+            prompt, modelo=settings.LLM_MODELO, max_tokens_saida=settings.LLM_TOKENS_SAIDA_MAX
+        )
+        return validar(carregar_json(texto))
+
+
+def validador_dias(grupo: list[tuple[int, Optional[str]]]) -> Callable[[Any], list]:
+    """
+    Validador de uma seção com os dias `grupo` ((índice, foco), na ordem
+    pedida). Foco None mantém o que a IA escreveu.
+    """
+    def validar(resposta: Any) -> list:
+        dias = resposta.get("dias_de_treino") if isinstance(resposta, dict) else None
+        if not isinstance(dias, list) or len(dias) != len(grupo):
+            raise RespostaInvalida(f"Seção de dias esperava {len(grupo)} dia(s)")
+        for (indice, foco), dia in zip(grupo, dias):
+            if not isinstance(dia, dict) or not isinstance(dia.get("exercicios"), list) or not dia["exercicios"]:
+                raise RespostaInvalida(f"{identificacao_dia(indice)} sem exercícios")
+            # O foco atribuído prevalece: garante dias sem foco repetido
+            if foco is not None:
+                dia["foco_muscular"] = foco
+            dia["identificacao"] = identificacao_dia(indice)
+        return dias
+
+    return validar
+
+
+def validar_nutricao(resposta: Any) -> dict:
+    if not isinstance(resposta, dict) or not isinstance(resposta.get("sugestoes_nutricionais"), dict):
+        raise RespostaInvalida("Seção de nutrição sem 'sugestoes_nutricionais'")
+    return resposta
@@ -0,0 +1,100 @@
+# benchmarks/cache_contexto.py
+"""
+Tokens de prompt por geração sem e com o cache de contexto do prefixo
+fixo (`LLM_CACHE_CONTEXTO_ATIVO`), com o provedor `stub`, sem rede.
+
+Como no Gemini, `prompt` é o total de tokens de entrada e `cache` a parte
+lida do cache; `novos` (prompt - cache) é o que é enviado e processado a
+cada requisição. Os planos gerados com e sem cache são comparados: o
+cache não muda a resposta.
+
+Depois, o ciclo de vida do cache: com TTL curto, a margem provoca uma
+renovação; sem requisições até o TTL acabar, um cache novo é criado; e
+um cache removido pelo provedor antes do prazo é recriado na hora.
+
+Uso:
+    python -m benchmarks.cache_contexto --repeticoes 10
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["LLM_PROVEDOR"] = "stub"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--dias", type=int, default=4)
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    from app.core.metricas import LLM_CACHE_CONTEXTO
+    from app.services.ia_agent import generate_training_plan
+    from app.services.provedores_llm import obter_provedor
+
+    provedor = obter_provedor()
+    tokens = {"prompt": 0, "cache": 0}
+    gerar_original, gerar_no_cache_original = provedor.gerar, provedor._gerar_no_cache
+
+    def contar(resposta):
+        tokens["prompt"] += resposta.tokens_prompt
+        tokens["cache"] += resposta.tokens_cache
+        return resposta
+
+    provedor.gerar = lambda *a: contar(gerar_original(*a))
+    provedor._gerar_no_cache = lambda *a: contar(gerar_no_cache_original(*a))
+
+    def gerar(i: int) -> dict:
+        return generate_training_plan(
+            f"Usuário {i}", 160 + i, 60 + i, 20 + i, args.dias, "academia", "hipertrofia",
+            preferencias={"exercicios_evitar": ["Supino reto com barra"]} if i % 3 == 0 else None,
+        )
+
+    print(f"{'modo':>10}{'prompt':>9}{'cache':>8}{'novos':>8}")
+    planos, novos = {}, {}
+    for modo, ativo in (("sem cache", False), ("com cache", True)):
+        settings.LLM_CACHE_CONTEXTO_ATIVO = ativo
+        tokens.update(prompt=0, cache=0)
+        planos[modo] = [gerar(i) for i in range(args.repeticoes)]
+        prompt, cache = tokens["prompt"] / args.repeticoes, tokens["cache"] / args.repeticoes
+        novos[modo] = prompt - cache
+        print(f"{modo:>10}{prompt:>9.0f}{cache:>8.0f}{prompt - cache:>8.0f}")
+    print(f"{'redução':>10}{'':>17}{novos['sem cache'] / novos['com cache']:>7.1f}x")
+    assert planos["sem cache"] == planos["com cache"], "o cache mudou os planos gerados"
+
+    def eventos() -> str:
+        contagem = {
+            amostra.labels["evento"]: int(amostra.value)
+            for metrica in LLM_CACHE_CONTEXTO.collect()
+            for amostra in metrica.samples
+            if amostra.name.endswith("_total")
+        }
+        return ", ".join(f"{evento}={n}" for evento, n in sorted(contagem.items()))
+
+    print(f"\nEventos: {eventos()}")
+
+    # Ciclo de vida com TTL de 2s e margem de 1s
+    provedor.caches.ttl, provedor.caches.margem = 2, 1.0
+    provedor.caches._entradas.clear()
+    etapas = (
+        ("cria", 0.0),
+        ("reutiliza", 0.2),
+        ("renova (dentro da margem)", 1.0),
+        ("expirado: cria outro", 2.5),
+    )
+    for etapa, pausa in etapas:
+        time.sleep(pausa)
+        gerar(0)
+        print(f"{etapa:>28}: {eventos()}")
+    provedor.descartar_caches()
+    gerar(0)
+    print(f"{'removido no provedor: recria':>28}: {eventos()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# benchmarks/carga_api.py
+"""
+Gerador de carga com cenário misto contra uma instância da API.
+
+Cada usuário virtual se cadastra, faz login e, até o fim do teste, sorteia
+ações segundo os pesos de `--mix`: gerar plano, avaliar exercício, avaliar
+refeição, consultar estatísticas e listar feedbacks. Ao final imprime, por
+rota, quantidade, erros por status, p50/p95/p99 e vazão.
+
+Para medir a API (e não o limite de requisições), suba-a com limites altos
+e, para não gastar a API paga, apontando o Gemini para o stub:
+
+    python -m benchmarks.gemini_stub --porta 8090 &
+    GEMINI_BASE_URL=http://127.0.0.1:8090 GEMINI_API_KEY=stub \\
+    RATE_LIMIT_CAPACIDADE=1000000 RATE_LIMIT_REPOSICAO_POR_MINUTO=1000000 \\
+    RATE_LIMIT_CADASTROS_POR_HORA=1000000 \\
+    uvicorn main:app --port 8000 --workers 2
+
+    python -m benchmarks.carga_api --url http://127.0.0.1:8000 --usuarios 50 --duracao 60
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+PERFIS = [
+    {"altura": 175, "peso": 80, "idade": 25, "disponibilidade": 4, "local": "academia", "objetivo": "hipertrofia"},
+    {"altura": 162, "peso": 70, "idade": 34, "disponibilidade": 3, "local": "casa", "objetivo": "perder"},
+    {"altura": 181, "peso": 72, "idade": 41, "disponibilidade": 5, "local": "arLivre", "objetivo": "definicao"},
+    {"altura": 168, "peso": 55, "idade": 19, "disponibilidade": 2, "local": "academia", "objetivo": "ganhar"},
+]
+EXERCICIOS = ["Supino reto com barra", "Agachamento livre", "Remada curvada", "Prancha", "Burpee"]
+REFEICOES = ["Banana com aveia", "Arroz com ovo", "Tapioca com queijo", "Frango grelhado com batata doce"]
+
+MIX_PADRAO = "gerar=1,feedback_exercicio=4,feedback_refeicao=2,stats=2,listar=1"
+
+
+class Resultados:
+    def __init__(self):
+        self.latencias: dict[str, list[float]] = defaultdict(list)
+        self.status: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def registrar(self, rota: str, status: str, duracao: float) -> None:
+        self.status[rota][status] += 1
+        if status.startswith("2"):
+            self.latencias[rota].append(duracao)
+
+    def resumo(self, duracao: float) -> dict[str, dict]:
+        linhas = {}
+        for rota in sorted(self.status):
+            amostras = sorted(self.latencias[rota])
+            total = sum(self.status[rota].values())
+            linhas[rota] = {
+                "total": total,
+                "ok": len(amostras),
+                "erros": {s: n for s, n in self.status[rota].items() if not s.startswith("2")},
+                "p50_ms": _percentil(amostras, 50),
+                "p95_ms": _percentil(amostras, 95),
+                "p99_ms": _percentil(amostras, 99),
+                "vazao_rps": round(len(amostras) / duracao, 2),
+            }
+        return linhas
+
+
+def _percentil(amostras: list[float], p: float) -> float | None:
+    if not amostras:
+        return None
+    indice = min(len(amostras) - 1, max(0, round(p / 100 * len(amostras)) - 1))
+    return round(amostras[indice] * 1000, 1)
+
+
+async def requisitar(cliente: httpx.AsyncClient, resultados: Resultados, rota: str, metodo: str, url: str, **kwargs):
+    inicio = time.perf_counter()
+    try:
+        resposta = await cliente.request(metodo, url, **kwargs)
+        status = str(resposta.status_code)
+    except httpx.HTTPError as e:
+        resposta, status = None, type(e).__name__
+    resultados.registrar(rota, status, time.perf_counter() - inicio)
+    return resposta
+
+
+async def usuario_virtual(
+    cliente: httpx.AsyncClient,
+    resultados: Resultados,
+    acoes: list[str],
+    pesos: list[float],
+    fim: float,
+    pausa: float,
+    modo_rapido: bool,
+) -> None:
+    rng = random.Random()
+    email = f"carga-{uuid.uuid4().hex[:12]}@exemplo.com"
+    senha = "senha-de-carga"
+    perfil = rng.choice(PERFIS)
+
+    await requisitar(
+        cliente, resultados, "POST /auth/register", "POST", "/api/v1/auth/register",
+        json={"email": email, "password": senha, "nome": "Usuário de carga"},
+    )
+    resposta = await requisitar(
+        cliente, resultados, "POST /auth/login", "POST", "/api/v1/auth/login",
+        data={"username": email, "password": senha},
+    )
+    if resposta is None or resposta.status_code != 200:
+        return
+    cabecalhos = {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+
+    while time.perf_counter() < fim:
+        acao = rng.choices(acoes, pesos)[0]
+        if acao == "gerar":
+            await requisitar(
+                cliente, resultados, "POST /sugestao", "POST", "/api/v1/sugestao",
+                headers=cabecalhos,
+                json={"nome": "Usuário de carga", **perfil, "modo_rapido": modo_rapido},
+            )
+        elif acao == "feedback_exercicio":
+            await requisitar(
+                cliente, resultados, "POST /feedback/exercicio", "POST", "/api/v1/feedback/exercicio",
+                headers=cabecalhos,
+                json={"item_nome": rng.choice(EXERCICIOS), "gostou": rng.random() < 0.7},
+            )
+        elif acao == "feedback_refeicao":
+            await requisitar(
+                cliente, resultados, "POST /feedback/refeicao", "POST", "/api/v1/feedback/refeicao",
+                headers=cabecalhos,
+                json={"item_nome": rng.choice(REFEICOES), "gostou": rng.random() < 0.7},
+            )
+        elif acao == "stats":
+            await requisitar(
+                cliente, resultados, "GET /feedback/stats", "GET", "/api/v1/feedback/stats", headers=cabecalhos
+            )
+        elif acao == "listar":
+            await requisitar(
+                cliente, resultados, "GET /feedback/me", "GET", "/api/v1/feedback/me", headers=cabecalhos
+            )
+        if pausa:
+            await asyncio.sleep(rng.expovariate(1 / pausa))
+
+
+async def executar(args) -> tuple[Resultados, float]:
+    mix = dict(item.split("=") for item in args.mix.split(","))
+    acoes, pesos = list(mix), [float(p) for p in mix.values()]
+
+    resultados = Resultados()
+    limites = httpx.Limits(max_connections=args.usuarios * 2, max_keepalive_connections=args.usuarios * 2)
+    async with httpx.AsyncClient(base_url=args.url, limits=limites, timeout=args.timeout) as cliente:
+        inicio = time.perf_counter()
+        fim = inicio + args.duracao
+        tarefas = []
+        for i in range(args.usuarios):
+            tarefas.append(asyncio.create_task(
+                usuario_virtual(cliente, resultados, acoes, pesos, fim, args.pausa, args.modo_rapido)
+            ))
+            # Rampa: distribui a entrada dos usuários ao longo de `--rampa` segundos
+            if args.rampa:
+                await asyncio.sleep(args.rampa / args.usuarios)
+        await asyncio.gather(*tarefas)
+        return resultados, time.perf_counter() - inicio
+
+
+def imprimir(resumo: dict[str, dict], duracao: float) -> None:
+    print(f"\nduração: {duracao:.1f}s\n")
+    print(f"{'rota':<26}{'total':>7}{'ok':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}  erros")
+    for rota, r in resumo.items():
+        fmt = lambda v: f"{v:>10.1f}" if v is not None else f"{'-':>10}"
+        print(
+            f"{rota:<26}{r['total']:>7}{r['ok']:>7}{fmt(r['p50_ms'])}{fmt(r['p95_ms'])}{fmt(r['p99_ms'])}"
+            f"{r['vazao_rps']:>9.2f}  {r['erros'] or ''}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--usuarios", type=int, default=20)
+    parser.add_argument("--duracao", type=float, default=30.0, help="segundos")
+    parser.add_argument("--rampa", type=float, default=5.0, help="segundos para todos os usuários entrarem")
+    parser.add_argument("--pausa", type=float, default=0.5, help="pausa média entre ações (s)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--mix", default=MIX_PADRAO, help=f"pesos por ação (padrão: {MIX_PADRAO})")
+    parser.add_argument("--modo-rapido", action="store_true", help="gera planos pelo catálogo, sem IA")
+    parser.add_argument("--json", help="grava o resumo em JSON neste arquivo")
+    args = parser.parse_args()
+
+    resultados, duracao = asyncio.run(executar(args))
+    resumo = resultados.resumo(duracao)
+    imprimir(resumo, duracao)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"duracao": duracao, "rotas": resumo, "parametros": vars(args)}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
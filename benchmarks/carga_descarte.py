@@ -0,0 +1,151 @@
+# benchmarks/carga_descarte.py
+"""
+Teste de carga do descarte por prioridade (app.core.protecao_carga).
+
+Sobe uma aplicação sintética com o mesmo middleware da API e um recurso
+limitado que imita o pool do banco: `--conexoes` conexões, cada geração
+ocupa uma conexão por `--servico` segundos. A capacidade é, portanto,
+conexoes / servico requisições por segundo. O gerador de carga envia
+gerações em malha aberta a `--sobrecarga` vezes essa capacidade, junto com
+um fluxo leve de gravações de feedback, e os clientes desistem após
+`--timeout` segundos.
+
+Roda duas vezes, sem e com descarte, e compara o goodput (respostas 200
+recebidas dentro do prazo por segundo).
+
+Uso:
+    python -m benchmarks.carga_descarte
+    python -m benchmarks.carga_descarte --sobrecarga 3 --duracao 20
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from app.core.protecao_carga import MonitorCarga, ProtecaoCargaMiddleware  # noqa: E402
+
+
+def criar_app(ativo: bool, conexoes: int, servico: float) -> FastAPI:
+    monitor = MonitorCarga(lag_max=0.2, espera_pool_max=0.25, fila_llm_max=25)
+    pool = threading.BoundedSemaphore(conexoes)
+
+    app = FastAPI()
+    app.add_middleware(ProtecaoCargaMiddleware, monitor=monitor, ativo=ativo)
+
+    @app.post("/api/v1/sugestao")
+    def gerar():
+        inicio = time.perf_counter()
+        with pool:
+            monitor.registrar_espera_pool(time.perf_counter() - inicio)
+            time.sleep(servico)
+        return {"ok": True}
+
+    @app.post("/api/v1/feedback/exercicio")
+    async def feedback():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "carga": monitor.snapshot()}
+
+    return app
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def subir_servidor(app: FastAPI) -> tuple[uvicorn.Server, str]:
+    porta = porta_livre()
+    servidor = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=porta, log_level="error"))
+    threading.Thread(target=servidor.run, daemon=True).start()
+    while not servidor.started:
+        time.sleep(0.01)
+    return servidor, f"http://127.0.0.1:{porta}"
+
+
+async def disparar(cliente: httpx.AsyncClient, metodo: str, url: str, timeout: float, resultados: list):
+    inicio = time.perf_counter()
+    try:
+        resposta = await asyncio.wait_for(cliente.request(metodo, url), timeout)
+        resultados.append((resposta.status_code, time.perf_counter() - inicio))
+    except (asyncio.TimeoutError, httpx.HTTPError):
+        resultados.append(("timeout", time.perf_counter() - inicio))
+
+
+async def gerar_carga(base: str, taxa: float, duracao: float, timeout: float) -> tuple[list, list]:
+    geracoes: list = []
+    feedbacks: list = []
+    limites = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+
+    async with httpx.AsyncClient(base_url=base, limits=limites, timeout=None) as cliente:
+        tarefas = []
+        inicio = time.perf_counter()
+        enviados = 0
+        while (agora := time.perf_counter() - inicio) < duracao:
+            # Malha aberta: mantém a taxa de chegada independente das respostas
+            while enviados < agora * taxa:
+                tarefas.append(asyncio.create_task(
+                    disparar(cliente, "POST", "/api/v1/sugestao", timeout, geracoes)
+                ))
+                if enviados % 10 == 0:
+                    tarefas.append(asyncio.create_task(
+                        disparar(cliente, "POST", "/api/v1/feedback/exercicio", timeout, feedbacks)
+                    ))
+                enviados += 1
+            await asyncio.sleep(0.005)
+        await asyncio.gather(*tarefas)
+
+    return geracoes, feedbacks
+
+
+def resumir(nome: str, geracoes: list, feedbacks: list, duracao: float, timeout: float) -> None:
+    ok = [t for s, t in geracoes if s == 200 and t <= timeout]
+    descartadas = sum(1 for s, _ in geracoes if s == 503)
+    expiradas = sum(1 for s, _ in geracoes if s == "timeout")
+    fb_ok = sum(1 for s, t in feedbacks if s == 200 and t <= timeout)
+    ok.sort()
+    p95 = ok[int(len(ok) * 0.95) - 1] if ok else float("nan")
+    print(
+        f"{nome:<14} enviadas={len(geracoes):>5}  goodput={len(ok) / duracao:>6.1f}/s  "
+        f"p95_ok={p95 * 1000:>7.0f} ms  503={descartadas:>5}  timeout={expiradas:>5}  "
+        f"feedback_ok={fb_ok}/{len(feedbacks)}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conexoes", type=int, default=4)
+    parser.add_argument("--servico", type=float, default=0.2)
+    parser.add_argument("--sobrecarga", type=float, default=2.0)
+    parser.add_argument("--duracao", type=float, default=15.0)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    args = parser.parse_args()
+
+    capacidade = args.conexoes / args.servico
+    taxa = capacidade * args.sobrecarga
+    print(f"capacidade={capacidade:.0f}/s  carga={taxa:.0f}/s  duração={args.duracao:.0f}s  timeout={args.timeout}s\n")
+
+    for nome, ativo in (("sem descarte", False), ("com descarte", True)):
+        servidor, base = subir_servidor(criar_app(ativo, args.conexoes, args.servico))
+        geracoes, feedbacks = asyncio.run(gerar_carga(base, taxa, args.duracao, args.timeout))
+        servidor.should_exit = True
+        resumir(nome, geracoes, feedbacks, args.duracao, args.timeout)
+        time.sleep(0.5)
+
+
+if __name__ == "__main__":
+    main()
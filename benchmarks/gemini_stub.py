@@ -0,0 +1,139 @@
+# benchmarks/gemini_stub.py
+"""
+Servidor local que imita o endpoint `generateContent` da API do Gemini.
+
+Permite testar carga sem chamar a API paga. As respostas têm o mesmo
+formato da API real (candidates + usageMetadata) e trazem um plano válido,
+montado pelo gerador local a partir da frequência, local e objetivo lidos
+do prompt. Latência, erros e 429 são configuráveis:
+
+- latência log-normal definida por mediana e p95;
+- `--taxa-erro`: fração de respostas 500 (INTERNAL);
+- `--taxa-429`: fração de respostas 429 (RESOURCE_EXHAUSTED);
+- `--taxa-json-invalido`: fração de planos truncados (JSON inválido).
+
+Uso:
+    python -m benchmarks.gemini_stub --porta 8090 --latencia-mediana 6 --latencia-p95 12 --taxa-429 0.02
+
+E, na API:
+    GEMINI_BASE_URL=http://127.0.0.1:8090 GEMINI_API_KEY=stub uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+from collections import Counter
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from app.services.provedores_llm import plano_stub  # noqa: E402
+
+
+def texto_do_pedido(corpo: dict) -> str:
+    partes = [
+        parte.get("text", "")
+        for conteudo in corpo.get("contents", [])
+        for parte in conteudo.get("parts", [])
+    ]
+    return "\n".join(partes)
+
+
+def erro(status: int, codigo: str, mensagem: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"code": status, "message": mensagem, "status": codigo}},
+    )
+
+
+def criar_app(
+    latencia_mediana: float,
+    latencia_p95: float,
+    taxa_erro: float,
+    taxa_429: float,
+    taxa_json_invalido: float,
+    semente: int | None = None,
+) -> FastAPI:
+    rng = random.Random(semente)
+    mu = math.log(latencia_mediana)
+    sigma = max(0.0, math.log(latencia_p95 / latencia_mediana) / 1.645)
+    contagem: Counter[str] = Counter()
+
+    app = FastAPI(title="Gemini stub")
+
+    @app.post("/{versao}/models/{modelo}:generateContent")
+    async def generate_content(versao: str, modelo: str, request: Request):
+        corpo = await request.json()
+        prompt = texto_do_pedido(corpo)
+        await asyncio.sleep(rng.lognormvariate(mu, sigma))
+
+        sorteio = rng.random()
+        if sorteio < taxa_429:
+            contagem["429"] += 1
+            return erro(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).")
+        if sorteio < taxa_429 + taxa_erro:
+            contagem["500"] += 1
+            return erro(500, "INTERNAL", "An internal error has occurred.")
+
+        texto = plano_stub(prompt, semente=f"stub-{rng.random()}")
+        if rng.random() < taxa_json_invalido:
+            contagem["json_invalido"] += 1
+            texto = texto[: len(texto) // 2]
+        else:
+            contagem["ok"] += 1
+
+        return {
+            "candidates": [
+                {
+                    "content": {"parts": [{"text": texto}], "role": "model"},
+                    "finishReason": "STOP",
+                    "index": 0,
+                }
+            ],
+            "usageMetadata": {
+                "promptTokenCount": len(prompt) // 4,
+                "candidatesTokenCount": len(texto) // 4,
+                "totalTokenCount": (len(prompt) + len(texto)) // 4,
+            },
+            "modelVersion": modelo,
+        }
+
+    @app.get("/stub/stats")
+    async def stats():
+        return dict(contagem)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8090)
+    parser.add_argument("--latencia-mediana", type=float, default=6.0, help="segundos")
+    parser.add_argument("--latencia-p95", type=float, default=12.0, help="segundos")
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--taxa-429", type=float, default=0.0)
+    parser.add_argument("--taxa-json-invalido", type=float, default=0.0)
+    parser.add_argument("--semente", type=int, default=None)
+    args = parser.parse_args()
+
+    app = criar_app(
+        args.latencia_mediana,
+        args.latencia_p95,
+        args.taxa_erro,
+        args.taxa_429,
+        args.taxa_json_invalido,
+        args.semente,
+    )
+    uvicorn.run(app, host=args.host, port=args.porta, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
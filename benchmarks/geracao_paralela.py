@@ -0,0 +1,67 @@
+# benchmarks/geracao_paralela.py
+"""
+Latência da geração sequencial (um prompt) contra a paralela (uma chamada
+por dia + nutrição) usando o provedor `stub`, sem rede.
+
+O stub simula um modelo em que o tempo cresce com a saída:
+`--latencia` fixa por chamada (tempo até o primeiro token) mais
+`--segundos-por-token` x tokens de saída. Como o limitador AIMD começa em
+`LLM_CONCORRENCIA_INICIAL`, o script sobe esse valor para que as chamadas
+de um mesmo plano não fiquem na fila.
+
+Uso:
+    python -m benchmarks.geracao_paralela --dias 3 6 --repeticoes 5
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["LLM_PROVEDOR"] = "stub"
+os.environ.setdefault("LLM_CONCORRENCIA_INICIAL", "16")
+
+
+def medir(gerar, dias: int, repeticoes: int) -> list[float]:
+    duracoes = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        plano = gerar(f"Usuário {i}", 175, 80, 30, dias, "academia", "hipertrofia")
+        duracoes.append(time.perf_counter() - inicio)
+        assert len(plano["dias_de_treino"]) == dias
+    return duracoes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dias", type=int, nargs="+", default=[3, 6])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--latencia", type=float, default=0.5, help="segundos fixos por chamada")
+    parser.add_argument("--segundos-por-token", type=float, default=0.005)
+    args = parser.parse_args()
+
+    os.environ["LLM_STUB_LATENCIA_SEGUNDOS"] = str(args.latencia)
+    os.environ["LLM_STUB_SEGUNDOS_POR_TOKEN"] = str(args.segundos_por_token)
+
+    from app.core.config import settings
+    from app.services.ia_agent import generate_training_plan
+
+    print(f"{'dias':>5}{'modo':>12}{'média s':>10}{'p50 s':>9}{'máx s':>9}")
+    for dias in args.dias:
+        medias = {}
+        for modo, paralela in (("sequencial", False), ("paralela", True)):
+            settings.LLM_GERACAO_PARALELA = paralela
+            duracoes = medir(generate_training_plan, dias, args.repeticoes)
+            medias[modo] = statistics.mean(duracoes)
+            print(
+                f"{dias:>5}{modo:>12}{medias[modo]:>10.2f}"
+                f"{statistics.median(duracoes):>9.2f}{max(duracoes):>9.2f}"
+            )
+        print(f"{'':>5}{'ganho':>12}{medias['sequencial'] / medias['paralela']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
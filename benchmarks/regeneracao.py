@@ -0,0 +1,88 @@
+# benchmarks/regeneracao.py
+"""
+Tokens de saída e latência para trocar um dia de treino ou a nutrição de
+um plano: geração do plano inteiro de novo contra a regeneração parcial
+(`regenerar_dia` / `regenerar_nutricao`), com o provedor `stub`, sem rede.
+
+No stub o tempo de resposta é `--latencia` + `--segundos-por-token` x
+tokens de saída, então a queda de latência acompanha a queda de saída.
+
+Uso:
+    python -m benchmarks.regeneracao --dias 3 6 --repeticoes 5
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["LLM_PROVEDOR"] = "stub"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dias", type=int, nargs="+", default=[3, 6])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--latencia", type=float, default=0.5, help="segundos fixos por chamada")
+    parser.add_argument("--segundos-por-token", type=float, default=0.005)
+    args = parser.parse_args()
+
+    os.environ["LLM_STUB_LATENCIA_SEGUNDOS"] = str(args.latencia)
+    os.environ["LLM_STUB_SEGUNDOS_POR_TOKEN"] = str(args.segundos_por_token)
+
+    from app.services.ia_agent import generate_training_plan
+    from app.services.provedores_llm import obter_provedor
+    from app.services.regeneracao import regenerar_dia, regenerar_nutricao
+
+    provedor = obter_provedor()
+    tokens = {"saida": 0}
+    gerar_original = provedor.gerar
+
+    def gerar_contando(prompt, modelo, config):
+        resposta = gerar_original(prompt, modelo, config)
+        tokens["saida"] += resposta.tokens_saida
+        return resposta
+
+    provedor.gerar = gerar_contando
+    perfil = ("academia", "hipertrofia")
+
+    def medir(funcao) -> tuple[float, float]:
+        tokens["saida"] = 0
+        duracoes = []
+        for i in range(args.repeticoes):
+            inicio = time.perf_counter()
+            funcao(i)
+            duracoes.append(time.perf_counter() - inicio)
+        return tokens["saida"] / args.repeticoes, statistics.mean(duracoes)
+
+    print(f"{'dias':>5}{'modo':>12}{'saída':>8}{'média s':>10}  ganho (saída / tempo)")
+    for dias in args.dias:
+        plano = generate_training_plan("Usuário", 175, 80, 30, dias, *perfil)
+        refeicoes = [r["nome"] for opcoes in plano["sugestoes_nutricionais"].values() for r in opcoes.values()]
+
+        saida_inteiro, lat_inteiro = medir(
+            lambda i: generate_training_plan(f"Usuário {i}", 175, 80, 30, dias, *perfil)
+        )
+        print(f"{dias:>5}{'inteiro':>12}{saida_inteiro:>8.0f}{lat_inteiro:>10.2f}")
+
+        parciais = {
+            "um dia": lambda i: regenerar_dia(
+                f"Usuário {i}", 175, 80, 30, *perfil, None, plano["dias_de_treino"], 1 + i % dias
+            ),
+            "nutrição": lambda i: regenerar_nutricao(
+                f"Usuário {i}", 175, 80, 30, *perfil, None, dias, refeicoes
+            ),
+        }
+        for modo, funcao in parciais.items():
+            saida, latencia = medir(funcao)
+            print(
+                f"{dias:>5}{modo:>12}{saida:>8.0f}{latencia:>10.2f}"
+                f"{saida_inteiro / saida:>7.1f}x / {lat_inteiro / latencia:.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
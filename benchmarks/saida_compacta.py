@@ -0,0 +1,77 @@
+# benchmarks/saida_compacta.py
+"""
+Tokens de saída e latência da geração completa (JSON inteiro) contra a
+saída compacta (códigos do catálogo expandidos no servidor), com o
+provedor `stub`, sem rede.
+
+No stub o tempo de resposta é `--latencia` + `--segundos-por-token` x
+tokens de saída, então a queda de latência acompanha a queda de saída.
+Tokens de prompt também são medidos: a fatia do catálogo aumenta a
+entrada, que num modelo real custa bem menos tempo que a saída.
+
+Uso:
+    python -m benchmarks.saida_compacta --dias 3 6 --repeticoes 5
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["LLM_PROVEDOR"] = "stub"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dias", type=int, nargs="+", default=[3, 6])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--latencia", type=float, default=0.5, help="segundos fixos por chamada")
+    parser.add_argument("--segundos-por-token", type=float, default=0.005)
+    args = parser.parse_args()
+
+    os.environ["LLM_STUB_LATENCIA_SEGUNDOS"] = str(args.latencia)
+    os.environ["LLM_STUB_SEGUNDOS_POR_TOKEN"] = str(args.segundos_por_token)
+
+    from app.core.config import settings
+    from app.services.ia_agent import generate_training_plan
+    from app.services.provedores_llm import obter_provedor
+
+    provedor = obter_provedor()
+    tokens = {"prompt": 0, "saida": 0}
+    gerar_original = provedor.gerar
+
+    def gerar_contando(prompt, modelo, config):
+        resposta = gerar_original(prompt, modelo, config)
+        tokens["prompt"] += resposta.tokens_prompt
+        tokens["saida"] += resposta.tokens_saida
+        return resposta
+
+    provedor.gerar = gerar_contando
+
+    print(f"{'dias':>5}{'modo':>11}{'prompt':>9}{'saída':>8}{'média s':>10}{'p50 s':>9}")
+    for dias in args.dias:
+        resultados = {}
+        for modo, compacta in (("completa", False), ("compacta", True)):
+            settings.LLM_SAIDA_COMPACTA = compacta
+            tokens.update(prompt=0, saida=0)
+            duracoes = []
+            for i in range(args.repeticoes):
+                inicio = time.perf_counter()
+                plano = generate_training_plan(f"Usuário {i}", 175, 80, 30, dias, "academia", "hipertrofia")
+                duracoes.append(time.perf_counter() - inicio)
+                assert len(plano["dias_de_treino"]) == dias
+            saida = tokens["saida"] / args.repeticoes
+            resultados[modo] = (saida, statistics.mean(duracoes))
+            print(
+                f"{dias:>5}{modo:>11}{tokens['prompt'] / args.repeticoes:>9.0f}{saida:>8.0f}"
+                f"{statistics.mean(duracoes):>10.2f}{statistics.median(duracoes):>9.2f}"
+            )
+        (saida_c, lat_c), (saida_k, lat_k) = resultados["completa"], resultados["compacta"]
+        print(f"{'':>5}{'ganho':>11}{'':>9}{saida_c / saida_k:>7.1f}x{lat_c / lat_k:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# conftest.py
+import os
+
+# Antes de importar a aplicação: Settings exige estas variáveis. O banco é
+# sempre o de teste (TEST_DATABASE_URL), nunca o DATABASE_URL do ambiente,
+# porque as tabelas são recriadas e truncadas.
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", "postgresql://postgres@localhost/aican_test"
+)
+os.environ.setdefault("SECRET_KEY", "teste")
+os.environ.setdefault("GEMINI_API_KEY", "teste")
+os.environ["LLM_PROVEDOR"] = "stub"
+os.environ.setdefault("RATE_LIMIT_CAPACIDADE", "100000")
+os.environ.setdefault("RATE_LIMIT_CATALOGO_CAPACIDADE", "100000")
+os.environ.setdefault("CARGA_PROTECAO_ATIVA", "false")
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.instrumentacao_sql import limitar_consultas
+
+
+@pytest.fixture(scope="session")
+def banco():
+    """Cria o schema `aican` e as tabelas no banco de teste; pula os testes sem banco."""
+    from app.database import models  # noqa: F401 (registra os modelos no metadata)
+    from app.database.base import Base, engine
+    from app.database.models import feedback  # noqa: F401
+
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("DROP SCHEMA IF EXISTS aican CASCADE"))
+            conn.execute(text("CREATE SCHEMA aican"))
+    except OperationalError as e:
+        pytest.skip(f"Banco de teste indisponível (TEST_DATABASE_URL): {e.orig}")
+
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(banco):
+    """TestClient da aplicação sobre tabelas vazias."""
+    from fastapi.testclient import TestClient
+
+    from app.database.base import Base
+    from main import app
+
+    tabelas = ", ".join(f"aican.{t.name}" for t in Base.metadata.sorted_tables)
+    with banco.begin() as conn:
+        conn.execute(text(f"TRUNCATE {tabelas} RESTART IDENTITY CASCADE"))
+
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+@pytest.fixture
+def autenticado(client):
+    """Cria um usuário e devolve os cabeçalhos com o token dele."""
+    from app.core.security import create_access_token, get_password_hash
+    from app.database.base import SessionLocal
+    from app.database.models.user import User
+
+    with SessionLocal() as sessao:
+        sessao.add(User(nome="Teste", email="teste@aican.dev", hash_senha=get_password_hash("senha123")))
+        sessao.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'teste@aican.dev'})}"}
+
+
+@pytest.fixture
+def orcamento_consultas():
+    """
+    Orçamento de consultas SQL por endpoint.
+
+        def test_stats(client, autenticado, orcamento_consultas):
+            with orcamento_consultas(3, repeticoes_max=1):
+                client.get("/api/v1/feedback/stats", headers=autenticado)
+    """
+    return limitar_consultas
@@ -1,22 +1,27 @@
 # main.py
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.routers import router as v1_router
 from app.core.config import settings
+from app.core.exceptions import ServicoIndisponivelError
+from app.core.logs import configurar_logs
+from app.core.instrumentacao_sql import InstrumentacaoSQLMiddleware
+from app.core.metricas import MetricasHTTPMiddleware, gerar_metricas
+from app.core.rastreamento import RastreamentoMiddleware, configurar_rastreamento
+from app.core.protecao_carga import ProtecaoCargaMiddleware, monitor_carga
+from app.core.rate_limit import limiter
+from app.services.especulacao import pre_gerador
+from app.services.ia_agent import llm_circuit_breaker, llm_hedger, llm_limitador
+from app.services.provedores_llm import obter_provedor
 import logging
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 
-logging.basicConfig(
-    level=logging.INFO if not settings.DEBUG else logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# Logs via fila (escrita fora das requisições), JSON, amostragem e limite de tamanho
+configurar_logs()
 
-logger = logging.getLogger(__name__)
+# Antes de qualquer log: instala o TracerProvider e o trace_id nos registros
+configurar_rastreamento()
 
-# Configurar rate limiter
-limiter = Limiter(key_func=get_remote_address)
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="AICan - Treino IA API",
@@ -26,9 +31,22 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
-# Adicionar rate limiter
+# Rate limiter único (compartilhado por todas as rotas via app.core.rate_limit)
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+# Consultas SQL por requisição: cabeçalhos X-DB-* (DEBUG) e aviso de N+1
+app.add_middleware(InstrumentacaoSQLMiddleware)
+
+# Latência por rota (mais interno: não conta as requisições descartadas abaixo)
+app.add_middleware(MetricasHTTPMiddleware)
+
+# Span raiz de cada requisição (X-Trace-Id); envolve métricas e instrumentação SQL
+app.add_middleware(RastreamentoMiddleware)
+
+# Descarte de carga: sob pressão recusa gerações e depois consultas (503 + Retry-After).
+# Registrado antes do CORS para que as respostas 503 também levem os cabeçalhos CORS
+monitor_carga.configurar_fila_llm(lambda: llm_limitador.na_fila)
+app.add_middleware(ProtecaoCargaMiddleware, monitor=monitor_carga, ativo=settings.CARGA_PROTECAO_ATIVA)
 
 app.add_middleware(
     CORSMiddleware,
@@ -57,7 +75,25 @@ async def root():
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Verifica se a API está funcionando"""
-    return {"status": "healthy"}
+    caches = obter_provedor().caches
+    return {
+        "status": "healthy",
+        "ia": {
+            "circuit_breaker": llm_circuit_breaker.snapshot(),
+            "concorrencia": llm_limitador.snapshot(),
+            "hedge": llm_hedger.snapshot(),
+            "especulacao": pre_gerador.snapshot(),
+            "cache_contexto": caches.snapshot() if caches and settings.LLM_CACHE_CONTEXTO_ATIVO else None,
+        },
+        "carga": monitor_carga.snapshot(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas no formato de exposição do Prometheus"""
+    conteudo, tipo = gerar_metricas()
+    return Response(content=conteudo, media_type=tipo)
 
 
 from fastapi import Request
@@ -80,6 +116,15 @@ async def operational_error_handler(request: Request, exc: OperationalError):
         content={"detail": "Erro de conexão com o banco de dados. Tente novamente mais tarde."},
     )
 
+@app.exception_handler(ServicoIndisponivelError)
+async def servico_indisponivel_handler(request: Request, exc: ServicoIndisponivelError):
+    logger.warning(f"Serviço indisponível ({request.url.path}): {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 
 if __name__ == "__main__":
     import uvicorn
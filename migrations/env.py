@@ -12,7 +12,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 # Importa Base e carrega todos os modelos
 from app.database.base import Base
-from app.database.models import user, plano, catalogo_exercicio, nutricao, feedback
+from app.database.models import user, plano, catalogo_exercicio, nutricao, feedback, plano_pool
 from app.core.config import settings
 
 # Este é o objeto de configuração do Alembic, que fornece
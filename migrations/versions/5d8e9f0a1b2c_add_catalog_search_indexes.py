@@ -0,0 +1,64 @@
+"""add_catalog_search_indexes
+
+Revision ID: 5d8e9f0a1b2c
+Revises: 1f2e3d4c5b6a
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# identificadores de revisão, usados pelo Alembic.
+revision: str = '5d8e9f0a1b2c'
+down_revision: Union[str, Sequence[str], None] = '1f2e3d4c5b6a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Cria índices de busca textual (tsvector em português) e trigramas no catálogo."""
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA public")
+
+    # unaccent() não é IMMUTABLE; o wrapper permite usá-la em índices de expressão
+    op.execute("""
+        CREATE OR REPLACE FUNCTION aican.f_unaccent(text)
+        RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+
+    op.execute("""
+        CREATE INDEX ix_aican_catalogo_exercicios_nome_trgm
+        ON aican.catalogo_exercicios
+        USING gin (aican.f_unaccent(lower(nome)) public.gin_trgm_ops)
+    """)
+    op.execute("""
+        CREATE INDEX ix_aican_catalogo_exercicios_busca
+        ON aican.catalogo_exercicios
+        USING gin (to_tsvector('portuguese', aican.f_unaccent(coalesce(nome, '') || ' ' || coalesce(descricao, ''))))
+    """)
+    op.execute("""
+        CREATE INDEX ix_aican_catalogo_refeicoes_nome_trgm
+        ON aican.catalogo_refeicoes
+        USING gin (aican.f_unaccent(lower(nome)) public.gin_trgm_ops)
+    """)
+    op.execute("""
+        CREATE INDEX ix_aican_catalogo_refeicoes_busca
+        ON aican.catalogo_refeicoes
+        USING gin (to_tsvector('portuguese', aican.f_unaccent(coalesce(nome, '') || ' ' || coalesce(explicacao, ''))))
+    """)
+
+
+def downgrade() -> None:
+    """Remove os índices de busca do catálogo."""
+
+    op.drop_index('ix_aican_catalogo_refeicoes_busca', table_name='catalogo_refeicoes', schema='aican')
+    op.drop_index('ix_aican_catalogo_refeicoes_nome_trgm', table_name='catalogo_refeicoes', schema='aican')
+    op.drop_index('ix_aican_catalogo_exercicios_busca', table_name='catalogo_exercicios', schema='aican')
+    op.drop_index('ix_aican_catalogo_exercicios_nome_trgm', table_name='catalogo_exercicios', schema='aican')
+    op.execute("DROP FUNCTION IF EXISTS aican.f_unaccent(text)")
@@ -0,0 +1,60 @@
+"""add_plan_pool
+
+Revision ID: 6b7c8d9e0f1a
+Revises: 5d8e9f0a1b2c
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# identificadores de revisão, usados pelo Alembic.
+revision: str = '6b7c8d9e0f1a'
+down_revision: Union[str, Sequence[str], None] = '5d8e9f0a1b2c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Cria a tabela de planos pré-gerados por bucket de perfil."""
+
+    op.create_table('planos_pool',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('objetivo', sa.String(length=20), nullable=False),
+    sa.Column('local', sa.String(length=20), nullable=False),
+    sa.Column('disponibilidade', sa.Integer(), nullable=False),
+    sa.Column('faixa_imc', sa.String(length=20), nullable=False),
+    sa.Column('faixa_idade', sa.String(length=20), nullable=False),
+    sa.Column('conteudo', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('exercicios', postgresql.ARRAY(sa.String()), nullable=False),
+    sa.Column('refeicoes', postgresql.ARRAY(sa.String()), nullable=False),
+    sa.Column('assinatura', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('usado_em', sa.DateTime(), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('assinatura'),
+    schema='aican'
+    )
+    op.create_index(op.f('ix_aican_planos_pool_id'), 'planos_pool', ['id'], unique=False, schema='aican')
+    # Só planos livres entram no índice: a busca do bucket não varre os já usados
+    op.create_index(
+        'ix_planos_pool_bucket_livre',
+        'planos_pool',
+        ['objetivo', 'local', 'disponibilidade', 'faixa_imc', 'faixa_idade'],
+        unique=False,
+        schema='aican',
+        postgresql_where=sa.text('usado_em IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Remove a tabela de planos pré-gerados."""
+
+    op.drop_index('ix_planos_pool_bucket_livre', table_name='planos_pool', schema='aican')
+    op.drop_index(op.f('ix_aican_planos_pool_id'), table_name='planos_pool', schema='aican')
+    op.drop_table('planos_pool', schema='aican')
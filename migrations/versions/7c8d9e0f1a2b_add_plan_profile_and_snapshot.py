@@ -0,0 +1,54 @@
+"""add_plan_profile_and_snapshot
+
+Revision ID: 7c8d9e0f1a2b
+Revises: 6b7c8d9e0f1a
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# identificadores de revisão, usados pelo Alembic.
+revision: str = '7c8d9e0f1a2b'
+down_revision: Union[str, Sequence[str], None] = '6b7c8d9e0f1a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Guarda objetivo, local, frequência e um snapshot JSON de cada plano."""
+
+    op.add_column('planos', sa.Column('objetivo', sa.String(length=20), nullable=True), schema='aican')
+    op.add_column('planos', sa.Column('local', sa.String(length=20), nullable=True), schema='aican')
+    op.add_column('planos', sa.Column('frequencia', sa.Integer(), nullable=True), schema='aican')
+    op.add_column('planos', sa.Column('snapshot', postgresql.JSONB(astext_type=sa.Text()), nullable=True), schema='aican')
+
+    # Planos antigos: a frequência é o número de dias; objetivo e local
+    # ficam nulos (não estão gravados), então não são servidos como fallback
+    op.execute("""
+        UPDATE aican.planos p
+        SET frequencia = (SELECT count(*) FROM aican.plano_dias d WHERE d.plano_id = p.id)
+        WHERE frequencia IS NULL
+    """)
+
+    op.create_index(
+        'ix_planos_usuario_perfil_recente',
+        'planos',
+        ['usuario_id', 'objetivo', 'local', 'frequencia', sa.text('created_at DESC')],
+        unique=False,
+        schema='aican',
+    )
+
+
+def downgrade() -> None:
+    """Remove perfil e snapshot dos planos."""
+
+    op.drop_index('ix_planos_usuario_perfil_recente', table_name='planos', schema='aican')
+    op.drop_column('planos', 'snapshot', schema='aican')
+    op.drop_column('planos', 'frequencia', schema='aican')
+    op.drop_column('planos', 'local', schema='aican')
+    op.drop_column('planos', 'objetivo', schema='aican')
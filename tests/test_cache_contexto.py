@@ -0,0 +1,124 @@
+# tests/test_cache_contexto.py
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+
+from app.services import cache_contexto
+from app.services.cache_contexto import CacheExpiradoError, GerenciadorCacheContexto
+
+PREFIXO = "Você é uma API de backend."
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+    def avancar(self, segundos: float) -> None:
+        self.agora += segundos
+
+
+class Provedor:
+    """`criar`/`renovar` falsos que registram as chamadas e falham sob demanda."""
+
+    def __init__(self):
+        self.criados: list[tuple[str, int]] = []
+        self.renovados: list[tuple[str, int]] = []
+        self.erro_criar: Optional[Exception] = None
+        self.erro_renovar: Optional[Exception] = None
+
+    def criar(self, modelo: str, prefixo: str, ttl: int) -> str:
+        if self.erro_criar:
+            raise self.erro_criar
+        nome = f"caches/{len(self.criados) + 1}"
+        self.criados.append((nome, ttl))
+        return nome
+
+    def renovar(self, nome: str, ttl: int) -> None:
+        self.renovados.append((nome, ttl))
+        if self.erro_renovar:
+            raise self.erro_renovar
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(cache_contexto, "time", SimpleNamespace(monotonic=relogio))
+    return relogio
+
+
+@pytest.fixture
+def provedor():
+    return Provedor()
+
+
+@pytest.fixture
+def caches(provedor, relogio):
+    return GerenciadorCacheContexto(provedor.criar, provedor.renovar, ttl=300, margem=60, espera_falha=120)
+
+
+def test_reutiliza_fora_da_margem_e_renova_dentro(caches, provedor, relogio):
+    assert caches.obter("modelo", PREFIXO) == "caches/1"
+
+    relogio.avancar(239)  # faltam 61s
+    assert caches.obter("modelo", PREFIXO) == "caches/1"
+    assert provedor.renovados == []
+
+    relogio.avancar(2)  # faltam 59s
+    assert caches.obter("modelo", PREFIXO) == "caches/1"
+    assert provedor.renovados == [("caches/1", 300)]
+
+    # O TTL renovado conta a partir da renovação
+    relogio.avancar(239)
+    assert caches.obter("modelo", PREFIXO) == "caches/1"
+    assert len(provedor.renovados) == 1 and len(provedor.criados) == 1
+
+
+@pytest.mark.parametrize("erro", [CacheExpiradoError("sumiu"), RuntimeError("erro de rede")])
+def test_renovacao_falhou_cria_outro(caches, provedor, relogio, erro):
+    caches.obter("modelo", PREFIXO)
+    provedor.erro_renovar = erro
+
+    relogio.avancar(250)
+    assert caches.obter("modelo", PREFIXO) == "caches/2"
+    assert provedor.renovados == [("caches/1", 300)]
+    assert caches.snapshot() == {"caches": 1, "indisponiveis": 0}
+
+
+def test_expirado_cria_outro_sem_renovar(caches, provedor, relogio):
+    caches.obter("modelo", PREFIXO)
+
+    relogio.avancar(301)
+    assert caches.obter("modelo", PREFIXO) == "caches/2"
+    assert provedor.renovados == []
+
+
+def test_criacao_falhou_espera_antes_de_tentar_de_novo(caches, provedor, relogio):
+    provedor.erro_criar = ValueError("prefixo abaixo do mínimo de tokens")
+    assert caches.obter("modelo", PREFIXO) is None
+
+    provedor.erro_criar = None
+    relogio.avancar(119)
+    assert caches.obter("modelo", PREFIXO) is None
+    assert provedor.criados == []
+    assert caches.snapshot() == {"caches": 0, "indisponiveis": 1}
+
+    # Outro modelo não herda a espera
+    assert caches.obter("outro-modelo", PREFIXO) == "caches/1"
+
+    relogio.avancar(2)
+    assert caches.obter("modelo", PREFIXO) == "caches/2"
+    assert caches.snapshot() == {"caches": 2, "indisponiveis": 0}
+
+
+def test_invalidar_so_esquece_o_cache_com_o_mesmo_nome(caches, provedor):
+    caches.obter("modelo", PREFIXO)
+
+    caches.invalidar("modelo", PREFIXO, "caches/antigo")
+    assert caches.obter("modelo", PREFIXO) == "caches/1"
+
+    caches.invalidar("modelo", PREFIXO, "caches/1")
+    assert caches.obter("modelo", PREFIXO) == "caches/2"
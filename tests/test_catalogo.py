@@ -0,0 +1,135 @@
+# tests/test_catalogo.py
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import catalogo
+from app.services.catalogo import EXERCICIOS_BASE, IndiceCatalogo, classificar_grupo
+
+
+@pytest.mark.parametrize("exercicio", EXERCICIOS_BASE, ids=lambda ex: ex["nome"])
+def test_classificador_concorda_com_a_base(exercicio):
+    assert classificar_grupo(exercicio["nome"], exercicio["detalhes_execucao"]) == exercicio["grupo"]
+
+
+@pytest.mark.parametrize("nome, grupo", [
+    ("Rosca testa", "triceps"),
+    ("Cadeira extensora", "pernas"),
+    ("Cadeira abdutora", "gluteos"),
+    ("Puxada supinada", "costas"),
+    ("Flexão fechada", "triceps"),
+])
+def test_palavra_mais_especifica_vence(nome, grupo):
+    assert classificar_grupo(nome) == grupo
+
+
+@pytest.mark.parametrize("nome, grupo", [
+    ("Coreografia aeróbica", None),
+    ("Testando carga", None),
+    ("Elevação de glúteos", "gluteos"),
+    ("Agachamentos com salto", "pernas"),
+])
+def test_palavra_chave_precisa_terminar_a_palavra(nome, grupo):
+    assert classificar_grupo(nome) == grupo
+
+
+def _refeicao(nome: str, tipo: str = "pos_treino", nivel: str = "opcao_economica"):
+    return SimpleNamespace(
+        id=1, nome=nome, tipo=tipo, nivel=nivel, custo_estimado="R$ 1,00",
+        ingredientes=[], link_receita=None, explicacao="",
+    )
+
+
+def test_adicionar_refeicao_ignora_nome_repetido():
+    indice = IndiceCatalogo()
+    indice.recarregar(None)
+    antes = len(indice.prefixos_refeicoes)
+
+    indice.adicionar_refeicao(_refeicao("Arroz com ovo"))  # já na base
+    indice.adicionar_refeicao(_refeicao("Cuscuz com frango"))
+    indice.adicionar_refeicao(_refeicao("cuscuz  com  FRANGO", nivel="opcao_premium"))
+
+    assert len(indice.prefixos_refeicoes) == antes + 1
+    assert [r["nome"] for r in indice.prefixos_refeicoes.buscar("cuscuz com f")] == ["Cuscuz com frango"]
+    assert not any(r["nome"] == "Cuscuz com frango" for r in indice.refeicoes("pos_treino", "opcao_premium"))
+
+
+def test_adicionar_exercicio_ignora_nome_repetido():
+    indice = IndiceCatalogo()
+    indice.recarregar(None)
+    antes = len(indice.prefixos_exercicios)
+
+    item = SimpleNamespace(id=1, nome="Burpee", grupo_muscular="cardio", descricao="", video_url=None)
+    indice.adicionar_exercicio(item)
+    assert len(indice.prefixos_exercicios) == antes
+
+
+def test_recarga_expirada_e_feita_por_uma_requisicao_so(monkeypatch):
+    indice = IndiceCatalogo()
+    indice.recarregar(None)
+    indice.com_banco = True
+    indice.carregado_em = -1e9  # expirado
+    monkeypatch.setattr(catalogo, "indice_catalogo", indice)
+
+    liberar = threading.Event()
+    recargas = []
+
+    def recarregar_lento(db):
+        recargas.append(db)
+        liberar.wait(2)
+
+    monkeypatch.setattr(indice, "recarregar", recarregar_lento)
+
+    thread = threading.Thread(target=catalogo.obter_indice, args=("sessao",))
+    thread.start()
+    while not recargas:
+        pass
+
+    # Enquanto a primeira recarrega, as outras seguem com o índice atual
+    assert catalogo.obter_indice("outra sessao") is indice
+    assert recargas == ["sessao"]
+
+    liberar.set()
+    thread.join(2)
+
+
+def test_busca_no_banco_so_sem_resultado_no_indice(client, monkeypatch):
+    from app.api.v1.endpoints import catalogo as endpoint
+
+    chamadas = []
+
+    def buscar(session, tabela, termo, limite, **filtros):
+        chamadas.append((tabela, termo, filtros))
+        return [{"id": 7, "nome": "Remada baixa sentado", "grupo_muscular": "costas", "video_url": None}]
+
+    monkeypatch.setattr(endpoint, "buscar_no_banco", buscar)
+
+    resposta = client.get("/api/v1/catalogo/exercicios", params={"q": "remada", "grupo": "costas"})
+    assert resposta.status_code == 200
+    assert all("remada" in r["nome"].lower() for r in resposta.json())
+    assert chamadas == []
+
+    resposta = client.get(
+        "/api/v1/catalogo/exercicios", params={"q": "remda baxa", "grupo": "costas", "local": "casa"}
+    )
+    assert [r["id"] for r in resposta.json()] == [7]
+    assert chamadas == [("exercicios", "remda baxa", {"grupo": "costas", "local": "casa"})]
+
+
+def test_busca_no_banco_filtra_por_local(monkeypatch):
+    linhas = [
+        {"id": i, "nome": nome, "grupo_muscular": "costas", "video_url": None, "relevancia": 1.0}
+        for i, nome in enumerate(["Remada na máquina", "Remada com elástico", "Puxada na polia", "Remada curvada"])
+    ]
+
+    class Sessao:
+        def execute(self, sql, parametros):
+            self.parametros = parametros
+            return SimpleNamespace(mappings=lambda: SimpleNamespace(all=lambda: linhas[: parametros["limite"]]))
+
+    sessao = Sessao()
+    resultados = catalogo.buscar_no_banco(sessao, "exercicios", "remada", limite=2, local="casa")
+    assert [r["nome"] for r in resultados] == ["Remada com elástico", "Remada curvada"]
+    assert sessao.parametros["limite"] > 2
+    assert "relevancia" not in resultados[0]
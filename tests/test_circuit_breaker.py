@@ -0,0 +1,149 @@
+# tests/test_circuit_breaker.py
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.exceptions import ServicoIndisponivelError
+from app.services import circuit_breaker
+from app.services.circuit_breaker import ABERTO, FECHADO, SEMI_ABERTO, CircuitBreaker
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+    def avancar(self, segundos: float) -> None:
+        self.agora += segundos
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(circuit_breaker, "time", SimpleNamespace(monotonic=relogio))
+    return relogio
+
+
+@pytest.fixture
+def cb(relogio):
+    return CircuitBreaker("teste", taxa_falha=0.5, janela_segundos=60, minimo_chamadas=4, tempo_aberto=30, sondas=2)
+
+
+def _falhar(cb: CircuitBreaker, n: int) -> None:
+    for _ in range(n):
+        cb.antes_da_chamada()
+        cb.registrar_falha()
+
+
+def _abrir(cb: CircuitBreaker) -> None:
+    _falhar(cb, 4)
+    assert cb.estado == ABERTO
+
+
+def test_abre_ao_atingir_a_taxa_com_minimo_de_chamadas(cb):
+    _falhar(cb, 3)
+    assert cb.estado == FECHADO  # abaixo do mínimo de chamadas
+
+    _falhar(cb, 1)
+    assert cb.estado == ABERTO
+    assert cb.transicoes[ABERTO] == 1
+
+
+def test_sucessos_mantem_a_taxa_abaixo_do_limite(cb):
+    for _ in range(3):
+        cb.antes_da_chamada()
+        cb.registrar_sucesso()
+    _falhar(cb, 2)
+    assert cb.estado == FECHADO  # 2/5 < 50%
+
+    _falhar(cb, 1)
+    assert cb.estado == ABERTO  # 3/6
+
+
+def test_falhas_antigas_saem_da_janela(cb, relogio):
+    _falhar(cb, 3)
+    relogio.avancar(61)
+    _falhar(cb, 1)
+    assert cb.estado == FECHADO
+    assert cb.snapshot()["chamadas_janela"] == 1
+
+
+def test_aberto_falha_rapido_com_retry_after(cb, relogio):
+    _abrir(cb)
+    relogio.avancar(10)
+    with pytest.raises(ServicoIndisponivelError) as erro:
+        cb.antes_da_chamada()
+    assert erro.value.retry_after == 20
+
+
+def test_semi_aberto_depois_do_tempo_aberto(cb, relogio):
+    _abrir(cb)
+    relogio.avancar(29.9)
+    assert cb.estado == ABERTO
+    relogio.avancar(0.1)
+    assert cb.estado == SEMI_ABERTO
+
+
+def test_semi_aberto_limita_sondas_e_fecha_com_todas_ok(cb, relogio):
+    _abrir(cb)
+    relogio.avancar(30)
+
+    cb.antes_da_chamada()
+    cb.antes_da_chamada()
+    with pytest.raises(ServicoIndisponivelError):
+        cb.antes_da_chamada()  # terceira sonda
+
+    cb.registrar_sucesso()
+    assert cb.estado == SEMI_ABERTO
+    cb.registrar_sucesso()
+    assert cb.estado == FECHADO
+    assert cb.snapshot()["chamadas_janela"] == 0
+
+
+def test_falha_na_sonda_reabre(cb, relogio):
+    _abrir(cb)
+    relogio.avancar(30)
+
+    cb.antes_da_chamada()
+    cb.registrar_falha()
+    assert cb.estado == ABERTO
+    assert cb.transicoes[ABERTO] == 2
+    with pytest.raises(ServicoIndisponivelError):
+        cb.antes_da_chamada()
+
+
+def test_cancelar_chamada_devolve_a_sonda(cb, relogio):
+    _abrir(cb)
+    relogio.avancar(30)
+
+    cb.antes_da_chamada()
+    cb.antes_da_chamada()
+    cb.cancelar_chamada()  # ex.: fila do limitador cheia, a chamada nem saiu
+    cb.antes_da_chamada()  # a vaga de sonda voltou
+
+    cb.registrar_sucesso()
+    cb.registrar_sucesso()
+    assert cb.estado == FECHADO
+
+
+def test_cancelar_chamada_fechado_nao_conta_na_janela(cb):
+    cb.antes_da_chamada()
+    cb.cancelar_chamada()
+    assert cb.snapshot()["chamadas_janela"] == 0
+
+
+def test_ouvintes_recebem_as_transicoes(cb, relogio):
+    transicoes = []
+    cb.adicionar_ouvinte(lambda anterior, novo: transicoes.append((anterior, novo)))
+    cb.adicionar_ouvinte(lambda anterior, novo: 1 / 0)  # erro no ouvinte não interrompe
+
+    _abrir(cb)
+    relogio.avancar(30)
+    cb.antes_da_chamada()
+    cb.antes_da_chamada()
+    cb.registrar_sucesso()
+    cb.registrar_sucesso()
+
+    assert transicoes == [(FECHADO, ABERTO), (ABERTO, SEMI_ABERTO), (SEMI_ABERTO, FECHADO)]
@@ -0,0 +1,101 @@
+# tests/test_cliente_http.py
+import asyncio
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.services.cliente_http import ClienteHttpLLM, ClienteHttpLLMAsync
+
+URL = "https://ia.exemplo/v1/gerar"
+
+
+@pytest.fixture(autouse=True)
+def tetos(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_TIMEOUT_CONEXAO_SEGUNDOS", 5.0)
+    monkeypatch.setattr(settings, "LLM_TIMEOUT_LEITURA_SEGUNDOS", 40.0)
+    monkeypatch.setattr(settings, "LLM_TIMEOUT_ESCRITA_SEGUNDOS", 10.0)
+
+
+def _amostra(nome: str, **rotulos) -> float:
+    return REGISTRY.get_sample_value(nome, rotulos) or 0.0
+
+
+def _conexoes(conexao: str) -> float:
+    return _amostra("aican_llm_http_connections_total", conexao=conexao, http="HTTP/1.1")
+
+
+def _timeouts(fase: str) -> float:
+    return _amostra("aican_llm_timeouts_total", fase=fase)
+
+
+@pytest.mark.parametrize("timeout, esperado", [
+    (None, {"connect": 5.0, "read": 40.0, "write": 10.0, "pool": 5.0}),
+    (8.0, {"connect": 5.0, "read": 8.0, "write": 8.0, "pool": 5.0}),
+    # Pouco prazo restante: nenhuma fase passa do timeout da chamada
+    (2.0, {"connect": 2.0, "read": 2.0, "write": 2.0, "pool": 2.0}),
+])
+def test_timeout_da_chamada_vira_timeouts_por_fase(timeout, esperado):
+    with ClienteHttpLLM() as cliente:
+        request = cliente.build_request("POST", URL, timeout=timeout)
+    assert request.extensions["timeout"] == esperado
+
+
+def test_chamada_sem_timeout_usa_o_do_cliente():
+    with ClienteHttpLLM(timeout=httpx.Timeout(3.0)) as cliente:
+        request = cliente.build_request("POST", URL)
+    assert request.extensions["timeout"] == {"connect": 3.0, "read": 3.0, "write": 3.0, "pool": 3.0}
+
+
+def test_conta_conexoes_novas_e_reutilizadas():
+    def responder(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("x-conexao") == "nova":
+            request.extensions["trace"]("connection.connect_tcp.complete", {})
+        return httpx.Response(200, json={})
+
+    novas, reutilizadas = _conexoes("nova"), _conexoes("reutilizada")
+    with ClienteHttpLLM(transport=httpx.MockTransport(responder)) as cliente:
+        cliente.post(URL, headers={"x-conexao": "nova"})
+        cliente.post(URL)
+        cliente.post(URL)
+
+    assert _conexoes("nova") - novas == 1
+    assert _conexoes("reutilizada") - reutilizadas == 2
+
+
+@pytest.mark.parametrize("erro, fase", [
+    (httpx.ConnectTimeout, "conexao"),
+    (httpx.ReadTimeout, "leitura"),
+    (httpx.WriteTimeout, "escrita"),
+    (httpx.PoolTimeout, "pool"),
+])
+def test_conta_timeout_pela_fase(erro, fase):
+    def responder(request: httpx.Request) -> httpx.Response:
+        raise erro("tempo esgotado", request=request)
+
+    antes = _timeouts(fase)
+    with ClienteHttpLLM(transport=httpx.MockTransport(responder)) as cliente:
+        with pytest.raises(erro):
+            cliente.post(URL)
+    assert _timeouts(fase) - antes == 1
+
+
+def test_cliente_assincrono_conta_conexoes_e_timeouts():
+    async def responder(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("lento"):
+            raise httpx.ReadTimeout("tempo esgotado", request=request)
+        await request.extensions["trace"]("connection.connect_tcp.complete", {})
+        return httpx.Response(200, json={})
+
+    async def chamar():
+        async with ClienteHttpLLMAsync(transport=httpx.MockTransport(responder)) as cliente:
+            assert cliente.build_request("POST", URL, timeout=3.0).extensions["timeout"]["read"] == 3.0
+            await cliente.post(URL)
+            with pytest.raises(httpx.ReadTimeout):
+                await cliente.post(URL + "/lento")
+
+    novas, leituras = _conexoes("nova"), _timeouts("leitura")
+    asyncio.run(chamar())
+    assert _conexoes("nova") - novas == 1
+    assert _timeouts("leitura") - leituras == 1
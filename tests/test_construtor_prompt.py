@@ -0,0 +1,116 @@
+# tests/test_construtor_prompt.py
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services.catalogo import EXERCICIOS_BASE, REFEICOES_BASE
+from app.services.construtor_prompt import estimar_tokens, montar_restricoes, ranquear_preferencias
+
+AGORA = datetime(2026, 1, 31, 12)
+
+
+def test_cabe_no_orcamento_lista_tudo():
+    restricoes = montar_restricoes({"exercicios_evitar": ["Burpee"], "refeicoes_evitar": ["Omelete"]}, 1000)
+    assert "Burpee" in restricoes.texto and "Omelete" in restricoes.texto
+    assert (restricoes.listadas, restricoes.resumidas, restricoes.descartadas) == (2, 0, 0)
+
+
+EVITAR = (
+    ["Agachamento livre", "Burpee"]
+    + [f"Supino reto com halteres pegada {i}" for i in range(6)]
+    + [f"Polichinelo com agachamento variação {i}" for i in range(3)]
+    + [f"Remada invertida no chão variação {i}" for i in range(2)]
+)
+
+
+def test_menos_prioritarios_viram_categoria_mais_relevante_primeiro():
+    restricoes = montar_restricoes({"exercicios_evitar": EVITAR}, 106)
+    assert (restricoes.listadas, restricoes.resumidas) == (2, 11)
+    assert "Agachamento livre, Burpee\n" in restricoes.texto
+    assert "exercícios de peito (6), exercícios de impacto (3), exercícios de costas (2)" in restricoes.texto
+
+    # "Burpee" passa a ser o resumido mais relevante: a categoria dele vai para a frente
+    restricoes = montar_restricoes({"exercicios_evitar": EVITAR}, 97)
+    assert (restricoes.listadas, restricoes.resumidas) == (1, 12)
+    assert "exercícios de impacto (4), exercícios de peito (6), exercícios de costas (2)" in restricoes.texto
+
+
+def test_sem_espaco_descarta_categorias_menores():
+    restricoes = montar_restricoes({"exercicios_evitar": EVITAR}, 93)
+    assert "exercícios de peito (6)\n" in restricoes.texto
+    assert (restricoes.listadas, restricoes.resumidas, restricoes.descartadas) == (0, 6, 7)
+    assert estimar_tokens(restricoes.texto) <= 93
+
+
+def test_listas_longas_cabem_no_orcamento():
+    exercicios = [f"{e['nome']} variação {i}" for i in range(8) for e in EXERCICIOS_BASE][:368]
+    refeicoes = [
+        f"{r['nome']} {i}"
+        for i in range(10) for niveis in REFEICOES_BASE.values() for opcoes in niveis.values() for r in opcoes
+    ][:150]
+    preferencias = {"exercicios_evitar": exercicios, "refeicoes_evitar": refeicoes}
+    restricoes = montar_restricoes(preferencias, 400)
+    assert estimar_tokens(restricoes.texto) <= 400
+    assert restricoes.listadas + restricoes.resumidas + restricoes.descartadas == len(exercicios) + len(refeicoes)
+
+
+@pytest.fixture
+def meia_vida(monkeypatch):
+    monkeypatch.setattr(settings, "PREFERENCIAS_MEIA_VIDA_DIAS", 10)
+
+
+def _feedback(nome: str, dias_atras: float, gostou: bool = False, tipo: str = "exercicio"):
+    return SimpleNamespace(tipo=tipo, item_nome=nome, gostou=gostou, created_at=AGORA - timedelta(days=dias_atras))
+
+
+def test_rejeicao_recente_vem_antes_da_antiga(meia_vida):
+    feedbacks = [_feedback("Burpee", 30), _feedback("Prancha", 1), _feedback("Supino", 10)]
+    assert ranquear_preferencias(feedbacks, AGORA)["exercicios_evitar"] == ["Prancha", "Supino", "Burpee"]
+
+
+def test_varias_rejeicoes_antigas_pesam_mais_que_uma_recente(meia_vida):
+    # 3 x 0.5 (uma meia-vida) > 1 x ~0.93
+    feedbacks = [_feedback("Burpee", 10) for _ in range(3)] + [_feedback("Prancha", 1)]
+    assert ranquear_preferencias(feedbacks, AGORA)["exercicios_evitar"] == ["Burpee", "Prancha"]
+
+    # 3 x 0.125 (três meias-vidas) < 1 x ~0.93
+    feedbacks = [_feedback("Burpee", 30) for _ in range(3)] + [_feedback("Prancha", 1)]
+    assert ranquear_preferencias(feedbacks, AGORA)["exercicios_evitar"] == ["Prancha", "Burpee"]
+
+
+def test_voto_mais_recente_decide_a_lista(meia_vida):
+    feedbacks = [
+        _feedback("Burpee", 5),
+        _feedback("Burpee", 4),
+        _feedback("Burpee", 1, gostou=True),
+        _feedback("Omelete", 1, gostou=True, tipo="refeicao"),
+        _feedback("Omelete", 0, tipo="refeicao"),
+    ]
+    listas = ranquear_preferencias(feedbacks, AGORA)
+    assert listas == {
+        "exercicios_preferidos": ["Burpee"],
+        "exercicios_evitar": [],
+        "refeicoes_preferidas": [],
+        "refeicoes_evitar": ["Omelete"],
+    }
+
+
+def test_nomes_iguais_apos_normalizar_viram_um_item(meia_vida):
+    feedbacks = [
+        _feedback("supino  reto", 3),
+        _feedback("Supino Reto ", 2),
+        _feedback("SUPINO  RETO", 1),
+        _feedback("Flexão", 0),
+        _feedback("  ", 0),
+        _feedback("Flexão", 0, tipo="outro"),
+    ]
+    # Três rejeições somadas passam a única rejeição, mais recente, de "Flexão";
+    # o nome exibido é o da avaliação mais recente, sem espaços repetidos.
+    assert ranquear_preferencias(feedbacks, AGORA)["exercicios_evitar"] == ["SUPINO RETO", "Flexão"]
+
+
+def test_mesmo_peso_desempata_pelo_mais_recente_e_pelo_nome(meia_vida):
+    feedbacks = [_feedback("B", 0), _feedback("A", 0), _feedback("C", -1)]  # futuro conta como agora
+    assert ranquear_preferencias(feedbacks, AGORA)["exercicios_evitar"] == ["C", "A", "B"]
@@ -0,0 +1,60 @@
+# tests/test_especulacao.py
+import pytest
+
+from app.core.config import settings
+from app.database import base
+from app.services import especulacao
+from app.services.especulacao import PreGeradorPlanos
+
+PERFIL = dict(nome="Ana", altura=170, peso=65, idade=25, disponibilidade=3, local="casa", objetivo="hipertrofia")
+PREFERENCIAS = {"exercicios_evitar": ["Burpee"], "refeicoes_evitar": []}
+
+
+class Sessao:
+    abertas = 0
+
+    def __enter__(self):
+        Sessao.abertas += 1
+        return self
+
+    def __exit__(self, *exc):
+        Sessao.abertas -= 1
+
+
+@pytest.fixture
+def pre_gerador(monkeypatch):
+    monkeypatch.setattr(base, "SessionLocal", Sessao)
+    monkeypatch.setattr(especulacao, "obter_preferencias_usuario", lambda usuario_id, db: PREFERENCIAS)
+    monkeypatch.setattr(especulacao.monitor_carga, "pressao", lambda: 0.0)
+    monkeypatch.setattr(settings, "LLM_SAIDA_COMPACTA", True)
+
+    gerador = PreGeradorPlanos(feedbacks_min=2, ttl=60, max_por_hora=5, pressao_max=0.5)
+    monkeypatch.setattr(gerador, "_feedbacks_desde_ultimo_plano", lambda db, usuario_id: 3)
+    gerador.lembrar_perfil(1, PERFIL)
+    return gerador
+
+
+def test_gera_sem_segurar_a_sessao(pre_gerador, monkeypatch):
+    indices, geracoes = [], []
+    monkeypatch.setattr(especulacao, "obter_indice", lambda db: indices.append(db))
+
+    def gerar(**kwargs):
+        geracoes.append((Sessao.abertas, kwargs))
+        return {"nome_da_rotina": "Plano"}
+
+    monkeypatch.setattr(especulacao, "generate_training_plan", gerar)
+
+    pre_gerador._avaliar(1)
+
+    assert len(indices) == 1 and isinstance(indices[0], Sessao)  # índice carregado com a sessão aberta
+    assert geracoes == [(0, {**PERFIL, "preferencias": PREFERENCIAS})]
+    assert pre_gerador.consumir(1, PERFIL, PREFERENCIAS) == {"nome_da_rotina": "Plano"}
+
+
+def test_poucos_feedbacks_nao_gera(pre_gerador, monkeypatch):
+    monkeypatch.setattr(pre_gerador, "_feedbacks_desde_ultimo_plano", lambda db, usuario_id: 1)
+    monkeypatch.setattr(especulacao, "generate_training_plan", lambda **kwargs: pytest.fail("não deveria gerar"))
+
+    pre_gerador._avaliar(1)
+    assert Sessao.abertas == 0
+    assert pre_gerador.snapshot()["prontos"] == 0
@@ -0,0 +1,49 @@
+# tests/test_geracao_paralela.py
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.config import settings
+from app.services import geracao_paralela
+from app.services.ia_agent import TIER_FORTE, RespostaInvalida
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    # Um worker: as outras seções ficam na fila enquanto a primeira roda
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(geracao_paralela, "_executor", executor)
+    monkeypatch.setattr(settings, "LLM_PARALELO_DIAS_POR_CHAMADA", 1)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_falha_numa_secao_cancela_as_pendentes(executor, monkeypatch):
+    chamadas = []
+
+    def gerar_secao(nome_secao, prompt, tier, max_tokens_saida, validar):
+        chamadas.append(nome_secao)
+        raise RespostaInvalida("seção inválida")
+
+    monkeypatch.setattr(geracao_paralela, "gerar_secao", gerar_secao)
+
+    with pytest.raises(RespostaInvalida):
+        geracao_paralela.gerar_plano_paralelo("Ana", 170, 65, 25, 3, "casa", "hipertrofia", None, TIER_FORTE)
+
+    executor.shutdown(wait=True)
+    assert chamadas == ["dias"]  # 3 dias + nutrição: só a primeira seção chamou a IA
+
+
+def test_secoes_validas_montam_o_plano(executor, monkeypatch):
+    def gerar_secao(nome_secao, prompt, tier, max_tokens_saida, validar):
+        if nome_secao == "nutricao":
+            return validar({"nome_da_rotina": "Rotina", "sugestoes_nutricionais": {}})
+        exercicio = {"nome": "Agachamento", "series": "3", "repeticoes": "12", "descanso_segundos": 60}
+        return validar({"dias_de_treino": [{"exercicios": [exercicio]}]})
+
+    monkeypatch.setattr(geracao_paralela, "gerar_secao", gerar_secao)
+    monkeypatch.setattr(geracao_paralela, "validar_plano", lambda plano, nome: plano)
+
+    plano = geracao_paralela.gerar_plano_paralelo("Ana", 170, 65, 25, 3, "casa", "hipertrofia", None, TIER_FORTE)
+    assert [dia["identificacao"] for dia in plano["dias_de_treino"]] == ["Dia A", "Dia B", "Dia C"]
+    assert plano["nome_da_rotina"] == "Rotina"
@@ -0,0 +1,85 @@
+# tests/test_gerador_local.py
+import pytest
+
+from app.services import gerador_local
+from app.services.catalogo import NIVEIS_REFEICAO, REFEICOES_BASE, IndiceCatalogo, locais_compativeis
+from app.services.gerador_local import (
+    EXERCICIOS_POR_DIA,
+    TEMPLATE_CARDIO,
+    TEMPLATES_OBJETIVO,
+    gerar_plano_local,
+)
+
+
+@pytest.fixture(autouse=True)
+def indice_base(monkeypatch) -> IndiceCatalogo:
+    indice = IndiceCatalogo()
+    indice.recarregar(None)
+    monkeypatch.setattr(gerador_local, "obter_indice", lambda db: indice)
+    return indice
+
+
+def _nomes(tipo: str, nivel: str) -> list[str]:
+    return [r["nome"] for r in REFEICOES_BASE[tipo][nivel]]
+
+
+def test_slot_todo_rejeitado_usa_outro_nivel_do_horario():
+    evitar = _nomes("pre_treino", "opcao_economica")
+    plano = gerar_plano_local("Ana", 3, "casa", "hipertrofia", {"refeicoes_evitar": evitar})
+
+    escolhida = plano["sugestoes_nutricionais"]["pre_treino"]["opcao_economica"]["nome"]
+    assert escolhida not in evitar
+    assert escolhida in _nomes("pre_treino", "opcao_equilibrada") + _nomes("pre_treino", "opcao_premium")
+
+
+def test_horario_todo_rejeitado_usa_o_outro_horario():
+    evitar = [nome for nivel in NIVEIS_REFEICAO["pos_treino"] for nome in _nomes("pos_treino", nivel)]
+    plano = gerar_plano_local("Ana", 3, "casa", "hipertrofia", {"refeicoes_evitar": evitar})
+
+    for nivel, refeicao in plano["sugestoes_nutricionais"]["pos_treino"].items():
+        assert refeicao["nome"] in _nomes("pre_treino", nivel)
+
+
+@pytest.mark.parametrize("disponibilidade", range(1, 8))
+def test_um_foco_diferente_por_dia(disponibilidade):
+    dias = gerar_plano_local("Ana", disponibilidade, "academia", "hipertrofia")["dias_de_treino"]
+
+    assert len(dias) == disponibilidade
+    assert len({d["foco_muscular"] for d in dias}) == disponibilidade
+    assert [d["identificacao"] for d in dias] == [f"Dia {chr(ord('A') + i)}" for i in range(disponibilidade)]
+    assert all(len(d["exercicios"]) == EXERCICIOS_POR_DIA for d in dias)
+
+
+def _valores(ex: dict) -> dict:
+    return {k: ex[k] for k in ("series", "repeticoes", "descanso_segundos")}
+
+
+@pytest.mark.parametrize("objetivo", list(TEMPLATES_OBJETIVO))
+def test_series_e_repeticoes_do_objetivo(indice_base, objetivo):
+    dias = gerar_plano_local("Ana", 5, "academia", objetivo)["dias_de_treino"]
+    cardio = {e["nome"] for e in indice_base.exercicios("cardio")}
+
+    for ex in (ex for dia in dias for ex in dia["exercicios"]):
+        assert _valores(ex) == (TEMPLATE_CARDIO if ex["nome"] in cardio else TEMPLATES_OBJETIVO[objetivo])
+
+
+def test_perder_peso_tem_cardio_todo_dia(indice_base):
+    cardio = {e["nome"] for e in indice_base.exercicios("cardio")}
+    dias = gerar_plano_local("Ana", 4, "casa", "perder")["dias_de_treino"]
+    assert all(any(ex["nome"] in cardio for ex in dia["exercicios"]) for dia in dias)
+
+
+@pytest.mark.parametrize("local", ["casa", "arLivre"])
+def test_exercicios_executaveis_no_local(local):
+    dias = gerar_plano_local("Ana", 7, local, "hipertrofia")["dias_de_treino"]
+
+    nomes = [ex["nome"] for dia in dias for ex in dia["exercicios"]]
+    assert nomes
+    assert all(local in locais_compativeis(nome) for nome in nomes)
+
+
+def test_mesmo_perfil_gera_o_mesmo_plano():
+    assert gerar_plano_local("Ana", 4, "academia", "definicao") == gerar_plano_local("Ana", 4, "academia", "definicao")
+
+    planos = [gerar_plano_local(nome, 4, "academia", "definicao") for nome in ("Ana", "Bia", "Caio", "Duda")]
+    assert any(p != planos[0] for p in planos[1:])  # a semente depende do perfil
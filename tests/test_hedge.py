@@ -0,0 +1,213 @@
+# tests/test_hedge.py
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from app.services.hedge import HedgerLLM
+
+
+class ExecutorManual:
+    """Executor que só roda uma chamada quando o teste mandar."""
+
+    def __init__(self):
+        self.futuros: list[tuple[Future, object]] = []
+        self._submetido = threading.Condition()
+
+    def submit(self, funcao) -> Future:
+        futuro = Future()
+        with self._submetido:
+            self.futuros.append((futuro, funcao))
+            self._submetido.notify_all()
+        return futuro
+
+    def esperar_submissoes(self, n: int) -> None:
+        with self._submetido:
+            assert self._submetido.wait_for(lambda: len(self.futuros) >= n, timeout=2)
+
+    def iniciar(self, i: int) -> None:
+        assert self.futuros[i][0].set_running_or_notify_cancel()
+
+    def concluir(self, i: int) -> None:
+        futuro, funcao = self.futuros[i]
+        if not futuro.running():
+            self.iniciar(i)
+        try:
+            futuro.set_result(funcao())
+        except Exception as e:
+            futuro.set_exception(e)
+
+    def falhar(self, i: int, erro: Exception) -> None:
+        if not self.futuros[i][0].running():
+            self.iniciar(i)
+        self.futuros[i][0].set_exception(erro)
+
+
+def _hedger(**kwargs) -> tuple[HedgerLLM, ExecutorManual]:
+    kwargs = {"orcamento": 1.0, "atraso_min": 0.01, "amostras_min": 5, **kwargs}
+    hedger = HedgerLLM("teste", **kwargs)
+    hedger._latencias.extend([0.01] * 5)  # atraso do hedge: 10ms
+    executor = ExecutorManual()
+    hedger._executor = executor
+    return hedger, executor
+
+
+def _em_thread(funcao) -> tuple[threading.Thread, dict]:
+    saida: dict = {}
+
+    def rodar():
+        try:
+            saida["resultado"] = funcao()
+        except Exception as e:
+            saida["erro"] = e
+
+    thread = threading.Thread(target=rodar)
+    thread.start()
+    return thread, saida
+
+
+def test_sem_amostras_nao_dispara_hedge():
+    hedger = HedgerLLM("teste", orcamento=1.0, amostras_min=5)
+    assert hedger.atraso() is None
+    assert hedger.executar(lambda: "ok") == "ok"
+    assert hedger.disparados == 0
+
+
+def test_orcamento_limita_hedges():
+    hedger, executor = _hedger(orcamento=0.5)
+
+    # Primeira chamada: crédito 0.5, não dá para um hedge
+    thread, saida = _em_thread(lambda: hedger.executar(lambda: "a"))
+    time.sleep(0.05)
+    executor.concluir(0)
+    thread.join(2)
+    assert saida["resultado"] == "a"
+    assert hedger.disparados == 0
+    assert len(executor.futuros) == 1
+
+    # Segunda: crédito 1.0, o hedge sai e consome o crédito
+    thread, saida = _em_thread(lambda: hedger.executar(lambda: "b"))
+    executor.esperar_submissoes(3)
+    executor.concluir(2)
+    thread.join(2)
+    assert saida["resultado"] == "b"
+    assert hedger.disparados == 1
+    assert hedger.vitorias == 1
+    assert hedger.snapshot()["credito"] == 0.0
+
+
+def test_sem_vaga_devolve_o_credito():
+    hedger, executor = _hedger()
+    consultas = []
+
+    def sem_vaga() -> bool:
+        consultas.append(True)
+        return False
+
+    thread, saida = _em_thread(lambda: hedger.executar(lambda: "a", pode_disparar=sem_vaga))
+    time.sleep(0.05)
+    executor.concluir(0)
+    thread.join(2)
+
+    assert saida["resultado"] == "a"
+    assert consultas == [True]
+    assert hedger.disparados == 0
+    assert len(executor.futuros) == 1
+    assert hedger.snapshot()["credito"] == 1.0
+
+
+def test_erro_da_original_quando_as_duas_falham():
+    hedger, executor = _hedger()
+
+    thread, saida = _em_thread(lambda: hedger.executar(lambda: "x"))
+    executor.esperar_submissoes(2)
+    executor.falhar(1, RuntimeError("hedge"))  # o hedge falha primeiro
+    executor.falhar(0, RuntimeError("original"))
+    thread.join(2)
+
+    # Vale o erro da original, mesmo tendo chegado depois
+    assert str(saida["erro"]) == "original"
+
+
+def test_hedge_vence_e_cada_chamada_devolve_a_propria_vaga():
+    hedger, executor = _hedger()
+    terminadas: list[tuple[int, bool]] = []
+
+    def ao_terminar(futuro: Future, duracao: float) -> None:
+        indice = next(i for i, (f, _) in enumerate(executor.futuros) if f is futuro)
+        terminadas.append((indice, futuro.cancelled()))
+
+    thread, saida = _em_thread(lambda: hedger.executar(lambda: "x", ao_terminar=ao_terminar))
+    executor.esperar_submissoes(1)
+    executor.iniciar(0)
+    executor.esperar_submissoes(2)
+    executor.concluir(1)
+    thread.join(2)
+
+    assert saida["resultado"] == "x"
+    # A original ainda roda: a vaga dela não pode ter sido devolvida
+    assert terminadas == [(1, False)]
+    executor.concluir(0)
+    assert terminadas == [(1, False), (0, False)]
+
+
+def test_hedge_na_fila_e_cancelado_e_devolve_a_vaga():
+    hedger, executor = _hedger()
+    terminadas: list[tuple[int, bool]] = []
+
+    def ao_terminar(futuro: Future, duracao: float) -> None:
+        indice = next(i for i, (f, _) in enumerate(executor.futuros) if f is futuro)
+        terminadas.append((indice, futuro.cancelled()))
+
+    thread, saida = _em_thread(lambda: hedger.executar(lambda: "x", ao_terminar=ao_terminar))
+    executor.esperar_submissoes(2)
+    executor.concluir(0)  # a original vence com o hedge ainda na fila
+    thread.join(2)
+
+    assert saida["resultado"] == "x"
+    assert executor.futuros[1][0].cancelled()
+    assert sorted(terminadas) == [(0, False), (1, True)]
+
+
+def test_erro_no_callback_nao_quebra_a_chamada():
+    hedger = HedgerLLM("teste")
+
+    def ao_terminar(futuro, duracao):
+        raise RuntimeError("callback")
+
+    assert hedger.executar(lambda: "ok", ao_terminar=ao_terminar) == "ok"
+
+
+@pytest.mark.parametrize("vencedora", [0, 1])
+def test_vitorias_contam_so_o_hedge(vencedora):
+    hedger, executor = _hedger()
+    thread, saida = _em_thread(lambda: hedger.executar(lambda: "x"))
+    executor.esperar_submissoes(2)
+    executor.concluir(vencedora)
+    thread.join(2)
+    assert hedger.disparados == 1
+    assert hedger.vitorias == vencedora
+
+
+def test_vagas_do_limitador_voltam_com_hedge_cancelado(monkeypatch):
+    from app.services import ia_agent
+    from app.services.limite_concorrencia import LimitadorAIMD
+
+    limitador = LimitadorAIMD("teste", limite_inicial=4)
+    monkeypatch.setattr(ia_agent, "llm_limitador", limitador)
+    hedger, executor = _hedger()
+
+    limitador.adquirir(timeout=1)  # vaga da original, como em call_llm_api
+    thread, saida = _em_thread(lambda: hedger.executar(
+        lambda: "x",
+        pode_disparar=limitador.tentar_adquirir,
+        ao_terminar=lambda futuro, duracao: ia_agent._fim_chamada_hedger(futuro, duracao, "modelo"),
+    ))
+    executor.esperar_submissoes(2)
+    assert limitador.snapshot()["em_voo"] == 2
+
+    executor.concluir(0)
+    thread.join(2)
+    assert saida["resultado"] == "x"
+    assert limitador.snapshot()["em_voo"] == 0
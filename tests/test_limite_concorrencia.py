@@ -0,0 +1,188 @@
+# tests/test_limite_concorrencia.py
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.exceptions import ServicoIndisponivelError
+from app.services import limite_concorrencia
+from app.services.limite_concorrencia import ERRO, SOBRECARGA, SUCESSO, LimitadorAIMD
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+    def avancar(self, segundos: float) -> None:
+        self.agora += segundos
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(limite_concorrencia, "time", SimpleNamespace(monotonic=relogio))
+    return relogio
+
+
+def _limitador(**kwargs) -> LimitadorAIMD:
+    kwargs = {"limite_inicial": 4, "limite_min": 1, "limite_max": 8, "fila_max": 2, "latencia_alvo": 10.0, **kwargs}
+    return LimitadorAIMD("teste", **kwargs)
+
+
+def test_aumento_aditivo_com_sucessos_rapidos():
+    limitador = _limitador()
+    # +1/limite por sucesso: ~+1 a cada `limite` chamadas (4 + 1/4 + 1/4.25 + ...)
+    for _ in range(4):
+        limitador.adquirir(timeout=1)
+        limitador.liberar(1.0, SUCESSO)
+    assert limitador.limite == 4
+    limitador.adquirir(timeout=1)
+    limitador.liberar(1.0, SUCESSO)
+    assert limitador.limite == 5
+
+
+def test_sucesso_lento_nao_aumenta():
+    limitador = _limitador()
+    for _ in range(10):
+        limitador.adquirir(timeout=1)
+        limitador.liberar(11.0, SUCESSO)
+    assert limitador.limite == 4
+
+
+def test_aumento_para_no_maximo():
+    limitador = _limitador(limite_inicial=8)
+    for _ in range(20):
+        limitador.adquirir(timeout=1)
+        limitador.liberar(1.0, SUCESSO)
+    assert limitador.limite == 8
+
+
+def test_reducao_multiplicativa_uma_vez_por_intervalo(relogio):
+    limitador = _limitador(limite_inicial=8)
+    limitador.liberar(1.0, SOBRECARGA)
+    assert limitador.limite == 4
+
+    # Rajada de erros dentro de latencia_alvo conta como um único sinal
+    relogio.avancar(5)
+    limitador.liberar(1.0, SOBRECARGA)
+    assert limitador.limite == 4
+
+    relogio.avancar(5)
+    limitador.liberar(1.0, SOBRECARGA)
+    assert limitador.limite == 2
+
+    relogio.avancar(10)
+    limitador.liberar(1.0, SOBRECARGA)
+    relogio.avancar(10)
+    limitador.liberar(1.0, SOBRECARGA)
+    assert limitador.limite == 1  # limite_min
+
+
+def test_erro_comum_nao_mexe_no_limite(relogio):
+    limitador = _limitador()
+    limitador.adquirir(timeout=1)
+    limitador.liberar(1.0, ERRO)
+    assert limitador.limite == 4
+    assert limitador.snapshot()["em_voo"] == 0
+
+
+def test_espera_na_fila_ate_liberar_uma_vaga():
+    limitador = _limitador(limite_inicial=1)
+    limitador.adquirir(timeout=1)
+
+    adquiriu = threading.Event()
+
+    def esperar():
+        limitador.adquirir(timeout=2)
+        adquiriu.set()
+
+    thread = threading.Thread(target=esperar)
+    thread.start()
+    while limitador.na_fila == 0:
+        pass
+    assert not adquiriu.is_set()
+
+    limitador.liberar(1.0, ERRO)
+    thread.join(2)
+    assert adquiriu.is_set()
+    assert limitador.snapshot()["em_voo"] == 1
+    assert limitador.na_fila == 0
+
+
+def test_prazo_na_fila_vira_indisponivel():
+    limitador = _limitador(limite_inicial=1)
+    limitador.adquirir(timeout=1)
+    with pytest.raises(ServicoIndisponivelError):
+        limitador.adquirir(timeout=0.05)
+    assert limitador.na_fila == 0
+    assert limitador.rejeitadas == 1
+
+
+def test_fila_cheia_rejeita_na_hora_com_retry_after():
+    limitador = _limitador(limite_inicial=1, fila_max=0)
+    limitador.adquirir(timeout=1)
+    with pytest.raises(ServicoIndisponivelError) as erro:
+        limitador.adquirir(timeout=10)
+    assert erro.value.retry_after >= 1
+    assert limitador.rejeitadas == 1
+
+
+def test_fila_cheia_responde_503():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from main import servico_indisponivel_handler
+
+    limitador = _limitador(limite_inicial=1, fila_max=0)
+    limitador.adquirir(timeout=1)
+
+    app = FastAPI()
+    app.add_exception_handler(ServicoIndisponivelError, servico_indisponivel_handler)
+
+    @app.get("/gerar")
+    def gerar():
+        with limitador.vaga(timeout=1):
+            return {}
+
+    resposta = TestClient(app).get("/gerar")
+    assert resposta.status_code == 503
+    assert int(resposta.headers["Retry-After"]) >= 1
+
+
+def test_tentar_adquirir_nao_entra_na_fila():
+    limitador = _limitador(limite_inicial=2)
+    assert limitador.tentar_adquirir()
+    assert limitador.tentar_adquirir()
+    assert not limitador.tentar_adquirir()
+    assert limitador.na_fila == 0
+
+    limitador.liberar(1.0, SUCESSO)
+    assert limitador.tentar_adquirir()
+
+
+def test_tentar_adquirir_nao_fura_a_fila():
+    limitador = _limitador(limite_inicial=1)
+    limitador.adquirir(timeout=1)
+    thread = threading.Thread(target=limitador.adquirir, kwargs={"timeout": 2})
+    thread.start()
+    while limitador.na_fila == 0:
+        pass
+
+    # Com alguém esperando, a vaga que abrir é de quem está na fila
+    limitador._limite = 2.0
+    assert not limitador.tentar_adquirir()
+    with limitador._cond:
+        limitador._cond.notify_all()
+    thread.join(2)
+    assert limitador.snapshot()["em_voo"] == 2
+
+
+def test_vaga_libera_mesmo_com_excecao():
+    limitador = _limitador()
+    with pytest.raises(RuntimeError):
+        with limitador.vaga(timeout=1):
+            raise RuntimeError("falhou")
+    assert limitador.snapshot()["em_voo"] == 0
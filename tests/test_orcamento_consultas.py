@@ -0,0 +1,86 @@
+# tests/test_orcamento_consultas.py
+"""
+Orçamento de consultas SQL dos endpoints quentes: um aumento no número de
+consultas (ou um N+1) quebra o teste em vez de aparecer só em produção.
+"""
+
+PERFIL = {
+    "nome": "Teste",
+    "altura": 175,
+    "peso": 80,
+    "idade": 30,
+    "disponibilidade": 3,
+    "local": "academia",
+    "objetivo": "hipertrofia",
+}
+
+
+def _feedback(client, autenticado, tipo: str, nome: str, gostou: bool = False) -> dict:
+    resposta = client.post(
+        f"/api/v1/feedback/{tipo}", json={"item_nome": nome, "gostou": gostou}, headers=autenticado
+    )
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()
+
+
+def test_sugestao(client, autenticado, orcamento_consultas):
+    _feedback(client, autenticado, "exercicio", "Burpee")
+
+    # Primeira geração: grava o plano e alimenta o catálogo. Os inserts de
+    # dia são um por dia de treino (3 aqui); o resto não cresce com o plano
+    with orcamento_consultas(20, repeticoes_max=3):
+        resposta = client.post("/api/v1/sugestao", json=PERFIL, headers=autenticado)
+    assert resposta.status_code == 201, resposta.text
+
+    # Segunda: catálogo já preenchido
+    with orcamento_consultas(20, repeticoes_max=3):
+        resposta = client.post("/api/v1/sugestao", json=PERFIL, headers=autenticado)
+    assert resposta.status_code == 201, resposta.text
+
+
+def test_sugestao_modo_rapido(client, autenticado, orcamento_consultas):
+    with orcamento_consultas(20, repeticoes_max=3):
+        resposta = client.post("/api/v1/sugestao", json=dict(PERFIL, modo_rapido=True), headers=autenticado)
+    assert resposta.status_code == 201, resposta.text
+
+
+def test_feedback_criar(client, autenticado, orcamento_consultas):
+    with orcamento_consultas(4, repeticoes_max=1):
+        _feedback(client, autenticado, "exercicio", "Agachamento livre")
+        _feedback(client, autenticado, "refeicao", "Omelete de claras", gostou=True)
+
+
+def test_feedback_listar_e_stats(client, autenticado, orcamento_consultas):
+    for i in range(5):
+        _feedback(client, autenticado, "exercicio", f"Exercício {i}")
+
+    with orcamento_consultas(2, repeticoes_max=1):
+        resposta = client.get("/api/v1/feedback/me", headers=autenticado)
+    assert resposta.status_code == 200
+    assert len(resposta.json()["exercicios"]["nao_gostou"]) == 5
+
+    with orcamento_consultas(4, repeticoes_max=2):
+        resposta = client.get("/api/v1/feedback/stats", headers=autenticado)
+    assert resposta.status_code == 200
+
+
+def test_feedback_remover(client, autenticado, orcamento_consultas):
+    feedback = _feedback(client, autenticado, "exercicio", "Burpee")
+
+    with orcamento_consultas(4, repeticoes_max=1):
+        resposta = client.delete(f"/api/v1/feedback/{feedback['id']}", headers=autenticado)
+    assert resposta.status_code == 204
+
+
+def test_catalogo(client, orcamento_consultas):
+    client.get("/api/v1/catalogo/exercicios", params={"q": "sup"})  # carrega o índice
+
+    # Prefixo encontrado no índice em memória: nem o modo `auto` vai ao banco
+    with orcamento_consultas(0):
+        for rota, params in (
+            ("exercicios", {"q": "sup"}),
+            ("exercicios", {"q": "flex", "grupo": "peito", "local": "casa"}),
+            ("refeicoes", {"q": "omel"}),
+        ):
+            resposta = client.get(f"/api/v1/catalogo/{rota}", params=params)
+            assert resposta.status_code == 200, resposta.text
@@ -0,0 +1,65 @@
+# tests/test_plano_stale.py
+from app.api.v1.endpoints import treino
+
+PERFIL = {
+    "nome": "Teste",
+    "altura": 175,
+    "peso": 80,
+    "idade": 30,
+    "disponibilidade": 3,
+    "local": "academia",
+    "objetivo": "hipertrofia",
+}
+
+
+def _falhar(*args, **kwargs):
+    raise ValueError("IA fora do ar")
+
+
+def test_plano_stale_aplica_preferencias_novas(client, autenticado, monkeypatch):
+    resposta = client.post("/api/v1/sugestao", json=PERFIL, headers=autenticado)
+    assert resposta.status_code == 201, resposta.text
+    salvo = resposta.json()["plano"]
+    rejeitado = salvo["dias_de_treino"][0]["exercicios"][0]["nome"]
+
+    resposta = client.post(
+        "/api/v1/feedback/exercicio", json={"item_nome": rejeitado, "gostou": False}, headers=autenticado
+    )
+    assert resposta.status_code == 201
+
+    monkeypatch.setattr(treino, "generate_training_plan", _falhar)
+    resposta = client.post("/api/v1/sugestao", json=PERFIL, headers=autenticado)
+    assert resposta.status_code == 200, resposta.text
+    corpo = resposta.json()
+
+    assert corpo["stale"] is True
+    assert corpo["origem"] == "historico"
+    assert corpo["substituicoes"] >= 1
+    nomes = [ex["nome"] for dia in corpo["plano"]["dias_de_treino"] for ex in dia["exercicios"]]
+    assert rejeitado not in nomes
+
+    # O snapshot salvo não muda: a próxima resposta stale parte dele de novo
+    from app.database.base import SessionLocal
+    from app.database.models.plano import Plano
+
+    with SessionLocal() as sessao:
+        snapshot = sessao.get(Plano, corpo["plano"]["rotina_id"]).snapshot
+    assert snapshot["dias_de_treino"][0]["exercicios"][0]["nome"] == rejeitado
+
+
+def test_plano_com_menos_dias_que_a_disponibilidade_e_encontrado(client, autenticado, monkeypatch):
+    gerar = treino.generate_training_plan
+
+    def gerar_com_dois_dias(**kwargs):
+        plano = gerar(**kwargs)
+        plano["dias_de_treino"] = plano["dias_de_treino"][:2]
+        return plano
+
+    monkeypatch.setattr(treino, "generate_training_plan", gerar_com_dois_dias)
+    salvo = client.post("/api/v1/sugestao", json=PERFIL, headers=autenticado).json()["plano"]
+
+    monkeypatch.setattr(treino, "generate_training_plan", _falhar)
+    resposta = client.post("/api/v1/sugestao", json=PERFIL, headers=autenticado)
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.json()["stale"] is True
+    assert resposta.json()["plano"]["rotina_id"] == salvo["rotina_id"]
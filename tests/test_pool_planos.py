@@ -0,0 +1,180 @@
+# tests/test_pool_planos.py
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.services import pool_planos
+from app.services.pool_planos import bucket_do_perfil, consumir_do_pool
+
+PERFIL = dict(nome="Ana", altura=170, peso=65, idade=25, disponibilidade=3, local="casa", objetivo="hipertrofia")
+
+
+@pytest.fixture
+def sessoes(banco):
+    from app.database.base import SessionLocal
+
+    with banco.begin() as conn:
+        conn.execute(text("TRUNCATE aican.planos_pool RESTART IDENTITY"))
+    abertas = []
+
+    def nova():
+        sessao = SessionLocal()
+        abertas.append(sessao)
+        return sessao
+
+    yield nova
+    for sessao in abertas:
+        sessao.rollback()
+        sessao.close()
+
+
+def _gravar(sessao, *exercicios: str) -> None:
+    from app.database.models.plano_pool import PlanoPool
+
+    bucket = bucket_do_perfil(
+        PERFIL["objetivo"], PERFIL["local"], PERFIL["disponibilidade"], PERFIL["altura"], PERFIL["peso"], PERFIL["idade"]
+    )
+    for i, nome in enumerate(exercicios):
+        sessao.add(PlanoPool(
+            **bucket._asdict(),
+            conteudo={"nome_da_rotina": f"Plano {i} de [NOME]", "dias_de_treino": []},
+            exercicios=[nome],
+            refeicoes=[],
+            assinatura=f"{nome}-{i}",
+        ))
+    sessao.commit()
+
+
+def _consumir(sessao, evitar: list[str]):
+    return consumir_do_pool(sessao, **PERFIL, preferencias={"exercicios_evitar": evitar}, usuario_id=1)
+
+
+@pytest.fixture(autouse=True)
+def sem_reposicao(monkeypatch):
+    monkeypatch.setattr(pool_planos, "agendar_reposicao", lambda bucket: None)
+
+
+def test_pula_incompativeis_e_personaliza(sessoes):
+    sessao = sessoes()
+    _gravar(sessao, "burpee", "agachamento")
+
+    plano = _consumir(sessao, ["Burpee"])
+    assert plano["nome_da_rotina"] == "Plano 1 de Ana"
+
+
+def test_pula_o_plano_travado_por_outra_requisicao(sessoes):
+    a, b, c = sessoes(), sessoes(), sessoes()
+    _gravar(a, "agachamento", "flexao", "remada")
+
+    assert _consumir(a, [])["nome_da_rotina"] == "Plano 0 de Ana"
+    # `a` ainda não fez commit: a linha 1 segue travada e `b` fica com a próxima
+    assert _consumir(b, [])["nome_da_rotina"] == "Plano 1 de Ana"
+
+    livres = c.execute(text("SELECT id FROM aican.planos_pool FOR UPDATE SKIP LOCKED")).scalars().all()
+    assert livres == [3]
+
+
+def test_candidatos_nao_ficam_travados(sessoes):
+    a, b = sessoes(), sessoes()
+    _gravar(a, "burpee", "burpee saltando", "agachamento", "flexao")
+
+    _consumir(a, ["burpee"])
+    livres = b.execute(text("SELECT id FROM aican.planos_pool FOR UPDATE SKIP LOCKED")).scalars().all()
+    assert livres == [1, 2, 4]
+
+
+def test_sem_compativel_livre(sessoes):
+    a, b = sessoes(), sessoes()
+    _gravar(a, "burpee", "agachamento")
+
+    assert _consumir(a, ["burpee"]) is not None
+    assert _consumir(b, ["burpee"]) is None  # o único compatível está com `a`
+
+
+def test_reposicao_respeita_fila_pressao_e_orcamento(monkeypatch):
+    from app.services.limite_concorrencia import LimitadorAIMD
+
+    limitador = LimitadorAIMD("teste", limite_inicial=1, fila_max=5)
+    pressao = {"valor": 0.0}
+    monkeypatch.setattr(pool_planos, "llm_limitador", limitador)
+    monkeypatch.setattr(pool_planos.monitor_carga, "pressao", lambda: pressao["valor"])
+    monkeypatch.setattr(pool_planos, "_inicios_reposicao", pool_planos.deque())
+    monkeypatch.setattr(settings, "PLANO_POOL_REPOSICOES_POR_HORA", 2)
+
+    assert pool_planos._reposicao_permitida()
+
+    pressao["valor"] = 0.9
+    assert not pool_planos._reposicao_permitida()
+    pressao["valor"] = 0.0
+
+    limitador._na_fila = 1
+    assert not pool_planos._reposicao_permitida()
+    limitador._na_fila = 0
+
+    assert pool_planos._reposicao_permitida()
+    assert not pool_planos._reposicao_permitida()  # 2 por hora
+
+
+def test_gerar_para_bucket_para_quando_recusado(monkeypatch):
+    chamadas = []
+    monkeypatch.setattr(pool_planos, "generate_training_plan", lambda *a, **k: chamadas.append(1))
+    bucket = bucket_do_perfil("hipertrofia", "casa", 3, 170, 65, 25)
+
+    assert pool_planos.gerar_para_bucket(None, bucket, 5, pode_gerar=lambda: False) == 0
+    assert chamadas == []
+
+
+class SessaoFalsa:
+    abertas = 0
+    gravados: list = []
+
+    def __enter__(self):
+        SessaoFalsa.abertas += 1
+        return self
+
+    def __exit__(self, *exc):
+        SessaoFalsa.abertas -= 1
+
+    def query(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return None
+
+    def add(self, item):
+        SessaoFalsa.gravados.append(item)
+
+    def commit(self):
+        pass
+
+
+def test_reposicao_gera_sem_segurar_a_sessao(monkeypatch):
+    from app.database import base
+
+    monkeypatch.setattr(base, "SessionLocal", SessaoFalsa)
+    monkeypatch.setattr(SessaoFalsa, "gravados", [])
+    monkeypatch.setattr(pool_planos, "contar_livres", lambda db, bucket: 0)
+    monkeypatch.setattr(pool_planos, "_reposicao_permitida", lambda: True)
+    monkeypatch.setattr(settings, "PLANO_POOL_POR_BUCKET", 2)
+    monkeypatch.setattr(settings, "LLM_SAIDA_COMPACTA", True)
+    indices = []
+    monkeypatch.setattr(pool_planos, "obter_indice", lambda db: indices.append(db))
+
+    geracoes = []
+
+    def gerar(*args, **kwargs):
+        geracoes.append((SessaoFalsa.abertas, kwargs))
+        nome = f"exercicio {len(geracoes)}"
+        return {"dias_de_treino": [{"exercicios": [{"nome": nome}]}], "sugestoes_nutricionais": {}}
+
+    monkeypatch.setattr(pool_planos, "generate_training_plan", gerar)
+
+    pool_planos._repor(bucket_do_perfil("hipertrofia", "casa", 3, 170, 65, 25))
+
+    assert len(indices) == 1 and isinstance(indices[0], SessaoFalsa)  # índice aquecido com a sessão aberta
+    assert geracoes == [(0, {}), (0, {})]  # nenhuma sessão aberta durante a IA, e nenhuma repassada
+    assert [item.exercicios for item in SessaoFalsa.gravados] == [["exercicio 1"], ["exercicio 2"]]
+    assert SessaoFalsa.abertas == 0
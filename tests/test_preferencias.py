@@ -0,0 +1,87 @@
+# tests/test_preferencias.py
+import pytest
+
+from app.services import preferencias
+from app.services.catalogo import IndiceCatalogo
+from app.services.preferencias import aplicar_preferencias
+
+
+@pytest.fixture
+def indice(monkeypatch) -> IndiceCatalogo:
+    indice = IndiceCatalogo()
+    indice.recarregar(None)
+    monkeypatch.setattr(preferencias, "obter_indice", lambda db: indice)
+    return indice
+
+
+def _plano(foco: str, *exercicios: str, pos_treino: dict = None) -> dict:
+    return {
+        "dias_de_treino": [{"foco_muscular": foco, "exercicios": [{"nome": n} for n in exercicios]}],
+        "sugestoes_nutricionais": {"pos_treino": pos_treino or {}},
+    }
+
+
+def test_termo_parecido_troca_por_exercicio_do_mesmo_grupo_e_local(indice):
+    plano = _plano("Peito", "Supino reto com barra", "Flexão de braço")
+
+    assert aplicar_preferencias(plano, {"exercicios_evitar": ["supinos retos"]}, local="casa") == 1
+
+    novo, mantido = plano["dias_de_treino"][0]["exercicios"]
+    assert mantido == {"nome": "Flexão de braço"}
+    assert novo["nome"] in [e["nome"] for e in indice.exercicios("peito", "casa")]
+    assert novo["nome"] != "Flexão de braço"
+    assert novo["video_url"] and novo["detalhes_execucao"]
+
+
+def test_exercicio_sem_grupo_usa_o_foco_do_dia(indice):
+    plano = _plano("Costas", "Movimento inventado")
+
+    assert aplicar_preferencias(plano, {"exercicios_evitar": ["Movimento inventado"]}, local="academia") == 1
+    novo = plano["dias_de_treino"][0]["exercicios"][0]["nome"]
+    assert novo in [e["nome"] for e in indice.exercicios("costas", "academia")]
+
+
+def test_refeicao_trocada_por_outra_do_mesmo_horario_e_nivel(indice):
+    plano = _plano("Peito", pos_treino={
+        "opcao_economica": {"nome": "Arroz com ovo", "ingredientes": ["1 xícara de arroz", "2 ovos"]},
+        "opcao_premium": {"nome": "Cuscuz com sardinha", "ingredientes": []},
+    })
+
+    assert aplicar_preferencias(plano, {"refeicoes_evitar": ["Arroz com ovo"]}) == 1
+
+    nova = plano["sugestoes_nutricionais"]["pos_treino"]["opcao_economica"]
+    candidatas = [r["nome"] for r in indice.refeicoes("pos_treino", "opcao_economica")]
+    assert nova["nome"] in candidatas
+    assert nova["nome"] not in ("Arroz com ovo", "Cuscuz com sardinha")  # já usada no horário
+    assert nova["link_receita"] and "id" not in nova
+
+
+def test_ingrediente_rejeitado_remove_a_refeicao(indice):
+    plano = _plano("Peito", pos_treino={
+        "opcao_equilibrada": {"nome": "Marmita da casa", "ingredientes": ["150g frango", "arroz"]},
+    })
+
+    assert aplicar_preferencias(plano, {"refeicoes_evitar": ["Frango"]}) == 1
+    nova = plano["sugestoes_nutricionais"]["pos_treino"]["opcao_equilibrada"]
+    assert not any("frango" in i for i in nova["ingredientes"])
+
+
+def test_nome_de_refeicao_rejeitada_nao_remove_pelo_ingrediente(indice):
+    plano = _plano("Peito", pos_treino={
+        "opcao_equilibrada": {"nome": "Marmita da casa", "ingredientes": ["150g frango", "arroz"]},
+    })
+
+    assert aplicar_preferencias(plano, {"refeicoes_evitar": ["Frango grelhado com batata doce"]}) == 0
+    assert plano["sugestoes_nutricionais"]["pos_treino"]["opcao_equilibrada"]["nome"] == "Marmita da casa"
+
+
+def test_sem_substituto_mantem_o_item(monkeypatch):
+    monkeypatch.setattr(preferencias, "obter_indice", lambda db: IndiceCatalogo())  # índice vazio
+    plano = _plano("Peito", "Supino reto com barra", pos_treino={
+        "opcao_economica": {"nome": "Arroz com ovo", "ingredientes": []},
+    })
+
+    evitar = {"exercicios_evitar": ["Supino reto"], "refeicoes_evitar": ["Arroz com ovo"]}
+    assert aplicar_preferencias(plano, evitar, local="academia") == 0
+    assert plano["dias_de_treino"][0]["exercicios"] == [{"nome": "Supino reto com barra"}]
+    assert plano["sugestoes_nutricionais"]["pos_treino"]["opcao_economica"]["nome"] == "Arroz com ovo"
@@ -0,0 +1,65 @@
+# tests/test_provedores_llm.py
+import pytest
+
+from app.core.config import settings
+from app.services.provedores_llm import (
+    ConfigGeracao,
+    ProvedorCassete,
+    ProvedorComCacheContexto,
+    ProvedorStub,
+    RespostaLLM,
+)
+
+PREFIXO = "Você é uma API de backend. " * 20
+SUFIXO = "Nome: Ana | Frequência: 3 x/semana | Local: Em casa | Objetivo: Hipertrofia muscular"
+CONFIG = ConfigGeracao()
+
+
+@pytest.fixture
+def cache_ativo(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CACHE_CONTEXTO_ATIVO", True)
+
+
+def test_stub_usa_o_cache_e_responde_igual_ao_prompt_inteiro(cache_ativo):
+    provedor = ProvedorStub()
+    resposta = provedor.gerar_com_prefixo(PREFIXO, SUFIXO, "modelo", CONFIG)
+
+    assert resposta.tokens_cache == len(PREFIXO) // 4
+    assert resposta.texto == provedor.gerar(PREFIXO + SUFIXO, "modelo", CONFIG).texto
+    assert provedor.caches.snapshot()["caches"] == 1
+
+
+def test_cache_removido_no_provedor_e_recriado(cache_ativo):
+    provedor = ProvedorStub()
+    provedor.gerar_com_prefixo(PREFIXO, SUFIXO, "modelo", CONFIG)
+    provedor.descartar_caches()
+
+    resposta = provedor.gerar_com_prefixo(PREFIXO, SUFIXO, "modelo", CONFIG)
+    assert resposta.tokens_cache > 0
+    assert provedor._caches_criados == 2
+
+
+def test_provedor_sem_cache_recebe_o_prompt_inteiro(cache_ativo, tmp_path):
+    prompts = []
+
+    class Real(ProvedorStub):
+        def gerar(self, prompt, modelo, config):
+            prompts.append(prompt)
+            return RespostaLLM("{}", modelo)
+
+    provedor = ProvedorCassete(str(tmp_path / "cassete.json"), modo="gravar", real=Real())
+    provedor.gerar_com_prefixo(PREFIXO, SUFIXO, "modelo", CONFIG)
+
+    assert prompts == [PREFIXO + SUFIXO]
+    assert provedor.caches is None
+
+
+def test_provedor_com_cache_precisa_implementar_o_cache():
+    class Incompleto(ProvedorComCacheContexto):
+        nome = "incompleto"
+
+        def gerar(self, prompt, modelo, config):
+            return RespostaLLM("{}", modelo)
+
+    with pytest.raises(TypeError):
+        Incompleto()
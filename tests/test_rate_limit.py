@@ -0,0 +1,155 @@
+# tests/test_rate_limit.py
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Request
+
+from app.core import rate_limit
+from app.core.rate_limit import MemoriaBackend, RateLimiter, Regra
+from app.core.security import create_access_token
+
+REGRA = Regra(capacidade=10, taxa=1.0)  # 10 tokens, 1 por segundo
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+    def avancar(self, segundos: float) -> None:
+        self.agora += segundos
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=relogio))
+    return relogio
+
+
+def _requisicao(ip: str = "10.0.0.1", token: str = "") -> Request:
+    cabecalhos = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "headers": cabecalhos, "client": (ip, 5000)})
+
+
+def test_balde_cheio_e_reposicao(relogio):
+    backend = MemoriaBackend()
+    for _ in range(10):
+        assert backend.consumir("a", 1, REGRA) == (True, 0.0)
+    assert backend.consumir("a", 1, REGRA) == (False, 1.0)
+
+    relogio.avancar(3)
+    assert backend.consumir("a", 3, REGRA)[0]
+    assert not backend.consumir("a", 1, REGRA)[0]
+
+
+def test_reposicao_nao_passa_da_capacidade(relogio):
+    backend = MemoriaBackend()
+    backend.consumir("a", 10, REGRA)
+    relogio.avancar(1000)
+    assert backend.consumir("a", 10, REGRA)[0]
+    assert not backend.consumir("a", 1, REGRA)[0]
+
+
+def test_custo_ponderado_e_espera(relogio):
+    backend = MemoriaBackend()
+    assert backend.consumir("a", 7, REGRA) == (True, 0.0)
+
+    permitido, espera = backend.consumir("a", 5, REGRA)  # sobram 3, faltam 2
+    assert not permitido
+    assert espera == pytest.approx(2.0)
+
+    relogio.avancar(2)
+    assert backend.consumir("a", 5, REGRA)[0]
+
+
+def test_recusa_nao_consome_tokens(relogio):
+    backend = MemoriaBackend()
+    backend.consumir("a", 8, REGRA)
+    assert not backend.consumir("a", 5, REGRA)[0]
+    assert backend.consumir("a", 2, REGRA)[0]
+
+
+def test_descarte_lru(relogio):
+    backend = MemoriaBackend(max_chaves=2)
+    backend.consumir("a", 10, REGRA)
+    backend.consumir("b", 10, REGRA)
+    backend.consumir("a", 0, REGRA)  # "a" volta a ser a mais recente
+    backend.consumir("c", 10, REGRA)  # descarta "b"
+
+    assert list(backend._baldes) == ["a", "c"]
+    assert backend.consumir("b", 10, REGRA)[0]  # "b" recomeça cheio
+    assert not backend.consumir("c", 1, REGRA)[0]
+
+
+def test_retry_after_arredondado_para_cima(relogio):
+    limitador = RateLimiter(MemoriaBackend(), {"geral": Regra(capacidade=20, taxa=0.5)})
+    limitador.verificar(_requisicao(), "geral", 20)
+
+    with pytest.raises(HTTPException) as erro:
+        limitador.verificar(_requisicao(), "geral", 1.5)
+    assert erro.value.status_code == 429
+    assert erro.value.headers["Retry-After"] == "3"  # 1.5 tokens a 0.5/s
+
+
+def test_retry_after_minimo_de_um_segundo(relogio):
+    limitador = RateLimiter(MemoriaBackend(), {"geral": Regra(capacidade=1, taxa=100)})
+    limitador.verificar(_requisicao(), "geral", 1)
+    with pytest.raises(HTTPException) as erro:
+        limitador.verificar(_requisicao(), "geral", 1)
+    assert erro.value.headers["Retry-After"] == "1"
+
+
+def test_chave_por_usuario_ou_ip(relogio):
+    limitador = RateLimiter(MemoriaBackend(), {"geral": REGRA})
+    token = create_access_token({"sub": "ana@aican.dev"})
+
+    limitador.verificar(_requisicao("10.0.0.1", token), "geral", 10)
+    # Mesmo usuário em outro IP divide o balde; outro IP sem token não
+    with pytest.raises(HTTPException):
+        limitador.verificar(_requisicao("10.0.0.2", token), "geral", 1)
+    limitador.verificar(_requisicao("10.0.0.2"), "geral", 10)
+    # Token inválido conta pelo IP
+    with pytest.raises(HTTPException):
+        limitador.verificar(_requisicao("10.0.0.2", "invalido"), "geral", 1)
+
+
+def test_escopos_tem_baldes_separados(relogio):
+    limitador = RateLimiter(MemoriaBackend(), {"geral": REGRA, "cadastro": Regra(capacidade=1, taxa=0.001)})
+    limitador.verificar(_requisicao(), "cadastro", 1)
+    with pytest.raises(HTTPException):
+        limitador.verificar(_requisicao(), "cadastro", 1)
+    limitador.verificar(_requisicao(), "geral", 1)
+
+
+def test_falha_do_backend_deixa_passar():
+    class BackendQuebrado:
+        def consumir(self, chave, custo, regra):
+            raise ConnectionError("redis fora do ar")
+
+    limitador = RateLimiter(BackendQuebrado(), {"geral": REGRA})
+    limitador.verificar(_requisicao(), "geral", 1000)
+
+
+def test_busca_no_catalogo_nao_disputa_o_balde_da_geracao(client, autenticado, monkeypatch):
+    regras = {
+        "geral": Regra(capacidade=20, taxa=0.001),
+        "cadastro": REGRA,
+        "catalogo": Regra(capacidade=3, taxa=0.001),
+    }
+    monkeypatch.setattr(rate_limit, "limiter", RateLimiter(MemoriaBackend(), regras))
+    perfil = {
+        "nome": "Teste", "altura": 175, "peso": 80, "idade": 30,
+        "disponibilidade": 3, "local": "academia", "objetivo": "hipertrofia",
+    }
+
+    assert client.post("/api/v1/sugestao", json=perfil, headers=autenticado).status_code == 201
+    assert client.post("/api/v1/sugestao", json=perfil, headers=autenticado).status_code == 429
+
+    for _ in range(3):
+        resposta = client.get("/api/v1/catalogo/exercicios", params={"q": "sup"}, headers=autenticado)
+        assert resposta.status_code == 200
+    resposta = client.get("/api/v1/catalogo/refeicoes", params={"q": "ban"}, headers=autenticado)
+    assert resposta.status_code == 429
@@ -0,0 +1,105 @@
+# tests/test_regeneracao.py
+import pytest
+
+from app.services import regeneracao
+
+PERFIL = {
+    "nome": "Teste",
+    "altura": 175,
+    "peso": 80,
+    "idade": 30,
+    "local": "academia",
+    "objetivo": "hipertrofia",
+}
+
+
+@pytest.fixture
+def rotina(client, autenticado) -> int:
+    resposta = client.post("/api/v1/sugestao", json={**PERFIL, "disponibilidade": 3}, headers=autenticado)
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()["plano"]["rotina_id"]
+
+
+def _plano(rotina_id: int):
+    from sqlalchemy.orm import selectinload
+
+    from app.database.base import SessionLocal
+    from app.database.models.plano import Plano, PlanoDia
+
+    with SessionLocal() as sessao:
+        plano = (
+            sessao.query(Plano)
+            .options(selectinload(Plano.dias).selectinload(PlanoDia.exercicios), selectinload(Plano.refeicoes))
+            .filter(Plano.id == rotina_id)
+            .one()
+        )
+        dias = {
+            d.ordem: [(ex.id, ex.nome) for ex in sorted(d.exercicios, key=lambda e: e.ordem or 0)]
+            for d in plano.dias
+        }
+        refeicoes = sorted((r.id, r.nome) for r in plano.refeicoes)
+        return dias, refeicoes, plano.snapshot
+
+
+def test_regenera_so_o_dia_pedido(client, autenticado, rotina):
+    dias_antes, refeicoes_antes, _ = _plano(rotina)
+
+    resposta = client.post(f"/api/v1/sugestao/{rotina}/dias/2/regenerar", json=PERFIL, headers=autenticado)
+    assert resposta.status_code == 200, resposta.text
+    novo_dia = resposta.json()["plano"]["dia"]
+
+    dias, refeicoes, snapshot = _plano(rotina)
+    assert dias[1] == dias_antes[1] and dias[3] == dias_antes[3]
+    assert refeicoes == refeicoes_antes
+    # As linhas do dia 2 foram trocadas pelas do dia novo
+    assert not {i for i, _ in dias[2]} & {i for i, _ in dias_antes[2]}
+    assert [nome for _, nome in dias[2]] == [ex["nome"] for ex in novo_dia["exercicios"]]
+    assert snapshot["dias_de_treino"][1] == novo_dia
+    assert novo_dia["identificacao"] == "Dia B"
+
+
+def test_regenera_so_a_nutricao(client, autenticado, rotina):
+    dias_antes, refeicoes_antes, _ = _plano(rotina)
+
+    resposta = client.post(f"/api/v1/sugestao/{rotina}/nutricao/regenerar", json=PERFIL, headers=autenticado)
+    assert resposta.status_code == 200, resposta.text
+    nutricao = resposta.json()["plano"]["sugestoes_nutricionais"]
+
+    dias, refeicoes, snapshot = _plano(rotina)
+    assert dias == dias_antes
+    assert not {i for i, _ in refeicoes} & {i for i, _ in refeicoes_antes}
+    assert sorted(nome for _, nome in refeicoes) == sorted(r["nome"] for n in nutricao.values() for r in n.values())
+    assert snapshot["sugestoes_nutricionais"] == nutricao
+
+
+@pytest.mark.parametrize("ordem", [0, 4])
+def test_ordem_fora_da_rotina_e_404(client, autenticado, rotina, ordem):
+    resposta = client.post(f"/api/v1/sugestao/{rotina}/dias/{ordem}/regenerar", json=PERFIL, headers=autenticado)
+    assert resposta.status_code == 404
+
+
+def test_rotina_de_outro_usuario_e_404(client, autenticado, rotina):
+    from app.core.security import create_access_token, get_password_hash
+    from app.database.base import SessionLocal
+    from app.database.models.user import User
+
+    with SessionLocal() as sessao:
+        sessao.add(User(nome="Outra", email="outra@aican.dev", hash_senha=get_password_hash("senha123")))
+        sessao.commit()
+    outra = {"Authorization": f"Bearer {create_access_token({'sub': 'outra@aican.dev'})}"}
+
+    for rota in (f"{rotina}/dias/1/regenerar", f"{rotina}/nutricao/regenerar"):
+        resposta = client.post(f"/api/v1/sugestao/{rota}", json=PERFIL, headers=outra)
+        assert resposta.status_code == 404
+
+
+def test_dia_sem_foco_fica_com_o_da_ia(monkeypatch):
+    def gerar_secao(nome_secao, prompt, tier, max_tokens_saida, validar):
+        return validar({"dias_de_treino": [{"foco_muscular": "Pernas", "exercicios": [{"nome": "Agachamento"}]}]})
+
+    monkeypatch.setattr(regeneracao, "gerar_secao", gerar_secao)
+    dias = [{"identificacao": "Treino 1", "foco_muscular": None, "exercicios": [{"nome": "Leg press"}]}]
+
+    novo = regeneracao.regenerar_dia("Ana", 170, 65, 25, "academia", "hipertrofia", None, dias, 1)
+    assert novo["foco_muscular"] == "Pernas"
+    assert novo["identificacao"] == "Treino 1"
@@ -0,0 +1,68 @@
+# tests/test_saida_compacta.py
+import pytest
+
+from app.services.catalogo import NIVEIS_REFEICAO, IndiceCatalogo
+from app.services.ia_agent import RespostaInvalida
+from app.services.saida_compacta import expandir_plano_compacto, montar_fatia_catalogo
+
+
+@pytest.fixture
+def fatia():
+    indice = IndiceCatalogo()
+    indice.recarregar(None)
+    return montar_fatia_catalogo(indice, 1, "academia", None)
+
+
+def _codigo(refeicoes: dict, tipo: str, nivel: str) -> str:
+    return next(c for c, r in refeicoes.items() if (r["tipo"], r["nivel"]) == (tipo, nivel))
+
+
+def _compacto(exercicios: dict, refeicoes: dict) -> dict:
+    codigo_ex = next(iter(exercicios))
+    return {
+        "nome_da_rotina": "Rotina",
+        "dias": [{"foco": "Corpo inteiro", "ex": [[codigo_ex, "3x", "12", 60]]}],
+        "nutri": {
+            tipo: {nivel: _codigo(refeicoes, tipo, nivel) for nivel in niveis}
+            for tipo, niveis in NIVEIS_REFEICAO.items()
+        },
+    }
+
+
+def test_expande_codigos_do_catalogo(fatia):
+    exercicios, refeicoes = fatia
+    plano = expandir_plano_compacto(_compacto(exercicios, refeicoes), ["Corpo inteiro"], exercicios, refeicoes)
+
+    exercicio = plano["dias_de_treino"][0]["exercicios"][0]
+    assert exercicio["nome"] == next(iter(exercicios.values()))["nome"]
+    assert exercicio["video_url"]
+    for tipo, niveis in NIVEIS_REFEICAO.items():
+        assert list(plano["sugestoes_nutricionais"][tipo]) == list(niveis)
+
+
+@pytest.mark.parametrize("tipo", list(NIVEIS_REFEICAO))
+def test_nivel_faltando_e_invalido(fatia, tipo):
+    exercicios, refeicoes = fatia
+    compacto = _compacto(exercicios, refeicoes)
+    del compacto["nutri"][tipo]["opcao_premium"]
+
+    with pytest.raises(RespostaInvalida):
+        expandir_plano_compacto(compacto, ["Corpo inteiro"], exercicios, refeicoes)
+
+
+def test_codigo_de_outro_horario_e_invalido(fatia):
+    exercicios, refeicoes = fatia
+    compacto = _compacto(exercicios, refeicoes)
+    compacto["nutri"]["pos_treino"]["opcao_premium"] = _codigo(refeicoes, "pre_treino", "opcao_premium")
+
+    with pytest.raises(RespostaInvalida, match="pre_treino/opcao_premium"):
+        expandir_plano_compacto(compacto, ["Corpo inteiro"], exercicios, refeicoes)
+
+
+def test_codigo_de_outro_nivel_e_invalido(fatia):
+    exercicios, refeicoes = fatia
+    compacto = _compacto(exercicios, refeicoes)
+    compacto["nutri"]["pre_treino"]["opcao_economica"] = _codigo(refeicoes, "pre_treino", "opcao_premium")
+
+    with pytest.raises(RespostaInvalida):
+        expandir_plano_compacto(compacto, ["Corpo inteiro"], exercicios, refeicoes)